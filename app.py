@@ -1,5 +1,6 @@
 import streamlit as st
 from database import connect_to_database, init_session_state
+from utils import instrumentacion
 from typing import Dict, List, Optional, Callable
 import importlib
 import os
@@ -89,15 +90,27 @@ def get_available_pages(rol: str) -> List[str]:
     
     return available_pages
 
-def load_page(page_file: str):
-    """Carga dinámicamente una página y devuelve su función page()"""
+def load_page(page_file: str) -> Callable[[], None]:
+    """
+    Devuelve la función que ejecuta una página sin importar su módulo.
+    
+    El módulo de la página (y sus dependencias pesadas: PDF, gráficos, APIs de
+    Google) se importa recién la primera vez que el usuario la abre; después
+    queda en sys.modules. Así registrar el menú solo necesita el nombre del archivo.
+    """
     module_name = f"pages.{os.path.splitext(page_file)[0]}"
-    try:
-        module = importlib.import_module(module_name)
-        return module.page
-    except (ImportError, AttributeError) as e:
-        st.error(f"Error al cargar la página {page_file}: {e}")
-        return None
+
+    def run_page():
+        try:
+            module = importlib.import_module(module_name)
+            page_func = module.page
+        except (ImportError, AttributeError) as e:
+            st.error(f"Error al cargar la página {page_file}: {e}")
+            return
+        page_func()
+
+    run_page.__name__ = os.path.splitext(page_file)[0]
+    return run_page
 
 def main():
     st.set_page_config(
@@ -113,6 +126,11 @@ def main():
     
     # Obtener rol del usuario
     rol_usuario = obtener_rol_usuario(st.user.email)
+
+    # Medir las etapas de este rerun si un admin lo activó en el panel (o por INSTRUMENTACION=1)
+    instrumentacion.iniciar_rerun(
+        activar=rol_usuario == 'admin' and st.session_state.get('instrumentacion_activa', False)
+    )
     
     # Inicializar cliente de base de datos SQLite
     client = connect_to_database()
@@ -132,15 +150,13 @@ def main():
         if page_name == '03_Compensados':
             display_name = 'Ausencias'
         
-        # Crear la página
-        page_func = load_page(page_file)
-        if page_func:
-            pages.append(st.Page(
-                page_func,
-                title=display_name,
-                icon=PAGE_ICONS.get(page_name, None),
-                url_path=page_name.lower().replace('_', '-')
-            ))
+        # Registrar la página (su módulo se importa al abrirla)
+        pages.append(st.Page(
+            load_page(page_file),
+            title=display_name,
+            icon=PAGE_ICONS.get(page_name, None),
+            url_path=page_name.lower().replace('_', '-')
+        ))
     
     # Mostrar navegación y ejecutar la página seleccionada
     if pages:
@@ -164,6 +180,15 @@ def main():
         # Guardar la sección actual para que las páginas puedan detectar cambios de sección
         st.session_state.current_section = selected_page.title
         selected_page.run()
+
+        if instrumentacion.activa():
+            try:
+                instrumentacion.exportar_prometheus()
+            except OSError as e:
+                print(f"No se pudieron exportar las métricas de instrumentación: {e}")
+        if rol_usuario == 'admin':
+            from components.panel_instrumentacion import render_panel_instrumentacion
+            render_panel_instrumentacion()
     else:
         st.error("No hay páginas disponibles para tu rol. Contacta al administrador.")
 
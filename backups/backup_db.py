@@ -1,27 +1,41 @@
 #!/usr/bin/env python3
 """
 Backup script for SQLite database.
-Creates timestamped backups locally and via SSH to remote servers.
+Creates timestamped backups locally and replicates them to remote servers
+(SSH or local directories) concurrently, with checksum verification.
 Retains only the last 7 days of backups.
 Writes a status JSON file for frontend consumption.
+
+Backups are taken by backup_engine (paged copy, compressed, full or delta)
+unless BACKUP_MODE=plain, which keeps the old uncompressed gestor_<ts>.db copy.
+
+Usage:
+    backup_db.py                      run a backup
+    backup_db.py restore MANIFEST DEST
+    backup_db.py verify MANIFEST
 """
 
 import os
 import sqlite3
 import shutil
-import subprocess
 import json
 import logging
+import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from backup_engine import create_backup, cleanup_backups, restore_backup, verify_backup, check_integrity
+from replication import replicate, transport_for
+
 # Configuration - can be overridden by environment variables or .env
 DB_PATH = os.getenv("DATABASE_PATH", "data/gestor.db")
 BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
-BACKUP_REMOTE_SERVERS = os.getenv("BACKUP_REMOTE_SERVERS", "").split()  # space-separated list of "user@host:/path/"
+BACKUP_REMOTE_SERVERS = os.getenv("BACKUP_REMOTE_SERVERS", "").split()  # space-separated list of "user@host:/path/" or "file:///path/"
 BACKUP_SSH_KEY = os.getenv("BACKUP_SSH_KEY", os.path.expanduser("~/.ssh/id_ed25519"))
 RETENTION_DAYS = int(os.getenv("BACKUP_RETENTION_DAYS", "7"))
+BACKUP_MODE = os.getenv("BACKUP_MODE", "auto")  # auto, full, delta or plain
 STATUS_FILE = os.path.join(BACKUP_DIR, "backup_status.json")
 LOG_FILE = os.path.join(BACKUP_DIR, "backup.log")
 
@@ -98,47 +112,6 @@ def create_local_backup(src_db, backup_dir):
                 pass
         return None
 
-def copy_via_ssh(local_file, remote_spec):
-    """
-    Copy file to remote server via SCP using SSH key.
-    remote_spec format: "user@host:/remote/path/"
-    Returns True on success.
-    """
-    if not remote_spec.strip():
-        logger.warning("Empty remote spec, skipping SSH copy")
-        return True  # treat as success (nothing to do)
-        
-    try:
-        # Ensure remote spec ends with slash for directory
-        if not remote_spec.endswith('/'):
-            remote_spec += '/'
-            
-        # Build scp command
-        cmd = [
-            "scp",
-            "-i", BACKUP_SSH_KEY,
-            "-o", "StrictHostKeyChecking=no",
-            "-o", "UserKnownHostsFile=/dev/null",
-            local_file,
-            remote_spec
-        ]
-        
-        logger.info(f"Copying to remote: {remote_spec}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            logger.error(f"SCP failed: {result.stderr}")
-            return False
-        else:
-            logger.info(f"Successfully copied to {remote_spec}")
-            return True
-    except subprocess.TimeoutExpired:
-        logger.error("SCP timed out")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error during SCP: {e}")
-        return False
-
 def cleanup_old_backups(backup_dir, days):
     """Remove backup files older than specified days."""
     cutoff = datetime.now() - timedelta(days=days)
@@ -164,14 +137,16 @@ def cleanup_old_backups(backup_dir, days):
     except Exception as e:
         logger.error(f"Error during cleanup: {e}")
 
-def write_status(status, last_success=None, last_error=None, message=""):
+def write_status(status, last_success=None, last_error=None, message="", replication=None):
     """Write status JSON file atomically."""
     data = {
         "status": status,  # "ok", "error", "never_run"
         "last_success": last_success.isoformat() if last_success else None,
         "last_error": last_error.isoformat() if last_error else None,
         "message": message,
-        "checked_at": datetime.now().isoformat()
+        "checked_at": datetime.now().isoformat(),
+        # Per-remote outcome, timing and throughput of the last run
+        "replication": [result.to_dict() for result in replication or []]
     }
     temp_file = STATUS_FILE + ".tmp"
     try:
@@ -191,34 +166,40 @@ def main():
     success = False
     error_msg = ""
     backup_path = None
+    replication = []
     
     try:
         # Step 1: Create local backup
-        logger.info(f"Creating backup of {DB_PATH}")
-        backup_path = create_local_backup(DB_PATH, BACKUP_DIR)
-        if backup_path is None:
-            error_msg = "Failed to create local backup"
-            raise RuntimeError(error_msg)
+        logger.info(f"Creating backup of {DB_PATH} (mode: {BACKUP_MODE})")
+        if BACKUP_MODE == "plain":
+            backup_path = create_local_backup(DB_PATH, BACKUP_DIR)
+            if backup_path is None:
+                error_msg = "Failed to create local backup"
+                raise RuntimeError(error_msg)
+            backup_files = [backup_path]
+        else:
+            if not is_sqlite3_file(DB_PATH):
+                error_msg = f"Source database not found or not valid: {DB_PATH}"
+                raise RuntimeError(error_msg)
+            result = create_backup(DB_PATH, BACKUP_DIR, mode=BACKUP_MODE)
+            backup_files = result.files
         
-        # Step 2: Copy to remote servers (if any configured)
-        if BACKUP_REMOTE_SERVERS and any(BACKUP_REMOTE_SERVERS):
-            logger.info(f"Copying to {len([s for s in BACKUP_REMOTE_SERVERS if s.strip()])} remote server(s)")
-            all_success = True
-            for remote in BACKUP_REMOTE_SERVERS:
-                if not remote.strip():
-                    continue
-                if not copy_via_ssh(backup_path, remote):
-                    all_success = False
-            if not all_success:
-                error_msg = "One or more remote copies failed"
-                # We still consider partial success? For now, treat as error if any remote fails.
+        # Step 2: Replicate to remote servers (if any configured), all at once
+        remotes = [remote for remote in BACKUP_REMOTE_SERVERS if remote.strip()]
+        if remotes:
+            logger.info(f"Replicating {len(backup_files)} file(s) to {len(remotes)} remote server(s)")
+            replication = replicate(backup_files, [transport_for(remote, BACKUP_SSH_KEY) for remote in remotes])
+            failed = [result.remote for result in replication if not result.ok]
+            if failed:
+                error_msg = f"Replication failed for: {', '.join(failed)}"
                 raise RuntimeError(error_msg)
         else:
-            logger.info("No remote servers configured, skipping SSH copy")
+            logger.info("No remote servers configured, skipping replication")
         
         # Step 3: Cleanup old backups (local only; remote cleanup should be handled similarly on remote)
         logger.info(f"Cleaning up backups older than {RETENTION_DAYS} days")
         cleanup_old_backups(BACKUP_DIR, RETENTION_DAYS)
+        cleanup_backups(BACKUP_DIR, RETENTION_DAYS)
         
         # If we reach here, everything succeeded
         success = True
@@ -235,18 +216,57 @@ def main():
                 status="ok",
                 last_success=datetime.now(),
                 last_error=None,
-                message="Backup completed successfully"
+                message="Backup completed successfully",
+                replication=replication
             )
         else:
             write_status(
                 status="error",
                 last_success=None,
                 last_error=datetime.now(),
-                message=error_msg
+                message=error_msg,
+                replication=replication
             )
     
     logger.info("=== Backup process finished ===")
     return 0 if success else 1
 
+def restore_main(manifest, dest, overwrite=False):
+    """Restore a backup and check the integrity of the result."""
+    try:
+        restore_backup(manifest, dest, overwrite=overwrite)
+    except Exception as e:
+        logger.error(f"Restore failed: {e}")
+        return 1
+    report = check_integrity(dest)
+    if not report.ok:
+        logger.error(f"Restored database failed integrity check: {report.messages}")
+        return 1
+    logger.info(f"Restored {manifest} to {dest} (integrity ok)")
+    return 0
+
+def verify_main(manifest):
+    """Check that a backup restores to a database that passes integrity_check."""
+    report = verify_backup(manifest)
+    if report.ok:
+        logger.info(f"Backup {manifest} is valid")
+        return 0
+    logger.error(f"Backup {manifest} is not valid: {report.messages}")
+    return 1
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite backup, restore and verification")
+    subparsers = parser.add_subparsers(dest="command")
+    restore_parser = subparsers.add_parser("restore", help="Restore a backup from its manifest")
+    restore_parser.add_argument("manifest")
+    restore_parser.add_argument("dest")
+    restore_parser.add_argument("--overwrite", action="store_true")
+    verify_parser = subparsers.add_parser("verify", help="Verify a backup from its manifest")
+    verify_parser.add_argument("manifest")
+    args = parser.parse_args()
+
+    if args.command == "restore":
+        sys.exit(restore_main(args.manifest, args.dest, args.overwrite))
+    if args.command == "verify":
+        sys.exit(verify_main(args.manifest))
     sys.exit(main())
\ No newline at end of file
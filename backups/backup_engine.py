@@ -0,0 +1,425 @@
+"""
+Streaming, incremental backup engine for the SQLite database.
+
+- Snapshots are taken with the SQLite online backup API in paged steps
+  (``backup(pages=N, sleep=S)``), so the source database is only locked for
+  one step at a time and the app keeps working while the copy runs.
+- Backup files are stream-compressed with zstd (if the ``zstandard`` package
+  is installed) or gzip.
+- A *full* backup stores the whole database plus a per-page hash list in its
+  manifest. A *delta* backup stores only the pages that differ from the most
+  recent full backup, so restoring needs at most two files.
+- Every backup has a JSON manifest (``gestor_<ts>.json``) with the SHA-256 of
+  the restored database, used by ``restore_backup`` and ``verify_backup``.
+
+File layout in the backup directory::
+
+    gestor_<ts>.json          manifest
+    gestor_<ts>.full.db.gz    full backup (or .zst)
+    gestor_<ts>.delta.gz      changed pages against the base full backup
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step and pause between steps (seconds)
+BACKUP_PAGES = int(os.getenv("BACKUP_PAGES", "256"))
+BACKUP_SLEEP = float(os.getenv("BACKUP_SLEEP", "0.005"))
+# A new full backup is taken when the last one is older than this
+FULL_INTERVAL_DAYS = int(os.getenv("BACKUP_FULL_INTERVAL_DAYS", "7"))
+CHUNK_SIZE = 1024 * 1024
+FORMAT_VERSION = 1
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+_DELTA_MAGIC = b"GDELTA1\n"
+_PAGE_HEADER = struct.Struct(">I")
+# Errors raised while reading a damaged backup
+_READ_ERRORS = (OSError, ValueError, KeyError, EOFError, zlib.error) + ((zstandard.ZstdError,) if HAS_ZSTD else ())
+
+
+@dataclass
+class BackupResult:
+    """Outcome of ``create_backup``."""
+    kind: str
+    manifest_path: str
+    data_path: str
+    base: Optional[str] = None
+    pages_written: int = 0
+    page_count: int = 0
+    bytes_written: int = 0
+    base_files: list = field(default_factory=list)
+
+    @property
+    def files(self) -> list:
+        """
+        Files needed to restore this backup, in copy order (data before
+        manifest, base full backup before the delta).
+        """
+        return self.base_files + [self.data_path, self.manifest_path]
+
+
+@dataclass
+class IntegrityReport:
+    """Result of ``check_integrity`` / ``verify_backup``."""
+    ok: bool
+    messages: list = field(default_factory=list)
+
+
+def default_compression() -> str:
+    return "zstd" if HAS_ZSTD else "gzip"
+
+
+def _extension(compression: str) -> str:
+    return ".zst" if compression == "zstd" else ".gz"
+
+
+def open_compressed(path, mode: str, compression: str):
+    """Open a compressed stream for reading ('rb') or writing ('wb')."""
+    if compression == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("zstd backups need the 'zstandard' package")
+        raw = open(path, mode)
+        if mode == "wb":
+            return zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6) if mode == "wb" else gzip.open(path, mode)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def paged_snapshot(src_db: str, dst_path: str, pages: int = BACKUP_PAGES, sleep: float = BACKUP_SLEEP) -> None:
+    """
+    Consistent copy of ``src_db`` into ``dst_path`` using the online backup API
+    in steps of ``pages`` pages, sleeping ``sleep`` seconds between steps.
+    """
+    src_conn = sqlite3.connect(f"file:{src_db}?mode=ro", uri=True)
+    dst_conn = sqlite3.connect(dst_path)
+    try:
+        def _progress(status, remaining, total):
+            logger.debug(f"Snapshot progress: {total - remaining}/{total} pages")
+        src_conn.backup(dst_conn, pages=pages, progress=_progress, sleep=sleep)
+    finally:
+        dst_conn.close()
+        src_conn.close()
+
+
+def _page_size(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _iter_pages(db_path: str, page_size: int):
+    with open(db_path, "rb") as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                return
+            yield page
+
+
+def _page_digest(page: bytes) -> str:
+    return hashlib.blake2b(page, digest_size=8).hexdigest()
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def read_manifest(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_manifests(backup_dir: str) -> list:
+    """Manifests in ``backup_dir`` as (path, manifest), oldest first."""
+    found = []
+    for item in sorted(Path(backup_dir).glob("gestor_*.json")):
+        try:
+            manifest = read_manifest(str(item))
+        except (OSError, ValueError):
+            continue
+        if manifest.get("format") == FORMAT_VERSION:
+            found.append((str(item), manifest))
+    return found
+
+
+def latest_full(backup_dir: str) -> Optional[tuple]:
+    """(path, manifest) of the most recent full backup whose data file exists."""
+    for path, manifest in reversed(list_manifests(backup_dir)):
+        if manifest["kind"] == "full" and os.path.exists(os.path.join(backup_dir, manifest["data_file"])):
+            return path, manifest
+    return None
+
+
+def _unique_stem(backup_dir: str, timestamp: str) -> str:
+    """File stem for a new backup; adds a suffix if that second is already taken."""
+    stem = f"gestor_{timestamp}"
+    suffix = 1
+    while os.path.exists(os.path.join(backup_dir, f"{stem}.json")):
+        stem = f"gestor_{timestamp}_{suffix}"
+        suffix += 1
+    return stem
+
+
+def create_backup(src_db: str, backup_dir: str, mode: str = "auto", compression: Optional[str] = None,
+                  pages: int = BACKUP_PAGES, sleep: float = BACKUP_SLEEP,
+                  full_interval: timedelta = timedelta(days=FULL_INTERVAL_DAYS),
+                  now: Optional[datetime] = None) -> BackupResult:
+    """
+    Take a full or delta backup of ``src_db`` into ``backup_dir``.
+
+    Args:
+        mode: 'full', 'delta' or 'auto' (delta against the latest full backup if
+            it is newer than ``full_interval`` and has the same page size)
+        compression: 'zstd' or 'gzip' (default: zstd when available)
+        pages, sleep: Paged-copy parameters for the snapshot
+    """
+    if mode not in ("full", "delta", "auto"):
+        raise ValueError(f"Unknown backup mode: {mode}")
+    compression = compression or default_compression()
+    now = now or datetime.now()
+    timestamp = now.strftime(TIMESTAMP_FORMAT)
+    Path(backup_dir).mkdir(parents=True, exist_ok=True)
+
+    fd, snapshot = tempfile.mkstemp(prefix=".snapshot_", suffix=".db", dir=backup_dir)
+    os.close(fd)
+    try:
+        paged_snapshot(src_db, snapshot, pages=pages, sleep=sleep)
+        page_size = _page_size(snapshot)
+
+        base = None
+        if mode != "full":
+            base = latest_full(backup_dir)
+            if base is not None:
+                base_time = datetime.strptime(base[1]["timestamp"], TIMESTAMP_FORMAT)
+                usable = base[1]["page_size"] == page_size and (mode == "delta" or now - base_time < full_interval)
+                if not usable:
+                    base = None
+            if base is None and mode == "delta":
+                logger.info("No usable full backup for a delta; taking a full backup instead")
+
+        stem = _unique_stem(backup_dir, timestamp)
+        if base is None:
+            return _write_full(snapshot, backup_dir, stem, timestamp, page_size, compression)
+        return _write_delta(snapshot, backup_dir, stem, timestamp, page_size, compression, base)
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+
+def _write_full(snapshot, backup_dir, stem, timestamp, page_size, compression) -> BackupResult:
+    data_file = f"{stem}.full.db{_extension(compression)}"
+    data_path = os.path.join(backup_dir, data_file)
+    hashes = []
+    with open_compressed(data_path, "wb", compression) as out:
+        for page in _iter_pages(snapshot, page_size):
+            hashes.append(_page_digest(page))
+            out.write(page)
+
+    manifest_path = os.path.join(backup_dir, f"{stem}.json")
+    _write_manifest(manifest_path, {
+        "format": FORMAT_VERSION,
+        "kind": "full",
+        "timestamp": timestamp,
+        "compression": compression,
+        "data_file": data_file,
+        "page_size": page_size,
+        "page_count": len(hashes),
+        "sha256": _sha256_file(snapshot),
+        "page_hashes": hashes,
+    })
+    result = BackupResult("full", manifest_path, data_path, pages_written=len(hashes), page_count=len(hashes),
+                          bytes_written=os.path.getsize(data_path))
+    logger.info(f"Full backup created: {data_path} ({result.page_count} pages, {result.bytes_written} bytes)")
+    return result
+
+
+def _write_delta(snapshot, backup_dir, stem, timestamp, page_size, compression, base) -> BackupResult:
+    base_path, base_manifest = base
+    base_hashes = base_manifest["page_hashes"]
+    data_file = f"{stem}.delta{_extension(compression)}"
+    data_path = os.path.join(backup_dir, data_file)
+
+    changed = 0
+    page_count = 0
+    with open_compressed(data_path, "wb", compression) as out:
+        out.write(_DELTA_MAGIC)
+        for number, page in enumerate(_iter_pages(snapshot, page_size)):
+            page_count += 1
+            if number < len(base_hashes) and base_hashes[number] == _page_digest(page):
+                continue
+            out.write(_PAGE_HEADER.pack(number))
+            out.write(page)
+            changed += 1
+
+    manifest_path = os.path.join(backup_dir, f"{stem}.json")
+    _write_manifest(manifest_path, {
+        "format": FORMAT_VERSION,
+        "kind": "delta",
+        "timestamp": timestamp,
+        "compression": compression,
+        "data_file": data_file,
+        "base": os.path.basename(base_path),
+        "page_size": page_size,
+        "page_count": page_count,
+        "pages_changed": changed,
+        "sha256": _sha256_file(snapshot),
+    })
+    base_files = [os.path.join(backup_dir, base_manifest["data_file"]), base_path]
+    result = BackupResult("delta", manifest_path, data_path, base=os.path.basename(base_path),
+                          pages_written=changed, page_count=page_count, bytes_written=os.path.getsize(data_path),
+                          base_files=base_files)
+    logger.info(f"Delta backup created: {data_path} ({changed}/{page_count} pages changed, base {result.base})")
+    return result
+
+
+def _decompress_to(data_path: str, compression: str, dest_path: str) -> None:
+    with open_compressed(data_path, "rb", compression) as src, open(dest_path, "wb") as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            dst.write(chunk)
+
+
+def _apply_delta(data_path: str, compression: str, dest_path: str, page_size: int, page_count: int) -> None:
+    with open_compressed(data_path, "rb", compression) as src, open(dest_path, "r+b") as dst:
+        if src.read(len(_DELTA_MAGIC)) != _DELTA_MAGIC:
+            raise ValueError(f"Not a delta backup: {data_path}")
+        while True:
+            header = src.read(_PAGE_HEADER.size)
+            if not header:
+                break
+            (number,) = _PAGE_HEADER.unpack(header)
+            page = src.read(page_size)
+            if len(page) != page_size:
+                raise ValueError(f"Truncated delta backup: {data_path}")
+            dst.seek(number * page_size)
+            dst.write(page)
+        dst.truncate(page_count * page_size)
+
+
+def restore_backup(manifest_path: str, dest_path: str, overwrite: bool = False) -> str:
+    """
+    Rebuild the database described by ``manifest_path`` into ``dest_path``.
+
+    Delta backups are applied on top of their base full backup. The result is
+    checked against the SHA-256 recorded in the manifest.
+
+    Returns:
+        ``dest_path``
+
+    Raises:
+        FileExistsError if ``dest_path`` exists and ``overwrite`` is False
+        ValueError if the restored file does not match the manifest
+    """
+    if os.path.exists(dest_path) and not overwrite:
+        raise FileExistsError(f"Destination already exists: {dest_path}")
+    backup_dir = os.path.dirname(os.path.abspath(manifest_path))
+    manifest = read_manifest(manifest_path)
+
+    tmp = dest_path + ".restoring"
+    try:
+        if manifest["kind"] == "full":
+            _decompress_to(os.path.join(backup_dir, manifest["data_file"]), manifest["compression"], tmp)
+        else:
+            base = read_manifest(os.path.join(backup_dir, manifest["base"]))
+            _decompress_to(os.path.join(backup_dir, base["data_file"]), base["compression"], tmp)
+            _apply_delta(os.path.join(backup_dir, manifest["data_file"]), manifest["compression"], tmp,
+                         manifest["page_size"], manifest["page_count"])
+
+        if _sha256_file(tmp) != manifest["sha256"]:
+            raise ValueError(f"Restored database does not match the manifest checksum: {manifest_path}")
+        os.replace(tmp, dest_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.info(f"Backup {os.path.basename(manifest_path)} restored to {dest_path}")
+    return dest_path
+
+
+def check_integrity(db_path: str) -> IntegrityReport:
+    """Run ``PRAGMA integrity_check`` on a database file."""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return IntegrityReport(False, [str(e)])
+    return IntegrityReport(rows == ["ok"], rows)
+
+
+def verify_backup(manifest_path: str) -> IntegrityReport:
+    """Restore a backup to a temporary file and check checksum and integrity."""
+    fd, tmp = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        try:
+            restore_backup(manifest_path, tmp, overwrite=True)
+        except _READ_ERRORS as e:
+            return IntegrityReport(False, [f"Restore failed: {e}"])
+        return check_integrity(tmp)
+    finally:
+        os.remove(tmp)
+
+
+def cleanup_backups(backup_dir: str, days: int, now: Optional[datetime] = None) -> int:
+    """
+    Delete backups older than ``days``, keeping any full backup that a retained
+    delta still depends on.
+
+    Returns:
+        Number of backups deleted
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=days)
+    manifests = list_manifests(backup_dir)
+    kept_bases = {
+        manifest["base"] for _, manifest in manifests
+        if manifest["kind"] == "delta" and datetime.strptime(manifest["timestamp"], TIMESTAMP_FORMAT) >= cutoff
+    }
+    deleted = 0
+    for path, manifest in manifests:
+        if datetime.strptime(manifest["timestamp"], TIMESTAMP_FORMAT) >= cutoff:
+            continue
+        if os.path.basename(path) in kept_bases:
+            continue
+        for item in (os.path.join(backup_dir, manifest["data_file"]), path):
+            if os.path.exists(item):
+                os.remove(item)
+        logger.info(f"Deleted old backup: {os.path.basename(path)}")
+        deleted += 1
+    return deleted
@@ -0,0 +1,201 @@
+"""
+Replication of backup files to remote servers.
+
+Every remote is handled in its own thread, so a slow or unreachable server
+does not delay the others. For each file:
+
+1. If the remote already has the file with the same SHA-256 it is skipped
+   (e.g. the base full backup of a delta that was sent on a previous run).
+2. The file is uploaded under a temporary name, its SHA-256 is computed on the
+   remote side and compared with the local one, and only then it is renamed
+   to its final name.
+3. Failed attempts are retried with exponential backoff.
+
+Remote specs:
+    user@host:/path/     SSH (scp + ssh, using the backup SSH key)
+    file:///path/        Local directory (mounted share, tests)
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_WORKERS = int(os.getenv("BACKUP_REPLICATION_WORKERS", "4"))
+REPLICATION_RETRIES = int(os.getenv("BACKUP_REPLICATION_RETRIES", "3"))
+REPLICATION_BACKOFF = float(os.getenv("BACKUP_REPLICATION_BACKOFF", "2"))
+TRANSFER_TIMEOUT = int(os.getenv("BACKUP_TRANSFER_TIMEOUT", "300"))
+
+_PARTIAL_SUFFIX = ".part"
+
+
+class ReplicationError(Exception):
+    """A file could not be copied or did not arrive intact."""
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalDirTransport:
+    """Copies files into a local directory (a mounted share or a test dir)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.name = f"file://{directory}"
+
+    def remote_checksum(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.directory, filename)
+        return sha256_file(path) if os.path.exists(path) else None
+
+    def upload(self, local_file: str, filename: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        shutil.copyfile(local_file, os.path.join(self.directory, filename))
+
+    def rename(self, filename: str, new_name: str) -> None:
+        os.replace(os.path.join(self.directory, filename), os.path.join(self.directory, new_name))
+
+
+class SSHTransport:
+    """Copies files with scp and checks them with ssh + sha256sum."""
+
+    def __init__(self, remote_spec: str, ssh_key: str, timeout: int = TRANSFER_TIMEOUT):
+        host, _, directory = remote_spec.partition(":")
+        self.host = host
+        self.directory = directory if directory.endswith("/") else directory + "/"
+        self.ssh_key = ssh_key
+        self.timeout = timeout
+        self.name = remote_spec
+
+    def _options(self) -> list:
+        return [
+            "-i", self.ssh_key,
+            "-o", "StrictHostKeyChecking=no",
+            "-o", "UserKnownHostsFile=/dev/null",
+            "-o", "BatchMode=yes",
+        ]
+
+    def _ssh(self, command: str) -> subprocess.CompletedProcess:
+        return subprocess.run(["ssh", *self._options(), self.host, command],
+                              capture_output=True, text=True, timeout=self.timeout)
+
+    def remote_checksum(self, filename: str) -> Optional[str]:
+        path = self.directory + filename
+        result = self._ssh(f"test -f '{path}' && sha256sum '{path}' || true")
+        if result.returncode != 0:
+            raise ReplicationError(f"ssh failed: {result.stderr.strip()}")
+        output = result.stdout.strip()
+        return output.split()[0] if output else None
+
+    def upload(self, local_file: str, filename: str) -> None:
+        cmd = ["scp", *self._options(), local_file, f"{self.host}:{self.directory}{filename}"]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise ReplicationError(f"scp failed: {result.stderr.strip()}")
+
+    def rename(self, filename: str, new_name: str) -> None:
+        result = self._ssh(f"mv -f '{self.directory}{filename}' '{self.directory}{new_name}'")
+        if result.returncode != 0:
+            raise ReplicationError(f"ssh mv failed: {result.stderr.strip()}")
+
+
+def transport_for(remote_spec: str, ssh_key: str):
+    """Transport for a remote spec ('file://' for local directories, SSH otherwise)."""
+    if remote_spec.startswith("file://"):
+        return LocalDirTransport(remote_spec[len("file://"):])
+    return SSHTransport(remote_spec, ssh_key)
+
+
+@dataclass
+class RemoteResult:
+    """Outcome of replicating to one remote (stored in backup_status.json)."""
+    remote: str
+    ok: bool = False
+    files_sent: int = 0
+    files_skipped: int = 0
+    bytes_sent: int = 0
+    seconds: float = 0.0
+    throughput_mb_s: float = 0.0
+    attempts: int = 0
+    error: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _send_file(transport, local_file: str, checksum: str, result: RemoteResult,
+               retries: int, backoff: float, sleep) -> None:
+    filename = os.path.basename(local_file)
+    partial = filename + _PARTIAL_SUFFIX
+    for attempt in range(retries + 1):
+        result.attempts += 1
+        try:
+            if transport.remote_checksum(filename) == checksum:
+                result.files_skipped += 1
+                return
+            transport.upload(local_file, partial)
+            arrived = transport.remote_checksum(partial)
+            if arrived != checksum:
+                raise ReplicationError(f"checksum mismatch for {filename}")
+            transport.rename(partial, filename)
+            result.files_sent += 1
+            result.bytes_sent += os.path.getsize(local_file)
+            return
+        except (ReplicationError, OSError, subprocess.TimeoutExpired) as e:
+            if attempt == retries:
+                raise ReplicationError(f"{filename}: {e}") from e
+            delay = backoff * 2 ** attempt
+            logger.warning(f"{transport.name}: {filename} failed ({e}), retrying in {delay:.1f}s")
+            sleep(delay)
+
+
+def replicate_to(transport, files: list, checksums: dict, retries: int = REPLICATION_RETRIES,
+                 backoff: float = REPLICATION_BACKOFF, sleep=time.sleep) -> RemoteResult:
+    """Send ``files`` (in order) to one remote. Never raises; errors go to the result."""
+    result = RemoteResult(remote=transport.name)
+    start = time.monotonic()
+    try:
+        for local_file in files:
+            _send_file(transport, local_file, checksums[local_file], result, retries, backoff, sleep)
+        result.ok = True
+    except Exception as e:
+        result.error = str(e)
+        logger.error(f"Replication to {transport.name} failed: {e}")
+    result.seconds = round(time.monotonic() - start, 3)
+    if result.seconds > 0:
+        result.throughput_mb_s = round(result.bytes_sent / result.seconds / 1e6, 3)
+    if result.ok:
+        logger.info(f"Replicated to {transport.name}: {result.files_sent} sent, {result.files_skipped} already there, "
+                    f"{result.bytes_sent} bytes in {result.seconds}s")
+    return result
+
+
+def replicate(files: list, transports: list, workers: int = REPLICATION_WORKERS,
+              retries: int = REPLICATION_RETRIES, backoff: float = REPLICATION_BACKOFF,
+              sleep=time.sleep) -> list:
+    """
+    Send ``files`` to every transport concurrently.
+
+    Returns:
+        List of RemoteResult, in the same order as ``transports``
+    """
+    if not transports:
+        return []
+    checksums = {local_file: sha256_file(local_file) for local_file in files}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(transports)))) as executor:
+        futures = [
+            executor.submit(replicate_to, transport, files, checksums, retries, backoff, sleep)
+            for transport in transports
+        ]
+        return [future.result() for future in futures]
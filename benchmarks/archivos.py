@@ -0,0 +1,120 @@
+"""
+Archivos de entrada sintéticos para los benchmarks de Horarios, armados a
+partir de las marcaciones de scripts/datos_sinteticos.py:
+
+- Texto del reloj (formato de cargar_y_procesar_datos).
+- Planillas Excel mensuales del libro, una hoja por empleado.
+- PDF "query" del reloj con la tabla con líneas que lee pdfplumber.
+"""
+
+import os
+
+import pandas as pd
+
+COLUMNAS_PDF = ["Date", "ID Number", "Name", "Time", "Status", "Verification"]
+FILAS_POR_PAGINA = 45
+
+
+def texto_reloj(marcas: pd.DataFrame) -> bytes:
+    """Registros 'id fecha hora col3 col4 col5' separados por tabulaciones."""
+    fecha_hora = marcas["fecha_hora"].dt.strftime("%Y-%m-%d\t%H:%M:%S")
+    lineas = marcas["id_empleado"].astype(str) + "\t" + fecha_hora + "\t1\t0\t1"
+    return ("\n".join(lineas) + "\n").encode()
+
+
+def hoja_libro(marcas_empleado: pd.DataFrame) -> pd.DataFrame:
+    """Hoja de planilla: día en la columna A (filas 10-40) y hasta 4 pares hora/minuto en C:J."""
+    hoja = pd.DataFrame(index=range(42), columns=range(10), dtype=object)
+    # Título y pie: las filas vacías de los extremos no se leen de vuelta
+    hoja.iat[0, 0] = "Planilla de horarios"
+    hoja.iat[41, 0] = "Total"
+    for dia, grupo in marcas_empleado.groupby(marcas_empleado["fecha_hora"].dt.day):
+        fila = 9 + dia
+        hoja.iat[fila, 0] = dia
+        for j, momento in enumerate(grupo["fecha_hora"].iloc[:4]):
+            hoja.iat[fila, 2 + 2 * j] = momento.hour
+            hoja.iat[fila, 3 + 2 * j] = momento.minute
+    return hoja
+
+
+def escribir_excels_libro(marcas: pd.DataFrame, directorio: str) -> list:
+    """Un 'YYYY-MM.xlsx' por mes; la hoja de cada empleado se llama 'N EMPn'."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    periodos = marcas["fecha_hora"].dt.strftime("%Y-%m")
+    for periodo, del_mes in marcas.groupby(periodos, sort=True):
+        ruta = os.path.join(directorio, f"{periodo}.xlsx")
+        with pd.ExcelWriter(ruta, engine="openpyxl") as writer:
+            for orden, (id_empleado, grupo) in enumerate(del_mes.groupby("id_empleado", sort=False), start=1):
+                hoja_libro(grupo).to_excel(writer, sheet_name=f"{orden} EMP{id_empleado}", header=False, index=False)
+        rutas.append(ruta)
+    return rutas
+
+
+def _escapar(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pagina_pdf(filas: list) -> bytes:
+    """Contenido de una página A4 apaisada con la tabla dibujada con líneas."""
+    ancho_col, alto_fila, x0, y0 = 120, 12, 40, 560
+    columnas = len(filas[0])
+    comandos = ["0.5 w"]
+    for i in range(len(filas) + 1):
+        y = y0 - i * alto_fila
+        comandos.append(f"{x0} {y} m {x0 + columnas * ancho_col} {y} l S")
+    for j in range(columnas + 1):
+        x = x0 + j * ancho_col
+        comandos.append(f"{x} {y0} m {x} {y0 - len(filas) * alto_fila} l S")
+    comandos.append("BT /F1 8 Tf")
+    for i, fila in enumerate(filas):
+        for j, celda in enumerate(fila):
+            comandos.append(f"1 0 0 1 {x0 + j * ancho_col + 3} {y0 - (i + 1) * alto_fila + 3} Tm ({_escapar(celda)}) Tj")
+    comandos.append("ET")
+    return "\n".join(comandos).encode("latin-1")
+
+
+def escribir_pdf(filas: list, ruta: str) -> str:
+    """PDF mínimo (una fuente estándar, una tabla por página) sin dependencias."""
+    paginas = [filas[i:i + FILAS_POR_PAGINA] for i in range(0, len(filas), FILAS_POR_PAGINA)]
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, se completa al final
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for pagina in paginas:
+        contenido = _pagina_pdf(pagina)
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream")
+        objetos.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 842 595] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objetos)))
+        kids.append(f"{len(objetos)} 0 R")
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    salida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for numero, objeto in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        salida += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+    xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    with open(ruta, "wb") as f:
+        f.write(salida)
+    return ruta
+
+
+def escribir_pdfs_query(marcas: pd.DataFrame, nombres: dict, directorio: str) -> list:
+    """Un PDF de query del reloj por mes, con encabezado en la primera página."""
+    os.makedirs(directorio, exist_ok=True)
+    reloj = marcas[marcas["tipo"] == "RELOJ"]
+    rutas = []
+    for periodo, del_mes in reloj.groupby(reloj["fecha_hora"].dt.strftime("%Y-%m"), sort=True):
+        filas = [COLUMNAS_PDF] + [
+            [momento.strftime("%d/%m/%Y"), id_empleado, nombres.get(id_empleado, ""),
+             momento.strftime("%H:%M:%S"), "C/In", "FP"]
+            for id_empleado, momento in zip(del_mes["id_empleado"], del_mes["fecha_hora"])
+        ]
+        rutas.append(escribir_pdf(filas, os.path.join(directorio, f"query_{periodo}.pdf")))
+    return rutas
@@ -0,0 +1,305 @@
+"""
+Benchmarks de la capa de datos (database.py) con tablas de 1k, 10k y 100k filas.
+
+- Operaciones sueltas: get_data, insert_data, update_data, delete_data y los
+  caminos de TableWrapper (append_row, update_cell), que recargan la tabla entera.
+- Carga masiva con import_from_dataframe y arranque en frío con init_session_state.
+- Lectores concurrentes mientras otro escribe sobre el mismo archivo, con hilos
+  y con procesos. El rendimiento (lecturas/s, escrituras/s, latencias y errores
+  de bloqueo) queda en 'extra_info' de cada resultado; el tiempo medido por
+  pytest-benchmark en esos casos incluye arrancar los lectores.
+
+    ./scripts/run_benchmarks.sh json resultados.json -k database
+"""
+
+import itertools
+import multiprocessing
+import shutil
+import statistics
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import database
+from database import (
+    DatabaseClient, TableWrapper, delete_data, get_data, import_from_dataframe, init_db, init_session_state,
+    insert_data, update_data,
+)
+from scripts.datos_sinteticos import Escala, generar_compensados, generar_eventos, generar_personal, generar_vacaciones
+
+TAMANIOS = [1_000, 10_000, pytest.param(100_000, marks=pytest.mark.slow)]
+# Escenario concurrente: escrituras del escritor y lectores simultáneos
+ESCRITURAS = 100
+LECTORES = 4
+ESTADOS = ["Pendiente", "En curso", "Completada", "Cancelada"]
+
+
+def generar_tareas(personal: pd.DataFrame, filas: int, rng) -> pd.DataFrame:
+    return pd.DataFrame({
+        "ID": [f"T{i:07d}" for i in range(filas)],
+        "Título Tarea": [f"Tarea {i}" for i in range(filas)],
+        "Tarea": "Descripción de la tarea sintética",
+        "Responsable": rng.choice(personal["Apellido, Nombres"].to_numpy(), filas),
+        "Fecha límite": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, filas), unit="D"))
+        .strftime("%Y-%m-%d"),
+        "Estado": rng.choice(ESTADOS, filas),
+    })
+
+
+def tablas_de(filas: int) -> dict:
+    """Tablas con 'filas' registros en tareas, vacaciones y compensados (personal: filas / 10)."""
+    escala = Escala(empleados=max(1, filas // 10), anios=1, licencias_por_anio=10, ausencias_por_anio=10,
+                    eventos_por_anio=max(1, filas // 10), semilla=filas)
+    rng = np.random.default_rng(escala.semilla)
+    personal = generar_personal(escala, rng)
+    return {
+        "tareas": generar_tareas(personal, filas, rng),
+        "vacaciones": generar_vacaciones(personal, escala, rng),
+        "compensados": generar_compensados(personal, escala, rng),
+        "personal": personal,
+        "eventos": generar_eventos(escala, rng),
+    }
+
+
+@pytest.fixture(scope="session")
+def plantillas(tmp_path_factory):
+    """Devuelve una función filas -> (ruta de una base llena, tablas), armadas una vez."""
+    cache = {}
+
+    def obtener(filas: int):
+        if filas not in cache:
+            ruta = str(tmp_path_factory.mktemp(f"db_{filas}") / "gestor.db")
+            init_db(ruta)
+            tablas = tablas_de(filas)
+            for tabla, df in tablas.items():
+                import_from_dataframe(tabla, df, ruta)
+            cache[filas] = (ruta, tablas)
+        return cache[filas]
+
+    return obtener
+
+
+@pytest.fixture
+def base(plantillas, tmp_path, monkeypatch, request):
+    """Copia de la base del tamaño pedido, usada también como base por defecto."""
+    plantilla, tablas = plantillas(request.param)
+    ruta = str(tmp_path / "gestor.db")
+    shutil.copyfile(plantilla, ruta)
+    # insert_data, append_row y update_cell usan la base por defecto
+    monkeypatch.setattr(database, "DATABASE_URL", ruta)
+    return ruta, tablas
+
+
+@pytest.fixture
+def sesion(monkeypatch):
+    """st.session_state en memoria para los caminos que leen o escriben la sesión."""
+    import streamlit
+
+    from benchmarks.conftest import EstadoSesion
+
+    estado = EstadoSesion(usuario="benchmark")
+    monkeypatch.setattr(streamlit, "session_state", estado)
+    return estado
+
+
+def _tarea(numero: int) -> dict:
+    return {"ID": f"N{numero:07d}", "Título Tarea": "Nueva", "Tarea": "Alta desde el benchmark",
+            "Responsable": "Pérez, Ana", "Fecha límite": "2025-06-30", "Estado": "Pendiente"}
+
+
+def _percentiles_ms(latencias: list) -> dict:
+    if not latencias:
+        return {"p50_ms": None, "p95_ms": None}
+    ordenadas = sorted(latencias)
+    return {
+        "p50_ms": round(statistics.median(ordenadas) * 1000, 3),
+        "p95_ms": round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))] * 1000, 3),
+    }
+
+
+parametrizar_tamanios = pytest.mark.parametrize("base", TAMANIOS, indirect=True, ids=lambda n: f"{n}filas")
+
+
+# --- Operaciones sueltas ---
+
+@parametrizar_tamanios
+def test_get_data(benchmark, base):
+    ruta, tablas = base
+    df = benchmark(get_data, "vacaciones", ruta, with_rowid=True)
+    assert len(df) == len(tablas["vacaciones"])
+
+
+@parametrizar_tamanios
+def test_insert_data(benchmark, base):
+    ruta, _ = base
+    numeros = itertools.count()
+    assert benchmark(lambda: insert_data("tareas", _tarea(next(numeros)), ruta))
+
+
+@parametrizar_tamanios
+def test_update_data(benchmark, base):
+    ruta, tablas = base
+    ids = itertools.cycle(tablas["tareas"]["ID"].iloc[::97])
+    assert benchmark(lambda: update_data("tareas", next(ids), "Estado", "Completada", db_path=ruta))
+
+
+@parametrizar_tamanios
+def test_delete_data(benchmark, base):
+    ruta, tablas = base
+    ids = iter(tablas["tareas"]["ID"])
+    assert benchmark.pedantic(delete_data, setup=lambda: (("tareas", next(ids)), {"db_path": ruta}),
+                              rounds=min(200, len(tablas["tareas"])))
+
+
+@parametrizar_tamanios
+def test_append_row_con_recarga(benchmark, base, sesion):
+    """append_row inserta y recarga la tabla completa en la sesión."""
+    ruta, tablas = base
+    tabla = TableWrapper(DatabaseClient(ruta), "tareas")
+    numeros = itertools.count()
+    assert benchmark.pedantic(lambda: tabla.append_row(list(_tarea(next(numeros)).values())), rounds=20)
+    assert len(sesion["df_tareas"]) == len(tablas["tareas"]) + next(numeros)
+
+
+@parametrizar_tamanios
+def test_update_cell_con_recarga(benchmark, base, sesion):
+    """update_cell lee la tabla completa para ubicar la fila antes de actualizar."""
+    ruta, tablas = base
+    tabla = TableWrapper(DatabaseClient(ruta), "tareas")
+    filas = itertools.cycle(range(2, len(tablas["tareas"]) + 2, 97))
+    estado = list(tablas["tareas"].columns).index("Estado") + 1
+    assert benchmark.pedantic(lambda: tabla.update_cell(next(filas), estado, "En curso"), rounds=20)
+
+
+# --- Carga masiva y arranque en frío ---
+
+@parametrizar_tamanios
+def test_import_from_dataframe(benchmark, base):
+    ruta, tablas = base
+    df = tablas["vacaciones"]
+
+    def vaciar():
+        with database.get_connection(ruta) as conn:
+            conn.execute("DELETE FROM vacaciones")
+        return (), {}
+
+    assert benchmark.pedantic(lambda: import_from_dataframe("vacaciones", df, ruta), setup=vaciar, rounds=3)
+    benchmark.extra_info["filas_por_segundo"] = round(len(df) / benchmark.stats.stats.mean)
+
+
+@parametrizar_tamanios
+def test_init_session_state_en_frio(benchmark, base, sesion):
+    """Carga de todas las tablas en una sesión vacía, como en el primer render."""
+    ruta, tablas = base
+    cliente = DatabaseClient(ruta)
+
+    def sesion_vacia():
+        sesion.clear()
+        return (cliente,), {}
+
+    benchmark.pedantic(init_session_state, setup=sesion_vacia, rounds=3)
+    assert len(sesion["df_vacaciones"]) == len(tablas["vacaciones"])
+
+
+# --- Lectores concurrentes durante escrituras ---
+
+def _leer_hasta(ruta: str, fin, resultados: list, listo=None):
+    """Lee la tabla completa en bucle hasta que termine el escritor."""
+    latencias, errores = [], 0
+    if listo is not None:
+        listo.wait()
+    while not fin.is_set():
+        inicio = time.perf_counter()
+        try:
+            get_data("vacaciones", ruta)
+            latencias.append(time.perf_counter() - inicio)
+        except Exception:
+            errores += 1
+    resultados.append((latencias, errores))
+
+
+def _lector_proceso(ruta: str, fin, listo, cola):
+    resultados = []
+    _leer_hasta(ruta, fin, resultados, listo)
+    cola.put(resultados[0])
+
+
+def _escribir(ruta: str, cantidad: int, desde: int) -> tuple:
+    latencias, fallidas = [], 0
+    for numero in range(desde, desde + cantidad):
+        inicio = time.perf_counter()
+        if insert_data("tareas", _tarea(numero), ruta):
+            latencias.append(time.perf_counter() - inicio)
+        else:
+            fallidas += 1
+    return latencias, fallidas
+
+
+def _resumir(segundos: float, escrituras: tuple, lecturas: list) -> dict:
+    latencias_lectura = [l for lista, _ in lecturas for l in lista]
+    return {
+        "segundos": round(segundos, 3),
+        "escrituras_por_segundo": round(len(escrituras[0]) / segundos, 1),
+        "escrituras_fallidas": escrituras[1],
+        "escritura": _percentiles_ms(escrituras[0]),
+        "lecturas_por_segundo": round(len(latencias_lectura) / segundos, 1),
+        "lecturas_fallidas": sum(errores for _, errores in lecturas),
+        "lectura": _percentiles_ms(latencias_lectura),
+    }
+
+
+@parametrizar_tamanios
+def test_lectores_hilos_durante_escrituras(benchmark, base):
+    ruta, _ = base
+    rondas = itertools.count()
+
+    def escenario():
+        fin, lecturas = threading.Event(), []
+        hilos = [threading.Thread(target=_leer_hasta, args=(ruta, fin, lecturas)) for _ in range(LECTORES)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        escrituras = _escribir(ruta, ESCRITURAS, next(rondas) * ESCRITURAS)
+        fin.set()
+        segundos = time.perf_counter() - inicio
+        for hilo in hilos:
+            hilo.join()
+        return _resumir(segundos, escrituras, lecturas)
+
+    resumen = benchmark.pedantic(escenario, rounds=3)
+    benchmark.extra_info.update(resumen, lectores=LECTORES, escrituras=ESCRITURAS)
+    assert resumen["escrituras_fallidas"] == 0
+
+
+@parametrizar_tamanios
+def test_lectores_procesos_durante_escrituras(benchmark, base):
+    ruta, _ = base
+    contexto = multiprocessing.get_context("spawn")
+    rondas = itertools.count()
+
+    def escenario():
+        fin, cola = contexto.Event(), contexto.Queue()
+        # Los lectores importan pandas al arrancar: se empieza a escribir cuando están todos listos
+        listo = contexto.Barrier(LECTORES + 1)
+        procesos = [contexto.Process(target=_lector_proceso, args=(ruta, fin, listo, cola))
+                    for _ in range(LECTORES)]
+        for proceso in procesos:
+            proceso.start()
+        listo.wait()
+        inicio = time.perf_counter()
+        escrituras = _escribir(ruta, ESCRITURAS, next(rondas) * ESCRITURAS)
+        fin.set()
+        segundos = time.perf_counter() - inicio
+        lecturas = [cola.get(timeout=60) for _ in procesos]
+        for proceso in procesos:
+            proceso.join()
+        return _resumir(segundos, escrituras, lecturas)
+
+    resumen = benchmark.pedantic(escenario, rounds=2)
+    benchmark.extra_info.update(resumen, lectores=LECTORES, escrituras=ESCRITURAS)
+    assert resumen["escrituras_fallidas"] == 0
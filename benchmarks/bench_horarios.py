@@ -0,0 +1,122 @@
+"""
+Benchmarks de las etapas de Horarios (pytest-benchmark), a 1, 6 y 24 meses
+de marcaciones de 50 empleados.
+
+    ./scripts/run_benchmarks.sh guardar    # línea base
+    ./scripts/run_benchmarks.sh comparar   # falla si alguna etapa empeora más del umbral
+
+Los archivos se llaman bench_*.py para que la suite de tests no los recolecte.
+"""
+
+import os
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.archivos import escribir_excels_libro, escribir_pdfs_query, texto_reloj
+from utils.jornadas import calcular_jornada, construir_intervalos
+
+# Meses de datos; los casos grandes de los lectores de archivos son lentos
+TAMANIOS = [1, 6, 24]
+TAMANIOS_ARCHIVOS = [1, pytest.param(6, marks=pytest.mark.slow), pytest.param(24, marks=pytest.mark.slow)]
+# Leer el PDF de un mes ya lleva varios segundos: 24 meses no entra en una corrida razonable
+TAMANIOS_PDF = [1, pytest.param(6, marks=pytest.mark.slow)]
+
+
+def _una_vez(benchmark, funcion, *args, rondas=3):
+    """Etapas de varios segundos: pocas rondas, una iteración cada una."""
+    return benchmark.pedantic(funcion, args=args, rounds=rondas, iterations=1, warmup_rounds=0)
+
+
+def _registros_drive(datos):
+    """df_registros como queda después de leer los CSV de Drive."""
+    registros = datos.marcas.copy()
+    registros["id_empleado"] = registros["id_empleado"].astype(str)
+    return registros
+
+
+def _sin_duplicados(horarios, registros):
+    """Etapa de deduplicación tal como la encadena seccion_horarios."""
+    df_reloj = horarios.eliminar_duplicados_reloj(registros[registros["tipo"] == "RELOJ"].copy())
+    combinado = pd.concat([df_reloj, registros[registros["tipo"] == "LIBRO"]], ignore_index=True)
+    combinado["fecha"] = pd.to_datetime(combinado["fecha_hora"]).dt.date
+    combinado["hora"] = pd.to_datetime(combinado["fecha_hora"]).dt.hour
+    return combinado
+
+
+def _jornada(registros):
+    intervalos = construir_intervalos(registros)
+    return calcular_jornada(registros, intervalos)
+
+
+@pytest.mark.parametrize("meses", TAMANIOS)
+def test_cargar_y_procesar_datos(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    datos = datos_por_tamanio(meses)
+    horarios = horarios_con_datos(datos)
+    contenido = texto_reloj(datos.reloj)
+
+    df, jornada = benchmark.pedantic(
+        horarios.cargar_y_procesar_datos, setup=lambda: ((BytesIO(contenido),), {}), rounds=3, warmup_rounds=0,
+    )
+    assert len(df) == len(datos.reloj)
+    assert not jornada.empty
+
+
+@pytest.mark.parametrize("meses", TAMANIOS_ARCHIVOS)
+def test_leer_excel_horarios(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    datos = datos_por_tamanio(meses)
+    horarios = horarios_con_datos(datos)
+    rutas = escribir_excels_libro(datos.reloj, os.path.join(datos.directorio, "libro"))
+
+    resultados = _una_vez(benchmark, lambda: [horarios.leer_excel_horarios(ruta) for ruta in rutas])
+    assert all(not df.empty for df in resultados)
+    assert set(resultados[0]["id_empleado"]) <= set(datos.nombres)
+
+
+@pytest.mark.parametrize("meses", TAMANIOS_PDF)
+def test_leer_pdf_query(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    datos = datos_por_tamanio(meses)
+    horarios = horarios_con_datos(datos)
+    rutas = escribir_pdfs_query(datos.marcas, datos.nombres, os.path.join(datos.directorio, "query"))
+
+    resultados = _una_vez(benchmark, lambda: [horarios.leer_pdf_query(ruta) for ruta in rutas], rondas=1)
+    assert sum(len(df) for df in resultados) == len(datos.reloj)
+
+
+@pytest.mark.parametrize("meses", TAMANIOS)
+def test_deduplicacion_reloj(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    datos = datos_por_tamanio(meses)
+    horarios = horarios_con_datos(datos)
+    registros = _registros_drive(datos)
+
+    resultado = _una_vez(benchmark, _sin_duplicados, horarios, registros)
+    assert len(resultado) < len(registros)
+
+
+@pytest.mark.parametrize("meses", TAMANIOS)
+def test_jornada(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    datos = datos_por_tamanio(meses)
+    horarios = horarios_con_datos(datos)
+    registros = _sin_duplicados(horarios, _registros_drive(datos))
+
+    jornada = benchmark(_jornada, registros)
+    assert not jornada.empty
+
+
+@pytest.mark.parametrize("meses", TAMANIOS)
+def test_obtener_compensatorios_por_fecha(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    horarios = horarios_con_datos(datos_por_tamanio(meses))
+
+    resultado = benchmark(horarios.obtener_compensatorios_por_fecha)
+    assert not resultado.empty
+
+
+@pytest.mark.parametrize("meses", TAMANIOS)
+def test_obtener_vacaciones_por_fecha(benchmark, datos_por_tamanio, horarios_con_datos, meses):
+    horarios = horarios_con_datos(datos_por_tamanio(meses))
+
+    resultado = benchmark(horarios.obtener_vacaciones_por_fecha)
+    assert not resultado.empty
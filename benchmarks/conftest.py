@@ -0,0 +1,112 @@
+"""
+Fixtures de los benchmarks: datos sintéticos por tamaño (meses × 50 empleados)
+y un reemplazo mínimo de streamlit para correr las funciones de Horarios sin
+servidor.
+"""
+
+import math
+import os
+import sys
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.datos_sinteticos import Escala, generar_marcas, generar_tablas
+
+EMPLEADOS = 50
+SEMILLA = 2024
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: casos grandes de los lectores de archivos")
+
+
+class EstadoSesion(dict):
+    """session_state en memoria: acceso como dict y como atributos."""
+
+    def __getattr__(self, nombre):
+        try:
+            return self[nombre]
+        except KeyError:
+            raise AttributeError(nombre)
+
+    def __setattr__(self, nombre, valor):
+        self[nombre] = valor
+
+
+class StreamlitFalso:
+    """Las funciones de st que usan las etapas medidas, sin efectos."""
+
+    def __init__(self):
+        self.session_state = EstadoSesion()
+        self.mensajes = []
+
+    def _registrar(self, mensaje, *args, **kwargs):
+        self.mensajes.append(mensaje)
+
+    error = warning = info = success = _registrar
+
+    def spinner(self, *args, **kwargs):
+        return nullcontext()
+
+
+class Datos:
+    """Tablas, marcaciones y archivos de entrada de un tamaño, generados una sola vez."""
+
+    def __init__(self, meses: int, directorio: str):
+        self.meses = meses
+        self.directorio = directorio
+        self.escala = Escala(empleados=EMPLEADOS, anios=max(1, math.ceil(meses / 12)),
+                             meses_marcas=meses, semilla=SEMILLA)
+        self.tablas = generar_tablas(self.escala)
+        self.marcas = generar_marcas(self.tablas["personal"], self.escala, np.random.default_rng(SEMILLA + 1))
+        self.nombres = dict(zip(self.tablas["personal"]["ID"], self.tablas["personal"]["Apellido, Nombres"]))
+
+    @property
+    def reloj(self) -> pd.DataFrame:
+        return self.marcas[self.marcas["tipo"] == "RELOJ"]
+
+
+@pytest.fixture(scope="session")
+def datos_por_tamanio(tmp_path_factory):
+    """Devuelve una función meses -> Datos, con caché por sesión."""
+    cache = {}
+
+    def obtener(meses: int) -> Datos:
+        if meses not in cache:
+            cache[meses] = Datos(meses, str(tmp_path_factory.mktemp(f"datos_{meses}m")))
+        return cache[meses]
+
+    return obtener
+
+
+@pytest.fixture
+def st_falso(monkeypatch):
+    """Reemplaza streamlit en ui_sections.horarios."""
+    import ui_sections.horarios as horarios
+
+    falso = StreamlitFalso()
+    monkeypatch.setattr(horarios, "st", falso)
+    return falso
+
+
+@pytest.fixture
+def horarios_con_datos(st_falso, monkeypatch):
+    """
+    Devuelve una función meses -> (módulo horarios, Datos) con las tablas en
+    session_state y los mapas de IDs armados con el personal sintético.
+    """
+    import ui_sections.horarios as horarios
+
+    def preparar(datos: Datos):
+        monkeypatch.setattr(horarios, "ID_NOMBRE_MAP", dict(datos.nombres))
+        monkeypatch.setattr(horarios, "MAPA_PLANILLA_ID", {f"EMP{i}": i for i in datos.nombres})
+        st_falso.session_state.df_vacaciones = datos.tablas["vacaciones"]
+        st_falso.session_state.df_compensados = datos.tablas["compensados"]
+        return horarios
+
+    return preparar
@@ -19,6 +19,7 @@ def render_backup_status():
     last_success = None
     last_error = None
     message = "No backups have been run yet."
+    replication = []
     
     try:
         if os.path.exists(status_file):
@@ -28,6 +29,7 @@ def render_backup_status():
                 last_success = data.get('last_success')
                 last_error = data.get('last_error')
                 message = data.get('message', '')
+                replication = data.get('replication', [])
     except Exception as e:
         message = f"Error reading backup status: {e}"
         status = "error"
@@ -60,6 +62,9 @@ def render_backup_status():
         st.markdown("---")
         st.markdown(f"**{icon} Copia de Seguridad**")
         st.caption(message)
+        if replication:
+            ok = sum(1 for remote in replication if remote.get('ok'))
+            st.caption(f"Réplicas: {ok}/{len(replication)} OK")
 
 # For testing outside of Streamlit
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+
+from utils import cache, instrumentacion
+
+
+def render_panel_instrumentacion():
+    """
+    Panel plegable del sidebar (solo admins) con los tiempos del rerun actual.
+
+    El interruptor activa la medición para esta sesión desde el próximo rerun.
+    Con la medición activa, app.py actualiza al final de cada rerun el archivo
+    de métricas de Prometheus (utils.instrumentacion.RUTA_PROMETHEUS), que
+    incluye las estadísticas de los espacios de caché (utils.cache).
+    """
+    with st.sidebar:
+        with st.expander("⏱️ Instrumentación", expanded=False):
+            st.toggle("Medir etapas del rerun", key="instrumentacion_activa",
+                      help="Tiempo, filas y caché de carga de datos, Drive, jornada, gráficos y calendario")
+            if not instrumentacion.activa():
+                st.caption("Medición desactivada.")
+                return
+
+            registros = instrumentacion.registros()
+            st.caption(f"Rerun: {instrumentacion.duracion_rerun() * 1000:.0f} ms · {len(registros)} etapas")
+            if registros:
+                tabla = pd.DataFrame([
+                    {
+                        "Etapa": "  " * r.profundidad + r.nombre,
+                        "ms": round(r.segundos * 1000, 1),
+                        "Filas": r.filas,
+                        "Caché": r.cache or "",
+                    }
+                    for r in registros
+                ])
+                st.dataframe(tabla, hide_index=True, width='stretch')
+
+            espacios = cache.estadisticas()
+            st.caption(f"Caché: {cache.registro().bytes / cache.MB:.1f} de {cache.CACHE_MAX_MB:g} MB")
+            if espacios:
+                tabla_cache = pd.DataFrame([
+                    {
+                        "Espacio": nombre,
+                        "Entradas": datos["entradas"],
+                        "MB": round(datos["bytes"] / cache.MB, 2),
+                        "Aciertos": datos["aciertos"],
+                        "Fallos": datos["fallos"],
+                        "Desalojos": datos["desalojos"] + datos["vencidas"],
+                        "Compartidos": datos["aciertos_compartidos"],
+                    }
+                    for nombre, datos in espacios.items()
+                ])
+                st.dataframe(tabla_cache, hide_index=True, width='stretch')
+            st.caption(f"Métricas: `{instrumentacion.RUTA_PROMETHEUS}`")
@@ -5,6 +5,7 @@ Reemplaza google_sheets_client.py para usar SQLite como almacenamiento local.
 """
 
 import sqlite3
+import time
 import pandas as pd
 import os
 from typing import Optional
@@ -17,6 +18,10 @@ DEFAULT_DB_PATH = "data/gestor.db"
 # Variable de entorno para overrides
 DATABASE_URL = os.getenv("DATABASE_PATH", DEFAULT_DB_PATH)
 
+# Tablas cuyos DataFrames se indexan por rowid de SQLite: el índice es el
+# identificador estable (AUTOINCREMENT, no se reutiliza) que usan las ediciones y bajas
+ROWID_TABLES = {"vacaciones", "compensados"}
+
 
 def get_database_path() -> str:
     """Obtiene la ruta de la base de datos."""
@@ -60,13 +65,14 @@ def get_table_names() -> list:
     return list(SCHEMA.keys())
 
 
-def get_data(table_name: str, db_path: Optional[str] = None) -> pd.DataFrame:
+def get_data(table_name: str, db_path: Optional[str] = None, with_rowid: bool = False) -> pd.DataFrame:
     """
     Obtiene todos los datos de una tabla y los retorna como DataFrame.
     
     Args:
         table_name: Nombre de la tabla
         db_path: Ruta opcional de la base de datos
+        with_rowid: Usar el rowid de SQLite como índice del DataFrame
         
     Returns:
         DataFrame con los datos de la tabla
@@ -76,9 +82,17 @@ def get_data(table_name: str, db_path: Optional[str] = None) -> pd.DataFrame:
     
     conn = get_connection(db_path)
     try:
-        df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+        # Las tablas sin clave primaria ya tienen una columna 'rowid' explícita
+        # (INTEGER PRIMARY KEY AUTOINCREMENT, ver get_create_table_sql)
+        if with_rowid and SCHEMA[table_name].get("primary_key") is not None:
+            query = f'SELECT rowid AS "rowid", * FROM {table_name}'
+        else:
+            query = f"SELECT * FROM {table_name}"
+        df = pd.read_sql_query(query, conn)
         # Normalizar nombres de columnas (eliminar espacios)
         df.columns = [str(c).strip() for c in df.columns]
+        if with_rowid:
+            df = df.set_index("rowid")
         return df
     finally:
         conn.close()
@@ -192,6 +206,95 @@ def delete_data(table_name: str, id_value: str, id_column: str = "ID",
         conn.close()
 
 
+def _quote(column: str) -> str:
+    return f'"{column}"'
+
+
+def insert_record(table_name: str, data: dict, db_path: Optional[str] = None) -> Optional[int]:
+    """
+    Inserta un registro y devuelve su rowid.
+    
+    Returns:
+        rowid del registro nuevo, o None si falló la inserción
+    """
+    if table_name not in SCHEMA:
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el esquema")
+    
+    conn = get_connection(db_path)
+    try:
+        columns = ", ".join(_quote(col) for col in data)
+        placeholders = ", ".join("?" * len(data))
+        with conn:
+            cursor = conn.execute(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", list(data.values()))
+        return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"Error al insertar: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def get_record(table_name: str, rowid: int, db_path: Optional[str] = None) -> Optional[dict]:
+    """Obtiene un registro por rowid (None si no existe)."""
+    if table_name not in SCHEMA:
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el esquema")
+    
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(f"SELECT * FROM {table_name} WHERE rowid = ?", (int(rowid),)).fetchone()
+        return dict(row) if row is not None else None
+    finally:
+        conn.close()
+
+
+def update_record(table_name: str, rowid: int, data: dict, db_path: Optional[str] = None) -> bool:
+    """
+    Actualiza las columnas indicadas de un registro con una sola sentencia por rowid.
+    
+    Returns:
+        True si se actualizó el registro
+    """
+    if table_name not in SCHEMA:
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el esquema")
+    if not data:
+        return False
+    
+    conn = get_connection(db_path)
+    try:
+        assignments = ", ".join(f"{_quote(col)} = ?" for col in data)
+        with conn:
+            cursor = conn.execute(f"UPDATE {table_name} SET {assignments} WHERE rowid = ?",
+                                  [*data.values(), int(rowid)])
+        return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f"Error al actualizar: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def delete_record(table_name: str, rowid: int, db_path: Optional[str] = None) -> bool:
+    """
+    Elimina un registro por rowid.
+    
+    Returns:
+        True si se eliminó el registro
+    """
+    if table_name not in SCHEMA:
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el esquema")
+    
+    conn = get_connection(db_path)
+    try:
+        with conn:
+            cursor = conn.execute(f"DELETE FROM {table_name} WHERE rowid = ?", (int(rowid),))
+        return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f"Error al eliminar: {e}")
+        return False
+    finally:
+        conn.close()
+
+
 def row_count(table_name: str, db_path: Optional[str] = None) -> int:
     """Retorna la cantidad de registros en una tabla."""
     if table_name not in SCHEMA:
@@ -266,15 +369,14 @@ def import_from_dataframe(table_name: str, df: pd.DataFrame,
         # Normalizar nombres de columnas
         df.columns = [str(c).strip() for c in df.columns]
         
-        # Insertar los datos
-        for _, row in df.iterrows():
-            data = row.to_dict()
-            columns = list(data.keys())
-            # Wrap column names with spaces in quotes
-            columns_quoted = [f'"{col}"' if ' ' in col else col for col in columns]
-            placeholders = ["?"] * len(columns)
+        # Insertar todas las filas con una sola sentencia preparada; los
+        # valores se pasan a tipos de Python (sqlite3 no acepta numpy) y NaN a NULL
+        if len(df.columns) and len(df):
+            columns_quoted = [_quote(col) for col in df.columns]
+            placeholders = ["?"] * len(df.columns)
             sql = f"INSERT INTO {table_name} ({', '.join(columns_quoted)}) VALUES ({', '.join(placeholders)})"
-            cursor.execute(sql, list(data.values()))
+            values = df.astype(object).where(df.notna(), None)
+            cursor.executemany(sql, values.itertuples(index=False, name=None))
         
         conn.commit()
         return True
@@ -286,6 +388,115 @@ def import_from_dataframe(table_name: str, df: pd.DataFrame,
         conn.close()
 
 
+def _texto_comparable(df: pd.DataFrame) -> pd.DataFrame:
+    """Valores como texto (NULL/NaN como marca aparte) para comparar filas de la hoja y de la base."""
+    return df.astype(str).where(df.notna(), "\x00")
+
+
+def _hash_filas(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def _hash_claves(texto: pd.DataFrame, key_columns: list) -> pd.Series:
+    """
+    Hash de la clave natural de cada fila. Las claves repetidas se numeran en
+    orden de aparición, así la n-ésima repetición de la hoja se corresponde con
+    la n-ésima de la base.
+    """
+    claves = texto[key_columns].copy()
+    claves["_ocurrencia"] = claves.groupby(key_columns, sort=False).cumcount()
+    return _hash_filas(claves)
+
+
+def sync_from_dataframe(table_name: str, df: pd.DataFrame, key_columns: list,
+                        db_path: Optional[str] = None) -> Optional[dict]:
+    """
+    Sincroniza la tabla con un DataFrame aplicando solo las diferencias.
+    
+    Las filas se emparejan por su clave natural ('key_columns') y se comparan
+    por el hash de sus valores: se insertan las nuevas, se actualizan las que
+    cambiaron y se borran las que ya no están, todo en una transacción. Las
+    filas iguales no se tocan.
+    
+    Args:
+        table_name: Nombre de la tabla
+        df: DataFrame con el contenido completo que debe quedar en la tabla
+        key_columns: Columnas que identifican cada fila
+        db_path: Ruta opcional de la base de datos
+        
+    Returns:
+        Diccionario con inserted, updated, deleted, unchanged y seconds, o
+        None si hubo un error (la tabla queda sin cambios)
+    """
+    if table_name not in SCHEMA:
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el esquema")
+    
+    inicio = time.perf_counter()
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    faltantes = [c for c in key_columns if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Columnas clave ausentes en los datos de '{table_name}': {faltantes}")
+    columns = list(df.columns)
+    
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    try:
+        existing = pd.read_sql_query(
+            f'SELECT rowid AS "_rowid", {", ".join(_quote(c) for c in columns)} FROM {table_name}', conn
+        )
+        texto_existente = _texto_comparable(existing[columns])
+        texto_nuevo = _texto_comparable(df[columns])
+        
+        actuales = pd.DataFrame({
+            "clave": _hash_claves(texto_existente, key_columns).to_numpy(),
+            "hash": _hash_filas(texto_existente).to_numpy(),
+            "rowid": existing["_rowid"].to_numpy(),
+        })
+        nuevas = pd.DataFrame({
+            "clave": _hash_claves(texto_nuevo, key_columns).to_numpy(),
+            "hash": _hash_filas(texto_nuevo).to_numpy(),
+            "posicion": range(len(df)),
+        })
+        cruce = actuales.merge(nuevas, on="clave", how="outer", indicator=True)
+        
+        borrar = cruce.loc[cruce["_merge"] == "left_only", "rowid"].astype(int).tolist()
+        insertar = cruce.loc[cruce["_merge"] == "right_only", "posicion"].astype(int).sort_values().tolist()
+        cambiadas = cruce[(cruce["_merge"] == "both") & (cruce["hash_x"] != cruce["hash_y"])]
+        
+        valores = df.astype(object).where(df.notna(), None)
+        # Primero las bajas, para que una clave primaria que cambió no choque con la nueva fila
+        cursor.executemany(f"DELETE FROM {table_name} WHERE rowid = ?", [(rowid,) for rowid in borrar])
+        asignaciones = ", ".join(f"{_quote(c)} = ?" for c in columns)
+        cursor.executemany(
+            f"UPDATE {table_name} SET {asignaciones} WHERE rowid = ?",
+            [
+                tuple(valores.iloc[int(posicion)]) + (int(rowid),)
+                for posicion, rowid in zip(cambiadas["posicion"], cambiadas["rowid"])
+            ],
+        )
+        placeholders = ", ".join(["?"] * len(columns))
+        cursor.executemany(
+            f"INSERT INTO {table_name} ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})",
+            valores.iloc[insertar].itertuples(index=False, name=None),
+        )
+        conn.commit()
+    except Exception as e:
+        print(f"Error al sincronizar: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+    
+    return {
+        "inserted": len(insertar),
+        "updated": len(cambiadas),
+        "deleted": len(borrar),
+        "unchanged": int((cruce["_merge"] == "both").sum()) - len(cambiadas),
+        "seconds": round(time.perf_counter() - inicio, 3),
+    }
+
+
 # Funciones de compatibilidad con la API anterior (google_sheets_client)
 # Estas funciones mantienen la misma interfaz para minimizar cambios en el código
 
@@ -296,9 +507,16 @@ class DatabaseClient:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or get_database_path()
         
-    def get_table(self, table_name: str):
-        """Retorna un DataFrame con los datos de la tabla."""
-        return get_data(table_name, self.db_path)
+    def get_table(self, table_name: str, with_rowid: Optional[bool] = None):
+        """
+        Retorna un DataFrame con los datos de la tabla.
+        
+        Las tablas de ROWID_TABLES se devuelven indexadas por rowid salvo que
+        se indique lo contrario.
+        """
+        if with_rowid is None:
+            with_rowid = table_name in ROWID_TABLES
+        return get_data(table_name, self.db_path, with_rowid=with_rowid)
     
     def update_cell_by_id(self, table_name: str, id_to_find: str, column_name: str, new_value: any) -> bool:
         """Actualiza una celda buscando por ID."""
@@ -320,6 +538,18 @@ TABLE_NAMES = {
     "Feriados_Manuales": "feriados",
 }
 
+# Espacios de utils.cache derivados de cada tabla: se invalidan al refrescarla
+CACHES_POR_TABLA = {
+    "feriados": ("calendario_laboral",),
+}
+
+
+def invalidar_caches_de(table_name: str) -> None:
+    """Invalida los espacios de caché que dependen de la tabla."""
+    from utils.cache import invalidar
+    for nombre in CACHES_POR_TABLA.get(table_name, ()):
+        invalidar(nombre)
+
 
 def connect_to_database():
     """Conecta a la base de datos SQLite. Compatible con connect_to_google_sheets()."""
@@ -329,12 +559,22 @@ def connect_to_database():
 def init_session_state(client):
     """Inicializa el estado de la sesión para cada tabla. Compatible con google_sheets_client.init_session_state()."""
     import streamlit as st
+    from utils.instrumentacion import etapa
     sheets = ["Tareas", "Vacaciones", "Compensados", "Personal", "Eventos", "Feriados_Manuales"]
-    for sheet_name in sheets:
-        session_key = f"df_{sheet_name.lower()}"
-        if session_key not in st.session_state:
-            df = client.get_table(TABLE_NAMES.get(sheet_name, sheet_name.lower()))
-            st.session_state[session_key] = df
+    # Acierto de caché: todas las tablas ya estaban en la sesión
+    with etapa("db.init_session_state", cache=True) as medicion:
+        filas = 0
+        for sheet_name in sheets:
+            session_key = f"df_{sheet_name.lower()}"
+            if session_key not in st.session_state:
+                table_name = TABLE_NAMES.get(sheet_name, sheet_name.lower())
+                with etapa(f"db.cargar.{table_name}") as carga:
+                    df = client.get_table(table_name)
+                    carga.filas = len(df)
+                st.session_state[session_key] = df
+                medicion.marcar_miss()
+                filas += len(df)
+        medicion.filas = filas
 
 
 def get_sheet(client, sheet_name):
@@ -379,6 +619,41 @@ class TableWrapper:
         
         return success
     
+    def _row_dict(self, values) -> dict:
+        """Convierte una lista de valores (en el orden del esquema) en diccionario."""
+        if isinstance(values, dict):
+            return dict(values)
+        columns = [col[0] for col in SCHEMA.get(self.table_name, {}).get("columns", [])]
+        return dict(zip(columns, values))
+
+    def append_record(self, values) -> Optional[int]:
+        """
+        Agrega un registro y lo suma al DataFrame de la sesión sin recargar la tabla.
+        
+        Returns:
+            rowid del registro nuevo, o None si falló
+        """
+        data = self._row_dict(values)
+        rowid = insert_record(self.table_name, data, getattr(self.client, "db_path", None))
+        if rowid is not None:
+            patch_session_row(self.table_name, rowid, data)
+        return rowid
+
+    def update_record(self, rowid, values) -> bool:
+        """Actualiza un registro por rowid y lo corrige en el DataFrame de la sesión."""
+        data = self._row_dict(values)
+        ok = update_record(self.table_name, rowid, data, getattr(self.client, "db_path", None))
+        if ok:
+            patch_session_row(self.table_name, rowid, data)
+        return ok
+
+    def delete_record(self, rowid) -> bool:
+        """Elimina un registro por rowid y lo quita del DataFrame de la sesión."""
+        ok = delete_record(self.table_name, rowid, getattr(self.client, "db_path", None))
+        if ok:
+            drop_session_row(self.table_name, rowid)
+        return ok
+
     def update_cell(self, row, col, value):
         """Actualiza una celda específica por fila y columna."""
         from database import get_data, update_data, table_exists
@@ -424,12 +699,47 @@ def get_sheet_data(client, sheet_name):
     return client.get_table(table_name)
 
 
+def _session_key(table_name: str) -> str:
+    """Clave de st.session_state del DataFrame de una tabla."""
+    sheet_name = {v: k for k, v in TABLE_NAMES.items()}.get(table_name, table_name)
+    return f"df_{sheet_name.lower()}"
+
+
+def patch_session_row(table_name: str, rowid: int, data: dict) -> bool:
+    """
+    Inserta o corrige una fila (por rowid) del DataFrame de la sesión, en su lugar.
+    
+    Returns:
+        True si había un DataFrame indexado por rowid para corregir
+    """
+    import streamlit as st
+    df = st.session_state.get(_session_key(table_name))
+    if df is None or df.index.name != "rowid":
+        return False
+    columns = [col for col in data if col in df.columns]
+    if rowid in df.index:
+        df.loc[rowid, columns] = [data[col] for col in columns]
+    else:
+        df.loc[rowid] = [data.get(col) for col in df.columns]
+    return True
+
+
+def drop_session_row(table_name: str, rowid: int) -> bool:
+    """Quita una fila (por rowid) del DataFrame de la sesión, en su lugar."""
+    import streamlit as st
+    df = st.session_state.get(_session_key(table_name))
+    if df is None or df.index.name != "rowid" or rowid not in df.index:
+        return False
+    df.drop(index=rowid, inplace=True)
+    return True
+
+
 def refresh_data(client, sheet_name):
     """Refresca los datos de una tabla específica en el estado de la sesión."""
     import streamlit as st
     table_name = TABLE_NAMES.get(sheet_name, sheet_name.lower())
     st.session_state[f"df_{sheet_name.lower()}"] = client.get_table(table_name)
-    st.cache_data.clear()
+    invalidar_caches_de(table_name)
 
 
 def refresh_all_data(client):
@@ -439,7 +749,7 @@ def refresh_all_data(client):
     for sheet_name in sheets:
         table_name = TABLE_NAMES.get(sheet_name, sheet_name.lower())
         st.session_state[f"df_{sheet_name.lower()}"] = client.get_table(table_name)
-    st.cache_data.clear()
+        invalidar_caches_de(table_name)
 
 
 def update_cell_by_id(client, sheet_name, id_to_find, column_name, new_value):
@@ -75,6 +75,33 @@ SCHEMA = {
         "primary_key": "Fecha",
         "description": "Feriados manuales"
     },
+    "feriados_nacionales": {
+        "columns": [
+            ("Fecha", "TEXT"),
+            ("Nombre", "TEXT"),
+            ("Tipo", "TEXT"),
+            ("Año", "INTEGER"),
+        ],
+        "primary_key": "Fecha",
+        "description": "Copia local de los feriados nacionales (API argentinadatos)"
+    },
+    "feriados_nacionales_anios": {
+        "columns": [
+            ("Año", "INTEGER"),
+            ("Actualizado", "TEXT"),
+        ],
+        "primary_key": "Año",
+        "description": "Años de feriados nacionales descargados y fecha de la última actualización"
+    },
+    "cotizaciones_historicas": {
+        "columns": [
+            ("Casa", "TEXT"),
+            ("Fecha", "TEXT"),
+            ("Datos", "TEXT"),
+        ],
+        "primary_key": ["Casa", "Fecha"],
+        "description": "Cotizaciones diarias ya cerradas (JSON de la API; NULL si ese día no hubo cotización)"
+    },
 }
 
 # SQL para crear todas las tablas
@@ -4,7 +4,12 @@ Script de migración de datos desde Google Sheets hacia SQLite
 Este script exporta los datos de Google Sheets y los importa a la base de datos SQLite.
 
 Uso:
-    python migrations/migrate_from_sheets.py
+    python migrations/migrate_from_sheets.py [--reiniciar] [--delta]
+
+Si la migración se interrumpe, al volver a ejecutarla continúa con las hojas
+que faltaban (ver CHECKPOINT_PATH). --reiniciar migra todo de nuevo.
+--delta inserta, actualiza o borra solo las filas que cambiaron (según la
+clave natural de cada tabla, ver SYNC_KEYS) en lugar de reemplazar las tablas.
 
 Para ejecutar este script necesitas:
     - Archivo credenciales.json de Google Cloud
@@ -13,12 +18,21 @@ Para ejecutar este script necesitas:
 
 import sys
 import os
+import json
+import argparse
+from typing import Optional
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
-from database import init_db, get_data, import_from_dataframe, row_count
+import time
+from database import init_db, import_from_dataframe, sync_from_dataframe
 from database_schema import SCHEMA
 
+SPREADSHEET_NAME = "GestorProyectosStreamlit"
+# Progreso de la migración, para retomar una ejecución interrumpida
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "data", "migracion_checkpoint.json")
+
 # Hojas a migrar (ordenadas por prioridad)
 SHEETS_TO_MIGRATE = [
     "Vacaciones", 
@@ -35,6 +49,24 @@ SHEET_TO_TABLE_MAP = {
     "Feriados_Manuales": "feriados",
 }
 
+# Clave natural de cada tabla para la sincronización incremental (--delta).
+# Las tablas que no están acá usan su clave primaria.
+SYNC_KEYS = {
+    "vacaciones": ["Apellido, Nombres", "Fecha inicio"],
+    "compensados": ["Apellido, Nombres", "Desde fecha"],
+    "personal": ["ID"],
+}
+
+
+def sync_key(table_name: str) -> list:
+    """Columnas que identifican cada fila de la tabla al sincronizar."""
+    if table_name in SYNC_KEYS:
+        return SYNC_KEYS[table_name]
+    primary_key = SCHEMA[table_name].get("primary_key")
+    if primary_key is None:
+        raise ValueError(f"La tabla '{table_name}' no tiene clave para sincronizar")
+    return [primary_key]
+
 
 def connect_to_google_sheets():
     """Conecta a Google Sheets."""
@@ -49,66 +81,179 @@ def connect_to_google_sheets():
         return None
 
 
-def get_sheet_data(client, sheet_name: str) -> pd.DataFrame:
-    """Obtiene los datos de una hoja de cálculo."""
+def _numericise(valor):
+    """Convierte números como lo hace get_all_records de gspread."""
+    if not isinstance(valor, str) or valor == "" or "_" in valor:
+        return valor
     try:
-        sheet = client.open("GestorProyectosStreamlit").worksheet(sheet_name)
-        df = pd.DataFrame(sheet.get_all_records())
-        # Solo limpiar espacios al inicio/final
-        df.columns = [str(c).strip() for c in df.columns]
-        return df
-    except Exception as e:
-        print(f"Error al obtener datos de '{sheet_name}': {e}")
+        return int(valor)
+    except ValueError:
+        pass
+    if any(c.isdigit() for c in valor):
+        try:
+            return float(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+def valores_a_dataframe(valores: list) -> pd.DataFrame:
+    """
+    Convierte los valores de una hoja (primera fila = encabezados) en un
+    DataFrame equivalente al de get_all_records.
+    
+    La API omite las celdas vacías al final de cada fila, así que las filas
+    se completan con "". Las columnas sin encabezado se descartan.
+    """
+    if not valores:
         return pd.DataFrame()
+    encabezados = [str(c).strip() for c in valores[0]]
+    ancho = len(encabezados)
+    filas = [
+        [_numericise(v) for v in (fila + [""] * (ancho - len(fila)))[:ancho]]
+        for fila in valores[1:]
+    ]
+    df = pd.DataFrame(filas, columns=encabezados)
+    return df.loc[:, [c != "" for c in encabezados]]
 
 
-def migrate_sheet(client, sheet_name: str) -> dict:
+def leer_hojas(spreadsheet, sheet_names: list) -> dict:
     """
-    Migra los datos de una hoja de Google Sheets a SQLite.
+    Lee todas las hojas pedidas con una única llamada a la API
+    (values_batch_get).
     
     Returns:
-        Diccionario con estadísticas de la migración
+        Diccionario {nombre de hoja: DataFrame}
     """
-    table_name = SHEET_TO_TABLE_MAP.get(sheet_name, sheet_name.lower())
+    rangos = [f"'{nombre}'" for nombre in sheet_names]
+    respuesta = spreadsheet.values_batch_get(rangos)
+    rangos_leidos = respuesta.get("valueRanges", [])
+    return {
+        nombre: valores_a_dataframe(rango.get("values", []))
+        for nombre, rango in zip(sheet_names, rangos_leidos)
+    }
+
+
+def cargar_checkpoint(checkpoint_path: str) -> dict:
+    """Hojas ya migradas en una ejecución anterior interrumpida."""
+    try:
+        with open(checkpoint_path) as f:
+            return json.load(f).get("completadas", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_checkpoint(checkpoint_path: str, completadas: dict) -> None:
+    """Guarda el progreso de forma atómica."""
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    temporal = checkpoint_path + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump({"spreadsheet": SPREADSHEET_NAME, "completadas": completadas}, f, indent=2)
+    os.replace(temporal, checkpoint_path)
+
+
+def migrate_sheet(sheet_name: str, df_gs: pd.DataFrame, db_path: Optional[str] = None,
+                  delta: bool = False) -> dict:
+    """
+    Importa a SQLite los datos ya leídos de una hoja, en una sola transacción.
     
-    # Verificar que la tabla existe en el esquema
-    if table_name not in SCHEMA:
-        print(f"  ⚠️ Tabla '{table_name}' no encontrada en el esquema, saltando...")
-        return {"status": "skipped", "reason": "table not in schema"}
+    Con delta=True solo se aplican las diferencias con lo que ya hay en la
+    tabla (ver sync_from_dataframe); si no, la tabla se reemplaza completa.
     
-    # Obtener datos de Google Sheets
-    print(f"  📥 Obteniendo datos de '{sheet_name}'...")
-    df_gs = get_sheet_data(client, sheet_name)
+    Returns:
+        Diccionario con estadísticas de la migración
+    """
+    table_name = SHEET_TO_TABLE_MAP.get(sheet_name, sheet_name.lower())
     
     if df_gs.empty:
         print(f"  ⚠️ No hay datos en '{sheet_name}', saltando...")
-        return {"status": "skipped", "reason": "empty sheet"}
+        return {"status": "skipped", "sheet": sheet_name, "reason": "empty sheet"}
     
-    print(f"  📊 {len(df_gs)} registros encontrados")
+    resultado = {
+        "status": "success",
+        "sheet": sheet_name,
+        "table": table_name,
+        "records": len(df_gs),
+    }
+    inicio = time.perf_counter()
+    if delta:
+        print(f"  🔄 Sincronizando {len(df_gs)} registros de '{sheet_name}' con '{table_name}'...")
+        try:
+            cambios = sync_from_dataframe(table_name, df_gs, sync_key(table_name), db_path)
+        except ValueError as e:
+            print(f"  ❌ {e}")
+            cambios = None
+        if cambios is None:
+            return {"status": "failed", "sheet": sheet_name, "reason": "sync error"}
+        resultado.update(cambios)
+        print(f"  ✅ '{sheet_name}': {cambios['inserted']} nuevos, {cambios['updated']} modificados, "
+              f"{cambios['deleted']} eliminados, {cambios['unchanged']} sin cambios ({cambios['seconds']}s)")
+        return resultado
     
-    # Contar registros antes
-    count_before = row_count(table_name)
+    print(f"  💾 Importando {len(df_gs)} registros de '{sheet_name}' en '{table_name}'...")
+    if not import_from_dataframe(table_name, df_gs, db_path):
+        return {"status": "failed", "sheet": sheet_name, "reason": "import error"}
     
-    # Importar a SQLite
-    print(f"  💾 Importando a SQLite...")
-    success = import_from_dataframe(table_name, df_gs)
+    resultado["seconds"] = round(time.perf_counter() - inicio, 3)
+    print(f"  ✅ '{sheet_name}' migrada: {len(df_gs)} registros ({resultado['seconds']}s)")
+    return resultado
+
+
+def migrate_sheets(client, sheet_names: list = SHEETS_TO_MIGRATE, db_path: Optional[str] = None,
+                   checkpoint_path: str = CHECKPOINT_PATH, reiniciar: bool = False,
+                   delta: bool = False) -> list:
+    """
+    Migra las hojas indicadas abriendo el documento una sola vez y leyendo
+    todas las hojas pendientes con un único pedido.
     
-    if not success:
-        return {"status": "failed", "reason": "import error"}
+    Cada hoja migrada se registra en el checkpoint; si la ejecución se
+    interrumpe, la siguiente continúa con las hojas que faltaban. Cuando
+    todas terminan bien el checkpoint se borra.
     
-    # Contar registros después
-    count_after = row_count(table_name)
+    Args:
+        client: Cliente de gspread (o uno equivalente con open/values_batch_get)
+        reiniciar: Ignorar el checkpoint y migrar todo de nuevo
+        delta: Aplicar solo las diferencias en lugar de reemplazar cada tabla
     
-    print(f"  ✅ Migración completada: {count_before} → {count_after} registros")
+    Returns:
+        Lista con el resultado de cada hoja
+    """
+    completadas = {} if reiniciar else cargar_checkpoint(checkpoint_path)
+    resultados = {}
+    pendientes = []
+    for sheet_name in sheet_names:
+        table_name = SHEET_TO_TABLE_MAP.get(sheet_name, sheet_name.lower())
+        if table_name not in SCHEMA:
+            print(f"  ⚠️ Tabla '{table_name}' no encontrada en el esquema, saltando...")
+            resultados[sheet_name] = {"status": "skipped", "sheet": sheet_name, "reason": "table not in schema"}
+        elif sheet_name in completadas:
+            print(f"  ⏭️ '{sheet_name}' ya migrada en una ejecución anterior")
+            resultados[sheet_name] = {**completadas[sheet_name], "from_checkpoint": True}
+        else:
+            pendientes.append(sheet_name)
     
-    return {
-        "status": "success",
-        "sheet": sheet_name,
-        "table": table_name,
-        "records": len(df_gs),
-        "count_before": count_before,
-        "count_after": count_after,
-    }
+    if pendientes:
+        print(f"  📥 Obteniendo {len(pendientes)} hoja(s) en un solo pedido...")
+        try:
+            datos = leer_hojas(client.open(SPREADSHEET_NAME), pendientes)
+        except Exception as e:
+            print(f"  ❌ Error al obtener datos de Google Sheets: {e}")
+            datos = {}
+        
+        for sheet_name in pendientes:
+            if sheet_name not in datos:
+                resultados[sheet_name] = {"status": "failed", "sheet": sheet_name, "reason": "fetch error"}
+                continue
+            resultado = migrate_sheet(sheet_name, datos[sheet_name], db_path, delta)
+            resultados[sheet_name] = resultado
+            if resultado["status"] == "success":
+                completadas[sheet_name] = resultado
+                guardar_checkpoint(checkpoint_path, completadas)
+    
+    lista = [resultados[sheet_name] for sheet_name in sheet_names]
+    if all(r["status"] != "failed" for r in lista) and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return lista
 
 
 def verify_migration(results: list) -> dict:
@@ -139,7 +284,7 @@ def verify_migration(results: list) -> dict:
     }
 
 
-def main():
+def main(reiniciar: bool = False, delta: bool = False):
     """Función principal de migración."""
     print("=" * 60)
     print("MIGRACIÓN: Google Sheets → SQLite")
@@ -163,12 +308,7 @@ def main():
     
     # Paso 3: Migrar cada hoja
     print("\n[3/3] Migrando datos...")
-    results = []
-    
-    for i, sheet_name in enumerate(SHEETS_TO_MIGRATE, 1):
-        print(f"\n  [{i}/{len(SHEETS_TO_MIGRATE)}] Migrando '{sheet_name}'...")
-        result = migrate_sheet(client, sheet_name)
-        results.append(result)
+    results = migrate_sheets(client, SHEETS_TO_MIGRATE, reiniciar=reiniciar, delta=delta)
     
     # Resumen
     print("\n" + "=" * 60)
@@ -181,6 +321,11 @@ def main():
     print(f"Total de registros migrados: {verification['total_records']}")
     print(f"Exitosos: {verification['successful']}")
     print(f"Fallidos: {verification['failed']}")
+    if delta:
+        for result in results:
+            if result.get("status") == "success" and "inserted" in result:
+                print(f"  {result['table']}: +{result['inserted']} ~{result['updated']} -{result['deleted']} "
+                      f"={result['unchanged']} ({result['seconds']}s)")
     
     if verification['failed'] == 0:
         print("\n🎉 ¡Migración completada exitosamente!")
@@ -192,4 +337,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Migración de Google Sheets a SQLite")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignorar el progreso guardado y migrar todo")
+    parser.add_argument("--delta", action="store_true",
+                        help="Aplicar solo las diferencias en lugar de reemplazar cada tabla")
+    args = parser.parse_args()
+    main(args.reiniciar, args.delta)
\ No newline at end of file
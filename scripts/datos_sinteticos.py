@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos a escala de producción.
+
+Produce, a partir de una semilla, siempre los mismos datos:
+
+- Una base ``gestor.db`` con personal, vacaciones, ausencias (compensados),
+  eventos y feriados manuales, con el mismo formato que cargan los formularios.
+- Archivos CSV mensuales de marcaciones con el formato de los que se leen de
+  Google Drive en Horarios (``id_empleado, fecha_hora, tipo, fecha, hora``),
+  mezclando registros de RELOJ y de LIBRO, con marcas impares y duplicadas.
+
+Uso:
+    python scripts/datos_sinteticos.py --escala media --salida /tmp/datos
+    python scripts/datos_sinteticos.py --empleados 500 --anios 5 --semilla 7
+
+Desde código (benchmarks, pruebas de carga):
+    from scripts.datos_sinteticos import ESCALAS, generar
+    resumen = generar("/tmp/datos", ESCALAS["grande"])
+"""
+
+import argparse
+import os
+import sys
+from dataclasses import dataclass, replace, asdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from database import import_from_dataframe, init_db
+
+APELLIDOS = [
+    "Acosta", "Aguirre", "Álvarez", "Benítez", "Blanco", "Cabrera", "Castro", "Díaz", "Domínguez",
+    "Fernández", "Flores", "Giménez", "Gómez", "González", "Gutiérrez", "Herrera", "Juárez", "López",
+    "Martínez", "Medina", "Molina", "Morales", "Muñoz", "Núñez", "Ortiz", "Pereyra", "Pérez", "Ramírez",
+    "Ríos", "Rodríguez", "Rojas", "Romero", "Ruiz", "Sánchez", "Silva", "Sosa", "Suárez", "Torres",
+    "Vega", "Villalba",
+]
+NOMBRES = [
+    "Ana", "Andrés", "Carla", "Carlos", "Cecilia", "Diego", "Elena", "Emiliano", "Florencia", "Gabriel",
+    "Graciela", "Hernán", "Inés", "Javier", "Julia", "Lucas", "Lucía", "Marcela", "Martín", "Mariana",
+    "Natalia", "Nicolás", "Pablo", "Paula", "Roberto", "Romina", "Santiago", "Silvia", "Tomás", "Valeria",
+]
+TIPOS_AUSENCIA = [
+    "Compensatorio", "Certificado médico", "Permiso gremial", "Estudios",
+    "Franco compensatorio por feriado trabajado", "Otro",
+]
+MOTIVOS_FERIADO = ["Asueto administrativo", "Feriado provincial", "Día del trabajador del Observatorio"]
+
+
+@dataclass(frozen=True)
+class Escala:
+    """Parámetros del volumen y las características de los datos generados."""
+    empleados: int = 60
+    anios: int = 3
+    # Último día del histórico (fijo, para que los datos no dependan de la fecha actual)
+    fin: date = date(2025, 12, 31)
+    licencias_por_anio: int = 3
+    ausencias_por_anio: int = 6
+    eventos_por_anio: int = 24
+    feriados_por_anio: int = 3
+    # Marcaciones
+    marcas_por_dia: int = 4
+    meses_marcas: int = 6
+    tasa_inasistencia: float = 0.05
+    proporcion_libro: float = 0.3
+    tasa_impares: float = 0.03
+    tasa_duplicados: float = 0.02
+    semilla: int = 42
+
+
+ESCALAS = {
+    "chica": Escala(empleados=10, anios=1, meses_marcas=1),
+    "media": Escala(),
+    "grande": Escala(empleados=300, anios=5, meses_marcas=12),
+}
+
+
+def _fechas_iso(fechas) -> np.ndarray:
+    return pd.DatetimeIndex(fechas).strftime("%Y-%m-%d").to_numpy()
+
+
+def _dias_aleatorios(rng, desde: pd.Timestamp, hasta: pd.Timestamp, cantidad: int) -> pd.DatetimeIndex:
+    dias = rng.integers(0, (hasta - desde).days + 1, cantidad)
+    return desde + pd.to_timedelta(dias, unit="D")
+
+
+def generar_personal(escala: Escala, rng) -> pd.DataFrame:
+    """Personal con nombres únicos, ID numérico y fechas de nacimiento e ingreso."""
+    combinaciones = len(APELLIDOS) * len(NOMBRES)
+    elegidas = rng.permutation(max(combinaciones, escala.empleados))[:escala.empleados]
+    nombres = []
+    for orden, indice in enumerate(elegidas):
+        apellido = APELLIDOS[indice % combinaciones // len(NOMBRES)]
+        nombre = NOMBRES[indice % len(NOMBRES)]
+        # Con más empleados que combinaciones, se agrega un segundo nombre numerado
+        sufijo = f" {indice // combinaciones + 1}" if indice >= combinaciones else ""
+        nombres.append(f"{apellido}, {nombre}{sufijo}")
+    fin = pd.Timestamp(escala.fin)
+    nacimiento = _dias_aleatorios(rng, pd.Timestamp("1960-01-01"), pd.Timestamp("2001-12-31"), escala.empleados)
+    ingreso = _dias_aleatorios(rng, pd.Timestamp("2000-01-01"), fin, escala.empleados)
+    return pd.DataFrame({
+        "Apellido, Nombres": nombres,
+        "Fecha de nacimiento": _fechas_iso(nacimiento),
+        "Fecha ingreso PAO": _fechas_iso(ingreso),
+        "ID": [str(i + 1) for i in range(escala.empleados)],
+    })
+
+
+def _anios(escala: Escala) -> list:
+    return list(range(escala.fin.year - escala.anios + 1, escala.fin.year + 1))
+
+
+def generar_vacaciones(personal: pd.DataFrame, escala: Escala, rng) -> pd.DataFrame:
+    """Licencias de 5 a 15 días por empleado y año."""
+    por_anio = len(personal) * escala.licencias_por_anio
+    bloques = []
+    for anio in _anios(escala):
+        inicio = _dias_aleatorios(rng, pd.Timestamp(anio, 1, 1), pd.Timestamp(anio, 12, 10), por_anio)
+        duracion = rng.integers(5, 16, por_anio)
+        solicitud = inicio - pd.to_timedelta(rng.integers(5, 41, por_anio), unit="D")
+        otros = rng.random(por_anio) < 0.2
+        bloques.append(pd.DataFrame({
+            "Apellido, Nombres": np.repeat(personal["Apellido, Nombres"].to_numpy(), escala.licencias_por_anio),
+            "Fecha solicitud": _fechas_iso(solicitud),
+            "Tipo": np.where(otros, "Otros", f"Licencia Ordinaria {anio}"),
+            "Fecha inicio": _fechas_iso(inicio),
+            "Fecha regreso": _fechas_iso(inicio + pd.to_timedelta(duracion, unit="D")),
+            "Observaciones": np.where(rng.random(por_anio) < 0.1, "Pendientes: 2", ""),
+        }))
+    return pd.concat(bloques, ignore_index=True).sort_values("Fecha inicio", kind="stable", ignore_index=True)
+
+
+def _horas(minutos: np.ndarray) -> np.ndarray:
+    return np.char.add(np.char.add(np.char.zfill((minutos // 60).astype(str), 2), ":"),
+                       np.char.zfill((minutos % 60).astype(str), 2))
+
+
+def generar_compensados(personal: pd.DataFrame, escala: Escala, rng) -> pd.DataFrame:
+    """Ausencias de día completo o por horas."""
+    por_anio = len(personal) * escala.ausencias_por_anio
+    bloques = []
+    for anio in _anios(escala):
+        desde = _dias_aleatorios(rng, pd.Timestamp(anio, 1, 1), pd.Timestamp(anio, 12, 31), por_anio)
+        por_horas = rng.random(por_anio) < 0.5
+        inicio = rng.integers(8 * 4, 14 * 4, por_anio) * 15
+        fin = inicio + rng.integers(1, 5, por_anio) * 60
+        bloques.append(pd.DataFrame({
+            "Apellido, Nombres": np.repeat(personal["Apellido, Nombres"].to_numpy(), escala.ausencias_por_anio),
+            "Fecha Solicitud": _fechas_iso(desde - pd.to_timedelta(rng.integers(0, 15, por_anio), unit="D")),
+            "Tipo": rng.choice(TIPOS_AUSENCIA, por_anio),
+            "Desde fecha": _fechas_iso(desde),
+            "Desde hora": np.where(por_horas, _horas(inicio), ""),
+            "Hasta fecha": _fechas_iso(desde),
+            "Hasta hora": np.where(por_horas, _horas(fin), ""),
+        }))
+    return pd.concat(bloques, ignore_index=True).sort_values("Desde fecha", kind="stable", ignore_index=True)
+
+
+def generar_eventos(escala: Escala, rng) -> pd.DataFrame:
+    """Eventos de calendario, la mitad con horario."""
+    cantidad = escala.eventos_por_anio * escala.anios
+    anios = _anios(escala)
+    desde = _dias_aleatorios(rng, pd.Timestamp(anios[0], 1, 1), pd.Timestamp(escala.fin), cantidad)
+    duracion = rng.integers(0, 3, cantidad)
+    con_horario = rng.random(cantidad) < 0.5
+    inicio = rng.integers(8, 16, cantidad) * 60
+    return pd.DataFrame({
+        "Nombre del Evento": [f"Evento {i + 1}" for i in range(cantidad)],
+        "Fecha Solicitud": _fechas_iso(desde - pd.to_timedelta(7, unit="D")),
+        "Tipo": rng.choice(["Reunión", "Visita", "Capacitación", "Mantenimiento"], cantidad),
+        "Desde fecha": _fechas_iso(desde),
+        "Desde hora": np.where(con_horario, _horas(inicio), ""),
+        "Hasta fecha": _fechas_iso(desde + pd.to_timedelta(duracion, unit="D")),
+        "Hasta hora": np.where(con_horario, _horas(inicio + 120), ""),
+    }).sort_values("Desde fecha", kind="stable", ignore_index=True)
+
+
+def generar_feriados(escala: Escala, rng) -> pd.DataFrame:
+    """Feriados manuales en días hábiles distintos."""
+    anios = _anios(escala)
+    dias = pd.bdate_range(pd.Timestamp(anios[0], 1, 1), pd.Timestamp(escala.fin))
+    cantidad = min(escala.feriados_por_anio * escala.anios, len(dias))
+    elegidos = pd.DatetimeIndex(np.sort(rng.choice(dias.to_numpy(), cantidad, replace=False)))
+    return pd.DataFrame({"Fecha": _fechas_iso(elegidos), "Motivo": rng.choice(MOTIVOS_FERIADO, cantidad)})
+
+
+def generar_marcas(personal: pd.DataFrame, escala: Escala, rng) -> pd.DataFrame:
+    """
+    Marcaciones de los últimos 'meses_marcas' meses hasta escala.fin.
+
+    Cada día hábil con asistencia tiene 'marcas_por_dia' registros de RELOJ
+    (entrada, salidas intermedias y salida). Una parte de los días también
+    tiene entrada y salida de LIBRO. Algunos días de RELOJ pierden una marca
+    (impares) y algunas marcas aparecen repetidas segundos después.
+    """
+    fin = pd.Timestamp(escala.fin)
+    desde = (fin - pd.DateOffset(months=escala.meses_marcas)) + pd.Timedelta(days=1)
+    dias = pd.bdate_range(desde, fin).to_numpy()
+    ids = personal["ID"].to_numpy()
+    empleado = np.repeat(ids, len(dias))
+    dia = np.tile(dias, len(ids))
+    presentes = rng.random(len(dia)) >= escala.tasa_inasistencia
+    empleado, dia = empleado[presentes], dia[presentes]
+    n = len(dia)
+
+    # Entrada alrededor de las 7:30 y jornada de unas 8.5 h (en segundos)
+    entrada = (7.5 * 3600 + rng.normal(0, 20 * 60, n)).astype(np.int64)
+    jornada = (8.5 * 3600 + rng.normal(0, 30 * 60, n)).astype(np.int64)
+    k = max(2, escala.marcas_por_dia)
+    intermedias = np.sort(rng.uniform(0.3, 0.7, (n, k - 2)), axis=1) * jornada[:, None]
+    offsets = np.column_stack([np.zeros(n), intermedias, jornada]).astype(np.int64)
+    segundos = entrada[:, None] + offsets
+
+    conservar = np.ones((n, k), dtype=bool)
+    impares = rng.random(n) < escala.tasa_impares
+    conservar[np.flatnonzero(impares), rng.integers(0, k, int(impares.sum()))] = False
+
+    momentos = (dia[:, None] + segundos.astype("timedelta64[s]"))[conservar]
+    reloj_empleado = np.repeat(empleado, k).reshape(n, k)[conservar]
+    duplicadas = np.flatnonzero(rng.random(len(momentos)) < escala.tasa_duplicados)
+    momentos = np.concatenate([
+        momentos, momentos[duplicadas] + rng.integers(5, 50, len(duplicadas)).astype("timedelta64[s]"),
+    ])
+    reloj_empleado = np.concatenate([reloj_empleado, reloj_empleado[duplicadas]])
+
+    # LIBRO: entrada y salida redondeadas a 5 minutos
+    con_libro = rng.random(n) < escala.proporcion_libro
+    libro_segundos = (np.column_stack([entrada, entrada + jornada])[con_libro] // 300) * 300
+    libro_momentos = (dia[con_libro][:, None] + libro_segundos.astype("timedelta64[s]")).ravel()
+    libro_empleado = np.repeat(empleado[con_libro], 2)
+
+    fecha_hora = pd.DatetimeIndex(np.concatenate([momentos, libro_momentos]))
+    marcas = pd.DataFrame({
+        "id_empleado": np.concatenate([reloj_empleado, libro_empleado]),
+        "fecha_hora": fecha_hora,
+        "tipo": np.repeat(["RELOJ", "LIBRO"], [len(momentos), len(libro_momentos)]),
+    })
+    marcas = marcas.sort_values(["fecha_hora", "id_empleado"], kind="stable", ignore_index=True)
+    marcas["fecha"] = marcas["fecha_hora"].dt.date
+    marcas["hora"] = marcas["fecha_hora"].dt.hour
+    return marcas
+
+
+def escribir_csvs_mensuales(marcas: pd.DataFrame, directorio: str) -> list:
+    """Un CSV por mes, con el nombre 'registros_YYYY-MM.csv' como en Drive."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    for periodo, grupo in marcas.groupby(marcas["fecha_hora"].dt.strftime("%Y-%m"), sort=True):
+        ruta = os.path.join(directorio, f"registros_{periodo}.csv")
+        grupo.to_csv(ruta, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        rutas.append(ruta)
+    return rutas
+
+
+def generar_tablas(escala: Escala) -> dict:
+    """Todas las tablas de la base, en un orden fijo de uso del generador."""
+    rng = np.random.default_rng(escala.semilla)
+    personal = generar_personal(escala, rng)
+    return {
+        "personal": personal,
+        "vacaciones": generar_vacaciones(personal, escala, rng),
+        "compensados": generar_compensados(personal, escala, rng),
+        "eventos": generar_eventos(escala, rng),
+        "feriados": generar_feriados(escala, rng),
+    }
+
+
+def generar(directorio: str, escala: Escala = ESCALAS["media"], marcas: bool = True) -> dict:
+    """
+    Genera 'directorio/gestor.db' y 'directorio/registros/*.csv'.
+
+    Returns:
+        Resumen con la escala usada, las rutas y la cantidad de filas
+    """
+    os.makedirs(directorio, exist_ok=True)
+    db_path = os.path.join(directorio, "gestor.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    init_db(db_path)
+    tablas = generar_tablas(escala)
+    for tabla, df in tablas.items():
+        import_from_dataframe(tabla, df, db_path)
+    resumen = {
+        "escala": asdict(escala),
+        "db_path": db_path,
+        "filas": {tabla: len(df) for tabla, df in tablas.items()},
+    }
+    if marcas:
+        # Generador aparte para que las marcas no cambien si cambian las tablas
+        df_marcas = generar_marcas(tablas["personal"], escala, np.random.default_rng(escala.semilla + 1))
+        resumen["csv"] = escribir_csvs_mensuales(df_marcas, os.path.join(directorio, "registros"))
+        resumen["filas"]["marcas"] = len(df_marcas)
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos reproducibles")
+    parser.add_argument("--salida", default="datos_sinteticos", help="Directorio de salida")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="media")
+    parser.add_argument("--empleados", type=int)
+    parser.add_argument("--anios", type=int, help="Años de historial de vacaciones y ausencias")
+    parser.add_argument("--marcas-por-dia", type=int)
+    parser.add_argument("--meses-marcas", type=int, help="Meses de marcaciones (un CSV por mes)")
+    parser.add_argument("--proporcion-libro", type=float, help="Proporción de días con registros de LIBRO")
+    parser.add_argument("--tasa-impares", type=float)
+    parser.add_argument("--tasa-duplicados", type=float)
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--sin-marcas", action="store_true", help="Generar solo la base de datos")
+    args = parser.parse_args(argv)
+
+    cambios = {
+        campo: valor for campo, valor in vars(args).items()
+        if campo in Escala.__dataclass_fields__ and valor is not None
+    }
+    escala = replace(ESCALAS[args.escala], **cambios)
+    resumen = generar(args.salida, escala, marcas=not args.sin_marcas)
+    print(f"✅ Base generada en {resumen['db_path']}")
+    for tabla, filas in resumen["filas"].items():
+        print(f"   {tabla}: {filas} filas")
+    if "csv" in resumen:
+        print(f"   {len(resumen['csv'])} archivos CSV en {os.path.dirname(resumen['csv'][0])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
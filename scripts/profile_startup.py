@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Perfil de arranque de la aplicación: tiempo de importación por módulo, tiempo
+del primer render de cada página y memoria máxima (RSS).
+
+Cada medición corre en un intérprete nuevo, así los imports son "en frío"
+como en el primer arranque del servidor:
+
+- Imports: ``python -X importtime -c "import <módulo>"`` para app, database,
+  utils.date_utils y cada ui_sections.*. Se agrega por módulo (tiempo propio
+  y acumulado) y por paquete de primer nivel.
+- Render: la app y cada página de pages/ se ejecutan con AppTest de Streamlit,
+  con un usuario admin simulado (st.user y secrets) y una base SQLite temporal
+  (o la indicada con --db).
+
+El reporte JSON tiene claves ordenadas para poder compararlo entre commits:
+
+    python scripts/profile_startup.py -o perfil_antes.json
+    python scripts/profile_startup.py -o perfil_despues.json --comparar perfil_antes.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+MODULOS_BASE = ["app", "database", "utils.date_utils"]
+EMAIL_PERFIL = "perfil@example.com"
+# Prefijo de la línea con el resultado del subproceso de render (las páginas
+# y sus hilos de fondo también escriben en stdout)
+MARCA_RESULTADO = "PERFIL_RENDER:"
+TOP_MODULOS = 15
+
+
+def modulos_a_medir() -> list:
+    """app, database, utils.date_utils y todos los módulos de ui_sections."""
+    secciones = sorted(
+        f"ui_sections.{os.path.splitext(os.path.basename(path))[0]}"
+        for path in glob.glob(os.path.join(PROJECT_ROOT, "ui_sections", "*.py"))
+        if not os.path.basename(path).startswith("__")
+    )
+    return MODULOS_BASE + secciones
+
+
+def objetivos_de_render() -> list:
+    """'app' (página inicial a través de la navegación) y cada archivo de pages/."""
+    paginas = sorted(
+        os.path.relpath(path, PROJECT_ROOT)
+        for path in glob.glob(os.path.join(PROJECT_ROOT, "pages", "*.py"))
+    )
+    return ["app.py"] + paginas
+
+
+# --- Tiempos de importación ---
+
+def parsear_importtime(salida: str) -> list:
+    """
+    Convierte la salida de -X importtime en una lista de
+    (nombre, profundidad, propio_us, acumulado_us), en el orden impreso
+    (los hijos aparecen antes que su padre).
+    """
+    registros = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue
+        nombre = partes[2].rstrip()
+        profundidad = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        registros.append((nombre.strip(), profundidad, int(partes[0]), int(partes[1])))
+    return registros
+
+
+def subarbol(registros: list, modulo: str) -> list:
+    """Registros del import de 'modulo' (el módulo y todo lo que importó)."""
+    for indice, (nombre, profundidad, _, _) in enumerate(registros):
+        if nombre == modulo and profundidad == 0:
+            inicio = indice
+            while inicio > 0 and registros[inicio - 1][1] > 0:
+                inicio -= 1
+            return registros[inicio:indice + 1]
+    return []
+
+
+def resumir_imports(registros: list, modulo: str) -> dict:
+    """Tiempo total, módulos más costosos y tiempo por paquete de un import."""
+    arbol = subarbol(registros, modulo)
+    if not arbol:
+        return {"error": "módulo no encontrado en la salida de importtime"}
+    por_paquete = {}
+    for nombre, _, propio, _ in arbol:
+        paquete = nombre.split(".")[0]
+        por_paquete[paquete] = por_paquete.get(paquete, 0) + propio
+    top = sorted(arbol, key=lambda r: r[2], reverse=True)[:TOP_MODULOS]
+    return {
+        "cumulative_ms": round(arbol[-1][3] / 1000, 2),
+        "modules_loaded": len(arbol),
+        "top_self_ms": {nombre: round(propio / 1000, 2) for nombre, _, propio, _ in top},
+        "by_package_ms": {
+            paquete: round(us / 1000, 2)
+            for paquete, us in sorted(por_paquete.items(), key=lambda item: item[1], reverse=True)
+            if us >= 1000
+        },
+    }
+
+
+def medir_import(modulo: str) -> dict:
+    """Importa 'modulo' en un intérprete nuevo con -X importtime."""
+    codigo = (
+        "import resource, sys; "
+        f"sys.path.insert(0, {PROJECT_ROOT!r}); "
+        f"import {modulo}; "
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    )
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, cwd=PROJECT_ROOT,
+    )
+    if proceso.returncode != 0:
+        ultima = proceso.stderr.strip().splitlines()[-1:] or [""]
+        return {"error": ultima[0]}
+    resumen = resumir_imports(parsear_importtime(proceso.stderr), modulo)
+    resumen["peak_rss_kb"] = int(proceso.stdout.strip().splitlines()[-1])
+    return resumen
+
+
+def medir_imports(modulos: list, repeticiones: int) -> dict:
+    """Mediana del tiempo acumulado de cada módulo en 'repeticiones' corridas."""
+    resultados = {}
+    for modulo in modulos:
+        corridas = [medir_import(modulo) for _ in range(repeticiones)]
+        validas = [c for c in corridas if "error" not in c]
+        if not validas:
+            resultados[modulo] = corridas[0]
+            continue
+        mediana = statistics.median(c["cumulative_ms"] for c in validas)
+        # Se guarda el detalle de la corrida más cercana a la mediana
+        elegida = min(validas, key=lambda c: abs(c["cumulative_ms"] - mediana))
+        resultados[modulo] = dict(elegida, cumulative_ms=round(mediana, 2), runs=len(validas))
+        print(f"  {modulo}: {resultados[modulo]['cumulative_ms']} ms")
+    return resultados
+
+
+# --- Primer render con AppTest ---
+
+def _render_en_este_proceso(objetivo: str, db_path: str, timeout: float) -> dict:
+    """Ejecuta un render con AppTest (se llama dentro del subproceso)."""
+    import resource
+    from types import SimpleNamespace
+
+    os.environ["DATABASE_PATH"] = db_path
+    os.chdir(PROJECT_ROOT)
+    inicio = time.perf_counter()
+    import streamlit
+    from streamlit.testing.v1 import AppTest
+
+    # Usuario admin simulado: app.py consulta st.user y los roles de secrets
+    streamlit.user = SimpleNamespace(is_logged_in=True, email=EMAIL_PERFIL, name="Perfil")
+    at = AppTest.from_file(os.path.join(PROJECT_ROOT, objetivo), default_timeout=timeout)
+    at.secrets["roles"] = {"admin_emails": [EMAIL_PERFIL]}
+    error = None
+    try:
+        at.run()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall_ms = (time.perf_counter() - inicio) * 1000
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "exceptions": [str(e.value) for e in at.exception] if error is None else [error],
+    }
+
+
+def medir_render(objetivo: str, db_path: str, timeout: float) -> dict:
+    """Primer render de 'objetivo' en un intérprete nuevo."""
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--render-interno", objetivo,
+         "--db", db_path, "--timeout", str(timeout)],
+        capture_output=True, text=True, cwd=PROJECT_ROOT,
+    )
+    resultado = [linea for linea in proceso.stdout.splitlines() if linea.startswith(MARCA_RESULTADO)]
+    if proceso.returncode != 0 or not resultado:
+        ultima = proceso.stderr.strip().splitlines()[-1:] or [""]
+        return {"error": ultima[0]}
+    return json.loads(resultado[-1][len(MARCA_RESULTADO):])
+
+
+def medir_renders(objetivos: list, db_path: str, timeout: float) -> dict:
+    resultados = {}
+    for objetivo in objetivos:
+        resultados[objetivo] = medir_render(objetivo, db_path, timeout)
+        print(f"  {objetivo}: {resultados[objetivo].get('wall_ms', 'error')} ms")
+    return resultados
+
+
+# --- Reporte ---
+
+def _commit_actual():
+    try:
+        proceso = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                 cwd=PROJECT_ROOT)
+        return proceso.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(actual: dict, anterior: dict, umbral: float) -> list:
+    """
+    Módulos y páginas cuyo tiempo creció más que 'umbral' (proporción, 0.2 = 20%).
+
+    Returns:
+        Lista de (sección, nombre, antes_ms, ahora_ms)
+    """
+    regresiones = []
+    for seccion, campo in (("imports", "cumulative_ms"), ("renders", "wall_ms")):
+        for nombre, datos in actual.get(seccion, {}).items():
+            antes = anterior.get(seccion, {}).get(nombre, {}).get(campo)
+            ahora = datos.get(campo)
+            if antes and ahora and ahora > antes * (1 + umbral):
+                regresiones.append((seccion, nombre, antes, ahora))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque de la aplicación")
+    parser.add_argument("-o", "--salida", default="perfil_arranque.json", help="Archivo JSON del reporte")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Corridas por módulo (se usa la mediana)")
+    parser.add_argument("--db", help="Base SQLite a usar en los renders (por defecto una vacía temporal)")
+    parser.add_argument("--timeout", type=float, default=30, help="Tiempo máximo de cada render (s)")
+    parser.add_argument("--sin-render", action="store_true", help="Medir solo los imports")
+    parser.add_argument("--comparar", help="Reporte anterior para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=0.2, help="Aumento relativo considerado regresión")
+    parser.add_argument("--render-interno", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.render_interno:
+        resultado = _render_en_este_proceso(args.render_interno, args.db, args.timeout)
+        print(MARCA_RESULTADO + json.dumps(resultado), flush=True)
+        # No esperar a los hilos de fondo que hayan lanzado las páginas
+        os._exit(0)
+
+    reporte = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": sys.version.split()[0],
+    }
+    print("⏱️ Tiempos de importación...")
+    reporte["imports"] = medir_imports(modulos_a_medir(), max(1, args.repeticiones))
+
+    if not args.sin_render:
+        print("🖥️ Primer render por página...")
+        with tempfile.TemporaryDirectory() as directorio:
+            db_path = args.db
+            if db_path is None:
+                from database import init_db
+                db_path = os.path.join(directorio, "gestor.db")
+                init_db(db_path)
+            reporte["renders"] = medir_renders(objetivos_de_render(), db_path, args.timeout)
+
+    with open(args.salida, "w") as f:
+        json.dump(reporte, f, indent=2, sort_keys=True, ensure_ascii=False)
+    print(f"📄 Reporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            anterior = json.load(f)
+        regresiones = comparar(reporte, anterior, args.umbral)
+        for seccion, nombre, antes, ahora in regresiones:
+            print(f"⚠️ {seccion} {nombre}: {antes} → {ahora} ms")
+        if regresiones:
+            return 1
+        print("✅ Sin regresiones respecto del reporte anterior")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
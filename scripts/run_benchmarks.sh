@@ -0,0 +1,43 @@
+#!/bin/bash
+# Benchmarks de Horarios con pytest-benchmark
+#
+#   ./scripts/run_benchmarks.sh guardar    # corre y guarda una línea base
+#   ./scripts/run_benchmarks.sh comparar   # compara con la última línea base guardada
+#   ./scripts/run_benchmarks.sh json resultados.json   # corre y escribe el reporte JSON
+#
+# Variables:
+#   UMBRAL   aumento de la media que se considera regresión (por defecto 20%)
+#   RAPIDO=1 excluye los casos lentos (lectores de archivos a 6 y 24 meses)
+#
+# Los argumentos extra se pasan a pytest (p. ej. -k jornada).
+
+set -e
+cd "$(dirname "$0")/.."
+
+MODO="${1:-guardar}"
+UMBRAL="${UMBRAL:-20%}"
+ARGS=(benchmarks/ -o "python_files=bench_*.py" -p no:cacheprovider
+      --benchmark-storage=file://benchmarks/.resultados --benchmark-columns=min,mean,median,rounds)
+if [ "${RAPIDO:-0}" = "1" ]; then
+    ARGS+=(-m "not slow")
+fi
+
+case "$MODO" in
+    guardar)
+        echo "⏱️ Corriendo benchmarks y guardando línea base..."
+        python3 -m pytest "${ARGS[@]}" --benchmark-autosave "${@:2}"
+        ;;
+    comparar)
+        echo "⏱️ Comparando con la última línea base (umbral: $UMBRAL)..."
+        python3 -m pytest "${ARGS[@]}" --benchmark-compare --benchmark-compare-fail="mean:$UMBRAL" "${@:2}"
+        ;;
+    json)
+        SALIDA="${2:-benchmarks.json}"
+        echo "⏱️ Corriendo benchmarks, reporte en $SALIDA..."
+        python3 -m pytest "${ARGS[@]}" --benchmark-json="$SALIDA" "${@:3}"
+        ;;
+    *)
+        echo "Uso: $0 [guardar|comparar|json ARCHIVO]"
+        exit 2
+        ;;
+esac
@@ -1,9 +1,12 @@
 """
 Pytest configuration and fixtures for the project.
 """
+import json
 import pytest
 import sys
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 
 # Add the parent directory to the path so we can import the app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -40,3 +43,50 @@ def mock_streamlit_secrets():
         }
     }
     return secrets
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """GET handler that delegates every response to the server's 'responder'."""
+
+    def do_GET(self):
+        status, headers, body = self.server.responder(self.path, self.headers)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            headers = {"Content-Type": "application/json", **headers}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Factory of local HTTP servers for tests that hit external APIs.
+
+    stub_server(responder, threaded=False) starts a server and returns its base
+    URL; responder(path, headers) returns (status, headers, body), where body
+    is bytes, a dict/list (sent as JSON) or None. Servers are shut down and
+    their sockets closed at teardown.
+    """
+    servers = []
+
+    def start(responder, threaded=False):
+        server_class = ThreadingHTTPServer if threaded else HTTPServer
+        server = server_class(("127.0.0.1", 0), _StubRequestHandler)
+        server.responder = responder
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,81 @@
+"""
+Tests del reporte de anomalías de todo el personal (utils/anomalias.py).
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.anomalias import expandir_periodos, generar_reporte_anomalias, resumen_anomalias
+
+
+def _fecha(texto):
+    return pd.Timestamp(texto).date()
+
+
+@pytest.fixture
+def registros():
+    """Semana del 03/03/2025 (lunes) al 07/03/2025 (viernes) para dos empleados."""
+    filas = []
+    # Empleado 1: lunes normal, martes corto, miércoles sin marcas, jueves largo, viernes impar
+    filas += [("1", "2025-03-03 08:00", "RELOJ"), ("1", "2025-03-03 16:00", "RELOJ"),
+              ("1", "2025-03-03 08:00", "LIBRO"), ("1", "2025-03-03 16:00", "LIBRO")]
+    filas += [("1", "2025-03-04 08:00", "RELOJ"), ("1", "2025-03-04 13:00", "RELOJ")]
+    filas += [("1", "2025-03-06 07:00", "RELOJ"), ("1", "2025-03-06 17:00", "RELOJ")]
+    filas += [("1", "2025-03-07 08:00", "RELOJ"), ("1", "2025-03-07 16:00", "RELOJ"),
+              ("1", "2025-03-07 16:05", "RELOJ")]
+    # Empleado 2: jornada larga con diferencia LIBRO/RELOJ de 2 horas
+    filas += [("2", "2025-03-03 07:00", "RELOJ"), ("2", "2025-03-03 16:00", "RELOJ"),
+              ("2", "2025-03-03 07:00", "LIBRO"), ("2", "2025-03-03 18:00", "LIBRO")]
+    return pd.DataFrame(filas, columns=["id_empleado", "fecha_hora", "tipo"])
+
+
+class TestReporteAnomalias:
+    """Tests de detección de anomalías."""
+
+    def test_banderas_por_dia(self, registros):
+        reporte = generar_reporte_anomalias(registros).set_index(["id_empleado", "fecha"])
+        assert ("1", _fecha("2025-03-03")) not in reporte.index
+        assert reporte.loc[("1", _fecha("2025-03-04")), "jornada_corta"]
+        assert reporte.loc[("1", _fecha("2025-03-05")), "sin_marcaciones"]
+        assert reporte.loc[("1", _fecha("2025-03-06")), "jornada_larga"]
+        assert reporte.loc[("1", _fecha("2025-03-07")), "marcas_impares"]
+        assert reporte.loc[("2", _fecha("2025-03-03")), "diferencia_grande"]
+
+    def test_cobertura_y_feriados(self, registros):
+        cobertura = pd.DataFrame({"id_empleado": ["1"], "fecha": [_fecha("2025-03-05")]})
+        reporte = generar_reporte_anomalias(registros, cobertura=cobertura)
+        assert not reporte["sin_marcaciones"].any()
+        reporte = generar_reporte_anomalias(registros, feriados=["2025-03-05"])
+        assert not reporte["sin_marcaciones"].any()
+
+    def test_etiquetas_y_resumen(self, registros):
+        reporte = generar_reporte_anomalias(registros)
+        fila = reporte[(reporte["id_empleado"] == "2")].iloc[0]
+        assert fila["anomalias"] == "Jornada larga, Diferencia LIBRO/RELOJ"
+        resumen = resumen_anomalias(reporte).set_index("id_empleado")
+        assert resumen.loc["1"].sum() == 4
+
+    def test_vacio(self):
+        assert generar_reporte_anomalias(pd.DataFrame()).empty
+
+
+class TestExpandirPeriodos:
+    """Tests de la expansión de vacaciones y ausencias en días."""
+
+    def test_fin_no_inclusivo_y_mapa(self):
+        df = pd.DataFrame({
+            "Apellido, Nombres": ["Pérez, Ana", "Sin Mapa"],
+            "Fecha inicio": ["2025-03-03", "2025-03-10"],
+            "Fecha regreso": ["2025-03-06", "2025-03-11"],
+        })
+        dias = expandir_periodos(df, "Apellido, Nombres", "Fecha inicio", "Fecha regreso",
+                                 hasta_inclusive=False, mapa_ids={"Pérez, Ana": "7"})
+        assert dias[dias["id_empleado"] == "7"]["fecha"].tolist() == [
+            _fecha("2025-03-03"), _fecha("2025-03-04"), _fecha("2025-03-05")
+        ]
+        assert dias[dias["id_empleado"] == "Sin Mapa"]["fecha"].tolist() == [_fecha("2025-03-10")]
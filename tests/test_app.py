@@ -9,7 +9,7 @@ from unittest.mock import patch, MagicMock
 # Add the parent directory to the path so we can import the app
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import obtener_rol_usuario, tiene_permiso, get_available_pages, ROLES_PERMISOS
+from app import obtener_rol_usuario, tiene_permiso, get_available_pages, load_page, ROLES_PERMISOS
 
 
 class TestAuthentication:
@@ -136,6 +136,18 @@ class TestNavigation:
             result = get_available_pages('admin')
             assert result == []
 
+    def test_load_page_imports_on_first_run(self):
+        """Test that registering a page does not import its module until it runs."""
+        module = MagicMock()
+        with patch('app.importlib.import_module', return_value=module) as mock_import:
+            run_page = load_page('07_Horarios.py')
+            assert run_page.__name__ == '07_Horarios'
+            mock_import.assert_not_called()
+
+            run_page()
+            mock_import.assert_called_once_with('pages.07_Horarios')
+            module.page.assert_called_once_with()
+
 
 if __name__ == '__main__':
     pytest.main([__file__])
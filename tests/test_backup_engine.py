@@ -0,0 +1,120 @@
+"""
+Tests del motor de backups incrementales (backups/backup_engine.py).
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backups.backup_engine import (
+    check_integrity, cleanup_backups, create_backup, list_manifests, restore_backup, verify_backup,
+)
+
+INICIO = datetime(2025, 3, 10, 2, 30)
+
+
+def _filas(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, texto FROM notas ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def base_datos(tmp_path):
+    db_path = str(tmp_path / "gestor.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE notas (id INTEGER PRIMARY KEY, texto TEXT)")
+    conn.executemany("INSERT INTO notas (texto) VALUES (?)", [(f"nota {i} " * 20,) for i in range(2000)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+class TestBackupEngine:
+    """Tests de backups completos, deltas, restauración y retención."""
+
+    def test_full_y_restauracion(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        resultado = create_backup(base_datos, destino, mode="auto", compression="gzip", pages=16, sleep=0, now=INICIO)
+        assert resultado.kind == "full"
+        assert resultado.data_path.endswith(".full.db.gz")
+        # Comprimido: ocupa menos que la base original
+        assert resultado.bytes_written < os.path.getsize(base_datos)
+
+        restaurada = str(tmp_path / "restaurada.db")
+        restore_backup(resultado.manifest_path, restaurada)
+        assert _filas(restaurada) == _filas(base_datos)
+        assert check_integrity(restaurada).ok
+        with pytest.raises(FileExistsError):
+            restore_backup(resultado.manifest_path, restaurada)
+
+    def test_delta_guarda_solo_paginas_cambiadas(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        full = create_backup(base_datos, destino, compression="gzip", now=INICIO)
+
+        conn = sqlite3.connect(base_datos)
+        conn.execute("UPDATE notas SET texto = 'cambiada' WHERE id = 5")
+        conn.executemany("INSERT INTO notas (texto) VALUES (?)", [("nueva",)] * 50)
+        conn.commit()
+        conn.close()
+
+        delta = create_backup(base_datos, destino, compression="gzip", now=INICIO + timedelta(days=1))
+        assert delta.kind == "delta"
+        assert delta.base == os.path.basename(full.manifest_path)
+        assert 0 < delta.pages_written < delta.page_count / 4
+
+        restaurada = str(tmp_path / "restaurada.db")
+        restore_backup(delta.manifest_path, restaurada)
+        assert _filas(restaurada) == _filas(base_datos)
+        assert verify_backup(delta.manifest_path).ok
+
+    def test_delta_con_base_que_se_achico(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        create_backup(base_datos, destino, compression="gzip", now=INICIO)
+        conn = sqlite3.connect(base_datos)
+        conn.execute("DELETE FROM notas WHERE id > 100")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+
+        delta = create_backup(base_datos, destino, mode="delta", compression="gzip", now=INICIO + timedelta(hours=1))
+        restaurada = str(tmp_path / "restaurada.db")
+        restore_backup(delta.manifest_path, restaurada)
+        assert os.path.getsize(restaurada) == os.path.getsize(base_datos)
+        assert _filas(restaurada) == _filas(base_datos)
+
+    def test_auto_hace_full_si_el_ultimo_es_viejo(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        create_backup(base_datos, destino, compression="gzip", now=INICIO)
+        siguiente = create_backup(base_datos, destino, compression="gzip", now=INICIO + timedelta(days=8))
+        assert siguiente.kind == "full"
+
+    def test_verify_detecta_corrupcion(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        resultado = create_backup(base_datos, destino, compression="gzip", now=INICIO)
+        with open(resultado.data_path, "r+b") as f:
+            f.seek(40)
+            f.write(b"\x00" * 64)
+        reporte = verify_backup(resultado.manifest_path)
+        assert not reporte.ok
+
+    def test_retencion_conserva_base_de_deltas(self, base_datos, tmp_path):
+        destino = str(tmp_path / "backups")
+        full = create_backup(base_datos, destino, compression="gzip", now=INICIO)
+        viejo = create_backup(base_datos, destino, compression="gzip", now=INICIO + timedelta(days=1))
+        reciente = create_backup(base_datos, destino, compression="gzip", now=INICIO + timedelta(days=6))
+        assert reciente.base == os.path.basename(full.manifest_path)
+
+        borrados = cleanup_backups(destino, days=3, now=INICIO + timedelta(days=7))
+        assert borrados == 1
+        restantes = [os.path.basename(path) for path, _ in list_manifests(destino)]
+        assert restantes == [os.path.basename(full.manifest_path), os.path.basename(reciente.manifest_path)]
+        assert not os.path.exists(viejo.data_path)
+        assert verify_backup(reciente.manifest_path).ok
@@ -0,0 +1,209 @@
+"""
+Tests de la caché por espacios (utils/cache.py).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import cache, instrumentacion
+from utils.cache import RegistroCache, clave_de, tamanio_bytes
+from utils.cache_backend import BackendCache, BackendSQLite
+
+
+class TestCache:
+    """Tests de límites, desalojo, invalidación y métricas de la caché."""
+
+    def test_tamanio_bytes(self):
+        df = pd.DataFrame({"a": range(1000), "b": ["x" * 10] * 1000})
+        assert tamanio_bytes(df) == df.memory_usage(deep=True).sum()
+        assert tamanio_bytes(b"x" * 5000) >= 5000
+        assert tamanio_bytes({"df": df, "otra": df}) < 2 * tamanio_bytes(df)
+
+    def test_lru_por_entradas_y_bytes(self):
+        registro = RegistroCache(techo_bytes=10 * cache.MB)
+        espacio = registro.espacio("e", max_entradas=2)
+        espacio.guardar("a", 1)
+        espacio.guardar("b", 2)
+        assert espacio.obtener("a") == 1  # "b" pasa a ser la menos usada
+        espacio.guardar("c", 3)
+        assert "b" not in espacio and "a" in espacio and "c" in espacio
+
+        chico = registro.espacio("chico", max_mb=10_000 / cache.MB)
+        for i in range(5):
+            chico.guardar(i, b"x" * 3000)
+        assert chico.bytes <= 10_000 and len(chico) == 3
+        assert chico.guardar("enorme", b"x" * 20_000) is False
+        assert chico.estadisticas()["desalojos"] == 2
+
+    def test_ttl(self):
+        espacio = RegistroCache().espacio("ttl", ttl=0.05)
+        espacio.guardar("a", 1)
+        assert espacio.obtener("a") == 1
+        time.sleep(0.06)
+        assert espacio.obtener("a") is None
+        assert espacio.estadisticas()["vencidas"] == 1
+
+    def test_techo_global_desaloja_la_menos_usada(self):
+        registro = RegistroCache(techo_bytes=10_000)
+        uno, dos = registro.espacio("uno"), registro.espacio("dos")
+        fijo = registro.espacio("recursos", fijo=True)
+        uno.guardar("viejo", b"x" * 4000)
+        dos.guardar("a", b"x" * 4000)
+        fijo.guardar("cliente", b"x" * 50_000)
+        dos.guardar("b", b"x" * 4000)
+        assert "viejo" not in uno and "a" in dos and "b" in dos
+        assert "cliente" in fijo
+        assert registro.bytes <= 10_000
+
+    def test_invalidacion(self):
+        espacio = RegistroCache().espacio("inv")
+        for clave in [("2024",), ("2025",), ("2026",)]:
+            espacio.guardar(clave, clave[0])
+        assert espacio.invalidar(("2024",)) == 1
+        assert espacio.invalidar(predicado=lambda clave: clave[0] >= "2026") == 1
+        assert list(espacio._entradas) == [("2025",)]
+        assert espacio.invalidar() == 1 and espacio.bytes == 0
+
+    def test_cacheado(self):
+        llamadas = []
+
+        @cache.cacheado("test.cacheado", guardar_si=bool)
+        def duplicar(x, extra=None):
+            llamadas.append(x)
+            return x * 2
+
+        duplicar.clear()
+        instrumentacion.iniciar_rerun(True)
+        with instrumentacion.etapa("primera", cache=True):
+            assert duplicar(2, extra={"b": 1, "a": 2}) == 4
+        with instrumentacion.etapa("segunda", cache=True):
+            assert duplicar(2, extra={"a": 2, "b": 1}) == 4
+        assert duplicar(0) == 0 and duplicar(0) == 0  # 0 no se guarda
+        instrumentacion.iniciar_rerun(False)
+        instrumentacion.reiniciar_totales()
+
+        assert llamadas == [2, 0, 0]
+        stats = duplicar.espacio.estadisticas()
+        assert (stats["aciertos"], stats["fallos"]) == (1, 3)
+        assert clave_de((2,), {"extra": {"b": 1, "a": 2}}) in duplicar.espacio
+
+    def test_calculo_unico_entre_hilos(self):
+        espacio = RegistroCache().espacio("hilos")
+        llamadas = []
+
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.05)
+            return "valor"
+
+        hilos = [threading.Thread(target=espacio.obtener_o_calcular, args=("k", calcular)) for _ in range(5)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert len(llamadas) == 1
+        assert espacio._calculando == {}
+
+    def test_texto_prometheus(self):
+        registro = RegistroCache()
+        registro.espacio("drive.csv").guardar("a", b"x" * 100)
+        texto = cache.texto_prometheus(registro.estadisticas())
+        assert '# TYPE gestor_cache_bytes gauge' in texto
+        assert 'gestor_cache_entradas{espacio="drive.csv"} 1' in texto
+        # Los bytes (del orden de 1e8) se escriben completos, no redondeados por ':g'
+        texto = cache.texto_prometheus({"drive.csv": dict(registro.espacio("drive.csv").estadisticas(),
+                                                          bytes=123456789)})
+        assert 'gestor_cache_bytes{espacio="drive.csv"} 123456789\n' in texto
+
+
+def _calcular_en_proceso(ruta_db, ruta_registro, resultados):
+    """Objetivo de multiprocessing: un 'worker' que pide la misma clave compartida."""
+    registro = RegistroCache(backend=BackendSQLite(ruta_db))
+    espacio = registro.espacio("drive.csv", compartido=True)
+
+    def descargar():
+        with open(ruta_registro, "a") as f:
+            f.write("descarga\n")
+        time.sleep(0.5)
+        return b"contenido"
+
+    resultados.put(espacio.obtener_o_calcular(("abc",), descargar))
+
+
+class TestCacheCompartida:
+    """Tests del nivel compartido entre procesos (utils/cache_backend.py)."""
+
+    def _registros(self, tmp_path, n=2):
+        ruta = str(tmp_path / "compartida.db")
+        return [RegistroCache(backend=BackendSQLite(ruta)) for _ in range(n)]
+
+    def test_valor_calculado_en_un_proceso_lo_leen_los_demas(self, tmp_path):
+        uno, dos = self._registros(tmp_path)
+        df = pd.DataFrame({"id_empleado": ["1", "2"], "hora": [8, 17]})
+        uno.espacio("registros", compartido=True).guardar(("a", "b"), df)
+        leido = dos.espacio("registros", compartido=True).obtener(("a", "b"))
+        pd.testing.assert_frame_equal(leido, df)
+        stats = dos.espacio("registros").estadisticas()
+        assert (stats["aciertos_compartidos"], stats["entradas"]) == (1, 1)
+        # Los espacios no compartidos y los fijos quedan en el proceso
+        uno.espacio("local").guardar("x", 1)
+        uno.espacio("recursos", fijo=True, compartido=True).guardar("cliente", object())
+        assert dos.espacio("local").obtener("x") is None
+        assert dos.espacio("recursos", fijo=True, compartido=True).obtener("cliente") is None
+
+    def test_invalidacion_llega_a_otro_proceso(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(cache, "REVISAR_GENERACION_CADA", 0)
+        uno, dos = self._registros(tmp_path)
+        for registro in (uno, dos):
+            registro.espacio("drive.listado", compartido=True)
+        uno.espacio("drive.listado").guardar("carpeta", ["2025-01.csv"])
+        assert dos.espacio("drive.listado").obtener("carpeta") == ["2025-01.csv"]
+        uno.espacio("drive.listado").invalidar()
+        assert dos.espacio("drive.listado").obtener("carpeta") is None
+        assert len(dos.espacio("drive.listado")) == 0
+
+    def test_backend_incompleto_no_se_puede_crear(self):
+        class SoloLectura(BackendCache):
+            def obtener(self, espacio, clave):
+                return None
+
+        with pytest.raises(TypeError):
+            SoloLectura()
+
+    def test_ttl_y_limite_de_tamanio(self, tmp_path):
+        backend = BackendSQLite(str(tmp_path / "compartida.db"), max_mb=20_000 / cache.MB)
+        backend.guardar("e", "vence", "vence", b"x", ttl=0.05)
+        for i in range(4):
+            backend.guardar("e", str(i), i, b"x" * 6000)
+        time.sleep(0.06)
+        assert backend.obtener("e", "vence") is None
+        # Solo entran tres de 6000 bytes: se fue la menos usada
+        assert backend.obtener("e", "0") is None
+        assert backend.obtener("e", "3")[0] == b"x" * 6000
+
+    def test_un_solo_proceso_calcula(self, tmp_path):
+        import multiprocessing
+
+        contexto = multiprocessing.get_context("spawn")
+        resultados = contexto.Queue()
+        ruta_registro = str(tmp_path / "descargas.txt")
+        procesos = [
+            contexto.Process(target=_calcular_en_proceso,
+                             args=(str(tmp_path / "compartida.db"), ruta_registro, resultados))
+            for _ in range(3)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        valores = [resultados.get(timeout=60) for _ in procesos]
+        for proceso in procesos:
+            proceso.join(timeout=30)
+        assert valores == [b"contenido"] * 3
+        with open(ruta_registro) as f:
+            assert f.read().count("descarga") == 1
@@ -0,0 +1,69 @@
+"""
+Tests del calendario laboral precalculado (utils/calendario_laboral.py).
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.calendario_laboral import CalendarioLaboral, feriados_manuales_dict
+
+
+@pytest.fixture
+def calendario():
+    """Años 2024-2025 con un feriado en día hábil y otro en fin de semana."""
+    return CalendarioLaboral("2024-01-01", "2025-12-31", {
+        "2025-03-03": "Carnaval",
+        "2025-03-24": "Día de la Memoria",
+        "2025-03-08": "Sábado de prueba",
+    })
+
+
+class TestCalendarioLaboral:
+    """Tests de conteo y máscaras de días hábiles."""
+
+    def test_contar_habiles(self, calendario):
+        # Marzo 2025: 21 días de lunes a viernes menos 2 feriados
+        assert calendario.contar_habiles("2025-03-01", "2025-03-31") == 19
+        assert calendario.contar_habiles("2025-03-05", "2025-03-05") == 1
+        assert calendario.contar_habiles("2025-03-06", "2025-03-05") == 0
+
+    def test_contar_coincide_con_recorrido(self, calendario):
+        fechas = pd.date_range("2024-12-20", "2025-04-10")
+        esperado = sum(
+            1 for f in fechas
+            if f.weekday() < 5 and f.strftime("%Y-%m-%d") not in calendario.nombres_feriados
+        )
+        assert calendario.contar_habiles("2024-12-20", "2025-04-10") == esperado
+
+    def test_fuera_de_rango(self, calendario):
+        with pytest.raises(ValueError):
+            calendario.contar_habiles("2023-12-01", "2024-01-10")
+
+    def test_mascaras(self, calendario):
+        fechas = [pd.Timestamp("2025-03-03").date(), "2025-03-04", "2025-03-08", "2026-01-05"]
+        assert calendario.mascara_habiles(fechas).tolist() == [False, True, False, True]
+        assert calendario.mascara_feriados(fechas).tolist() == [True, False, True, False]
+
+    def test_feriados_en_rango(self, calendario):
+        assert calendario.feriados_en_rango("2025-03-01", "2025-03-10") == [
+            ("2025-03-03", "Carnaval"), ("2025-03-08", "Sábado de prueba")
+        ]
+
+
+class TestFeriadosManuales:
+    """Tests de la normalización de feriados manuales."""
+
+    def test_formatos_y_motivo_por_defecto(self):
+        df = pd.DataFrame({
+            "Fecha": ["2025-05-02", "15/08/2025", "no es fecha"],
+            "Motivo ": ["Puente", None, "x"],
+        })
+        assert feriados_manuales_dict(df) == {
+            "2025-05-02": "Puente",
+            "2025-08-15": "Feriado/Asueto",
+        }
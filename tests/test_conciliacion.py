@@ -0,0 +1,73 @@
+"""
+Tests de la conciliación LIBRO vs RELOJ (utils/conciliacion.py).
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.conciliacion import conciliar_libro_reloj, exportar_tabla
+
+
+@pytest.fixture
+def registros():
+    """Dos empleados: uno con LIBRO y RELOJ completos, otro con RELOJ impar."""
+    return pd.DataFrame([
+        ("1", "2025-03-03 08:00", "RELOJ"),
+        ("1", "2025-03-03 16:00", "RELOJ"),
+        ("1", "2025-03-03 08:00", "LIBRO"),
+        ("1", "2025-03-03 16:30", "LIBRO"),
+        ("1", "2025-03-04 08:00", "RELOJ"),
+        ("1", "2025-03-04 17:00", "RELOJ"),
+        ("1", "2025-03-04 08:00", "LIBRO"),
+        ("1", "2025-03-04 16:00", "LIBRO"),
+        ("2", "2025-03-03 09:00", "RELOJ"),
+        ("2", "2025-03-03 17:00", "RELOJ"),
+        ("2", "2025-03-03 17:02", "RELOJ"),
+        ("2", "2025-03-03 09:00", "LIBRO"),
+        ("2", "2025-03-03 17:00", "LIBRO"),
+    ], columns=["id_empleado", "fecha_hora", "tipo"])
+
+
+class TestConciliacion:
+    """Tests del cálculo de diferencias y clasificación."""
+
+    def test_diferencias_y_clasificacion(self, registros):
+        tabla = conciliar_libro_reloj(registros).set_index(["id_empleado", "fecha"])
+        dia_1 = tabla.loc[("1", pd.Timestamp("2025-03-03").date())]
+        dia_2 = tabla.loc[("1", pd.Timestamp("2025-03-04").date())]
+        assert dia_1["diferencia"] == pytest.approx(0.5)
+        assert dia_1["tipo_diferencia"] == "Positiva"
+        assert dia_2["diferencia"] == pytest.approx(-1.0)
+        assert dia_2["tipo_diferencia"] == "Negativa"
+
+    def test_registros_impares(self, registros):
+        tabla = conciliar_libro_reloj(registros)
+        fila = tabla[tabla["id_empleado"] == "2"].iloc[0]
+        assert fila["marcas_reloj"] == 3
+        assert fila["impar_reloj"] and not fila["impar_libro"]
+        assert fila["tipo_diferencia"] == "Registros impares"
+
+    def test_fechas_sin_registros(self, registros):
+        fechas = pd.date_range("2025-03-01", "2025-03-05").date
+        tabla = conciliar_libro_reloj(registros[registros["id_empleado"] == "1"], fechas=fechas)
+        assert len(tabla) == 5
+        vacios = tabla[tabla["marcas_reloj"] == 0]
+        assert vacios["diferencia"].isna().all()
+        assert (vacios["tipo_diferencia"] == "Cero").all()
+
+
+class TestExportacion:
+    """Tests de exportación del reporte."""
+
+    def test_exportar_csv(self, registros):
+        contenido = exportar_tabla(conciliar_libro_reloj(registros), "csv")
+        assert contenido.decode("utf-8-sig").startswith("id_empleado,fecha,horas_libro")
+
+    def test_formato_invalido(self, registros):
+        with pytest.raises(ValueError):
+            exportar_tabla(conciliar_libro_reloj(registros), "xls")
@@ -0,0 +1,86 @@
+"""
+Tests del cliente concurrente de cotizaciones (utils/cotizaciones.py) contra
+un servidor HTTP local.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cotizaciones import armar_tipos_cambio, obtener_cotizaciones
+
+HOY = date(2025, 3, 10)  # lunes
+
+
+class _Stub:
+    """Respuestas del servidor local (fixture stub_server de conftest.py)."""
+    pedidos = []
+
+    @classmethod
+    def responder(cls, path, headers):
+        cls.pedidos.append(path)
+        partes = path.strip("/").split("/")
+        if partes[0] == "historico":
+            # /historico/{casa}/{YYYY}/{MM}/{DD}: sin cotización los fines de semana
+            dia = date(int(partes[2]), int(partes[3]), int(partes[4]))
+            if dia.weekday() >= 5:
+                return 200, {}, []
+            valor = 1000 + dia.day
+            return 200, {}, [{"casa": partes[1], "compra": valor - 20, "venta": valor,
+                              "fecha": dia.isoformat()}]
+        return 200, {}, {"compra": 1100, "venta": 1150}
+
+
+@pytest.fixture
+def urls(stub_server):
+    # Servidor concurrente: el cliente hace los pedidos en paralelo
+    base = stub_server(_Stub.responder, threaded=True)
+    _Stub.pedidos = []
+    return {
+        "historico": base + "/historico/{casa}/{fecha}",
+        "dolarapi": base + "/dolarapi/{casa}",
+        "euro": base + "/euro",
+    }
+
+
+@pytest.fixture
+def temp_db():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "test.db")
+
+
+class TestObtenerCotizaciones:
+    """Tests de la descarga concurrente y del caché de días cerrados."""
+
+    def test_primera_consulta(self, urls, temp_db):
+        resultado = obtener_cotizaciones(hoy=HOY, db_path=temp_db, urls=urls)
+        assert resultado["errores"] == []
+        # 2 actuales + euro + 7 días x 2 casas
+        assert len(_Stub.pedidos) == 17
+        fechas = [d["fecha"] for d in resultado["historico"]["oficial"]]
+        assert fechas == ["2025-03-04", "2025-03-05", "2025-03-06", "2025-03-07", "2025-03-10"]
+        assert resultado["euro"]["venta"] == 1150
+
+    def test_dias_cerrados_no_se_vuelven_a_pedir(self, urls, temp_db):
+        obtener_cotizaciones(hoy=HOY, db_path=temp_db, urls=urls)
+        _Stub.pedidos = []
+        resultado = obtener_cotizaciones(hoy=HOY, db_path=temp_db, urls=urls)
+        # 2 actuales + euro + hoy x 2 casas; ayer (domingo, sin datos) todavía
+        # está dentro del margen y se vuelve a consultar
+        assert sorted(p for p in _Stub.pedidos if p.startswith("/historico")) == [
+            "/historico/blue/2025/03/09", "/historico/blue/2025/03/10",
+            "/historico/oficial/2025/03/09", "/historico/oficial/2025/03/10",
+        ]
+        assert len(_Stub.pedidos) == 7
+        assert len(resultado["historico"]["blue"]) == 5
+
+    def test_armar_tipos_cambio(self, urls, temp_db):
+        tipos = armar_tipos_cambio(obtener_cotizaciones(hoy=HOY, db_path=temp_db, urls=urls))
+        assert tipos["oficial"]["venta"] == 1150
+        assert tipos["oficial"]["fechas"][0] == "2025-03-04"
+        assert tipos["euro"]["historico_venta"] == []
@@ -22,6 +22,13 @@ from database import (
     table_exists,
     import_from_dataframe,
     get_database_path,
+    insert_record,
+    get_record,
+    update_record,
+    delete_record,
+    sync_from_dataframe,
+    DatabaseClient,
+    TableWrapper,
 )
 
 
@@ -212,5 +219,103 @@ class TestPersonal:
         assert len(df) == 3
 
 
+
+class TestRegistrosPorRowid:
+    """Tests de altas, ediciones y bajas por rowid."""
+    
+    @staticmethod
+    def _vacacion(nombre, inicio):
+        return {"Apellido, Nombres": nombre, "Fecha solicitud": "2025-01-01", "Tipo": "Otros",
+                "Fecha inicio": inicio, "Fecha regreso": "2025-03-20", "Observaciones": ""}
+    
+    def test_crud_por_rowid(self, temp_db):
+        """Verifica que el rowid identifica al registro aunque se borren otros."""
+        primero = insert_record("vacaciones", self._vacacion("Doe, John", "2025-03-01"), temp_db)
+        segundo = insert_record("vacaciones", self._vacacion("Smith, Jane", "2025-03-02"), temp_db)
+        assert primero != segundo
+        
+        assert delete_record("vacaciones", primero, temp_db)
+        assert not delete_record("vacaciones", primero, temp_db)
+        assert update_record("vacaciones", segundo, {"Tipo": "Licencia Ordinaria 2025"}, temp_db)
+        assert get_record("vacaciones", segundo, temp_db)["Tipo"] == "Licencia Ordinaria 2025"
+        
+        df = DatabaseClient(temp_db).get_table("vacaciones")
+        assert df.index.name == "rowid"
+        assert df.index.tolist() == [segundo]
+        assert "rowid" not in df.columns
+    
+    def test_table_wrapper_corrige_la_sesion(self, temp_db, monkeypatch):
+        """Verifica que el DataFrame de la sesión se corrige sin recargar la tabla."""
+        import streamlit as st
+        client = DatabaseClient(temp_db)
+        insert_record("vacaciones", self._vacacion("Doe, John", "2025-03-01"), temp_db)
+        st.session_state["df_vacaciones"] = client.get_table("vacaciones")
+        df_sesion = st.session_state["df_vacaciones"]
+        monkeypatch.setattr(client, "get_table", lambda *a, **k: pytest.fail("no debe recargar la tabla"))
+        
+        sheet = TableWrapper(client, "vacaciones")
+        nuevo = sheet.append_record(["Smith, Jane", "2025-01-02", "Otros", "2025-04-01", "2025-04-10", ""])
+        assert sheet.update_record(nuevo, {"Observaciones": "Pendientes: 3"})
+        viejo = df_sesion.index[0]
+        assert sheet.delete_record(viejo)
+        
+        assert st.session_state["df_vacaciones"] is df_sesion
+        assert df_sesion.index.tolist() == [nuevo]
+        assert df_sesion.loc[nuevo, "Observaciones"] == "Pendientes: 3"
+        assert df_sesion.loc[nuevo, "Fecha inicio"] == "2025-04-01"
+        del st.session_state["df_vacaciones"]
+
+
+
+class TestSincronizacion:
+    """Tests de la sincronización incremental por clave natural."""
+    
+    CLAVE = ["Apellido, Nombres", "Fecha inicio"]
+    
+    @staticmethod
+    def _hoja(filas):
+        return pd.DataFrame(filas, columns=["Apellido, Nombres", "Tipo", "Fecha inicio", "Observaciones"])
+    
+    def test_aplica_solo_diferencias(self, temp_db):
+        """Verifica altas, modificaciones y bajas sin tocar las filas iguales."""
+        original = self._hoja([
+            ["Doe, John", "Otros", "2025-03-01", ""],
+            ["Smith, Jane", "Otros", "2025-03-02", ""],
+            ["Smith, Jane", "Otros", "2025-03-02", "repetida"],
+            ["Ruiz, Eva", "Otros", "2025-03-05", None],
+        ])
+        cambios = sync_from_dataframe("vacaciones", original, self.CLAVE, temp_db)
+        assert (cambios["inserted"], cambios["updated"], cambios["deleted"]) == (4, 0, 0)
+        rowids = get_data("vacaciones", temp_db, with_rowid=True).index.tolist()
+        
+        # Sin cambios: no se escribe nada
+        cambios = sync_from_dataframe("vacaciones", original, self.CLAVE, temp_db)
+        assert (cambios["inserted"], cambios["updated"], cambios["deleted"], cambios["unchanged"]) == (0, 0, 0, 4)
+        
+        nueva = self._hoja([
+            ["Doe, John", "Licencia Ordinaria 2025", "2025-03-01", ""],
+            ["Smith, Jane", "Otros", "2025-03-02", ""],
+            ["Smith, Jane", "Otros", "2025-03-02", "repetida"],
+            ["Gómez, Luis", "Otros", "2025-04-01", ""],
+        ])
+        cambios = sync_from_dataframe("vacaciones", nueva, self.CLAVE, temp_db)
+        assert (cambios["inserted"], cambios["updated"], cambios["deleted"], cambios["unchanged"]) == (1, 1, 1, 2)
+        
+        df = get_data("vacaciones", temp_db, with_rowid=True)
+        # Las filas sin cambios y la modificada conservan su rowid
+        assert df.index.tolist()[:3] == rowids[:3]
+        assert df["Tipo"].tolist()[0] == "Licencia Ordinaria 2025"
+        assert sorted(df["Apellido, Nombres"]) == ["Doe, John", "Gómez, Luis", "Smith, Jane", "Smith, Jane"]
+    
+    def test_error_no_modifica_la_tabla(self, temp_db):
+        """Verifica que un error deja la tabla como estaba."""
+        sync_from_dataframe("feriados", pd.DataFrame({"Fecha": ["2025-01-01"], "Motivo": ["Año nuevo"]}),
+                            ["Fecha"], temp_db)
+        # Dos filas con la misma clave primaria: falla la transacción completa
+        repetidas = pd.DataFrame({"Fecha": ["2025-05-01", "2025-05-01"], "Motivo": ["a", "b"]})
+        assert sync_from_dataframe("feriados", repetidas, ["Fecha"], temp_db) is None
+        assert get_data("feriados", temp_db)["Fecha"].tolist() == ["2025-01-01"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
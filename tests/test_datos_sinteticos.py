@@ -0,0 +1,67 @@
+"""
+Tests del generador de datos sintéticos (scripts/datos_sinteticos.py).
+"""
+
+import os
+import sys
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_data, row_count
+from scripts.datos_sinteticos import ESCALAS, generar, generar_marcas, generar_personal, generar_tablas
+from ui_sections.horarios import read_csv_bytes
+
+ESCALA = replace(ESCALAS["chica"], empleados=20)
+
+
+class TestDatosSinteticos:
+    """Tests de reproducibilidad, volumen y formato de los datos generados."""
+
+    def test_reproducible_con_la_misma_semilla(self):
+        primera, segunda = generar_tablas(ESCALA), generar_tablas(ESCALA)
+        for tabla in primera:
+            pd.testing.assert_frame_equal(primera[tabla], segunda[tabla])
+        otra = generar_tablas(replace(ESCALA, semilla=ESCALA.semilla + 1))
+        assert not otra["vacaciones"].equals(primera["vacaciones"])
+
+    def test_volumen_segun_escala(self):
+        tablas = generar_tablas(replace(ESCALA, anios=2))
+        assert len(tablas["personal"]) == 20
+        assert tablas["personal"]["Apellido, Nombres"].is_unique
+        assert len(tablas["vacaciones"]) == 20 * 2 * ESCALA.licencias_por_anio
+        assert len(tablas["compensados"]) == 20 * 2 * ESCALA.ausencias_por_anio
+        assert tablas["feriados"]["Fecha"].is_unique
+
+    def test_nombres_unicos_con_muchos_empleados(self):
+        personal = generar_personal(replace(ESCALA, empleados=1500), np.random.default_rng(0))
+        assert personal["Apellido, Nombres"].is_unique
+
+    def test_marcas_impares_duplicadas_y_libro(self):
+        escala = replace(ESCALA, empleados=50, meses_marcas=2, tasa_impares=0.1, tasa_duplicados=0.05,
+                         proporcion_libro=0.5)
+        marcas = generar_marcas(generar_personal(escala, np.random.default_rng(1)), escala,
+                                np.random.default_rng(2))
+        reloj = marcas[marcas["tipo"] == "RELOJ"]
+        por_dia = reloj.groupby(["id_empleado", "fecha"]).size()
+        impares = (por_dia % 2 == 1).mean()
+        assert 0.1 < impares < 0.3
+        libro = marcas[marcas["tipo"] == "LIBRO"].groupby(["id_empleado", "fecha"]).size()
+        assert (libro == 2).all()
+        assert 0.4 < len(libro) / len(por_dia) < 0.6
+        assert marcas["fecha_hora"].is_monotonic_increasing
+
+    def test_genera_base_y_csvs_legibles(self, tmp_path):
+        resumen = generar(str(tmp_path), ESCALA)
+        assert row_count("vacaciones", resumen["db_path"]) == resumen["filas"]["vacaciones"]
+        assert get_data("personal", resumen["db_path"])["ID"].tolist()[:2] == ["1", "2"]
+
+        assert [os.path.basename(p) for p in resumen["csv"]] == ["registros_2025-12.csv"]
+        with open(resumen["csv"][0], "rb") as f:
+            df = read_csv_bytes(f.read())
+        assert {"id_empleado", "fecha_hora", "tipo"} <= set(df.columns)
+        assert len(df) == resumen["filas"]["marcas"]
+        assert pd.to_datetime(df["fecha_hora"]).notna().all()
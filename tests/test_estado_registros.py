@@ -0,0 +1,77 @@
+"""
+Tests del estado de licencias y ausencias (utils/estado_registros.py).
+"""
+
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.estado_registros import (
+    ESTADO_EN_CURSO, ESTADO_PROXIMA, ESTADO_TRANSCURRIDA, contar_estados,
+    estilos_por_estado, preparar_compensados, preparar_vacaciones, vista_en_cache,
+)
+
+HOY = date(2025, 3, 10)
+
+
+@pytest.fixture
+def df_vacaciones():
+    return pd.DataFrame({
+        'Apellido, Nombres': ['Pérez, Ana', 'Gómez, Luis', 'Sosa, Eva', 'Ruiz, Juan'],
+        'Fecha solicitud': ['2025-01-01'] * 4,
+        'Tipo': ['Licencia Ordinaria 2025'] * 4,
+        'Fecha inicio': ['2025-03-03', '2025-03-20', '03/02/2025', ''],
+        # El regreso el mismo día de hoy: el último día fue ayer
+        'Fecha regreso': ['2025-03-17', '2025-03-31', '2025-03-10', ''],
+        'Observaciones': [''] * 4,
+    })
+
+
+class TestEstadoRegistros:
+    """Tests de estado, etiquetas y caché de la vista."""
+
+    def test_estado_vacaciones(self, df_vacaciones):
+        vista = preparar_vacaciones(df_vacaciones, HOY)
+        assert vista['Estado'].tolist() == [ESTADO_EN_CURSO, ESTADO_PROXIMA, ESTADO_TRANSCURRIDA, '']
+        assert contar_estados(vista) == {ESTADO_EN_CURSO: 1, ESTADO_TRANSCURRIDA: 1, ESTADO_PROXIMA: 1}
+        # La tabla de la sesión no se modifica
+        assert 'Estado' not in df_vacaciones.columns
+
+    def test_etiquetas(self, df_vacaciones):
+        vista = preparar_vacaciones(df_vacaciones, HOY)
+        assert vista['Etiqueta'].iloc[0] == '#0: Pérez, Ana - 03/03/2025 (Licencia Ordinaria 2025)'
+        assert vista['Etiqueta'].iloc[3] == '#3: Ruiz, Juan -  (Licencia Ordinaria 2025)'
+
+        compensados = preparar_compensados(pd.DataFrame({
+            'Apellido, Nombres': ['Pérez, Ana', 'Gómez, Luis'],
+            'Desde fecha': ['2025-03-10', '2025-03-11'],
+            'Hasta fecha': ['2025-03-10', '2025-03-12'],
+            'Desde hora': ['09:00', None],
+        }), HOY)
+        assert compensados['Etiqueta'].tolist() == [
+            '#0: Pérez, Ana - 10/03/2025 09:00', '#1: Gómez, Luis - 11/03/2025 ',
+        ]
+        assert compensados['Estado'].tolist() == [ESTADO_EN_CURSO, ESTADO_PROXIMA]
+
+    def test_estilos_por_fila(self, df_vacaciones):
+        vista = preparar_vacaciones(df_vacaciones, HOY).iloc[[1, 0, 3]]
+        estilos = estilos_por_estado(vista, vista['Estado'])
+        assert estilos.shape == vista.shape
+        assert set(estilos.iloc[0]) == {'background-color: #FF8C00'}
+        assert set(estilos.iloc[1]) == {'background-color: #1E90FF'}
+        assert set(estilos.iloc[2]) == {''}
+
+    def test_vista_en_cache(self, df_vacaciones):
+        estado = {}
+        primera = vista_en_cache(estado, 'vista', df_vacaciones, preparar_vacaciones, HOY)
+        assert vista_en_cache(estado, 'vista', df_vacaciones, preparar_vacaciones, HOY) is primera
+        # Cambia el día: se recalcula el estado
+        assert vista_en_cache(estado, 'vista', df_vacaciones, preparar_vacaciones, date(2025, 4, 1)) is not primera
+        df_vacaciones.loc[0, 'Tipo'] = 'Otros'
+        nueva = vista_en_cache(estado, 'vista', df_vacaciones, preparar_vacaciones, date(2025, 4, 1))
+        assert nueva['Etiqueta'].iloc[0].endswith('(Otros)')
@@ -0,0 +1,227 @@
+"""
+Tests del armado de eventos del Calendario Unificado (utils/eventos_calendario.py).
+"""
+
+import os
+import sys
+from datetime import date, time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.eventos_calendario import (
+    CacheEventos, IndiceEventos, eventos_compensados, eventos_cumpleanios, eventos_tareas,
+    eventos_vacaciones, ventana_de_carga, version_tabla,
+)
+
+
+@pytest.fixture
+def tablas():
+    """Tablas de sesión mínimas con fechas ISO y DD/MM/YYYY mezcladas."""
+    return {
+        'df_tareas': pd.DataFrame({
+            'Título Tarea': ['Informe', 'Cerrada', 'Sin fecha'],
+            'Estado': ['En curso', 'Finalizada', 'Pendiente'],
+            'Responsable': ['Ana', 'Luis', 'Ana'],
+            'Fecha límite': ['2025-03-04', '2025-03-05', ''],
+        }),
+        'df_vacaciones': pd.DataFrame({
+            'Apellido, Nombres': ['Pérez, Ana'],
+            'Fecha inicio': ['2025-01-06'],
+            'Fecha regreso': ['20/01/2025'],
+        }),
+        'df_compensados': pd.DataFrame({
+            'Apellido, Nombres': ['Gómez, Luis', 'Pérez, Ana'],
+            'Tipo': ['Compensatorio', 'Trámite'],
+            'Desde fecha': ['2025-02-10', '2025-02-11'],
+            'Hasta fecha': ['2025-02-10', '2025-02-12'],
+            'Desde hora': ['09:00', ''],
+            'Hasta hora': [time(13, 0), None],
+        }),
+        'df_personal': pd.DataFrame({
+            'Apellido, Nombres': ['Pérez, Ana', 'Gómez, Luis'],
+            'Fecha de nacimiento': ['1992-02-29', '15/12/1985'],
+        }),
+        'df_feriados_manuales': pd.DataFrame({'Fecha': ['2025-04-02'], 'Motivo': ['Asueto']}),
+    }
+
+
+class TestConstructores:
+    """Tests de los constructores vectorizados por fuente."""
+
+    def test_tareas_excluye_finalizadas_y_sin_fecha(self, tablas):
+        eventos = eventos_tareas(tablas['df_tareas'])
+        assert eventos == [{
+            "title": "Tarea: Informe", "start": "2025-03-04", "color": "#FF6347",
+            "extendedProps": {"tipo": "tarea", "estado": "En curso", "responsable": "Ana"},
+        }]
+
+    def test_vacaciones_fin_es_dia_de_regreso(self, tablas):
+        evento, = eventos_vacaciones(tablas['df_vacaciones'])
+        assert (evento['start'], evento['end']) == ('2025-01-06', '2025-01-20')
+        assert evento['extendedProps']['descripcion'] == (
+            'Período de licencia de Pérez, Ana desde 06/01/2025 hasta 20/01/2025'
+        )
+
+    def test_compensados_con_y_sin_hora(self, tablas):
+        con_hora, todo_el_dia = eventos_compensados(tablas['df_compensados'])
+        assert con_hora['title'] == 'Compensatorio: Gómez, Luis'
+        assert (con_hora['start'], con_hora['end']) == ('2025-02-10T09:00', '2025-02-10T13:00:00')
+        # Sin horas: todo el día, con fin exclusivo
+        assert (todo_el_dia['start'], todo_el_dia['end']) == ('2025-02-11', '2025-02-13')
+
+    def test_no_modifica_las_tablas(self, tablas):
+        copia = tablas['df_compensados'].copy()
+        eventos_compensados(tablas['df_compensados'])
+        pd.testing.assert_frame_equal(tablas['df_compensados'], copia)
+
+    def test_cumpleanios_29_febrero_y_diciembre(self, tablas):
+        eventos = eventos_cumpleanios(tablas['df_personal'], hoy=date(2025, 12, 1))
+        assert [(e['title'], e['start']) for e in eventos] == [
+            ('🎂 Cumpleaños: Pérez, Ana', '2025-03-01'),
+            ('🎂 Cumpleaños: Pérez, Ana', '2026-03-01'),
+            ('🎂 Cumpleaños: Gómez, Luis', '2025-12-15'),
+            ('🎂 Cumpleaños: Gómez, Luis', '2026-12-15'),
+        ]
+        en_junio = eventos_cumpleanios(tablas['df_personal'], hoy=date(2024, 6, 1))
+        assert [e['start'] for e in en_junio] == ['2024-02-29', '2024-12-15']
+
+
+class TestCacheEventos:
+    """Tests del recálculo incremental por versión de tabla."""
+
+    def test_orden_de_la_lista_combinada(self, tablas):
+        google = [{'title': 'Reunión', 'start': '2025-03-01', 'end': '2025-03-02', 'color': '#FFA500'}]
+        eventos = CacheEventos().eventos(tablas, google, hoy=date(2025, 6, 1))
+        titulos = [e['title'] for e in eventos]
+        assert titulos == [
+            'Tarea: Informe', 'Licencia: Pérez, Ana', 'Compensatorio: Gómez, Luis',
+            'Trámite: Pérez, Ana', '🎌 Feriado: Asueto', 'Reunión',
+            '🎂 Cumpleaños: Pérez, Ana', '🎂 Cumpleaños: Gómez, Luis',
+        ]
+
+    def test_solo_recalcula_la_fuente_que_cambio(self, tablas):
+        cache = CacheEventos()
+        primera = cache.eventos(tablas, hoy=date(2025, 6, 1))
+        assert cache.eventos(tablas, hoy=date(2025, 6, 1)) is primera
+
+        # Edición en el lugar de una sola tabla
+        tablas['df_tareas'].loc[0, 'Título Tarea'] = 'Informe final'
+        segunda = cache.eventos(tablas, hoy=date(2025, 6, 1))
+        assert segunda[0]['title'] == 'Tarea: Informe final'
+        assert cache.recalculos['tareas'] == 2
+        assert cache.recalculos['vacaciones'] == 1
+        assert cache.recalculos['cumpleanios'] == 1
+
+    def test_cumpleanios_se_recalculan_al_cambiar_de_anio(self, tablas):
+        cache = CacheEventos()
+        cache.eventos(tablas, hoy=date(2025, 6, 1))
+        cache.eventos(tablas, hoy=date(2025, 7, 1))
+        assert cache.recalculos['cumpleanios'] == 1
+        eventos = cache.eventos(tablas, hoy=date(2026, 1, 2))
+        assert cache.recalculos['cumpleanios'] == 2
+        assert eventos[-1]['start'] == '2026-12-15'
+
+    def test_version_tabla(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+        assert version_tabla(df) == version_tabla(df.copy())
+        assert version_tabla(df) != version_tabla(df.iloc[::-1].reset_index(drop=True))
+        assert version_tabla(pd.DataFrame()) == version_tabla(None)
+
+
+class TestIndiceEventos:
+    """Tests de la consulta de eventos por rango de fechas."""
+
+    @pytest.fixture
+    def indice(self):
+        return IndiceEventos([
+            {'title': 'Licencia larga', 'start': '2025-01-06', 'end': '2025-02-20'},
+            {'title': 'Tarea', 'start': '2025-03-04'},
+            {'title': 'Reunión', 'start': '2025-02-28T10:00', 'end': '2025-02-28T11:00'},
+            {'title': 'Ausencia', 'start': '2025-03-10', 'end': '2025-03-12'},
+        ])
+
+    def test_superposicion_con_la_ventana(self, indice):
+        titulos = [e['title'] for e in indice.en_rango(date(2025, 2, 15), date(2025, 3, 4))]
+        # La licencia empezó antes de la ventana pero sigue vigente; la ausencia queda afuera
+        assert titulos == ['Licencia larga', 'Reunión', 'Tarea']
+
+    def test_fin_exclusivo(self, indice):
+        # 'end' 2025-03-12 de un evento de todo el día no incluye ese día
+        assert indice.en_rango(date(2025, 3, 12), date(2025, 3, 31)) == []
+        assert [e['title'] for e in indice.en_rango(date(2025, 3, 11), date(2025, 3, 11))] == ['Ausencia']
+
+    def test_coincide_con_filtro_completo(self, tablas):
+        eventos = CacheEventos().eventos(tablas, hoy=date(2025, 6, 1))
+        indice = IndiceEventos(eventos)
+        desde, hasta = ventana_de_carga(date(2025, 2, 14), margen_dias=7)
+        assert (desde, hasta) == (date(2025, 1, 25), date(2025, 3, 7))
+        esperado = [
+            e['title'] for e in eventos
+            if e['start'][:10] <= hasta.isoformat()
+            and (e.get('end') or e['start'])[:10] >= desde.isoformat()
+        ]
+        assert sorted(e['title'] for e in indice.en_rango(desde, hasta)) == sorted(esperado)
+
+
+class _EstadoSesion(dict):
+    """session_state mínimo: acceso por atributo."""
+
+    def __getattr__(self, nombre):
+        try:
+            return self[nombre]
+        except KeyError:
+            raise AttributeError(nombre)
+
+    def __setattr__(self, nombre, valor):
+        self[nombre] = valor
+
+
+class TestAnclaDesdeVista:
+    """Tests de la navegación con los botones propios de FullCalendar."""
+
+    @pytest.fixture
+    def calendario(self, monkeypatch):
+        pytest.importorskip("streamlit_calendar")
+        from types import SimpleNamespace
+        from ui_sections import calendario
+        monkeypatch.setattr(calendario, "st", SimpleNamespace(session_state=_EstadoSesion(
+            calendario_ancla=date(2025, 3, 10))))
+        return calendario
+
+    @staticmethod
+    def _events_set(inicio, fin, actual, tipo="dayGridMonth"):
+        """Payload de streamlit-calendar 1.4 para el callback eventsSet."""
+        return {
+            "callback": "eventsSet",
+            "eventsSet": {
+                "events": [],
+                "view": {
+                    "type": tipo, "title": "",
+                    "activeStart": inicio, "activeEnd": fin,
+                    "currentStart": actual, "currentEnd": fin,
+                },
+            },
+        }
+
+    def test_vista_fuera_de_la_ventana_mueve_el_ancla(self, calendario):
+        desde, hasta = ventana_de_carga(date(2025, 3, 10))
+        estado = self._events_set("2025-06-29T03:00:00.000Z", "2025-08-10T03:00:00.000Z",
+                                  "2025-07-01T03:00:00.000Z")
+        assert calendario.actualizar_ancla_desde_vista(estado, desde, hasta) is True
+        sesion = calendario.st.session_state
+        assert sesion.calendario_ancla == date(2025, 7, 1)
+        assert sesion.calendario_vista == "dayGridMonth"
+
+    def test_vista_dentro_de_la_ventana(self, calendario):
+        desde, hasta = ventana_de_carga(date(2025, 3, 10))
+        estado = self._events_set("2025-03-10T03:00:00.000Z", "2025-03-17T03:00:00.000Z",
+                                  "2025-03-10T03:00:00.000Z", tipo="timeGridWeek")
+        assert calendario.actualizar_ancla_desde_vista(estado, desde, hasta) is False
+        assert calendario.st.session_state.calendario_ancla == date(2025, 3, 10)
+        # Sin vista (eventChange) o sin estado no hace nada
+        assert not calendario.actualizar_ancla_desde_vista({"callback": "eventChange", "eventChange": {}},
+                                                           desde, hasta)
+        assert not calendario.actualizar_ancla_desde_vista(None, desde, hasta)
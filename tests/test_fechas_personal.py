@@ -0,0 +1,78 @@
+"""
+Tests del servicio de fechas del personal (utils/fechas_personal.py).
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fechas_personal import FechasPersonal, ordinal_en_anio
+
+
+@pytest.fixture
+def df_personal():
+    return pd.DataFrame({
+        'Apellido, Nombres': ['Pérez, Ana María', 'Gómez, Luis', 'Sosa, Eva', 'Juan Ruiz', ''],
+        'Fecha de nacimiento': ['1992-02-29', '03/01/1985', '2000-12-30', None, '1990-01-01'],
+        'Fecha ingreso PAO': ['2015-03-02', '2020-01-05', '', '2010-12-31', '2000-01-01'],
+    })
+
+
+def _proximo_por_recorrido(nacimiento: date, hoy: date, dias: int):
+    """Referencia: la lógica original, persona por persona con replace(year=...)."""
+    for anio in (hoy.year, hoy.year + 1):
+        try:
+            fecha = nacimiento.replace(year=anio)
+        except ValueError:
+            fecha = nacimiento.replace(year=anio, month=3, day=1)
+        if hoy <= fecha <= hoy + timedelta(days=dias):
+            return fecha, anio - nacimiento.year
+    return None
+
+
+class TestFechasPersonal:
+    """Tests de próximos aniversarios y regla del 29 de febrero."""
+
+    def test_nombres_a_mostrar(self, df_personal):
+        fechas = FechasPersonal(df_personal)
+        # La fila sin nombre se descarta
+        assert fechas.nombres_mostrar.tolist() == ['Ana P.', 'Luis G.', 'Eva S.', 'Juan R.']
+
+    def test_29_de_febrero(self):
+        assert ordinal_en_anio(pd.Series([2]).to_numpy(), pd.Series([29]).to_numpy(), 2025)[0] == \
+            date(2025, 3, 1).timetuple().tm_yday
+        fechas = FechasPersonal(pd.DataFrame({'Apellido, Nombres': ['Pérez, Ana'],
+                                              'Fecha de nacimiento': ['1992-02-29']}))
+        assert fechas.fechas_en_anio('nacimiento', 2025)['fecha'].dt.date.tolist() == [date(2025, 3, 1)]
+        assert fechas.fechas_en_anio('nacimiento', 2028)['fecha'].dt.date.tolist() == [date(2028, 2, 29)]
+
+    def test_proximos_cruza_fin_de_anio(self, df_personal):
+        proximos = FechasPersonal(df_personal).proximos('nacimiento', date(2025, 12, 28), 7)
+        assert proximos[['nombre_mostrar', 'fecha', 'faltan', 'anios']].values.tolist() == [
+            ['Eva S.', date(2025, 12, 30), 2, 25],
+            ['Luis G.', date(2026, 1, 3), 6, 41],
+        ]
+
+    def test_aniversarios_de_ingreso(self, df_personal):
+        proximos = FechasPersonal(df_personal).proximos('ingreso', date(2025, 12, 31), 0)
+        assert proximos[['nombre', 'anios']].values.tolist() == [['Juan Ruiz', 15]]
+
+    @pytest.mark.parametrize('hoy', [date(2024, 2, 25), date(2025, 2, 25), date(2027, 12, 30), date(2028, 1, 1)])
+    def test_coincide_con_recorrido(self, hoy):
+        nacimientos = pd.date_range('1980-01-01', '1981-12-31', freq='3D').date.tolist() + [date(1992, 2, 29)]
+        df = pd.DataFrame({
+            'Apellido, Nombres': [f'Persona, N{i}' for i in range(len(nacimientos))],
+            'Fecha de nacimiento': [d.isoformat() for d in nacimientos],
+        })
+        for dias in (0, 7, 70):
+            obtenidos = FechasPersonal(df).proximos('nacimiento', hoy, dias)
+            esperados = {
+                f'Persona, N{i}': ref for i, d in enumerate(nacimientos)
+                if (ref := _proximo_por_recorrido(d, hoy, dias)) is not None
+            }
+            assert dict(zip(obtenidos['nombre'], zip(obtenidos['fecha'], obtenidos['anios']))) == esperados
@@ -0,0 +1,102 @@
+"""
+Tests del almacén local de feriados (utils/feriados_store.py) contra un
+servidor HTTP local que simula la API de Argentina Datos.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import feriados_store
+from utils.feriados_store import (
+    anios_pendientes,
+    descargar_feriados,
+    leer_feriados,
+    prefetch_feriados,
+    refrescar_en_segundo_plano,
+)
+
+FERIADOS_STUB = {
+    "2025": [
+        {"fecha": "2025-03-03", "nombre": "Carnaval", "tipo": "inamovible"},
+        {"fecha": "2025-03-24", "nombre": "Día de la Memoria", "tipo": "inamovible"},
+    ],
+    "2026": [{"fecha": "2026-01-01", "nombre": "Año nuevo", "tipo": "inamovible"}],
+}
+
+
+class _Stub:
+    """Respuestas del servidor local (fixture stub_server de conftest.py)."""
+    fallas_pendientes = 0
+
+    @classmethod
+    def responder(cls, path, headers):
+        year = path.rstrip("/").rsplit("/", 1)[-1]
+        if cls.fallas_pendientes > 0:
+            cls.fallas_pendientes -= 1
+            return 503, {}, None
+        if year not in FERIADOS_STUB:
+            return 404, {}, None
+        return 200, {}, FERIADOS_STUB[year]
+
+
+@pytest.fixture
+def api_stub(stub_server):
+    """Servidor local con la forma de /v1/feriados/{año}."""
+    _Stub.fallas_pendientes = 0
+    return stub_server(_Stub.responder) + "/v1/feriados"
+
+
+@pytest.fixture
+def temp_db(monkeypatch):
+    """Base temporal y sin esperas entre reintentos."""
+    monkeypatch.setattr(feriados_store, "ESPERA_REINTENTO", 0)
+    feriados_store._ultimo_intento.clear()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "test.db")
+
+
+class TestDescarga:
+    """Tests de la descarga con reintentos."""
+
+    def test_reintenta_ante_errores(self, api_stub, temp_db):
+        _Stub.fallas_pendientes = 2
+        feriados = descargar_feriados(2025, base_url=api_stub, reintentos=3)
+        assert [f["fecha"] for f in feriados] == ["2025-03-03", "2025-03-24"]
+
+    def test_falla_tras_agotar_reintentos(self, api_stub, temp_db):
+        _Stub.fallas_pendientes = 5
+        with pytest.raises(Exception):
+            descargar_feriados(2025, base_url=api_stub, reintentos=2)
+
+
+class TestAlmacen:
+    """Tests de la precarga y lectura local."""
+
+    def test_prefetch_y_lectura_local(self, api_stub, temp_db):
+        resultado = prefetch_feriados([2025, 2026, 2030], db_path=temp_db, base_url=api_stub, reintentos=1)
+        assert resultado == {2025: True, 2026: True, 2030: False}
+        assert leer_feriados(2025, temp_db) == {
+            "2025-03-03": "Carnaval",
+            "2025-03-24": "Día de la Memoria",
+        }
+        assert leer_feriados(2030, temp_db) == {}
+        assert anios_pendientes([2025, 2026, 2030], temp_db) == [2030]
+
+    def test_fallo_conserva_copia_local(self, api_stub, temp_db):
+        prefetch_feriados([2025], db_path=temp_db, base_url=api_stub)
+        _Stub.fallas_pendientes = 10
+        assert prefetch_feriados([2025], db_path=temp_db, base_url=api_stub, reintentos=1) == {2025: False}
+        assert len(leer_feriados(2025, temp_db)) == 2
+
+    def test_refresco_en_segundo_plano(self, api_stub, temp_db):
+        hilo = refrescar_en_segundo_plano([2025, 2026], db_path=temp_db, base_url=api_stub)
+        assert hilo is not None
+        hilo.join(timeout=10)
+        assert anios_pendientes([2025, 2026], temp_db) == []
+        # Sin años pendientes no se lanza otro hilo
+        assert refrescar_en_segundo_plano([2025, 2026], db_path=temp_db, base_url=api_stub) is None
@@ -0,0 +1,125 @@
+"""
+Tests de la caché de iCal (utils/ical_cache.py) con un servidor local de
+archivos .ics que soporta ETag.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("recurring_ical_events")
+
+from utils.ical_cache import CacheIcal
+
+ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//test//ES
+BEGIN:VEVENT
+UID:semanal@test
+DTSTART:20250303T120000Z
+DTEND:20250303T130000Z
+RRULE:FREQ=WEEKLY;COUNT=20
+SUMMARY:Reunion semanal
+END:VEVENT
+BEGIN:VEVENT
+UID:unico@test
+DTSTART;VALUE=DATE:20250415
+DTEND;VALUE=DATE:20250416
+SUMMARY:Dia completo
+LOCATION:Malargue
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class _Ics:
+    """Respuestas del servidor local de .ics con ETag (fixture stub_server de conftest.py)."""
+    contenido = ICS
+    etag = '"v1"'
+    respuestas = []
+
+    @classmethod
+    def responder(cls, path, headers):
+        if headers.get("If-None-Match") == cls.etag:
+            cls.respuestas.append(304)
+            return 304, {}, None
+        cls.respuestas.append(200)
+        return 200, {"Content-Type": "text/calendar", "ETag": cls.etag}, cls.contenido
+
+
+@pytest.fixture
+def ics_url(stub_server):
+    _Ics.contenido = ICS
+    _Ics.etag = '"v1"'
+    _Ics.respuestas = []
+    return stub_server(_Ics.responder) + "/calendario.ics"
+
+
+@pytest.fixture
+def cache_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+class TestCacheIcal:
+    """Tests de peticiones condicionales, ventana y persistencia."""
+
+    def test_ventana_expande_solo_meses_visibles(self, ics_url, cache_dir):
+        cache = CacheIcal(cache_dir)
+        eventos = cache.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31))
+        assert [e["start"] for e in eventos] == [
+            "2025-03-03T12:00:00", "2025-03-10T12:00:00", "2025-03-17T12:00:00",
+            "2025-03-24T12:00:00", "2025-03-31T12:00:00",
+        ]
+        assert set(cache.feed(ics_url).meses) == {(2025, 3)}
+
+    def test_evento_de_dia_completo(self, ics_url, cache_dir):
+        cache = CacheIcal(cache_dir)
+        eventos = cache.eventos_en_ventana(ics_url, date(2025, 4, 15), date(2025, 4, 15))
+        dia = [e for e in eventos if e["allDay"]]
+        assert dia == [{
+            "title": "Dia completo", "start": "2025-04-15", "end": "2025-04-17",
+            "color": "#FFA500", "allDay": True, "location": "Malargue",
+        }]
+
+    def test_peticion_condicional(self, ics_url, cache_dir):
+        cache = CacheIcal(cache_dir)
+        cache.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31))
+        cache.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31), forzar=True)
+        assert _Ics.respuestas == [200, 304]
+
+    def test_cambio_de_contenido_invalida_meses(self, ics_url, cache_dir):
+        cache = CacheIcal(cache_dir)
+        cache.eventos_en_ventana(ics_url, date(2025, 4, 1), date(2025, 4, 30))
+        _Ics.contenido = ICS.replace(b"Dia completo", b"Feriado puente")
+        _Ics.etag = '"v2"'
+        eventos = cache.eventos_en_ventana(ics_url, date(2025, 4, 1), date(2025, 4, 30), forzar=True)
+        assert "Feriado puente" in {e["title"] for e in eventos}
+
+    def test_persistencia_entre_procesos(self, ics_url, cache_dir):
+        CacheIcal(cache_dir).eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31))
+        nueva = CacheIcal(cache_dir)
+        feed = nueva.feed(ics_url)
+        assert (2025, 3) in feed.meses
+        eventos = nueva.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31))
+        assert len(eventos) == 5
+        # La nueva instancia (otro proceso) aprovecha la revalidación reciente de la primera
+        assert _Ics.respuestas == [200]
+        # y al revalidar usa el ETag guardado
+        nueva.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31), forzar=True)
+        assert _Ics.respuestas == [200, 304]
+
+    def test_meses_expandidos_por_otro_proceso(self, ics_url, cache_dir):
+        uno, otro = CacheIcal(cache_dir), CacheIcal(cache_dir)
+        uno.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 3, 31))
+        otro.eventos_en_ventana(ics_url, date(2025, 4, 1), date(2025, 4, 30))
+        uno.eventos_en_ventana(ics_url, date(2025, 3, 1), date(2025, 4, 30))
+        # 'otro' tomó la descarga del disco y 'uno' el mes que expandió 'otro'
+        assert _Ics.respuestas == [200]
+        assert {(2025, 3), (2025, 4)} <= set(otro.feed(ics_url).meses)
+        assert uno.feed(ics_url).meses[(2025, 4)] == otro.feed(ics_url).meses[(2025, 4)]
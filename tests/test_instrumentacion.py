@@ -0,0 +1,124 @@
+"""
+Tests de la instrumentación de etapas (utils/instrumentacion.py).
+"""
+
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import instrumentacion
+from utils.instrumentacion import etapa, instrumentar, iniciar_rerun, marcar_miss
+
+
+@pytest.fixture(autouse=True)
+def limpiar():
+    instrumentacion.reiniciar_totales()
+    yield
+    iniciar_rerun(False)
+    instrumentacion.reiniciar_totales()
+
+
+class TestInstrumentacion:
+    """Tests de mediciones por rerun, caché, totales y exportación a Prometheus."""
+
+    def test_desactivada_no_registra(self):
+        iniciar_rerun(False)
+        with etapa("a") as medicion:
+            medicion.filas = 10
+            medicion.marcar_miss()
+        assert medicion is etapa("b")
+        assert instrumentacion.registros() == []
+        assert instrumentacion.totales() == {}
+
+    def test_etapas_anidadas(self):
+        iniciar_rerun(True)
+        with etapa("externa", filas=3):
+            with etapa("interna") as interna:
+                interna.filas = 5
+        registros = instrumentacion.registros()
+        assert [(r.nombre, r.profundidad, r.filas) for r in registros] == [("interna", 1, 5), ("externa", 0, 3)]
+        assert registros[1].segundos >= registros[0].segundos
+        assert registros[1].cache is None
+
+    def test_cache_hit_y_miss(self):
+        iniciar_rerun(True)
+        cache = {}
+
+        def cargar(clave):
+            if clave not in cache:
+                marcar_miss()
+                cache[clave] = clave.upper()
+            return cache[clave]
+
+        for _ in range(2):
+            with etapa("carga", cache=True):
+                cargar("x")
+        assert [r.cache for r in instrumentacion.registros()] == ["miss", "hit"]
+        assert instrumentacion.totales()["carga"]["hit"] == 1
+
+    def test_decorador(self):
+        @instrumentar("filas", filas=len)
+        def generar(n):
+            return pd.DataFrame({"a": range(n)})
+
+        iniciar_rerun(True)
+        assert len(generar(4)) == 4
+        assert instrumentacion.registros()[0].filas == 4
+        assert generar.__name__ == "generar"
+
+    def test_por_hilo(self):
+        iniciar_rerun(True)
+        otros = []
+
+        def otra_sesion():
+            with etapa("otro"):
+                pass
+            otros.append(instrumentacion.activa())
+
+        hilo = threading.Thread(target=otra_sesion)
+        hilo.start()
+        hilo.join()
+        assert otros == [False]
+        assert instrumentacion.registros() == []
+
+    def test_exportar_prometheus(self, tmp_path):
+        iniciar_rerun(True)
+        with etapa('db.cargar."x"', filas=7, cache=True):
+            pass
+        ruta = instrumentacion.exportar_prometheus(str(tmp_path / "metricas" / "gestor.prom"))
+        texto = open(ruta).read()
+        assert "# TYPE gestor_etapa_segundos_total counter" in texto
+        assert 'gestor_etapa_filas_total{etapa="db.cargar.\\"x\\""} 7' in texto
+        assert 'gestor_etapa_cache_total{etapa="db.cargar.\\"x\\"",resultado="hit"} 1' in texto
+        assert os.listdir(tmp_path / "metricas") == ["gestor.prom"]
+
+    def test_prometheus_sin_perder_digitos(self):
+        datos = {"db.cargar": {"ejecuciones": 1234567, "segundos": 98765.4321, "filas": 123456789,
+                               "ultima": 0.000123456789, "hit": 0, "miss": 0}}
+        texto = instrumentacion.texto_prometheus(datos)
+        assert 'gestor_etapa_ejecuciones_total{etapa="db.cargar"} 1234567\n' in texto
+        assert 'gestor_etapa_segundos_total{etapa="db.cargar"} 98765.4321\n' in texto
+        assert 'gestor_etapa_filas_total{etapa="db.cargar"} 123456789\n' in texto
+        assert 'gestor_etapa_ultima_segundos{etapa="db.cargar"} 0.000123456789\n' in texto
+
+    def test_init_session_state(self, monkeypatch):
+        import streamlit
+
+        from database import init_session_state
+
+        class Cliente:
+            def get_table(self, tabla):
+                return pd.DataFrame({"x": range(3)})
+
+        monkeypatch.setattr(streamlit, "session_state", {})
+        iniciar_rerun(True)
+        init_session_state(Cliente())
+        init_session_state(Cliente())
+        resumen = [r for r in instrumentacion.registros() if r.nombre == "db.init_session_state"]
+        assert [(r.cache, r.filas) for r in resumen] == [("miss", 18), ("hit", 0)]
+        assert instrumentacion.totales()["db.cargar.vacaciones"]["filas"] == 3
@@ -0,0 +1,100 @@
+"""
+Tests del motor vectorizado de intervalos y jornadas (utils/jornadas.py).
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jornadas import (
+    construir_intervalos,
+    calcular_jornada,
+    intervalos_ausencias,
+    tabla_timeline,
+)
+
+
+@pytest.fixture
+def registros():
+    """Marcaciones de dos empleados con un día impar."""
+    return pd.DataFrame([
+        ("1", "2025-03-03 08:00", "RELOJ"),
+        ("1", "2025-03-03 12:00", "RELOJ"),
+        ("1", "2025-03-03 13:00", "RELOJ"),
+        ("1", "2025-03-03 17:30", "RELOJ"),
+        ("1", "2025-03-03 08:05", "LIBRO"),
+        ("1", "2025-03-03 16:05", "LIBRO"),
+        ("2", "2025-03-04 09:00", "RELOJ"),
+        ("2", "2025-03-04 17:00", "RELOJ"),
+        ("2", "2025-03-04 17:01", "RELOJ"),
+    ], columns=["id_empleado", "fecha_hora", "tipo"])
+
+
+class TestIntervalos:
+    """Tests de emparejamiento de marcaciones."""
+
+    def test_pares_por_grupo(self, registros):
+        intervalos = construir_intervalos(registros)
+        reloj_1 = intervalos[(intervalos["id_empleado"] == "1") & (intervalos["tipo"] == "RELOJ")]
+        assert len(reloj_1) == 2
+        assert reloj_1["duracion_horas"].tolist() == [4.0, 4.5]
+        assert reloj_1["base_horas"].tolist() == [8.0, 13.0]
+        assert reloj_1["dia_par"].all()
+
+    def test_marcacion_impar_sin_pareja(self, registros):
+        intervalos = construir_intervalos(registros)
+        emp_2 = intervalos[intervalos["id_empleado"] == "2"]
+        assert len(emp_2) == 1
+        assert not emp_2["dia_par"].iloc[0]
+
+    def test_vacio(self):
+        assert construir_intervalos(pd.DataFrame()).empty
+
+
+class TestJornada:
+    """Tests del cálculo de jornada diaria."""
+
+    def test_suma_por_tipo(self, registros):
+        jornada = calcular_jornada(registros)
+        fila = jornada[(jornada["id_empleado"] == "1") & (jornada["tipo"] == "RELOJ")].iloc[0]
+        assert fila["duracion_horas"] == pytest.approx(8.5)
+        assert fila["inicio_jornada"] == pd.Timestamp("2025-03-03 08:00")
+        assert fila["fin_jornada"] == pd.Timestamp("2025-03-03 17:30")
+
+    def test_umbral_minimo(self):
+        df = pd.DataFrame([
+            ("1", "2025-03-03 08:00", "RELOJ"),
+            ("1", "2025-03-03 08:10", "RELOJ"),
+        ], columns=["id_empleado", "fecha_hora", "tipo"])
+        assert calcular_jornada(df).empty
+
+
+class TestTimeline:
+    """Tests de la tabla del gráfico de intervalos."""
+
+    def test_relleno_de_dias_sin_datos(self, registros):
+        intervalos = construir_intervalos(registros, tipos=["RELOJ"])
+        fechas = pd.date_range("2025-03-01", "2025-03-05").date
+        tabla = tabla_timeline(intervalos, fechas)
+        assert set(tabla["Fecha"]) == set(fechas)
+        vacios = tabla[tabla["Inicio"] == "-"]
+        # El 04/03 tiene marcaciones impares: no se grafica y queda como hueco
+        assert len(vacios) == 4
+        assert tabla.loc[tabla["Inicio"] == "13:00", "DuracionHM"].iloc[0] == "4:30"
+
+    def test_ausencias_por_horas_y_dia_completo(self):
+        ausencias = pd.DataFrame({
+            "fecha": [pd.Timestamp("2025-03-03").date(), pd.Timestamp("2025-03-04").date()],
+            "id_empleado": ["1", "1"],
+            "hora_inicio": ["09:00", ""],
+            "hora_fin": ["10:30", ""],
+            "duracion_horas": [1.5, 8.0],
+        })
+        intervalos = intervalos_ausencias(ausencias)
+        assert intervalos["duracion_horas"].tolist() == [1.5, 8.0]
+        assert intervalos["base_horas"].tolist() == [9.0, 8.0]
+        assert (intervalos["tipo"] == "COMPENSADO").all()
@@ -0,0 +1,130 @@
+"""
+Tests del motor de migración Sheets → SQLite (migrations/migrate_from_sheets.py)
+con un cliente de gspread falso.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_data, init_db, row_count
+from migrations.migrate_from_sheets import migrate_sheets, valores_a_dataframe
+
+
+class SpreadsheetFalso:
+    """Documento en memoria que registra los pedidos recibidos."""
+
+    def __init__(self, hojas):
+        self.hojas = hojas
+        self.pedidos = []
+
+    def values_batch_get(self, ranges):
+        self.pedidos.append(list(ranges))
+        rangos = []
+        for rango in ranges:
+            nombre = rango.strip("'")
+            valores = self.hojas.get(nombre)
+            rangos.append({"range": f"{rango}!A1:Z1000", "values": valores} if valores else {"range": rango})
+        return {"valueRanges": rangos}
+
+
+class ClienteFalso:
+    def __init__(self, hojas):
+        self.spreadsheet = SpreadsheetFalso(hojas)
+        self.aperturas = 0
+
+    def open(self, nombre):
+        self.aperturas += 1
+        return self.spreadsheet
+
+
+HOJAS = {
+    "Vacaciones": [
+        ["Apellido, Nombres", "Fecha solicitud", "Tipo", "Fecha inicio", "Fecha regreso", "Observaciones"],
+        ["Pérez, Ana", "2025-01-01", "Licencia Ordinaria 2025", "2025-03-03", "2025-03-17"],
+        ["Gómez, Luis", "2025-01-02", "Otros", "2025-04-01", "2025-04-02", "Médico"],
+    ],
+    "Compensados": [
+        ["Apellido, Nombres", "Desde fecha", "Hasta fecha"],
+        ["Pérez, Ana", "2025-03-10", "2025-03-10"],
+    ],
+    "Personal": [
+        ["Apellido, Nombres", "ID", ""],
+        ["Pérez, Ana", "1001", "x"],
+    ],
+    "Feriados_Manuales": [["Fecha", "Motivo"]],
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "gestor.db")
+    init_db(path)
+    return path
+
+
+class TestMigracionLotes:
+    """Tests de lectura en un solo pedido, importación, checkpoint y modo delta."""
+
+    def test_valores_a_dataframe(self):
+        df = valores_a_dataframe(HOJAS["Personal"] + [["Gómez, Luis"]])
+        assert df.columns.tolist() == ["Apellido, Nombres", "ID"]
+        assert df["ID"].tolist() == [1001, ""]
+
+    def test_un_solo_pedido(self, db_path, tmp_path):
+        cliente = ClienteFalso(HOJAS)
+        checkpoint = str(tmp_path / "checkpoint.json")
+        resultados = migrate_sheets(cliente, db_path=db_path, checkpoint_path=checkpoint)
+
+        assert cliente.aperturas == 1
+        assert len(cliente.spreadsheet.pedidos) == 1
+        assert [r["status"] for r in resultados] == ["success", "success", "success", "skipped"]
+        assert row_count("vacaciones", db_path) == 2
+        vacaciones = get_data("vacaciones", db_path)
+        assert vacaciones["Observaciones"].tolist() == ["", "Médico"]
+        assert get_data("personal", db_path)["ID"].tolist() == ["1001"]
+        # Todo terminó bien: no queda checkpoint
+        assert not os.path.exists(checkpoint)
+
+    def test_reanuda_desde_checkpoint(self, db_path, tmp_path):
+        checkpoint = str(tmp_path / "checkpoint.json")
+        # La hoja Compensados tiene una columna que no existe en la tabla
+        hojas = dict(HOJAS, Compensados=[["Apellido, Nombres", "Columna rara"], ["Pérez, Ana", "1"]])
+        resultados = migrate_sheets(ClienteFalso(hojas), db_path=db_path, checkpoint_path=checkpoint)
+        assert [r["status"] for r in resultados] == ["success", "failed", "success", "skipped"]
+        assert os.path.exists(checkpoint)
+
+        cliente = ClienteFalso(HOJAS)
+        resultados = migrate_sheets(cliente, db_path=db_path, checkpoint_path=checkpoint)
+        # Solo se piden las hojas que no estaban completas
+        assert cliente.spreadsheet.pedidos == [["'Compensados'", "'Feriados_Manuales'"]]
+        assert resultados[0]["from_checkpoint"]
+        assert [r["status"] for r in resultados] == ["success", "success", "success", "skipped"]
+        assert row_count("compensados", db_path) == 1
+        assert not os.path.exists(checkpoint)
+
+    def test_reiniciar_ignora_checkpoint(self, db_path, tmp_path):
+        checkpoint = str(tmp_path / "checkpoint.json")
+        hojas = dict(HOJAS, Compensados=[["Columna rara"], ["1"]])
+        migrate_sheets(ClienteFalso(hojas), db_path=db_path, checkpoint_path=checkpoint)
+        cliente = ClienteFalso(HOJAS)
+        migrate_sheets(cliente, db_path=db_path, checkpoint_path=checkpoint, reiniciar=True)
+        assert len(cliente.spreadsheet.pedidos[0]) == 4
+        assert row_count("vacaciones", db_path) == 2
+
+    def test_modo_delta(self, db_path, tmp_path):
+        checkpoint = str(tmp_path / "checkpoint.json")
+        migrate_sheets(ClienteFalso(HOJAS), db_path=db_path, checkpoint_path=checkpoint)
+        hojas = dict(HOJAS, Vacaciones=HOJAS["Vacaciones"][:2] + [
+            ["Sosa, Eva", "2025-01-03", "Otros", "2025-05-01", "2025-05-02"],
+        ])
+        resultados = migrate_sheets(ClienteFalso(hojas), db_path=db_path, checkpoint_path=checkpoint, delta=True)
+        vacaciones = resultados[0]
+        assert (vacaciones["inserted"], vacaciones["updated"], vacaciones["deleted"], vacaciones["unchanged"]) == \
+            (1, 0, 1, 1)
+        assert resultados[1]["unchanged"] == 1
+        assert "seconds" in vacaciones
+        assert sorted(get_data("vacaciones", db_path)["Apellido, Nombres"]) == ["Pérez, Ana", "Sosa, Eva"]
@@ -0,0 +1,42 @@
+"""
+Tests del análisis de tiempos de importación (scripts/profile_startup.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.profile_startup import comparar, parsear_importtime, resumir_imports
+
+SALIDA = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 | _io
+import time:       300 |        300 |     pandas.core
+import time:      2000 |       2300 |   pandas
+import time:      1500 |       1500 |   utils.jornadas
+import time:       700 |       4500 | ui_sections.horarios
+import time:        50 |         50 | otro
+"""
+
+
+class TestProfileStartup:
+    """Tests del parseo de -X importtime y la comparación de reportes."""
+
+    def test_parsear_importtime(self):
+        registros = parsear_importtime(SALIDA)
+        assert registros[0] == ("_io", 0, 100, 100)
+        assert registros[1] == ("pandas.core", 2, 300, 300)
+        assert len(registros) == 6
+
+    def test_resumir_solo_el_subarbol(self):
+        resumen = resumir_imports(parsear_importtime(SALIDA), "ui_sections.horarios")
+        assert resumen["cumulative_ms"] == 4.5
+        # _io y otro no forman parte del import de horarios
+        assert resumen["modules_loaded"] == 4
+        assert resumen["by_package_ms"] == {"pandas": 2.3, "utils": 1.5}
+        assert list(resumen["top_self_ms"])[0] == "pandas"
+
+    def test_comparar(self):
+        anterior = {"imports": {"app": {"cumulative_ms": 100}}, "renders": {"app.py": {"wall_ms": 1000}}}
+        actual = {"imports": {"app": {"cumulative_ms": 150}}, "renders": {"app.py": {"wall_ms": 1100}}}
+        assert comparar(actual, anterior, 0.2) == [("imports", "app", 100, 150)]
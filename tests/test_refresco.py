@@ -0,0 +1,130 @@
+"""
+Tests del planificador de refresco en segundo plano (utils/refresco.py),
+usando un servidor HTTP local como fuente de datos.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache_backend import BackendSQLite
+from utils.clima import descargar_clima
+from utils.refresco import CacheCompartida, PlanificadorRefresco, formatear_antiguedad
+
+
+class _Stub:
+    """Respuestas del servidor local (fixture stub_server de conftest.py)."""
+    pedidos = 0
+    caido = False
+
+    @classmethod
+    def responder(cls, path, headers):
+        cls.pedidos += 1
+        if cls.caido:
+            return 500, {}, None
+        return 200, {}, {
+            "main": {"temp": 12.5, "feels_like": 10.0, "humidity": 40, "pressure": 1010},
+            "wind": {"speed": 5},
+            "weather": [{"description": "cielo claro"}],
+        }
+
+
+@pytest.fixture
+def api_stub(stub_server):
+    _Stub.pedidos = 0
+    _Stub.caido = False
+    return stub_server(_Stub.responder)
+
+
+def _descargar(base_url):
+    return lambda: descargar_clima("clave", base_url=base_url, timeout=2)
+
+
+class TestPlanificador:
+    """Tests de refresco anticipado y stale-while-revalidate."""
+
+    def test_primera_carga_y_lectura_sin_red(self, api_stub):
+        planificador = PlanificadorRefresco(intervalo=0.05)
+        planificador.registrar("clima", _descargar(api_stub), ttl=3600)
+        planificador.iniciar()
+        try:
+            valor, edad, error = planificador.cache.obtener("clima", esperar=5)
+            assert valor["temperature"] == 12.5
+            assert edad is not None and error is None
+            pedidos = _Stub.pedidos
+            # Las lecturas siguientes no van a la red
+            for _ in range(10):
+                planificador.cache.obtener("clima")
+            time.sleep(0.2)
+            assert _Stub.pedidos == pedidos
+        finally:
+            planificador.detener()
+
+    def test_refresca_antes_de_vencer(self, api_stub):
+        planificador = PlanificadorRefresco(fraccion=0.5)
+        planificador.registrar("clima", _descargar(api_stub), ttl=0.2)
+        assert planificador.ejecutar_pendientes() == ["clima"]
+        assert planificador.ejecutar_pendientes() == []
+        time.sleep(0.12)
+        # Pasó la mitad del TTL: se refresca aunque el dato todavía no venció
+        assert planificador.ejecutar_pendientes() == ["clima"]
+        assert _Stub.pedidos == 2
+
+    def test_error_conserva_ultimo_valor(self, api_stub):
+        planificador = PlanificadorRefresco(fraccion=0.5)
+        planificador.registrar("clima", _descargar(api_stub), ttl=3600)
+        planificador.refrescar("clima")
+        _Stub.caido = True
+        assert not planificador.refrescar("clima")
+        valor, _, error = planificador.cache.obtener("clima")
+        assert valor["temperature"] == 12.5
+        assert error == "Sin datos"
+
+    def test_error_de_red(self):
+        planificador = PlanificadorRefresco()
+        planificador.registrar("clima", _descargar("http://127.0.0.1:9"), ttl=3600)
+        assert not planificador.refrescar("clima")
+        assert planificador.cache.obtener("clima")[0] is None
+        # No se reintenta en la vuelta siguiente del bucle
+        assert planificador.pendientes() == []
+
+
+class TestCache:
+    """Tests de la caché compartida."""
+
+    def test_espera_primera_carga(self):
+        cache = CacheCompartida()
+        threading.Timer(0.05, cache.guardar, args=("x", 1)).start()
+        assert cache.obtener("x", esperar=2)[0] == 1
+
+    def test_varios_procesos_descargan_una_vez(self, tmp_path):
+        ruta = str(tmp_path / "compartida.db")
+        llamadas = []
+
+        def descargar():
+            llamadas.append(1)
+            return {"temperature": 20}
+
+        uno = PlanificadorRefresco(CacheCompartida(backend=BackendSQLite(ruta)))
+        dos = PlanificadorRefresco(CacheCompartida(backend=BackendSQLite(ruta)))
+        for planificador in (uno, dos):
+            planificador.registrar("clima", descargar, ttl=3600)
+        assert uno.ejecutar_pendientes() == ["clima"]
+        # El segundo proceso ve el dato fresco del primero y no descarga
+        assert dos.pendientes() == []
+        assert dos.cache.obtener("clima")[0] == {"temperature": 20}
+        # Con la tarea reservada por otro proceso tampoco se ejecuta
+        assert uno.cache.reservar("clima")
+        assert not dos.refrescar("clima")
+        assert len(llamadas) == 1
+
+    def test_formatear_antiguedad(self):
+        assert formatear_antiguedad(None) == "sin datos"
+        assert formatear_antiguedad(30) == "hace instantes"
+        assert formatear_antiguedad(600) == "hace 10 min"
+        assert formatear_antiguedad(7200) == "hace 2 h"
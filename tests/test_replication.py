@@ -0,0 +1,109 @@
+"""
+Tests de la replicación de backups (backups/replication.py) con el transporte
+a directorio local.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backups.replication import LocalDirTransport, replicate, sha256_file, transport_for, SSHTransport
+
+
+def _archivos(tmp_path, cantidad=3):
+    archivos = []
+    for i in range(cantidad):
+        path = tmp_path / "origen" / f"gestor_{i}.gz"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(os.urandom(50_000))
+        archivos.append(str(path))
+    return archivos
+
+
+class TransporteCorrupto(LocalDirTransport):
+    """Corrompe las primeras subidas para forzar reintentos."""
+
+    def __init__(self, directory, fallas):
+        super().__init__(directory)
+        self.fallas = fallas
+
+    def upload(self, local_file, filename):
+        super().upload(local_file, filename)
+        if self.fallas > 0:
+            self.fallas -= 1
+            with open(os.path.join(self.directory, filename), "ab") as f:
+                f.write(b"basura")
+
+
+class TransporteLento(LocalDirTransport):
+    """Registra cuántas subidas hay en curso al mismo tiempo."""
+
+    en_curso = 0
+    maximo = 0
+    lock = threading.Lock()
+
+    def upload(self, local_file, filename):
+        with self.lock:
+            TransporteLento.en_curso += 1
+            TransporteLento.maximo = max(TransporteLento.maximo, TransporteLento.en_curso)
+        time.sleep(0.05)
+        super().upload(local_file, filename)
+        with self.lock:
+            TransporteLento.en_curso -= 1
+
+
+class TestReplicacion:
+    """Tests de copia, verificación, reintentos y concurrencia."""
+
+    def test_copia_y_verifica(self, tmp_path):
+        archivos = _archivos(tmp_path)
+        destinos = [transport_for(f"file://{tmp_path / nombre}", "") for nombre in ("r1", "r2")]
+        resultados = replicate(archivos, destinos, backoff=0)
+
+        assert [r.ok for r in resultados] == [True, True]
+        assert resultados[0].files_sent == 3
+        assert resultados[0].bytes_sent == sum(os.path.getsize(a) for a in archivos)
+        for nombre in ("r1", "r2"):
+            copiados = sorted(os.listdir(tmp_path / nombre))
+            assert copiados == sorted(os.path.basename(a) for a in archivos)
+            for archivo in archivos:
+                assert sha256_file(str(tmp_path / nombre / os.path.basename(archivo))) == sha256_file(archivo)
+
+    def test_no_reenvia_archivos_presentes(self, tmp_path):
+        archivos = _archivos(tmp_path)
+        destino = LocalDirTransport(str(tmp_path / "r1"))
+        replicate(archivos[:2], [destino])
+        resultado = replicate(archivos, [destino])[0]
+        assert (resultado.files_sent, resultado.files_skipped) == (1, 2)
+
+    def test_reintenta_si_llega_corrupto(self, tmp_path):
+        archivos = _archivos(tmp_path, 1)
+        esperas = []
+        resultado = replicate(archivos, [TransporteCorrupto(str(tmp_path / "r1"), fallas=2)],
+                              retries=3, backoff=1, sleep=esperas.append)[0]
+        assert resultado.ok
+        assert resultado.attempts == 3
+        assert esperas == [1, 2]
+        assert not any(nombre.endswith(".part") for nombre in os.listdir(tmp_path / "r1"))
+
+    def test_un_destino_caido_no_afecta_a_los_demas(self, tmp_path):
+        archivos = _archivos(tmp_path, 1)
+        caido = TransporteCorrupto(str(tmp_path / "r1"), fallas=10)
+        sano = LocalDirTransport(str(tmp_path / "r2"))
+        resultados = replicate(archivos, [caido, sano], retries=1, sleep=lambda _: None)
+        assert [r.ok for r in resultados] == [False, True]
+        assert "checksum mismatch" in resultados[0].error
+
+    def test_destinos_en_paralelo(self, tmp_path):
+        archivos = _archivos(tmp_path, 1)
+        destinos = [TransporteLento(str(tmp_path / f"r{i}")) for i in range(3)]
+        replicate(archivos, destinos, workers=3)
+        assert TransporteLento.maximo == 3
+
+    def test_spec_ssh(self):
+        transporte = transport_for("backup@servidor:/backups/gestor", "/clave")
+        assert isinstance(transporte, SSHTransport)
+        assert (transporte.host, transporte.directory) == ("backup@servidor", "/backups/gestor/")
@@ -8,6 +8,14 @@ import locale
 import plotly.graph_objects as go
 from typing import Dict, Optional
 from ui_sections.pronostico import obtener_pronostico_extendido, mostrar_grafico_pronostico
+from utils.cotizaciones import obtener_cotizaciones, armar_tipos_cambio
+from utils.clima import descargar_clima, descargar_pronostico
+from utils.feriados_store import prefetch_feriados, anios_pendientes, ANIOS_ANTES, ANIOS_DESPUES
+from utils.refresco import CacheCompartida, PlanificadorRefresco, formatear_antiguedad
+from utils import cache
+from utils.cache import cacheado
+from utils.eventos_calendario import version_tabla
+from utils.fechas_personal import FechasPersonal
 
 # Configurar locale en español con fallback robusto
 spanish_locales = [
@@ -73,66 +81,61 @@ def formatear_fecha_espanol(datetime_obj, formato='completo'):
     else:
         return f"{dia_semana}, {dia} de {mes} de {anio}"
 
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def obtener_pronostico_extendido(lat=-35.4755, lon=-69.5843):
-    """Obtener pronóstico extendido de OpenWeatherMap API"""
-    api_key = st.secrets.get('api_keys', {}).get('openweather')
-    if not api_key:
-        st.warning("No se encontró la clave de OpenWeather API en secrets.toml")
-        return None
+# Tiempo máximo que un render espera la primera carga tras iniciar el servidor
+ESPERA_PRIMERA_CARGA = 5
+TTL_CLIMA = 3600
+TTL_TIPO_CAMBIO = 600
+TTL_FERIADOS = 86400
+# Días hacia adelante para las alertas de cumpleaños y aniversarios
+DIAS_ALERTAS_PERSONAL = 7
 
-    try:
-        base_url = "https://api.openweathermap.org/data/3.0/onecall"
-        params = {
-            'lat': lat,
-            'lon': lon,
-            'exclude': 'current,minutely,hourly,alerts',
-            'appid': api_key,
-            'units': 'metric',
-            'lang': 'es'
-        }
-        
-        response = requests.get(base_url, params=params)
-        data = response.json()
-        
-        if response.status_code == 200:
-            pronostico = data.get('daily', [])[:5]  # Solo los próximos 5 días
-            # Agregar timestamp a cada día para debug
-            for dia in pronostico:
-                dia['_cached_at'] = datetime.now().timestamp()
-            return pronostico
-    except Exception as e:
-        st.error(f"Error al obtener el pronóstico: {e}")
-    return None
+def _tipos_cambio_actuales():
+    """Tarea de refresco: cotizaciones armadas para la página."""
+    cotizaciones = obtener_cotizaciones()
+    if not cotizaciones['actual'] and not any(cotizaciones['historico'].values()):
+        raise RuntimeError("; ".join(cotizaciones['errores']) or "Sin datos")
+    return armar_tipos_cambio(cotizaciones)
+
+def _feriados_pendientes():
+    """Tarea de refresco: descarga los años de feriados faltantes o vencidos."""
+    anio = datetime.now().year
+    return prefetch_feriados(anios_pendientes(range(anio - ANIOS_ANTES, anio + ANIOS_DESPUES + 1)))
 
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def get_weather(lat=-35.4755, lon=-69.5843):
-    """Obtener el clima actual desde OpenWeatherMap"""
+@cacheado("recursos.planificador", fijo=True)
+def get_planificador() -> PlanificadorRefresco:
+    """
+    Planificador de refresco compartido por todas las sesiones del servidor.
+    Mantiene clima, pronóstico, cotizaciones y feriados actualizados en segundo
+    plano, antes de que venza su TTL. Con varios procesos (CACHE_BACKEND) los
+    datos se comparten y cada uno lo descarga un solo proceso.
+    """
+    planificador = PlanificadorRefresco(CacheCompartida(backend=cache.registro().backend))
     api_key = st.secrets.get('api_keys', {}).get('openweather')
-    if not api_key:
+    if api_key:
+        planificador.registrar('clima', lambda: descargar_clima(api_key), TTL_CLIMA)
+        planificador.registrar('pronostico', lambda: descargar_pronostico(api_key), TTL_CLIMA)
+    planificador.registrar('tipo_cambio', _tipos_cambio_actuales, TTL_TIPO_CAMBIO)
+    planificador.registrar('feriados', _feriados_pendientes, TTL_FERIADOS)
+    planificador.iniciar()
+    return planificador
+
+def leer_dato_externo(nombre):
+    """Lee (valor, antigüedad en segundos, error) de la caché compartida sin ir a la red."""
+    return get_planificador().cache.obtener(nombre, esperar=ESPERA_PRIMERA_CARGA)
+
+def obtener_pronostico_extendido():
+    """Pronóstico extendido de OpenWeatherMap (desde la caché de refresco)"""
+    if not st.secrets.get('api_keys', {}).get('openweather'):
         st.warning("No se encontró la clave de OpenWeather API en secrets.toml")
         return None
+    return leer_dato_externo('pronostico')[0]
 
-    try:
-        response = requests.get(
-            f'https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric&lang=es'
-        )
-        data = response.json()
-        
-        if response.status_code == 200:
-            return {
-                'temperature': data['main']['temp'],
-                'feels_like': data['main']['feels_like'],
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed': data['wind']['speed'] * 3.6,  # Convertir a km/h
-                'description': data['weather'][0]['description'].capitalize(),
-                'visibility': data.get('visibility', 10000),  # En metros
-                'timestamp': datetime.now().timestamp()  # Agregar timestamp para debug
-            }
-    except Exception as e:
-        st.error(f"Error al obtener el clima: {e}")
-    return None
+def get_weather():
+    """Clima actual desde OpenWeatherMap (desde la caché de refresco)"""
+    if not st.secrets.get('api_keys', {}).get('openweather'):
+        st.warning("No se encontró la clave de OpenWeather API en secrets.toml")
+        return None
+    return leer_dato_externo('clima')[0]
 
 def get_exchange_rates(base_currency='USD', target_currencies=['ARS', 'EUR', 'BRL']):
     """Obtener tasas de cambio usando la API de exchangerate-api.com"""
@@ -152,186 +155,12 @@ def get_exchange_rates(base_currency='USD', target_currencies=['ARS', 'EUR', 'BR
         st.error(f"Error al obtener tasas de cambio: {e}")
     return None
 
-@st.cache_data(ttl=600)  # Cache por 10 minutos
-def obtener_tipo_cambio(day_key: str) -> Optional[Dict[str, Dict[str, float]]]:
-    """Obtiene los tipos de cambio de ArgentinaDatos API y DolarAPI (para el euro)"""
-    try:
-        # Obtener datos actuales (últimos 7 días)
-        end_date = datetime.now()
-        start_date = end_date - pd.Timedelta(days=7)
-        
-        # Formatear fechas para la API
-        def format_date(dt):
-            return dt.strftime('%Y/%m/%d')
-        
-        # Obtener datos para cada tipo de cambio
-        def obtener_datos(casa):
-            try:
-                # Obtener datos para hoy
-                hoy = format_date(end_date)
-                response = requests.get(
-                    f"https://api.argentinadatos.com/v1/cotizaciones/dolares/{casa}/{hoy}",
-                    timeout=10
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    # Verificar si la respuesta es una lista y tiene datos
-                    if isinstance(data, list) and len(data) > 0:
-                        return data[0]  # Devolver el primer elemento de la lista
-                    elif isinstance(data, dict):
-                        return data  # Si es un diccionario, devolverlo directamente
-                    else:
-                        st.warning(f"Formato de datos inesperado para {casa}")
-                else:
-                    st.warning(f"Error al obtener datos para {casa}: HTTP {response.status_code}")
-                return None
-            except requests.exceptions.RequestException as e:
-                st.error(f"Error de conexión al obtener datos para {casa}: {str(e)}")
-            except Exception as e:
-                st.error(f"Error inesperado al obtener datos para {casa}: {str(e)}")
-            return None
-        
-        # Obtener datos históricos para calcular variación
-        def obtener_historico(casa, dias=7):
-            historico = []
-            for i in range(dias):
-                try:
-                    fecha = end_date - pd.Timedelta(days=i)
-                    fecha_str = format_date(fecha)
-                    response = requests.get(
-                        f"https://api.argentinadatos.com/v1/cotizaciones/dolares/{casa}/{fecha_str}",
-                        timeout=10
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if isinstance(data, list) and len(data) > 0:
-                            # Asegurarse de que el dato tenga la fecha
-                            dato = data[0]
-                            if 'fecha' not in dato:
-                                dato['fecha'] = fecha_str
-                            historico.append(dato)
-                        elif isinstance(data, dict):
-                            if 'fecha' not in data:
-                                data['fecha'] = fecha_str
-                            historico.append(data)
-                except requests.exceptions.RequestException as e:
-                    st.warning(f"No se pudo obtener histórico para {casa} ({fecha_str}): {str(e)}")
-                except Exception as e:
-                    st.warning(f"Error procesando histórico para {casa} ({fecha_str}): {str(e)}")
-            
-            # Ordenar por fecha (más antigua primero)
-            historico_ordenado = sorted(historico, key=lambda x: x.get('fecha', ''))
-            return historico_ordenado
-        
-        # Obtener datos actuales desde dolarapi.com
-        def obtener_dolarapi(casa):
-            try:
-                response = requests.get(f"https://dolarapi.com/v1/dolares/{casa}", timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    # Asegurarse de que el dato tenga la fecha
-                    if 'fecha' not in data:
-                        data['fecha'] = format_date(datetime.now())
-                    return data
-                return None
-            except Exception as e:
-                st.warning(f"No se pudo obtener datos actuales para {casa} desde dolarapi.com: {str(e)}")
-                return None
-        
-        # Obtener datos actuales
-        oficial = obtener_dolarapi('oficial')
-        blue = obtener_dolarapi('blue')
-        
-        # Obtener histórico desde ArgentinaDatos (excluyendo el día actual)
-        hist_oficial = obtener_historico('oficial')
-        hist_blue = obtener_historico('blue')
-        
-        # Agregar datos actuales al histórico si están disponibles
-        if oficial and hist_oficial:
-            # Verificar que no esté ya en el histórico
-            hoy = format_date(datetime.now())
-            if not any(d.get('fecha', '').startswith(hoy.split('T')[0]) for d in hist_oficial):
-                hist_oficial.append(oficial)
-        
-        if blue and hist_blue:
-            hoy = format_date(datetime.now())
-            if not any(d.get('fecha', '').startswith(hoy.split('T')[0]) for d in hist_blue):
-                hist_blue.append(blue)
-        
-        # Obtener datos del euro desde dolarapi.com
-        def obtener_euro():
-            try:
-                response = requests.get("https://dolarapi.com/v1/cotizaciones/eur", timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    # Asegurarse de que el dato tenga la fecha
-                    if 'fecha' not in data:
-                        data['fecha'] = format_date(datetime.now())
-                    return data
-                return None
-            except Exception as e:
-                st.error(f"Error al obtener datos del euro: {str(e)}")
-                return None
-        
-        euro_data = obtener_euro()
-        
-        # Función auxiliar para calcular variación
-        def calcular_variacion(historico):
-            if len(historico) < 2:
-                return 0.0
-            
-            # Ordenar por fecha (más reciente primero)
-            historico_ordenado = sorted(historico, key=lambda x: x.get('fecha', ''), reverse=True)
-            
-            # Obtener el valor de hoy y ayer
-            valor_actual = historico_ordenado[0].get('venta', 0) if historico_ordenado else 0
-            valor_anterior = historico_ordenado[1].get('venta', 0) if len(historico_ordenado) > 1 else 0
-            
-            if valor_anterior == 0:
-                return 0.0
-                
-            return ((valor_actual - valor_anterior) / valor_anterior) * 100
-        
-        # Helper para normalizar fechas a ISO (YYYY-MM-DD)
-        def _norm_fecha(fecha_val):
-            try:
-                return pd.to_datetime(str(fecha_val)).date().isoformat()
-            except Exception:
-                return None
-
-        return {
-            'oficial': {
-                'compra': oficial.get('compra', 0) if oficial else 0,
-                'venta': oficial.get('venta', 0) if oficial else 0,
-                'variacion': calcular_variacion(hist_oficial) if hist_oficial else 0,
-                'historico_compra': [d.get('compra', 0) for d in hist_oficial if 'compra' in d],
-                'historico_venta': [d.get('venta', 0) for d in hist_oficial if 'venta' in d],
-                'fechas': [f for f in (_norm_fecha(d.get('fecha')) for d in hist_oficial) if f],
-                'timestamp': datetime.now().timestamp()
-            },
-            'blue': {
-                'compra': blue.get('compra', 0) if blue else 0,
-                'venta': blue.get('venta', 0) if blue else 0,
-                'variacion': calcular_variacion(hist_blue) if hist_blue else 0,
-                'historico_compra': [d.get('compra', 0) for d in hist_blue if 'compra' in d],
-                'historico_venta': [d.get('venta', 0) for d in hist_blue if 'venta' in d],
-                'fechas': [f for f in (_norm_fecha(d.get('fecha')) for d in hist_blue) if f],
-                'timestamp': datetime.now().timestamp()
-            },
-            'euro': {
-                'compra': euro_data.get('compra', 0) if euro_data else 0,
-                'venta': euro_data.get('venta', 0) if euro_data else 0,
-                'variacion': 0,  # No mostramos variación para el euro
-                'historico_compra': [],
-                'historico_venta': [],
-                'fechas': [],
-                'timestamp': datetime.now().timestamp()
-            }
-        }
-    except Exception as e:
-        st.error(f"Error al obtener los tipos de cambio: {e}")
-        return None
+def obtener_tipo_cambio() -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    Tipos de cambio de ArgentinaDatos API y DolarAPI (para el euro), desde la
+    caché de refresco (ver utils.cotizaciones).
+    """
+    return leer_dato_externo('tipo_cambio')[0]
 
 def mostrar_seccion_bienvenida():
     st.title("Bienvenido al Gestor de Proyectos")
@@ -352,69 +181,31 @@ def mostrar_seccion_bienvenida():
     df_personal = st.session_state.get('df_personal', pd.DataFrame())
     if not df_personal.empty:
         today_date = now.date()
-        lookahead = today_date + pd.Timedelta(days=7)
         personal_alerts = []
+        # Las fechas del personal se parsean una sola vez por versión de la tabla
+        version = version_tabla(df_personal)
+        guardado = st.session_state.get('fechas_personal')
+        if guardado is None or guardado[0] != version:
+            guardado = (version, FechasPersonal(df_personal))
+            st.session_state.fechas_personal = guardado
+        fechas_personal = guardado[1]
 
-        for _, row in df_personal.iterrows():
-            nombre_completo = row.get('Apellido, Nombres', row.get('Nombre', ''))
-            if not nombre_completo: continue
-            
-            # Obtener nombre a mostrar (Nombre + Inicial Apellido)
-            nombre_str = str(nombre_completo)
-            if ',' in nombre_str:
-                partes = nombre_str.split(',')
-                apellido = partes[0].strip()
-                nombres = partes[1].strip() if len(partes) > 1 else ""
-                # Primer nombre
-                nombre_pila = nombres.split(' ')[0] if nombres else apellido
-                # Inicial del apellido
-                inicial_apellido = apellido[0].upper() if apellido else ""
-                nombre_mostrar = f"{nombre_pila} {inicial_apellido}." if inicial_apellido else nombre_pila
+        # 🎂 Cumpleaños
+        for alerta in fechas_personal.proximos('nacimiento', today_date, DIAS_ALERTAS_PERSONAL).itertuples():
+            if alerta.faltan == 0:
+                personal_alerts.append(f"🎂 **{alerta.nombre_mostrar}** cumple **{alerta.anios} años** ¡HOY!")
             else:
-                partes = nombre_str.split(' ')
-                nombre_pila = partes[0]
-                inicial_apellido = partes[1][0].upper() if len(partes) > 1 else ""
-                nombre_mostrar = f"{nombre_pila} {inicial_apellido}." if inicial_apellido else nombre_pila
-
-            # 🎂 Cumpleaños
-            col_nac = 'Fecha de nacimiento'
-            if col_nac in row and pd.notna(row[col_nac]):
-                try:
-                    dob = pd.to_datetime(row[col_nac], dayfirst=True, format='mixed').date()
-                    for anio in [today_date.year, today_date.year + 1]:
-                        try:
-                            bday = dob.replace(year=anio)
-                        except ValueError: # Feb 29
-                            bday = dob.replace(year=anio, month=3, day=1)
-                        
-                        if today_date <= bday <= lookahead:
-                            edad = anio - dob.year
-                            dia_sem = formatear_fecha_espanol(bday, formato='dia_semana').lower()
-                            if bday == today_date:
-                                personal_alerts.append(f"🎂 **{nombre_mostrar}** cumple **{edad} años** ¡HOY!")
-                            else:
-                                personal_alerts.append(f"🎂 **{nombre_mostrar}** cumple **{edad} años** el próximo {dia_sem} ({bday.strftime('%d/%m')})")
-                except: pass
+                dia_sem = formatear_fecha_espanol(alerta.fecha, formato='dia_semana').lower()
+                personal_alerts.append(f"🎂 **{alerta.nombre_mostrar}** cumple **{alerta.anios} años** el próximo {dia_sem} ({alerta.fecha.strftime('%d/%m')})")
 
-            # 🎖️ Aniversarios de Trabajo (múltiplos de 5)
-            col_pao = 'Fecha ingreso PAO'
-            if col_pao in row and pd.notna(row[col_pao]):
-                try:
-                    ingreso = pd.to_datetime(row[col_pao], dayfirst=True, format='mixed').date()
-                    for anio in [today_date.year, today_date.year + 1]:
-                        try:
-                            anniv = ingreso.replace(year=anio)
-                        except ValueError:
-                            anniv = ingreso.replace(year=anio, month=3, day=1)
-                        
-                        if today_date <= anniv <= lookahead:
-                            anios_serv = anio - ingreso.year
-                            if anios_serv > 0 and anios_serv % 5 == 0:
-                                if anniv == today_date:
-                                    personal_alerts.append(f"🎖️ **{nombre_mostrar}** cumple **{anios_serv} años** de trabajo ¡HOY!")
-                                else:
-                                    personal_alerts.append(f"🎖️ **{nombre_mostrar}** cumple **{anios_serv} años** de trabajo el {formatear_fecha_espanol(anniv, formato='corto')}")
-                except: pass
+        # 🎖️ Aniversarios de Trabajo (múltiplos de 5)
+        aniversarios = fechas_personal.proximos('ingreso', today_date, DIAS_ALERTAS_PERSONAL)
+        aniversarios = aniversarios[(aniversarios['anios'] > 0) & (aniversarios['anios'] % 5 == 0)]
+        for alerta in aniversarios.itertuples():
+            if alerta.faltan == 0:
+                personal_alerts.append(f"🎖️ **{alerta.nombre_mostrar}** cumple **{alerta.anios} años** de trabajo ¡HOY!")
+            else:
+                personal_alerts.append(f"🎖️ **{alerta.nombre_mostrar}** cumple **{alerta.anios} años** de trabajo el {formatear_fecha_espanol(alerta.fecha, formato='corto')}")
 
         if personal_alerts:
             # Mostrar alertas en un contenedor destacado
@@ -489,8 +280,7 @@ def mostrar_seccion_bienvenida():
     # Obtener el clima actual
     weather = get_weather()
     pronostico = obtener_pronostico_extendido()
-    # Pasar clave diaria para invalidar cache cada día
-    tipos_cambio = obtener_tipo_cambio(day_key=datetime.now().strftime('%Y-%m-%d'))
+    tipos_cambio = obtener_tipo_cambio()
     
     # Mostrar información del clima en 3 columnas
     col1, col2, col3 = st.columns([3, 4, 4])
@@ -506,6 +296,7 @@ def mostrar_seccion_bienvenida():
             st.caption(f"🪟 Presión: {weather['pressure']:.1f} hPa")
             if weather.get('visibility'):
                 st.caption(f"👁️ Visibilidad: {weather['visibility']/1000:.1f} km")
+            st.caption(f"🕒 Actualizado {formatear_antiguedad(leer_dato_externo('clima')[1])}")
         else:
             st.warning("No se pudo cargar la información del clima")
     
@@ -554,6 +345,7 @@ def mostrar_seccion_bienvenida():
             )
             
             st.plotly_chart(fig_temp, width='stretch')
+            st.caption(f"🕒 Actualizado {formatear_antiguedad(leer_dato_externo('pronostico')[1])}")
         else:
             st.warning("No se pudo cargar el pronóstico de temperaturas")
     
@@ -620,6 +412,7 @@ def mostrar_seccion_bienvenida():
     st.markdown("### 💰 Cotizaciones")
     
     if tipos_cambio:
+        st.caption(f"🕒 Actualizado {formatear_antiguedad(leer_dato_externo('tipo_cambio')[1])}")
         col1, col2, col3 = st.columns([1, 1, 2])
         
         # Función auxiliar para mostrar una tarjeta de cotización
@@ -7,8 +7,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_sheet, refresh_data
+from database import get_sheet
 from utils.date_utils import format_duracion_licencia
+from utils.estado_registros import (
+    COLUMNAS_OCULTAS, ESTADO_EN_CURSO, ESTADO_PROXIMA, ESTADO_TRANSCURRIDA,
+    contar_estados, estilar_por_estado, preparar_compensados, vista_en_cache,
+)
 
 def seccion_compensados(client, personal_list):
     st.subheader("⏱️ Registro de Ausencias")
@@ -18,20 +22,18 @@ def seccion_compensados(client, personal_list):
     if sheet is None: return
 
     if not df_compensados.empty:
-        df_compensados['Desde fecha'] = pd.to_datetime(df_compensados['Desde fecha'], errors='coerce', dayfirst=True, format='mixed')
-        df_compensados['Hasta fecha'] = pd.to_datetime(df_compensados['Hasta fecha'], errors='coerce', dayfirst=True, format='mixed')
-        today = pd.to_datetime(datetime.now().date())
+        # Fechas, estado y etiquetas se calculan una vez por versión de la tabla (y por día)
+        df_compensados = vista_en_cache(st.session_state, 'vista_compensados', df_compensados,
+                                        preparar_compensados, datetime.now().date())
 
         # Calcular métricas basadas en TODOS los registros (no filtrados)
-        en_curso_total = ((df_compensados['Desde fecha'] <= today) & (df_compensados['Hasta fecha'] >= today)).sum()
-        proximos_total = (df_compensados['Desde fecha'] > today).sum()
-        transcurridos_total = (df_compensados['Hasta fecha'] < today).sum()
+        totales = contar_estados(df_compensados)
 
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Total de Registros", len(df_compensados))
-        col2.metric("Ausencias en Curso", en_curso_total)
-        col3.metric("Próximas Ausencias", proximos_total)
-        col4.metric("Ausencias Transcurridas", transcurridos_total)
+        col2.metric("Ausencias en Curso", totales[ESTADO_EN_CURSO])
+        col3.metric("Próximas Ausencias", totales[ESTADO_PROXIMA])
+        col4.metric("Ausencias Transcurridas", totales[ESTADO_TRANSCURRIDA])
 
         st.markdown("---")
 
@@ -39,11 +41,14 @@ def seccion_compensados(client, personal_list):
 
     with vista_general:
         if not df_compensados.empty:
-            # Filtro por estado de los compensatorios
-            today = pd.to_datetime(datetime.now().date())
-
-            # Crear opciones de filtro
-            filter_options = ["Ausencias en Curso", "Próximas Ausencias", "Ausencias Transcurridas", "Todos"]
+            # Crear opciones de filtro (cada una corresponde a un valor de la columna 'Estado')
+            filtros = {
+                "Ausencias en Curso": ESTADO_EN_CURSO,
+                "Próximas Ausencias": ESTADO_PROXIMA,
+                "Ausencias Transcurridas": ESTADO_TRANSCURRIDA,
+                "Todos": None,
+            }
+            filter_options = list(filtros)
             default_filter = "Ausencias en Curso"
 
             selected_filter = st.selectbox(
@@ -52,47 +57,21 @@ def seccion_compensados(client, personal_list):
                 index=filter_options.index(default_filter)
             )
 
-            # Aplicar filtro según la selección
-            df_filtered = df_compensados.copy()
-
-            if selected_filter == "Ausencias en Curso":
-                # Ausencias que están actualmente en curso (desde <= hoy <= hasta)
-                df_filtered = df_filtered[
-                    (df_filtered['Desde fecha'] <= today) &
-                    (df_filtered['Hasta fecha'] >= today)
-                ]
-            elif selected_filter == "Próximas Ausencias":
-                # Ausencias que aún no han empezado (desde > hoy)
-                df_filtered = df_filtered[df_filtered['Desde fecha'] > today]
-            elif selected_filter == "Ausencias Transcurridas":
-                # Ausencias que ya terminaron (hasta < hoy)
-                df_filtered = df_filtered[df_filtered['Hasta fecha'] < today]
-            # "Todos" no aplica ningún filtro adicional
+            # Aplicar filtro según la selección ("Todos" no aplica ningún filtro)
+            estado_filtro = filtros[selected_filter]
+            df_filtered = df_compensados if estado_filtro is None else df_compensados[df_compensados['Estado'] == estado_filtro]
 
             st.info(f"Mostrando: {selected_filter} ({len(df_filtered)} registros)")
 
         else:
-            df_filtered = df_compensados.copy()
+            df_filtered = df_compensados
 
         df_display = df_filtered.sort_values(by='Desde fecha', ascending=False)
-        if 'row_number' in df_display.columns:
-            df_display = df_display.drop(columns=['row_number'])
-
-        def style_status(row):
-            today = pd.to_datetime(datetime.now().date()).date()
-            start_date = pd.to_datetime(row['Desde fecha']).date()
-            end_date = pd.to_datetime(row['Hasta fecha']).date()
-            style = ''
-            if start_date <= today and end_date >= today:
-                style = 'background-color: #1E90FF'  # En curso (blue)
-            elif end_date < today:
-                style = 'background-color: #696969'  # Ya ocurridas (gray)
-            elif start_date > today:
-                style = 'background-color: #FF8C00'  # Próximas (orange)
-            return [style] * len(row)
+        # Eliminar columnas auxiliares de la visualización
+        df_display = df_display.drop(columns=[c for c in COLUMNAS_OCULTAS if c in df_display.columns])
 
         st.dataframe(
-            df_display.style.apply(style_status, axis=1),
+            estilar_por_estado(df_display) if 'Estado' in df_display.columns else df_display,
             width='stretch',
             hide_index=True,
             column_config={
@@ -184,8 +163,7 @@ def seccion_compensados(client, personal_list):
                             hasta_fecha.strftime('%Y-%m-%d'),
                             hasta_hora_str,
                         ]
-                        sheet.append_row(new_row)
-                        refresh_data(client, sheet_name)
+                        sheet.append_record(new_row)
                         st.success("Registro de ausencia agregado.")
                         st.rerun()
                 else:
@@ -200,27 +178,28 @@ def seccion_compensados(client, personal_list):
                         hasta_fecha.strftime('%Y-%m-%d'),
                         hasta_hora_str,
                     ]
-                    sheet.append_row(new_row)
-                    refresh_data(client, sheet_name)
+                    sheet.append_record(new_row)
                     st.success("Registro de ausencia agregado.")
                     st.rerun()
 
     with modificar_eliminar:
         if not df_compensados.empty:
             st.markdown("#### Modificar o Eliminar un registro")
-            df_compensados['row_number'] = range(2, len(df_compensados) + 2)
-            options = [f"Fila {row['row_number']}: {row['Apellido, Nombres']} - {row['Desde fecha'].strftime('%d/%m/%Y') if pd.notna(row['Desde fecha']) else ''} {row['Desde hora'] if not pd.isna(row['Desde hora']) else ''}" for _, row in df_compensados.iterrows()]
-            option_to_edit = st.selectbox("Selecciona un registro para modificar o eliminar", options=[""] + options)
+            # Las opciones son los rowid de SQLite (índice del DataFrame): identifican el registro
+            # aunque cambie el orden de la tabla
+            etiquetas = df_compensados['Etiqueta']
+            rowid_to_edit = st.selectbox("Selecciona un registro para modificar o eliminar",
+                                         options=[None] + df_compensados.index.tolist(),
+                                         format_func=lambda rowid: "" if rowid is None else etiquetas[rowid])
 
-            if option_to_edit:
-                row_number_to_edit = int(option_to_edit.split(':')[0].replace('Fila ', ''))
-                record_data = df_compensados[df_compensados['row_number'] == row_number_to_edit].iloc[0]
+            if rowid_to_edit is not None:
+                record_data = df_compensados.loc[rowid_to_edit]
 
                 es_dia_completo = pd.isna(record_data['Desde hora']) or record_data['Desde hora'] == ''
-                tipo_compensatorio_key = f"tipo_compensatorio_radio_{row_number_to_edit}"
+                tipo_compensatorio_key = f"tipo_compensatorio_radio_{rowid_to_edit}"
                 tipo_compensatorio = st.radio("Tipo de ausencia", ("Día completo", "Por horas"), index=0 if es_dia_completo else 1, key=tipo_compensatorio_key)
 
-                with st.form(f"edit_compensados_form_{row_number_to_edit}"):
+                with st.form(f"edit_compensados_form_{rowid_to_edit}"):
                     nombre = st.selectbox("Apellido, Nombres", options=["Seleccione persona..."] + personal_list, index=personal_list.index(record_data["Apellido, Nombres"]) + 1 if record_data["Apellido, Nombres"] in personal_list else 0)
                     fecha_solicitud = st.date_input("Fecha Solicitud", value=pd.to_datetime(record_data["Fecha Solicitud"], dayfirst=True, format='mixed'), format="DD/MM/YYYY")
                     tipo = st.selectbox("Tipo", options=["Compensatorio"], index=0)
@@ -254,13 +233,11 @@ def seccion_compensados(client, personal_list):
                             desde_hora_str = desde_hora.strftime('%H:%M') if desde_hora else ''
                             hasta_hora_str = hasta_hora.strftime('%H:%M') if hasta_hora else ''
                             update_values = [nombre, fecha_solicitud.strftime('%Y-%m-%d'), tipo, desde_fecha.strftime('%Y-%m-%d'), desde_hora_str, hasta_fecha.strftime('%Y-%m-%d'), hasta_hora_str]
-                            sheet.update(f'A{row_number_to_edit}:G{row_number_to_edit}', [update_values])
-                            refresh_data(client, sheet_name)
+                            sheet.update_record(rowid_to_edit, update_values)
                             st.success("¡Registro actualizado!")
                             st.rerun()
 
                     if col_del.form_submit_button("Eliminar Registro"):
-                        sheet.delete_rows(row_number_to_edit)
-                        refresh_data(client, sheet_name)
+                        sheet.delete_record(rowid_to_edit)
                         st.success("¡Registro eliminado!")
                         st.rerun()
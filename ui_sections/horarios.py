@@ -1,33 +1,30 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import pdfplumber
 import warnings
 import re
 import numpy as np
 from datetime import datetime, timedelta
+from importlib.util import find_spec
 from io import BytesIO
 import os
-from utils.date_utils import get_feriados_argentina
-
-# Imports opcionales para Google Drive (no rompen si no están instalados)
+from utils.date_utils import calendario_laboral_sesion
+from utils.jornadas import construir_intervalos, calcular_jornada, intervalos_ausencias, tabla_timeline
+from utils.conciliacion import conciliar_libro_reloj, exportar_tabla
+from utils.anomalias import generar_reporte_anomalias, resumen_anomalias, expandir_periodos
+from utils.cache import cacheado, espacio, invalidar
+from utils.instrumentacion import etapa, instrumentar
+
+# Dependencias opcionales para Google Drive (no rompen si no están instalados).
+# Solo se verifica que existan; pdfplumber, plotly y el cliente de Google se
+# importan dentro de las funciones que los usan, para no cargarlos al importar
+# este módulo (la página de Utilidades solo usa los lectores de archivos).
 try:
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseDownload
-    HAS_GOOGLE_DRIVE = True
-except Exception:
+    HAS_GOOGLE_DRIVE = find_spec("googleapiclient") is not None and find_spec("google.oauth2") is not None
+except (ImportError, ValueError):
     HAS_GOOGLE_DRIVE = False
 
 warnings.filterwarnings("ignore", message=".*FontBBox.*")
 
-# --- Configuración de la Página ---
-st.set_page_config(
-    page_title="Análisis de Asistencia",
-    page_icon="🕒",
-    layout="wide"
-)
-
 # --- Funciones de Procesamiento ---
 
 def cargar_y_procesar_datos(archivo_subido):
@@ -60,26 +57,8 @@ def cargar_y_procesar_datos(archivo_subido):
         df['hora'] = df['fecha_hora'].dt.hour
         df['tipo'] = 'RELOJ'  # Marcar como datos de reloj
 
-        # --- NUEVO: Calcular suma de intervalos por día y empleado ---
-        def sumar_intervalos(fechas):
-            fechas = fechas.sort_values()
-            tiempos = fechas.tolist()
-            total = pd.Timedelta(0)
-            for i in range(0, len(tiempos)-1, 2):
-                total += tiempos[i+1] - tiempos[i]
-            return total.total_seconds() / 3600  # en horas
-
-        jornada = (
-            df.groupby(['id_empleado', 'fecha'])['fecha_hora']
-            .apply(sumar_intervalos)
-            .reset_index(name='duracion_horas')
-        )
-
-        # Para mostrar inicio y fin de jornada (opcional)
-        min_max = df.groupby(['id_empleado', 'fecha'])['fecha_hora'].agg(['min', 'max']).reset_index()
-        jornada = jornada.merge(min_max, on=['id_empleado', 'fecha'])
-        jornada.rename(columns={'min': 'inicio_jornada', 'max': 'fin_jornada'}, inplace=True)
-        jornada = jornada[jornada['duracion_horas'] > 0.25]
+        # Jornada diaria: suma de intervalos de pares de registros (vectorizado)
+        jornada = calcular_jornada(df)
 
         return df, jornada
 
@@ -90,6 +69,8 @@ def cargar_y_procesar_datos(archivo_subido):
 
 def leer_pdf_query(path_pdf):
     """Lee el PDF de query y devuelve un DataFrame compatible."""
+    import pdfplumber
+
     rows = []
     try:
         with pdfplumber.open(path_pdf) as pdf:
@@ -168,7 +149,14 @@ def leer_pdf_query(path_pdf):
         return None
 
 # --- Integración con Google Drive (Service Account) ---
-@st.cache_resource
+# Espacios de caché (utils.cache): el listado de la carpeta vence a los 10
+# minutos; los CSV descargados y los registros combinados se desalojan por
+# LRU dentro de su límite de memoria. Con varios procesos (CACHE_BACKEND) los
+# comparten todos: cada archivo se descarga una sola vez
+ESPACIOS_DRIVE = ("drive.listado", "drive.csv", "horarios.registros")
+REGISTROS_HORARIOS = espacio("horarios.registros", max_mb=192, max_entradas=8, ttl=3600, compartido=True)
+
+@cacheado("recursos.drive", fijo=True, guardar_si=lambda cliente: cliente is not None)
 def build_drive_client():
     """
     Construye un cliente de Google Drive v3 usando el archivo credenciales.json
@@ -176,6 +164,9 @@ def build_drive_client():
     """
     if not HAS_GOOGLE_DRIVE:
         return None
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
     try:
         # Buscar credenciales.json en la raíz del proyecto (un nivel arriba de ui_sections/)
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -195,7 +186,7 @@ def build_drive_client():
         st.error(f"No fue posible inicializar el cliente de Google Drive: {e}")
         return None
 
-@st.cache_data(ttl=600, show_spinner=False)
+@cacheado("drive.listado", max_entradas=4, ttl=600, compartido=True, guardar_si=bool)
 def list_csvs_in_folder(folder_id: str):
     """
     Lista archivos CSV en una carpeta de Drive por su Folder ID.
@@ -227,14 +218,17 @@ def list_csvs_in_folder(folder_id: str):
         st.error(f"Error al listar archivos de Drive: {e}")
         return []
 
-@st.cache_data(show_spinner=False)
+@cacheado("drive.csv", max_mb=128, ttl=6 * 3600, compartido=True, guardar_si=bool)
 def download_csv_file(file_id: str) -> bytes:
     """
     Descarga el contenido de un archivo CSV de Drive por file_id y devuelve bytes.
+    Los errores devuelven b"" y no quedan en caché.
     """
     service = build_drive_client()
     if service is None:
         return b""
+    from googleapiclient.http import MediaIoBaseDownload
+
     try:
         request = service.files().get_media(fileId=file_id)
         buf = BytesIO()
@@ -380,6 +374,7 @@ def leer_excel_horarios(archivo_excel):
     return df_planilla
 
 
+@instrumentar("horarios.compensatorios", filas=len)
 def obtener_compensatorios_por_fecha():
     """
     Obtiene los compensatorios activos del session_state y los procesa para el análisis de horarios.
@@ -490,6 +485,7 @@ def obtener_compensatorios_por_fecha():
         st.error(f"Error al procesar compensatorios: {str(e)}")
         return pd.DataFrame()
 
+@instrumentar("horarios.vacaciones", filas=len)
 def obtener_vacaciones_por_fecha():
     """
     Convierte las licencias/vacaciones del session_state en registros diarios de 8h por empleado.
@@ -647,11 +643,84 @@ def get_employee_display(id_empleado, incognito_mode):
         return f"ID: {id_empleado}"
     return ID_NOMBRE_MAP.get(id_empleado, f"ID: {id_empleado}")
 
+def obtener_dias_cubiertos():
+    """
+    Días cubiertos por vacaciones o ausencias de día completo, por empleado.
+    Devuelve un DataFrame ('id_empleado', 'fecha') para el reporte de anomalías.
+    """
+    # Nombre -> ID (si un nombre aparece más de una vez, gana el primero)
+    nombre_id = {}
+    for k, v in ID_NOMBRE_MAP.items():
+        nombre_id.setdefault(v, k)
+
+    partes = []
+    df_vac = st.session_state.get('df_vacaciones', pd.DataFrame())
+    if df_vac is not None and {'Apellido, Nombres', 'Fecha inicio', 'Fecha regreso'}.issubset(df_vac.columns):
+        # El día de regreso no forma parte de la licencia
+        partes.append(expandir_periodos(df_vac, 'Apellido, Nombres', 'Fecha inicio', 'Fecha regreso',
+                                        hasta_inclusive=False, mapa_ids=nombre_id))
+
+    df_comp = st.session_state.get('df_compensados', pd.DataFrame())
+    if df_comp is not None and {'Apellido, Nombres', 'Desde fecha', 'Hasta fecha'}.issubset(df_comp.columns):
+        sin_horas = pd.Series(True, index=df_comp.index)
+        for col in ('Desde hora', 'Hasta hora'):
+            if col in df_comp.columns:
+                sin_horas &= df_comp[col].isna() | (df_comp[col].astype(str).str.strip() == '')
+        partes.append(expandir_periodos(df_comp[sin_horas], 'Apellido, Nombres', 'Desde fecha', 'Hasta fecha',
+                                        mapa_ids=nombre_id))
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=['id_empleado', 'fecha'])
+    return pd.concat(partes, ignore_index=True).drop_duplicates(ignore_index=True)
+
+def obtener_fechas_feriados(fechas):
+    """Fechas de feriados nacionales y manuales dentro del rango de `fechas`."""
+    fechas = pd.to_datetime(pd.Series(list(fechas), dtype=object), errors='coerce').dropna()
+    if fechas.empty:
+        return []
+    calendario = calendario_laboral_sesion(fechas.min(), fechas.max())
+    return [f for f in calendario.dias_feriados() if fechas.min().date() <= f <= fechas.max().date()]
+
+def eliminar_duplicados_reloj(df_reloj):
+    """
+    Elimina registros de RELOJ duplicados o casi duplicados: de dos marcas
+    consecutivas del mismo empleado a menos de 1 minuto, se conserva la primera.
+    Devuelve el DataFrame ordenado por empleado y fecha_hora.
+    """
+    if df_reloj.empty:
+        return df_reloj
+    df_reloj = df_reloj.sort_values(['id_empleado', 'fecha_hora'])
+    
+    # Crear una máscara para identificar registros a mantener
+    mask = pd.Series(True, index=df_reloj.index)
+    
+    # Para cada empleado, verificar duplicados consecutivos
+    for empleado in df_reloj['id_empleado'].unique():
+        empleado_mask = df_reloj['id_empleado'] == empleado
+        empleado_indices = df_reloj[empleado_mask].index
+        
+        # Calcular diferencias de tiempo entre registros consecutivos
+        for i in range(1, len(empleado_indices)):
+            idx_prev = empleado_indices[i-1]
+            idx_curr = empleado_indices[i]
+            
+            tiempo_anterior = df_reloj.at[idx_prev, 'fecha_hora']
+            tiempo_actual = df_reloj.at[idx_curr, 'fecha_hora']
+            
+            # Si la diferencia es menor a 1 minuto, marcar como duplicado
+            if (tiempo_actual - tiempo_anterior) < pd.Timedelta(minutes=1):
+                mask.at[idx_curr] = False
+    
+    # Filtrar los registros duplicados
+    return df_reloj[mask]
+
 def seccion_horarios(client, personal_list):
     """
     Sección de Streamlit para analizar y visualizar los horarios del personal.
     Permite cargar archivos de texto y PDF, procesar los datos y mostrar gráficos interactivos.
     """
+    import plotly.express as px
 
     # --- Interfaz de Usuario (UI) ---
     st.subheader("📊 Analizador de Horarios del Personal")
@@ -671,25 +740,22 @@ def seccion_horarios(client, personal_list):
 
     # Botón para refrescar lista de archivos desde Google Drive
     if st.button("🔄 Actualizar lista"):
-        try:
-            st.cache_data.clear()
-        except Exception:
-            pass
+        # Solo las cachés de Drive: feriados y demás datos se conservan
+        for nombre in ESPACIOS_DRIVE:
+            invalidar(nombre)
         # Limpiar estados relacionados para forzar recarga
         st.session_state.pop('drive_csv_files', None)
-        st.session_state.pop('df_registros_horarios', None)
         st.session_state.pop('drive_processed_ids', None)
-        st.session_state.pop('jornada_horarios', None)
         st.rerun()
 
     # Limpiar caché al cargar la página
-    if 'drive_csv_files' not in st.session_state or 'df_registros_horarios' not in st.session_state:
+    if 'drive_csv_files' not in st.session_state:
         st.session_state['drive_processed_ids'] = None
-        st.session_state['df_registros_horarios'] = None
-        st.session_state['jornada_horarios'] = None
     
     # Obtener lista de archivos del Drive (usando caché)
-    files_list_all = list_csvs_in_folder(DEFAULT_FOLDER_ID)
+    with etapa("horarios.drive_listar", cache=True) as medicion:
+        files_list_all = list_csvs_in_folder(DEFAULT_FOLDER_ID)
+        medicion.filas = len(files_list_all)
     st.session_state['drive_csv_files'] = files_list_all
     
     # Ordenar por nombre descendente (YYYY-MM) para asegurar los periodos más recientes cronológicamente
@@ -741,7 +807,6 @@ def seccion_horarios(client, personal_list):
         if st.button("🚀 Procesar periodos seleccionados", type="primary"):
             st.session_state['drive_to_load_ids'] = file_ids_to_load
             # Limpiar datos previos para forzar recarga en el siguiente bloque
-            st.session_state['df_registros_horarios'] = None
             st.session_state['drive_processed_ids'] = None
             st.rerun()
         
@@ -759,22 +824,31 @@ def seccion_horarios(client, personal_list):
         loaded_periods = [p for p, fid in period_to_id.items() if fid in processed_ids]
         st.success(f"Datos cargados para {len(loaded_periods)} períodos: {', '.join(sorted(loaded_periods))}")
     
-    # Traer datos previos si existen
-    df_registros = st.session_state.get('df_registros_horarios')
-    jornada_cached = st.session_state.get('jornada_horarios')
+    # Traer datos previos si existen: los registros combinados están en la
+    # caché compartida con los archivos procesados como clave (la sesión solo
+    # guarda cuáles son); si se desalojaron, se vuelven a armar
+    ids_procesados = st.session_state.get('drive_processed_ids')
+    df_registros = None
+    if ids_procesados is not None:
+        df_registros = REGISTROS_HORARIOS.obtener(tuple(ids_procesados))
 
     # --- Carga y combinación de archivos ---
     # Verificar si ya tenemos datos cargados y procesados
-    if 'drive_processed_ids' not in st.session_state or st.session_state.get('df_registros_horarios') is None:
+    if df_registros is None:
         # Procesar archivos de Google Drive
         dfs_csv = []
-        file_ids = st.session_state.get('drive_to_load_ids', [])
+        if ids_procesados is None:
+            file_ids = st.session_state.get('drive_to_load_ids', [])
+        else:
+            file_ids = ids_procesados
         
         with st.spinner('Cargando datos de Google Drive...'):
             for i, fid in enumerate(file_ids):
                 try:
-                    content = download_csv_file(fid)
-                    df_temp = read_csv_bytes(content)
+                    with etapa("horarios.drive_descarga", cache=True) as medicion:
+                        content = download_csv_file(fid)
+                        df_temp = read_csv_bytes(content)
+                        medicion.filas = len(df_temp)
                     if not df_temp.empty:
                         columnas_requeridas = ['id_empleado', 'fecha_hora', 'tipo']
                         if all(col in df_temp.columns for col in columnas_requeridas):
@@ -794,15 +868,13 @@ def seccion_horarios(client, personal_list):
                     'count': len(dfs_csv),
                     'total_records': len(df_registros)
                 }
-                # Persistir en session_state
-                st.session_state['df_registros_horarios'] = df_registros
+                # Persistir en la caché y recordar en la sesión qué se cargó
+                REGISTROS_HORARIOS.guardar(tuple(sorted(file_ids)), df_registros)
                 st.session_state['drive_processed_ids'] = sorted(file_ids)
             else:
                 st.error("No se pudieron cargar datos de los archivos.")
                 return
     
-    # Obtener datos del session_state
-    df_registros = st.session_state.get('df_registros_horarios')
     if df_registros is None or df_registros.empty:
         st.warning("No hay datos disponibles para mostrar. Por favor, verifica los archivos en Google Drive.")
         return
@@ -813,78 +885,21 @@ def seccion_horarios(client, personal_list):
         df_libro = df_registros[df_registros['tipo'] == 'LIBRO'].copy()
         
         # --- Eliminar registros duplicados o casi duplicados (menos de 1 minuto de diferencia) solo para RELOJ ---
-        if not df_reloj.empty:
-            df_reloj = df_reloj.sort_values(['id_empleado', 'fecha_hora'])
-            
-            # Crear una máscara para identificar registros a mantener
-            mask = pd.Series(True, index=df_reloj.index)
-            
-            # Para cada empleado, verificar duplicados consecutivos
-            for empleado in df_reloj['id_empleado'].unique():
-                empleado_mask = df_reloj['id_empleado'] == empleado
-                empleado_indices = df_reloj[empleado_mask].index
-                
-                # Calcular diferencias de tiempo entre registros consecutivos
-                for i in range(1, len(empleado_indices)):
-                    idx_prev = empleado_indices[i-1]
-                    idx_curr = empleado_indices[i]
-                    
-                    tiempo_anterior = df_reloj.at[idx_prev, 'fecha_hora']
-                    tiempo_actual = df_reloj.at[idx_curr, 'fecha_hora']
-                    
-                    # Si la diferencia es menor a 1 minuto, marcar como duplicado
-                    if (tiempo_actual - tiempo_anterior) < pd.Timedelta(minutes=1):
-                        mask.at[idx_curr] = False
-            
-            # Filtrar los registros duplicados
-            duplicados = df_reloj[~mask]
-            df_reloj = df_reloj[mask]
-            
-            # Mostrar información de depuración
-            # if not duplicados.empty:
-            #     st.warning(f"Se encontraron {len(duplicados)} registros de RELOJ duplicados o casi duplicados (diferencia < 1 minuto):")
-            #     st.dataframe(duplicados[['id_empleado', 'fecha_hora']].sort_values(['id_empleado', 'fecha_hora']))
+        with etapa("horarios.deduplicacion", filas=len(df_reloj)):
+            df_reloj = eliminar_duplicados_reloj(df_reloj)
         
         # Volver a combinar los DataFrames
         df_registros = pd.concat([df_reloj, df_libro], ignore_index=True)
         
         # --- Procesamiento y análisis sobre el DataFrame combinado ---
-        
-        # --- Procesamiento y análisis sobre el DataFrame combinado ---
-        # Recalcula la jornada laboral sobre el DataFrame combinado
-        def sumar_intervalos(fechas):
-            fechas = fechas.sort_values()
-            tiempos = fechas.tolist()
-            total = pd.Timedelta(0)
-            for i in range(0, len(tiempos)-1, 2):
-                total += tiempos[i+1] - tiempos[i]
-            return total.total_seconds() / 3600  # en horas
-
         df_registros['fecha'] = pd.to_datetime(df_registros['fecha_hora']).dt.date
         df_registros['hora'] = pd.to_datetime(df_registros['fecha_hora']).dt.hour
 
-        # Agrupar por empleado, fecha y tipo para mantener la información del tipo (LIBRO/RELOJ)
-        jornada = (
-            df_registros.groupby(['id_empleado', 'fecha', 'tipo'])['fecha_hora']
-            .apply(sumar_intervalos)
-            .reset_index(name='duracion_horas')
-        )
-        
-        # Obtener el primer tipo para cada empleado y fecha (en caso de que haya múltiples tipos)
-        tipo_por_dia = df_registros.groupby(['id_empleado', 'fecha'])['tipo'].first().reset_index()
-        
-        # Obtener min y max por empleado y fecha
-        min_max = df_registros.groupby(['id_empleado', 'fecha'])['fecha_hora'].agg(['min', 'max']).reset_index()
-        
-        # Combinar todo en un solo DataFrame
-        jornada = jornada.merge(min_max, on=['id_empleado', 'fecha'])
-        jornada = jornada.merge(tipo_por_dia, on=['id_empleado', 'fecha'])
-        
-        jornada.rename(columns={'min': 'inicio_jornada', 'max': 'fin_jornada'}, inplace=True)
-        jornada = jornada[jornada['duracion_horas'] > 0.25]
-
-        # Guardar en session_state para persistencia entre reruns
-        st.session_state['jornada_horarios'] = jornada
+        # Tabla de intervalos (pares entrada/salida) de todos los empleados y días.
+        # Alimenta tanto la jornada laboral como el gráfico de intervalos.
+        with etapa("horarios.jornada", filas=len(df_registros)):
+            intervalos = construir_intervalos(df_registros)
+            jornada = calcular_jornada(df_registros, intervalos)
 
         # Añadir columna de nombre completo según ID
         df_registros['nombre'] = df_registros['id_empleado'].apply(
@@ -1126,20 +1141,90 @@ def seccion_horarios(client, personal_list):
                 height=min(400, 100 + len(resumen_empleados) * 35)
             )
             
+            # --- Reporte de conciliación LIBRO vs RELOJ de todo el personal ---
+            df_conciliacion = conciliar_libro_reloj(df_filtrado, jornada=df_jornada_filtrada)
+            if not df_conciliacion.empty:
+                df_conciliacion.insert(1, 'nombre', df_conciliacion['id_empleado'].map(
+                    lambda x: get_employee_display(x, st.session_state.get('incognito_mode', False))
+                ))
+                st.download_button(
+                    label="📥 Descargar conciliación LIBRO - RELOJ (CSV)",
+                    data=exportar_tabla(df_conciliacion, 'csv'),
+                    file_name=f"conciliacion_libro_reloj_{mes_seleccionado}.csv",
+                    mime='text/csv',
+                    help="Horas LIBRO y RELOJ, diferencia y registros impares por empleado y día"
+                )
+
+            # --- Reporte de anomalías de todo el personal ---
+            with st.expander("🚩 Reporte de anomalías (todo el personal)"):
+                df_anomalias = generar_reporte_anomalias(
+                    df_filtrado,
+                    jornada=df_jornada_filtrada,
+                    cobertura=obtener_dias_cubiertos(),
+                    feriados=obtener_fechas_feriados(pd.to_datetime(df_filtrado['fecha_hora'])),
+                )
+                if df_anomalias.empty:
+                    st.success("No se detectaron anomalías en el período seleccionado.")
+                else:
+                    resumen = resumen_anomalias(df_anomalias)
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Días con anomalías", len(df_anomalias))
+                    col2.metric("Marcaciones impares", int(resumen['marcas_impares'].sum()))
+                    col3.metric("Días sin marcaciones", int(resumen['sin_marcaciones'].sum()))
+                    col4.metric("Diferencias LIBRO/RELOJ", int(resumen['diferencia_grande'].sum()))
+
+                    df_anomalias.insert(1, 'nombre', df_anomalias['id_empleado'].map(
+                        lambda x: get_employee_display(x, st.session_state.get('incognito_mode', False))
+                    ))
+                    st.dataframe(
+                        df_anomalias[['nombre', 'fecha', 'horas_libro', 'horas_reloj', 'diferencia', 'anomalias']],
+                        column_config={
+                            'nombre': 'Empleado',
+                            'fecha': st.column_config.DateColumn('Fecha', format='DD/MM/YYYY'),
+                            'horas_libro': st.column_config.NumberColumn('Horas LIBRO', format='%.2f'),
+                            'horas_reloj': st.column_config.NumberColumn('Horas RELOJ', format='%.2f'),
+                            'diferencia': st.column_config.NumberColumn('Diferencia', format='%.2f'),
+                            'anomalias': 'Anomalías',
+                        },
+                        hide_index=True,
+                        width='stretch',
+                        height=min(400, 100 + len(df_anomalias) * 35)
+                    )
+
+                    col_csv, col_parquet = st.columns(2)
+                    with col_csv:
+                        st.download_button(
+                            label="📥 Descargar anomalías (CSV)",
+                            data=exportar_tabla(df_anomalias, 'csv'),
+                            file_name=f"anomalias_{mes_seleccionado}.csv",
+                            mime='text/csv'
+                        )
+                    with col_parquet:
+                        try:
+                            st.download_button(
+                                label="📥 Descargar anomalías (Parquet)",
+                                data=exportar_tabla(df_anomalias, 'parquet'),
+                                file_name=f"anomalias_{mes_seleccionado}.parquet",
+                                mime='application/octet-stream'
+                            )
+                        except ImportError:
+                            st.caption("Instalá pyarrow para exportar en formato Parquet.")
+            
             # --- Gráfico de distribución de horas ---
             st.subheader("Distribución de Horas por Día")
             
             # Crear gráfico de cajas por empleado
-            fig_distribucion = px.box(
-                df_jornada_filtrada,
-                x='nombre',
-                y='duracion_horas',
-                color='nombre',
-                labels={'duracion_horas': 'Horas trabajadas', 'nombre': 'Empleado'},
-                title=f"Distribución de horas trabajadas por empleado ({pd.to_datetime(mes_seleccionado).strftime('%B %Y').title()})" if mes_seleccionado != 'Todos' else 'Distribución de horas trabajadas por empleado',
-                template='plotly_white',
-                range_y=[0, 16]  # Establecer rango del eje Y entre 0 y 16 horas
-            )
+            with etapa("horarios.figura.distribucion", filas=len(df_jornada_filtrada)):
+                fig_distribucion = px.box(
+                    df_jornada_filtrada,
+                    x='nombre',
+                    y='duracion_horas',
+                    color='nombre',
+                    labels={'duracion_horas': 'Horas trabajadas', 'nombre': 'Empleado'},
+                    title=f"Distribución de horas trabajadas por empleado ({pd.to_datetime(mes_seleccionado).strftime('%B %Y').title()})" if mes_seleccionado != 'Todos' else 'Distribución de horas trabajadas por empleado',
+                    template='plotly_white',
+                    range_y=[0, 16]  # Establecer rango del eje Y entre 0 y 16 horas
+                )
             
             # Añadir línea de referencia de 8 horas
             fig_distribucion.add_hline(
@@ -1350,35 +1435,19 @@ def seccion_horarios(client, personal_list):
 
                 # --- Agregar Feriados ---
                 try:
-                    years_in_plot = pd.to_datetime(list(fechas_unicas)).year.unique()
-                    feriados_dict = {}
-                    for y in years_in_plot:
-                        feriados_dict.update(get_feriados_argentina(y))
-                    
-                    df_manual = st.session_state.get("df_feriados_manuales", pd.DataFrame())
-                    if not df_manual.empty and 'Fecha' in df_manual.columns:
-                        for _, row in df_manual.iterrows():
-                            try:
-                                f_dt = pd.to_datetime(row['Fecha'], errors='coerce', dayfirst=True, format='mixed')
-                                if pd.notna(f_dt):
-                                    f_str = f_dt.strftime('%Y-%m-%d')
-                                    label = row.get('Motivo (Opcional)') or row.get('Motivo') or 'Feriado/Asueto'
-                                    feriados_dict[f_str] = label
-                            except: continue
-
-                    rows_feriados = []
-                    for f_str, f_name in feriados_dict.items():
-                        f_date = datetime.strptime(f_str, '%Y-%m-%d').date()
-                        if f_date in fechas_unicas:
-                            rows_feriados.append({
-                                'fecha': f_date,
-                                'fecha_dt': pd.to_datetime(f_date),
-                                'duracion_horas': 8.0,
-                                'tipo_combinado': 'FERIADOS',
-                                'tipo_detalle': f_name,
-                                'es_salida_campo': False
-                            })
-                    
+                    fechas_plot = pd.Series(sorted(fechas_unicas), dtype=object)
+                    calendario = calendario_laboral_sesion(fechas_plot.min(), fechas_plot.max())
+                    es_feriado = calendario.mascara_feriados(fechas_plot)
+                    fechas_fer = fechas_plot[es_feriado]
+                    rows_feriados = [{
+                        'fecha': f,
+                        'fecha_dt': pd.Timestamp(f),
+                        'duracion_horas': 8.0,
+                        'tipo_combinado': 'FERIADOS',
+                        'tipo_detalle': calendario.nombres_feriados.get(pd.Timestamp(f).strftime('%Y-%m-%d'), ''),
+                        'es_salida_campo': False
+                    } for f in fechas_fer]
+
                     if rows_feriados:
                         df_feriados_plot = pd.DataFrame(rows_feriados)
                         to_add_fer = df_feriados_plot.reindex(columns=df_completo.columns)
@@ -1478,26 +1547,27 @@ def seccion_horarios(client, personal_list):
                     tick_vals = fechas_unicas
                     tick_text = [f"{pd.to_datetime(d).strftime('%d/%m')}" for d in tick_vals]
 
-                fig_historial = px.bar(
-                    df_plot,
-                    x='fecha',
-                    y='duracion_horas',
-                    color='tipo_combinado',
-                    barmode='group',
-                    title='Horas trabajadas, ausencias y vacaciones por día',
-                    labels={'fecha': 'Fecha', 'duracion_horas': 'Horas', 'tipo_combinado': 'Tipo'},
-                    color_discrete_map={
-                        'LIBRO': '#1f77b4',
-                        'RELOJ': '#ff7f0e',
-                        'AUSENCIAS': '#9b59b6',
-                        'VACACIONES': '#16a085',
-                        'FERIADOS': '#f1c40f'
-                    },
-                    category_orders={'fecha': fechas_unicas, 'tipo_combinado': ["FERIADOS", "LIBRO", "RELOJ", "AUSENCIAS", "VACACIONES"]},
-                    template='plotly_white',
-                    custom_data=['fecha_formateada', 'tipo_combinado', 'es_salida_campo', 'tipo_detalle_final'],
-                    base='base_horas'
-                )
+                with etapa("horarios.figura.historial", filas=len(df_plot)):
+                    fig_historial = px.bar(
+                        df_plot,
+                        x='fecha',
+                        y='duracion_horas',
+                        color='tipo_combinado',
+                        barmode='group',
+                        title='Horas trabajadas, ausencias y vacaciones por día',
+                        labels={'fecha': 'Fecha', 'duracion_horas': 'Horas', 'tipo_combinado': 'Tipo'},
+                        color_discrete_map={
+                            'LIBRO': '#1f77b4',
+                            'RELOJ': '#ff7f0e',
+                            'AUSENCIAS': '#9b59b6',
+                            'VACACIONES': '#16a085',
+                            'FERIADOS': '#f1c40f'
+                        },
+                        category_orders={'fecha': fechas_unicas, 'tipo_combinado': ["FERIADOS", "LIBRO", "RELOJ", "AUSENCIAS", "VACACIONES"]},
+                        template='plotly_white',
+                        custom_data=['fecha_formateada', 'tipo_combinado', 'es_salida_campo', 'tipo_detalle_final'],
+                        base='base_horas'
+                    )
 
                 # Ajustar posiciones (offset) y anchos para solapamiento descentrado
                 # FERIADOS un poco a la izquierda, LIBRO un poco a la derecha, RELOJ al centro/frente
@@ -1652,105 +1722,30 @@ def seccion_horarios(client, personal_list):
                 
                 st.plotly_chart(fig_historial, width='stretch')
                                # --- Diagrama de intervalos de trabajo (Timeline diario) - RELOJ y COMPENSADOS ---
-                df_reloj_raw = df_filtrado[df_filtrado['tipo'] == 'RELOJ'].copy()
-                df_reloj_raw['fecha_only'] = df_reloj_raw['fecha_hora'].dt.date
-                
-                intervalos_lista = []
-                
-                # 1. Procesar RELOJ
-                for f_dia, group in df_reloj_raw.groupby('fecha_only'):
-                    group = group.sort_values('fecha_hora')
-                    times = group['fecha_hora'].tolist()
-                    if len(times) > 0 and len(times) % 2 == 0:
-                        for i in range(0, len(times), 2):
-                            start = times[i]
-                            end = times[i+1]
-                            dur = (end - start).total_seconds()
-                            intervalos_lista.append({
-                                'Fecha': f_dia,
-                                'Inicio': start.strftime('%H:%M'),
-                                'Fin': end.strftime('%H:%M'),
-                                'Duración': dur / 3600,
-                                'DuracionHM': f"{int(dur//3600)}:{int((dur%3600)//60):02d}",
-                                'Base': start.hour + start.minute/60 + start.second/3600,
-                                'Tipo': 'RELOJ'
-                            })
-                
-                # 2. Procesar COMPENSADOS (AUSENCIAS)
-                if not df_compensatorios.empty:
-                    # Solo procesar compensados que estén dentro del periodo visible (fechas_unicas)
-                    set_fechas_visibles = set(fechas_unicas)
-                    df_comp_filtrado = df_compensatorios[df_compensatorios['fecha'].isin(set_fechas_visibles)].copy()
-                    
-                    for _, row in df_comp_filtrado.iterrows():
-                        f_dia = row['fecha']
-                        h_ini_str = row.get('hora_inicio') or ''
-                        h_fin_str = row.get('hora_fin') or ''
-                        
-                        if h_ini_str and h_fin_str:
-                            try:
-                                h_ini_dt = datetime.strptime(h_ini_str, '%H:%M')
-                                h_fin_dt = datetime.strptime(h_fin_str, '%H:%M')
-                                base_h = h_ini_dt.hour + h_ini_dt.minute/60
-                                end_h = h_fin_dt.hour + h_fin_dt.minute/60
-                                dur_h = end_h - base_h
-                                if dur_h > 0:
-                                    intervalos_lista.append({
-                                        'Fecha': f_dia,
-                                        'Inicio': h_ini_str,
-                                        'Fin': h_fin_str,
-                                        'Duración': dur_h,
-                                        'DuracionHM': f"{int(dur_h)}:{int((dur_h%1)*60):02d}",
-                                        'Base': base_h,
-                                        'Tipo': 'COMPENSADO'
-                                    })
-                            except: pass
-                        elif row.get('duracion_horas') == 8.0:
-                            # Caso Día Completo: Mostrar de 08:00 a 16:00 como bloque
-                            intervalos_lista.append({
-                                'Fecha': f_dia,
-                                'Inicio': '08:00',
-                                'Fin': '16:00',
-                                'Duración': 8.0,
-                                'DuracionHM': '8:00',
-                                'Base': 8.0,
-                                'Tipo': 'COMPENSADO'
-                            })
-
-                df_intervals = pd.DataFrame(intervalos_lista)
-                fechas_con_datos = set(df_intervals['Fecha'].tolist()) if not df_intervals.empty else set()
-                
-                # 3. Rellenar huecos para sincronizar eje X
-                dummy_rows = []
-                for f in fechas_unicas:
-                    if f not in fechas_con_datos:
-                        dummy_rows.append({
-                            'Fecha': f, 'Duración': 0.0, 'Base': 0.0, 
-                            'Inicio': '-', 'Fin': '-', 'DuracionHM': '0:00', 'Tipo': 'RELOJ'
-                        })
-                
-                if not df_intervals.empty:
-                    if dummy_rows:
-                        df_intervals = pd.concat([df_intervals, pd.DataFrame(dummy_rows)], ignore_index=True)
-                else:
-                    df_intervals = pd.DataFrame(dummy_rows)
-                
-                df_intervals = df_intervals.sort_values(['Fecha', 'Tipo'])
-                
-                fig_timeline = px.bar(
-                    df_intervals,
-                    x='Fecha',
-                    y='Duración',
-                    base='Base',
-                    color='Tipo',
-                    title="Intervalos de trabajo y compensados (RELOJ / COMP)",
-                    labels={'Fecha': 'Día', 'Duración': 'Intervalo', 'Base': 'Hora inicio', 'Tipo': 'Origen'},
-                    template='plotly_white',
-                    color_discrete_map={'RELOJ': '#ff7f0e', 'COMPENSADO': '#9b59b6'},
-                    barmode='overlay',
-                    custom_data=['Inicio', 'Fin', 'DuracionHM']
+                intervalos_emp = intervalos[
+                    (intervalos['id_empleado'] == empleado_seleccionado) &
+                    (intervalos['tipo'] == 'RELOJ')
+                ]
+                df_intervals = tabla_timeline(
+                    [intervalos_emp, intervalos_ausencias(df_compensatorios)],
+                    fechas_unicas
                 )
                 
+                with etapa("horarios.figura.timeline", filas=len(df_intervals)):
+                    fig_timeline = px.bar(
+                        df_intervals,
+                        x='Fecha',
+                        y='Duración',
+                        base='Base',
+                        color='Tipo',
+                        title="Intervalos de trabajo y compensados (RELOJ / COMP)",
+                        labels={'Fecha': 'Día', 'Duración': 'Intervalo', 'Base': 'Hora inicio', 'Tipo': 'Origen'},
+                        template='plotly_white',
+                        color_discrete_map={'RELOJ': '#ff7f0e', 'COMPENSADO': '#9b59b6'},
+                        barmode='overlay',
+                        custom_data=['Inicio', 'Fin', 'DuracionHM']
+                    )
+                
                 fig_timeline.update_layout(
                     yaxis=dict(
                         range=[0, 24], 
@@ -1787,42 +1782,17 @@ def seccion_horarios(client, personal_list):
                 # --- Gráfico de diferencias ---
                 st.subheader("Diferencia diaria (LIBRO - RELOJ)")
                 
-                # Crear un DataFrame con las diferencias
-                df_diferencias = df_completo.pivot_table(
-                    index='fecha', 
-                    columns='tipo_combinado', 
-                    values='duracion_horas',
-                    aggfunc='sum'
-                ).reset_index()
+                # Conciliación LIBRO vs RELOJ por día (horas, diferencia, paridad y clasificación)
+                registros_emp = df_registros[df_registros['id_empleado'] == empleado_seleccionado]
+                df_diferencias = conciliar_libro_reloj(
+                    registros_emp,
+                    jornada=df_jornada_filtrada,
+                    fechas=fechas_unicas
+                )
                 
-                # Calcular la diferencia LIBRO - RELOJ solo si ambos valores existen y son mayores a cero
-                if 'LIBRO' in df_diferencias.columns and 'RELOJ' in df_diferencias.columns:
-                    # Inicializar la columna de diferencia como NaN
-                    df_diferencias['diferencia'] = float('nan')
-                    
-                    # Calcular la diferencia solo para filas donde ambos valores son positivos
-                    mask = (df_diferencias['LIBRO'] > 0) & (df_diferencias['RELOJ'] > 0)
-                    df_diferencias.loc[mask, 'diferencia'] = df_diferencias.loc[mask, 'LIBRO'] - df_diferencias.loc[mask, 'RELOJ']
-                    
-                    # Contar cuántas diferencias válidas hay
-                    diferencias_validas = mask.sum()
-                    
-                    # Verificar si hay registros impares para cada fecha
-                    df_diferencias['tiene_impares'] = False
-                    
-                    # Obtener los conteos de registros por fecha y tipo
-                    if empleado_seleccionado != 'Todos':
-                        # Contar registros por fecha y tipo para el empleado seleccionado
-                        conteo_registros = df_registros[df_registros['id_empleado'] == empleado_seleccionado].groupby(
-                            ['fecha', 'tipo']
-                        ).size().unstack(fill_value=0)
-                        
-                        # Verificar si hay algún tipo con conteo impar para cada fecha
-                        for fecha in df_diferencias['fecha']:
-                            if fecha in conteo_registros.index:
-                                # Verificar si hay algún tipo con conteo impar
-                                if any(conteo_registros.loc[fecha] % 2 != 0):
-                                    df_diferencias.loc[df_diferencias['fecha'] == fecha, 'tiene_impares'] = True
+                if not df_diferencias.empty:
+                    # Contar cuántas diferencias válidas hay (ambos valores mayores a cero)
+                    diferencias_validas = int(df_diferencias['diferencia'].notna().sum())
                     
                     # Si no hay diferencias válidas, mostrar mensaje pero continuar con el resto del código
                     if diferencias_validas == 0:
@@ -1834,18 +1804,6 @@ def seccion_horarios(client, personal_list):
                     
                     # Solo mostrar el gráfico y métricas si hay diferencias válidas
                     if not sin_diferencias_validas:
-                        # Crear la columna para el color basado en la diferencia y si hay impares
-                        def get_color(row):
-                            if row['tiene_impares']:
-                                return 'Registros impares'
-                            elif row['diferencia'] > 0:
-                                return 'Positiva'
-                            elif row['diferencia'] < 0:
-                                return 'Negativa'
-                            else:
-                                return 'Cero'
-                        
-                        df_diferencias['tipo_diferencia'] = df_diferencias.apply(get_color, axis=1)
                         
                         # Filtrar días sin registros impares para las estadísticas
                         df_sin_impares = df_diferencias[~df_diferencias['tiene_impares']]
@@ -1853,28 +1811,29 @@ def seccion_horarios(client, personal_list):
                         dias_con_impares = df_diferencias['tiene_impares'].sum()
                         
                         # Crear el gráfico de barras para las diferencias
-                        fig_diferencias = px.bar(
-                            df_diferencias,
-                            x='fecha',
-                            y='diferencia',
-                            color='tipo_diferencia',
-                            title='Diferencia entre horas LIBRO y RELOJ (LIBRO - RELOJ)',
-                            labels={
-                                'fecha': 'Fecha',
-                                'diferencia': 'Diferencia (horas)',
-                                'tipo_diferencia': 'Tipo de Diferencia'
-                            },
-                            color_discrete_map={
-                                'Positiva': '#2ecc71',
-                                'Negativa': '#e74c3c',
-                                'Cero': '#7f8c8d',
-                                'Registros impares': '#f39c12'
-                            },
-                            category_orders={
-                                'fecha': sorted(df_diferencias['fecha'].unique())
-                            },
-                            template='plotly_white'
-                        )
+                        with etapa("horarios.figura.diferencias", filas=len(df_diferencias)):
+                            fig_diferencias = px.bar(
+                                df_diferencias,
+                                x='fecha',
+                                y='diferencia',
+                                color='tipo_diferencia',
+                                title='Diferencia entre horas LIBRO y RELOJ (LIBRO - RELOJ)',
+                                labels={
+                                    'fecha': 'Fecha',
+                                    'diferencia': 'Diferencia (horas)',
+                                    'tipo_diferencia': 'Tipo de Diferencia'
+                                },
+                                color_discrete_map={
+                                    'Positiva': '#2ecc71',
+                                    'Negativa': '#e74c3c',
+                                    'Cero': '#7f8c8d',
+                                    'Registros impares': '#f39c12'
+                                },
+                                category_orders={
+                                    'fecha': sorted(df_diferencias['fecha'].unique())
+                                },
+                                template='plotly_white'
+                            )
                         
                         # Configurar el diseño del gráfico
                         # Calcular el espaciado de ticks basado en el número de fechas
@@ -1993,14 +1952,15 @@ def seccion_horarios(client, personal_list):
                     df_libro = df_completo[(df_completo['tipo_combinado'] == 'LIBRO') & 
                                          (df_completo['duracion_horas'] > 0)]
                     if not df_libro.empty:
-                        fig_box_libro = px.box(
-                            df_libro,
-                            y='duracion_horas',
-                            title='Distribución de horas - LIBRO',
-                            labels={'duracion_horas': 'Horas trabajadas'},
-                            color_discrete_sequence=['#1f77b4'],
-                            template='plotly_white'
-                        )
+                        with etapa("horarios.figura.box_libro", filas=len(df_libro)):
+                            fig_box_libro = px.box(
+                                df_libro,
+                                y='duracion_horas',
+                                title='Distribución de horas - LIBRO',
+                                labels={'duracion_horas': 'Horas trabajadas'},
+                                color_discrete_sequence=['#1f77b4'],
+                                template='plotly_white'
+                            )
                         fig_box_libro.update_layout(
                             showlegend=False,
                             yaxis_title='Horas',
@@ -2025,14 +1985,15 @@ def seccion_horarios(client, personal_list):
                     df_reloj = df_reloj[df_reloj['duracion_horas'] > 0]
                     
                     if not df_reloj.empty:
-                        fig_box_reloj = px.box(
-                            df_reloj,
-                            y='duracion_horas',
-                            title='Distribución de horas - RELOJ',
-                            labels={'duracion_horas': 'Horas trabajadas'},
-                            color_discrete_sequence=['#ff7f0e'],
-                            template='plotly_white'
-                        )
+                        with etapa("horarios.figura.box_reloj", filas=len(df_reloj)):
+                            fig_box_reloj = px.box(
+                                df_reloj,
+                                y='duracion_horas',
+                                title='Distribución de horas - RELOJ',
+                                labels={'duracion_horas': 'Horas trabajadas'},
+                                color_discrete_sequence=['#ff7f0e'],
+                                template='plotly_white'
+                            )
                         fig_box_reloj.update_layout(
                             showlegend=False,
                             yaxis_title='Horas',
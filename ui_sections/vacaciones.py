@@ -7,8 +7,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_sheet, refresh_data
+from database import get_sheet
 from utils.date_utils import format_duracion_licencia
+from utils.estado_registros import (
+    COLUMNAS_OCULTAS, ESTADO_EN_CURSO, ESTADO_PROXIMA, ESTADO_TRANSCURRIDA,
+    contar_estados, estilar_por_estado, preparar_vacaciones, vista_en_cache,
+)
 
 def seccion_vacaciones(client, personal_list):
     st.subheader("📅 Registro de Vacaciones")
@@ -18,23 +22,18 @@ def seccion_vacaciones(client, personal_list):
     if sheet is None: return
 
     if not df_vacaciones.empty:
-        df_vacaciones['Fecha inicio'] = pd.to_datetime(df_vacaciones['Fecha inicio'], errors='coerce', dayfirst=True, format='mixed')
-        df_vacaciones['Fecha regreso'] = pd.to_datetime(df_vacaciones['Fecha regreso'], errors='coerce', dayfirst=True, format='mixed')
-        # Ajustar la fecha fin para mostrar el último día de vacaciones (un día antes del regreso)
-        df_vacaciones['Último día de vacaciones'] = df_vacaciones['Fecha regreso'] - pd.Timedelta(days=1)
-
-        today = pd.to_datetime(datetime.now().date())
+        # Fechas, estado y etiquetas se calculan una vez por versión de la tabla (y por día)
+        df_vacaciones = vista_en_cache(st.session_state, 'vista_vacaciones', df_vacaciones,
+                                       preparar_vacaciones, datetime.now().date())
 
         # Calcular métricas basadas en TODOS los registros (no filtrados)
-        en_curso_total = ((df_vacaciones['Fecha inicio'] <= today) & (df_vacaciones['Último día de vacaciones'] >= today)).sum()
-        proximas_total = (df_vacaciones['Fecha inicio'] > today).sum()
-        transcurridas_total = (df_vacaciones['Último día de vacaciones'] < today).sum()
+        totales = contar_estados(df_vacaciones)
 
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Total de Registros", len(df_vacaciones))
-        col2.metric("Vacaciones en Curso", en_curso_total)
-        col3.metric("Próximas Vacaciones", proximas_total)
-        col4.metric("Vacaciones Transcurridas", transcurridas_total)
+        col2.metric("Vacaciones en Curso", totales[ESTADO_EN_CURSO])
+        col3.metric("Próximas Vacaciones", totales[ESTADO_PROXIMA])
+        col4.metric("Vacaciones Transcurridas", totales[ESTADO_TRANSCURRIDA])
 
         st.markdown("---")
 
@@ -42,11 +41,14 @@ def seccion_vacaciones(client, personal_list):
 
     with vista_general:
         if not df_vacaciones.empty:
-            # Filtro por estado de las vacaciones
-            today = pd.to_datetime(datetime.now().date())
-
-            # Crear opciones de filtro
-            filter_options = ["Vacaciones en Curso", "Próximas Vacaciones", "Vacaciones Transcurridas", "Todos"]
+            # Crear opciones de filtro (cada una corresponde a un valor de la columna 'Estado')
+            filtros = {
+                "Vacaciones en Curso": ESTADO_EN_CURSO,
+                "Próximas Vacaciones": ESTADO_PROXIMA,
+                "Vacaciones Transcurridas": ESTADO_TRANSCURRIDA,
+                "Todos": None,
+            }
+            filter_options = list(filtros)
             default_filter = "Vacaciones en Curso"
 
             selected_filter = st.selectbox(
@@ -55,52 +57,21 @@ def seccion_vacaciones(client, personal_list):
                 index=filter_options.index(default_filter)
             )
 
-            # Aplicar filtro según la selección
-            df_filtered = df_vacaciones.copy()
-
-            if selected_filter == "Vacaciones en Curso":
-                # Vacaciones que están actualmente en curso (inicio <= hoy <= último día)
-                df_filtered = df_filtered[
-                    (df_filtered['Fecha inicio'] <= today) &
-                    (df_filtered['Último día de vacaciones'] >= today)
-                ]
-            elif selected_filter == "Próximas Vacaciones":
-                # Vacaciones que aún no han empezado (inicio > hoy)
-                df_filtered = df_filtered[df_filtered['Fecha inicio'] > today]
-            elif selected_filter == "Vacaciones Transcurridas":
-                # Vacaciones que ya terminaron (último día < hoy)
-                df_filtered = df_filtered[df_filtered['Último día de vacaciones'] < today]
-            # "Todos" no aplica ningún filtro adicional
+            # Aplicar filtro según la selección ("Todos" no aplica ningún filtro)
+            estado_filtro = filtros[selected_filter]
+            df_filtered = df_vacaciones if estado_filtro is None else df_vacaciones[df_vacaciones['Estado'] == estado_filtro]
 
             st.info(f"Mostrando: {selected_filter} ({len(df_filtered)} registros)")
 
         else:
-            df_filtered = df_vacaciones.copy()
+            df_filtered = df_vacaciones
 
         df_display = df_filtered.sort_values(by='Fecha inicio', ascending=False)
-        if 'row_number' in df_display.columns:
-            df_display = df_display.drop(columns=['row_number'])
-
-        # Eliminar columna auxiliar de la visualización
-        if 'Último día de vacaciones' in df_display.columns:
-            df_display = df_display.drop(columns=['Último día de vacaciones'])
-
-        def style_status(row):
-            today = pd.to_datetime(datetime.now().date()).date()
-            start_date = pd.to_datetime(row['Fecha inicio'], dayfirst=True, format='mixed').date()
-            # La fecha regresa es el día que vuelve al trabajo, el último día es uno antes
-            last_vacation_day = (pd.to_datetime(row['Fecha regreso'], dayfirst=True, format='mixed') - pd.Timedelta(days=1)).date()
-            style = ''
-            if start_date <= today and last_vacation_day >= today:
-                style = 'background-color: #1E90FF'  # En curso (blue)
-            elif last_vacation_day < today:
-                style = 'background-color: #696969'  # Ya ocurridas (gray)
-            elif start_date > today:
-                style = 'background-color: #FF8C00'  # Próximas (orange)
-            return [style] * len(row)
+        # Eliminar columnas auxiliares de la visualización
+        df_display = df_display.drop(columns=[c for c in COLUMNAS_OCULTAS if c in df_display.columns])
 
         st.dataframe(
-            df_display.style.apply(style_status, axis=1),
+            estilar_por_estado(df_display) if 'Estado' in df_display.columns else df_display,
             width='stretch',
             hide_index=True,
             column_config={
@@ -147,27 +118,29 @@ def seccion_vacaciones(client, personal_list):
                         fecha_regreso_live.strftime('%Y-%m-%d'),
                         observaciones
                     ]
-                    sheet.append_row(new_row)
-                    refresh_data(client, sheet_name)
+                    sheet.append_record(new_row)
                     st.success(f"Registro agregado para {nombre}.")
                     st.rerun()
 
     with modificar_eliminar:
         if not df_vacaciones.empty:
             st.markdown("#### Modificar o Eliminar un registro")
-            df_vacaciones['row_number'] = range(2, len(df_vacaciones) + 2)
-            options = [f"Fila {row['row_number']}: {row['Apellido, Nombres']} - {row['Fecha inicio'].strftime('%d/%m/%Y') if pd.notna(row['Fecha inicio']) else ''} ({row['Tipo']})" for _, row in df_vacaciones.iterrows()]
-            option_to_edit = st.selectbox("Selecciona un registro para modificar o eliminar", options=[""] + options, key="select_edit_vac")
+            # Las opciones son los rowid de SQLite (índice del DataFrame): identifican el registro
+            # aunque cambie el orden de la tabla
+            etiquetas = df_vacaciones['Etiqueta']
+            rowid_to_edit = st.selectbox("Selecciona un registro para modificar o eliminar",
+                                         options=[None] + df_vacaciones.index.tolist(),
+                                         format_func=lambda rowid: "" if rowid is None else etiquetas[rowid],
+                                         key="select_edit_vac")
 
-            if option_to_edit:
-                row_number_to_edit = int(option_to_edit.split(':')[0].replace('Fila ', ''))
-                record_data = df_vacaciones[df_vacaciones['row_number'] == row_number_to_edit].iloc[0]
+            if rowid_to_edit is not None:
+                record_data = df_vacaciones.loc[rowid_to_edit]
 
                 # Entradas en vivo para la edición
                 st.markdown("---")
                 col1, col2 = st.columns(2)
-                edit_inicio = col1.date_input("Modificar inicio", value=pd.to_datetime(record_data["Fecha inicio"], dayfirst=True, format='mixed'), key=f"edit_vac_ini_{row_number_to_edit}", format="DD/MM/YYYY")
-                edit_regreso = col2.date_input("Modificar regreso", value=pd.to_datetime(record_data["Fecha regreso"], dayfirst=True, format='mixed'), key=f"edit_vac_reg_{row_number_to_edit}", format="DD/MM/YYYY")
+                edit_inicio = col1.date_input("Modificar inicio", value=pd.to_datetime(record_data["Fecha inicio"], dayfirst=True, format='mixed'), key=f"edit_vac_ini_{rowid_to_edit}", format="DD/MM/YYYY")
+                edit_regreso = col2.date_input("Modificar regreso", value=pd.to_datetime(record_data["Fecha regreso"], dayfirst=True, format='mixed'), key=f"edit_vac_reg_{rowid_to_edit}", format="DD/MM/YYYY")
 
                 if edit_regreso > edit_inicio:
                     ultimo_dia_edit = edit_regreso - pd.Timedelta(days=1)
@@ -176,7 +149,7 @@ def seccion_vacaciones(client, personal_list):
                 else:
                     st.warning("La fecha de regreso debe ser posterior a la de inicio.")
 
-                with st.form(f"edit_vac_form_{row_number_to_edit}"):
+                with st.form(f"edit_vac_form_{rowid_to_edit}"):
                     nombre = st.selectbox("Apellido, Nombres", options=["Seleccione persona..."] + personal_list, index=personal_list.index(record_data["Apellido, Nombres"]) + 1 if record_data["Apellido, Nombres"] in personal_list else 0)
                     fecha_solicitud = st.date_input("Fecha Solicitud", value=pd.to_datetime(record_data["Fecha solicitud"], dayfirst=True, format='mixed'), format="DD/MM/YYYY")
                     tipo = st.selectbox("Tipo", options=["Licencia Ordinaria 2025", "Otros"], index=["Licencia Ordinaria 2025", "Otros"].index(record_data["Tipo"]) if record_data["Tipo"] in ["Licencia Ordinaria 2025", "Otros"] else 0)
@@ -197,14 +170,12 @@ def seccion_vacaciones(client, personal_list):
                                 edit_regreso.strftime('%Y-%m-%d'), 
                                 observaciones
                             ]
-                            sheet.update(f'A{row_number_to_edit}:F{row_number_to_edit}', [update_values])
-                            refresh_data(client, sheet_name)
+                            sheet.update_record(rowid_to_edit, update_values)
                             st.success("¡Registro actualizado!")
                             st.rerun()
 
                     if col_del.form_submit_button("Eliminar Registro"):
-                        sheet.delete_rows(row_number_to_edit)
-                        refresh_data(client, sheet_name)
+                        sheet.delete_record(rowid_to_edit)
                         st.success("¡Registro eliminado!")
                         st.rerun()
         else:
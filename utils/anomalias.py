@@ -0,0 +1,180 @@
+"""
+Reporte de anomalías de asistencia de todo el personal.
+
+Recorre una sola vez el conjunto completo de marcaciones cargadas y marca, para
+cada empleado y día:
+- cantidad impar de marcaciones (LIBRO o RELOJ)
+- jornadas por debajo o por encima de los umbrales
+- días hábiles sin marcaciones que no están cubiertos por vacaciones o ausencias
+- diferencias grandes entre LIBRO y RELOJ
+
+Todo el cálculo se hace con operaciones agrupadas y vectorizadas; el resultado
+es una única tabla exportable (ver utils.conciliacion.exportar_tabla).
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.conciliacion import conciliar_libro_reloj
+
+# Umbrales por defecto (mismos criterios de color que el resumen por empleado)
+UMBRAL_JORNADA_CORTA = 7.5
+UMBRAL_JORNADA_LARGA = 8.5
+UMBRAL_DIFERENCIA = 1.0
+
+ETIQUETAS_ANOMALIAS = {
+    'marcas_impares': 'Marcaciones impares',
+    'jornada_corta': 'Jornada corta',
+    'jornada_larga': 'Jornada larga',
+    'sin_marcaciones': 'Sin marcaciones',
+    'diferencia_grande': 'Diferencia LIBRO/RELOJ',
+}
+
+COLUMNAS_REPORTE = [
+    'id_empleado', 'fecha', 'horas_libro', 'horas_reloj', 'diferencia',
+    'marcas_libro', 'marcas_reloj',
+] + list(ETIQUETAS_ANOMALIAS) + ['anomalias']
+
+
+def expandir_periodos(df: pd.DataFrame, col_persona: str, col_desde: str, col_hasta: str,
+                      hasta_inclusive: bool = True, mapa_ids: dict = None) -> pd.DataFrame:
+    """
+    Expande períodos (desde/hasta) en una fila por persona y día, sin bucles.
+
+    Args:
+        df: DataFrame con los períodos (vacaciones, ausencias, ...)
+        col_persona: Columna con el nombre o ID de la persona
+        col_desde: Columna con la fecha de inicio
+        col_hasta: Columna con la fecha de fin
+        hasta_inclusive: False si la fecha de fin no forma parte del período
+            (ej: 'Fecha regreso' de vacaciones)
+        mapa_ids: Diccionario opcional nombre -> id_empleado; si el nombre no está
+            en el mapa se conserva tal cual
+
+    Returns:
+        DataFrame con columnas 'id_empleado' y 'fecha' (date)
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['id_empleado', 'fecha'])
+
+    desde = pd.to_datetime(df[col_desde], errors='coerce').dt.normalize()
+    hasta = pd.to_datetime(df[col_hasta], errors='coerce').dt.normalize()
+    if not hasta_inclusive:
+        hasta = hasta - pd.Timedelta(days=1)
+
+    validos = (desde.notna() & hasta.notna() & (hasta >= desde)).to_numpy()
+    personas = df[col_persona].to_numpy()[validos]
+    desde = desde.to_numpy()[validos]
+    dias = ((hasta.to_numpy()[validos] - desde) // np.timedelta64(1, 'D')).astype(np.int64) + 1
+
+    if mapa_ids:
+        personas = np.array([mapa_ids.get(p, p) for p in personas], dtype=object)
+
+    repeticiones = np.repeat(np.arange(len(dias)), dias)
+    inicio_grupo = np.repeat(np.cumsum(dias) - dias, dias)
+    desplazamiento = np.arange(repeticiones.size) - inicio_grupo
+    fechas = desde[repeticiones] + desplazamiento.astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'id_empleado': personas[repeticiones].astype(str),
+        'fecha': pd.DatetimeIndex(fechas).date,
+    }).drop_duplicates(ignore_index=True)
+
+
+def generar_reporte_anomalias(df_registros: pd.DataFrame, jornada: pd.DataFrame = None,
+                              cobertura: pd.DataFrame = None, feriados=None,
+                              umbral_corta: float = UMBRAL_JORNADA_CORTA,
+                              umbral_larga: float = UMBRAL_JORNADA_LARGA,
+                              umbral_diferencia: float = UMBRAL_DIFERENCIA,
+                              solo_anomalias: bool = True) -> pd.DataFrame:
+    """
+    Genera el reporte de anomalías para todos los empleados y días cargados.
+
+    El rango de días hábiles de cada empleado va desde su primera hasta su
+    última marcación, para no marcar como faltantes los días previos al ingreso
+    o posteriores al egreso.
+
+    Args:
+        df_registros: Marcaciones con 'id_empleado', 'fecha_hora' y 'tipo'
+        jornada: Jornada ya calculada (calcular_jornada); se calcula si no se pasa
+        cobertura: DataFrame ('id_empleado', 'fecha') de días cubiertos por
+            vacaciones o ausencias de día completo (ver expandir_periodos)
+        feriados: Fechas no laborables adicionales a los fines de semana
+        umbral_corta: Horas por debajo de las cuales la jornada es corta
+        umbral_larga: Horas por encima de las cuales la jornada es larga
+        umbral_diferencia: Diferencia absoluta LIBRO - RELOJ considerada grande
+        solo_anomalias: Si es True se devuelven solo los días con alguna anomalía
+
+    Returns:
+        DataFrame con las columnas de COLUMNAS_REPORTE ordenado por empleado y fecha
+    """
+    tabla = conciliar_libro_reloj(df_registros, jornada=jornada)
+    if tabla.empty:
+        return pd.DataFrame(columns=COLUMNAS_REPORTE)
+
+    # Grilla de días hábiles por empleado (primera a última marcación)
+    fechas_dt = pd.to_datetime(tabla['fecha'])
+    rangos = fechas_dt.groupby(tabla['id_empleado']).agg(['min', 'max'])
+    feriados_np = np.array(
+        sorted({pd.Timestamp(f).date() for f in (feriados or [])}), dtype='datetime64[D]'
+    )
+    dias = ((rangos['max'] - rangos['min']).dt.days + 1).to_numpy()
+    empleados = np.repeat(rangos.index.to_numpy(), dias)
+    inicio_grupo = np.repeat(np.cumsum(dias) - dias, dias)
+    desplazamiento = np.arange(empleados.size) - inicio_grupo
+    grilla = (np.repeat(rangos['min'].to_numpy().astype('datetime64[D]'), dias)
+              + desplazamiento.astype('timedelta64[D]'))
+    habiles = np.is_busday(grilla, holidays=feriados_np)
+
+    indice = pd.MultiIndex.from_arrays(
+        [empleados[habiles], pd.DatetimeIndex(grilla[habiles]).date],
+        names=['id_empleado', 'fecha'],
+    )
+    tabla = tabla.set_index(['id_empleado', 'fecha'])
+    tabla = tabla.reindex(tabla.index.union(indice))
+    tabla[['horas_libro', 'horas_reloj']] = tabla[['horas_libro', 'horas_reloj']].fillna(0.0)
+    tabla[['marcas_libro', 'marcas_reloj']] = tabla[['marcas_libro', 'marcas_reloj']].fillna(0).astype(np.int64)
+    tabla = tabla.reset_index()
+
+    claves = pd.MultiIndex.from_frame(tabla[['id_empleado', 'fecha']])
+    habil = claves.isin(indice)
+
+    cubierto = np.zeros(len(tabla), dtype=bool)
+    if cobertura is not None and not cobertura.empty:
+        cobertura_idx = pd.MultiIndex.from_arrays(
+            [cobertura['id_empleado'].astype(str), pd.to_datetime(cobertura['fecha']).dt.date]
+        )
+        cubierto = claves.isin(cobertura_idx)
+
+    # Horas de referencia: RELOJ si existe, si no LIBRO
+    horas = np.where(tabla['horas_reloj'] > 0, tabla['horas_reloj'], tabla['horas_libro'])
+    total_marcas = tabla['marcas_libro'].to_numpy() + tabla['marcas_reloj'].to_numpy()
+
+    tabla['marcas_impares'] = (tabla['marcas_libro'] % 2 != 0) | (tabla['marcas_reloj'] % 2 != 0)
+    tabla['jornada_corta'] = (horas > 0) & (horas < umbral_corta)
+    tabla['jornada_larga'] = horas > umbral_larga
+    tabla['sin_marcaciones'] = habil & (total_marcas == 0) & ~cubierto
+    tabla['diferencia_grande'] = tabla['diferencia'].abs().to_numpy() > umbral_diferencia
+
+    banderas = tabla[list(ETIQUETAS_ANOMALIAS)].to_numpy()
+    etiquetas = np.array(list(ETIQUETAS_ANOMALIAS.values()), dtype=object)
+    texto = pd.Series('', index=tabla.index, dtype=object)
+    for i, etiqueta in enumerate(etiquetas):
+        texto = texto.where(~banderas[:, i], texto + np.where(texto == '', '', ', ') + etiqueta)
+    tabla['anomalias'] = texto
+
+    if solo_anomalias:
+        tabla = tabla[banderas.any(axis=1)]
+
+    return (tabla.sort_values(['id_empleado', 'fecha'], kind='mergesort')
+            .reset_index(drop=True)[COLUMNAS_REPORTE])
+
+
+def resumen_anomalias(reporte: pd.DataFrame) -> pd.DataFrame:
+    """Cuenta las anomalías de cada tipo por empleado."""
+    if reporte is None or reporte.empty:
+        return pd.DataFrame(columns=['id_empleado'] + list(ETIQUETAS_ANOMALIAS))
+    return (reporte.groupby('id_empleado')[list(ETIQUETAS_ANOMALIAS)]
+            .sum()
+            .astype(np.int64)
+            .reset_index())
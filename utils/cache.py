@@ -0,0 +1,553 @@
+"""
+Caché del proceso organizada en espacios con nombre.
+
+Cada espacio tiene su límite de bytes y de entradas, un TTL y desalojo LRU.
+Por encima de todos hay un techo global (variable CACHE_MAX_MB) que se hace
+cumplir desalojando la entrada usada hace más tiempo entre todos los espacios:
+
+    @cacheado("drive.csv", max_mb=128, guardar_si=bool)
+    def download_csv_file(file_id): ...
+
+    invalidar("drive.csv")                          # todo el espacio
+    invalidar("drive.csv", clave=("abc",))          # una entrada
+    invalidar("calendario", lambda clave: ...)      # las que cumplan el predicado
+
+Los espacios 'fijos' guardan recursos (clientes, el planificador), no datos:
+no se desalojan ni cuentan para el techo.
+
+Los espacios 'compartidos' usan además el nivel compartido entre procesos
+(utils.cache_backend, activado con CACHE_BACKEND): si falta en memoria se
+busca ahí antes de calcular, un solo proceso calcula cada clave a la vez y
+las invalidaciones llegan a los demás procesos en REVISAR_GENERACION_CADA.
+
+Los fallos de caché de las funciones decoradas se informan a la
+instrumentación (marcar_miss) y cada espacio lleva aciertos, fallos,
+desalojos y bytes, que se exportan junto con las métricas de las etapas.
+"""
+
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from utils.cache_backend import BackendCache, crear_backend
+from utils.instrumentacion import lineas_prometheus, marcar_miss
+
+MB = 1024 * 1024
+TECHO_POR_DEFECTO_MB = 512
+# Límite de memoria de todas las cachés de datos del proceso
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", TECHO_POR_DEFECTO_MB))
+PREFIJO_METRICAS = "gestor_cache"
+# Con nivel compartido: cada cuánto se revisa si otro proceso invalidó un espacio
+REVISAR_GENERACION_CADA = 1.0
+# Máximo que se espera a que otro proceso termine un cálculo que reservó
+ESPERA_CALCULO_COMPARTIDO = 60
+INTERVALO_ESPERA = 0.1
+
+_FALTA = object()
+_TODAS = object()
+# Marca de último uso, común a todos los espacios (para el LRU global)
+_usos = itertools.count()
+
+
+def tamanio_bytes(valor: Any, _vistos: Optional[set] = None) -> int:
+    """
+    Estimación de la memoria que ocupa 'valor'.
+
+    DataFrames y Series con memory_usage(deep=True), arrays de numpy por
+    nbytes, bytes por su largo; contenedores y objetos recorriendo su
+    contenido (cada objeto se cuenta una sola vez).
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return len(valor) + sys.getsizeof(b"")
+    if isinstance(valor, (str, int, float, bool, type(None))):
+        return sys.getsizeof(valor)
+    uso = getattr(valor, "memory_usage", None)
+    if callable(uso):
+        try:
+            total = uso(deep=True)
+            return int(total.sum() if hasattr(total, "sum") else total)
+        except TypeError:
+            pass
+    nbytes = getattr(valor, "nbytes", None)
+    if isinstance(nbytes, int):
+        # Las vistas de numpy no son dueñas de sus datos pero los mantienen vivos
+        return max(nbytes, sys.getsizeof(valor))
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            tamanio_bytes(k, vistos) + tamanio_bytes(v, vistos) for k, v in valor.items()
+        )
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamanio_bytes(v, vistos) for v in valor)
+    atributos = getattr(valor, "__dict__", None)
+    if atributos is not None:
+        return sys.getsizeof(valor) + tamanio_bytes(atributos, vistos)
+    return sys.getsizeof(valor)
+
+
+def _congelar(valor: Any):
+    """Convierte un argumento en algo hasheable para usarlo como clave."""
+    if isinstance(valor, dict):
+        return tuple(sorted((_congelar(k), _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_congelar(v) for v in valor)
+    try:
+        hash(valor)
+    except TypeError:
+        return repr(valor)
+    return valor
+
+
+def clave_de(args: tuple, kwargs: dict) -> tuple:
+    """Clave de caché de una llamada: los argumentos posicionales y los nombrados, congelados."""
+    clave = tuple(_congelar(a) for a in args)
+    if kwargs:
+        clave += (tuple(sorted((k, _congelar(v)) for k, v in kwargs.items())),)
+    return clave
+
+
+def texto_clave(clave) -> str:
+    """Texto estable de una clave congelada, igual en todos los procesos (para el nivel compartido)."""
+    return repr(clave)
+
+
+class _Entrada:
+    __slots__ = ("valor", "bytes", "vence", "uso")
+
+    def __init__(self, valor, bytes_, vence):
+        self.valor = valor
+        self.bytes = bytes_
+        self.vence = vence
+        self.uso = next(_usos)
+
+
+class EspacioCache:
+    """
+    Un espacio de la caché: entradas en orden LRU con límites propios.
+
+    No se crea directamente: se obtiene con espacio() (o RegistroCache.espacio()).
+    """
+
+    def __init__(self, registro: "RegistroCache", nombre: str, max_bytes: Optional[int] = None,
+                 max_entradas: Optional[int] = None, ttl: Optional[float] = None, fijo: bool = False,
+                 compartido: bool = False):
+        self.registro = registro
+        self.nombre = nombre
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.fijo = fijo
+        # Los recursos (fijos) no se serializan: nunca van al nivel compartido
+        self.compartido = compartido and not fijo
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._calculando = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vencidas = 0
+        self.rechazadas = 0
+        self.aciertos_compartidos = 0
+        self._generacion = None
+        self._revisado = 0.0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        with self.registro.lock:
+            return self._leer(clave) is not _FALTA
+
+    # --- Lectura y escritura ---
+
+    def _leer(self, clave):
+        """Valor de 'clave' o _FALTA; descarta la entrada si venció. Requiere el lock."""
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return _FALTA
+        if entrada.vence is not None and entrada.vence <= time.monotonic():
+            self._quitar(clave)
+            self.vencidas += 1
+            return _FALTA
+        self._entradas.move_to_end(clave)
+        entrada.uso = next(_usos)
+        return entrada.valor
+
+    def obtener(self, clave, defecto=None):
+        """Valor guardado en 'clave' (o 'defecto'), contando el acierto o el fallo."""
+        backend = self._backend()
+        if backend is not None:
+            self._sincronizar(backend)
+        with self.registro.lock:
+            valor = self._leer(clave)
+            if valor is not _FALTA:
+                self.aciertos += 1
+                return valor
+        if backend is not None:
+            valor = self._de_backend(backend, clave)
+            if valor is not _FALTA:
+                return valor
+        with self.registro.lock:
+            self.fallos += 1
+        return defecto
+
+    def guardar(self, clave, valor, ttl: Optional[float] = None) -> bool:
+        """
+        Guarda 'valor' (también en el nivel compartido si el espacio lo usa) y
+        desaloja lo que haga falta para respetar los límites.
+
+        Devuelve False si no se guardó en ningún nivel (el valor solo ya supera
+        los límites).
+        """
+        guardado = self._guardar_local(clave, valor, ttl)
+        backend = self._backend()
+        if backend is not None:
+            ttl = self.ttl if ttl is None else ttl
+            guardado = backend.guardar(self.nombre, texto_clave(clave), clave, valor, ttl) or guardado
+        return guardado
+
+    def _guardar_local(self, clave, valor, ttl: Optional[float] = None) -> bool:
+        tamanio = tamanio_bytes(valor)
+        ttl = self.ttl if ttl is None else ttl
+        vence = None if ttl is None else time.monotonic() + ttl
+        with self.registro.lock:
+            if not self.fijo and tamanio > min(self.max_bytes or tamanio, self.registro.techo_bytes):
+                self.rechazadas += 1
+                self._quitar(clave)
+                return False
+            self._quitar(clave)
+            self._entradas[clave] = _Entrada(valor, tamanio, vence)
+            self.bytes += tamanio
+            if not self.fijo:
+                self.registro._bytes += tamanio
+            self._purgar_vencidas()
+            self._ajustar()
+            self.registro._ajustar_techo()
+            return True
+
+    def obtener_o_calcular(self, clave, calcular: Callable[[], Any],
+                           guardar_si: Optional[Callable[[Any], bool]] = None):
+        """
+        Valor de 'clave'; si falta lo calcula (una sola vez aunque lo pidan
+        varios hilos, o varios procesos si el espacio es compartido) y lo
+        guarda si cumple 'guardar_si'.
+        """
+        backend = self._backend()
+        if backend is not None:
+            self._sincronizar(backend)
+        with self.registro.lock:
+            valor = self._leer(clave)
+            if valor is not _FALTA:
+                self.aciertos += 1
+                return valor
+        with self._bloqueo_calculo(clave):
+            with self.registro.lock:
+                valor = self._leer(clave)
+                if valor is not _FALTA:
+                    # Lo calculó otro hilo mientras esperábamos
+                    self.aciertos += 1
+                    return valor
+            reservada = False
+            if backend is not None:
+                texto = texto_clave(clave)
+                valor = self._de_backend(backend, clave)
+                if valor is not _FALTA:
+                    return valor
+                reservada = backend.reservar(self.nombre, texto, ESPERA_CALCULO_COMPARTIDO)
+                if not reservada:
+                    valor = self._esperar_otro_proceso(backend, clave, texto)
+                    if valor is not _FALTA:
+                        return valor
+            with self.registro.lock:
+                self.fallos += 1
+            marcar_miss()
+            try:
+                valor = calcular()
+                if guardar_si is None or guardar_si(valor):
+                    self.guardar(clave, valor)
+            finally:
+                if reservada:
+                    backend.liberar(self.nombre, texto)
+            return valor
+
+    # --- Nivel compartido ---
+
+    def _backend(self) -> Optional[BackendCache]:
+        return self.registro.backend if self.compartido else None
+
+    def _sincronizar(self, backend: BackendCache) -> None:
+        """Descarta la copia en memoria si otro proceso invalidó el espacio."""
+        ahora = time.monotonic()
+        if ahora - self._revisado < REVISAR_GENERACION_CADA:
+            return
+        self._revisado = ahora
+        generacion = backend.generacion(self.nombre)
+        with self.registro.lock:
+            if self._generacion is not None and generacion != self._generacion:
+                for clave in list(self._entradas):
+                    self._quitar(clave)
+            self._generacion = generacion
+
+    def _de_backend(self, backend: BackendCache, clave):
+        """Lee 'clave' del nivel compartido y la copia en memoria; _FALTA si no está."""
+        encontrado = backend.obtener(self.nombre, texto_clave(clave))
+        if encontrado is None:
+            return _FALTA
+        valor, restante = encontrado
+        self._guardar_local(clave, valor, restante)
+        with self.registro.lock:
+            self.aciertos += 1
+            self.aciertos_compartidos += 1
+        return valor
+
+    def _esperar_otro_proceso(self, backend: BackendCache, clave, texto: str):
+        """Espera el resultado del proceso que reservó la clave; _FALTA si no lo dejó."""
+        limite = time.monotonic() + ESPERA_CALCULO_COMPARTIDO
+        while time.monotonic() < limite:
+            time.sleep(INTERVALO_ESPERA)
+            valor = self._de_backend(backend, clave)
+            if valor is not _FALTA:
+                return valor
+            if not backend.reservada(self.nombre, texto):
+                # Terminó sin guardar (p. ej. un error): se calcula acá
+                return self._de_backend(backend, clave)
+        return _FALTA
+
+    @contextmanager
+    def _bloqueo_calculo(self, clave):
+        with self.registro.lock:
+            bloqueo, esperando = self._calculando.get(clave, (None, 0))
+            if bloqueo is None:
+                bloqueo = threading.Lock()
+            self._calculando[clave] = (bloqueo, esperando + 1)
+        try:
+            with bloqueo:
+                yield
+        finally:
+            with self.registro.lock:
+                bloqueo, esperando = self._calculando[clave]
+                if esperando == 1:
+                    del self._calculando[clave]
+                else:
+                    self._calculando[clave] = (bloqueo, esperando - 1)
+
+    # --- Desalojo e invalidación ---
+
+    def _quitar(self, clave) -> bool:
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return False
+        self.bytes -= entrada.bytes
+        if not self.fijo:
+            self.registro._bytes -= entrada.bytes
+        return True
+
+    def _desalojar_lru(self) -> None:
+        clave = next(iter(self._entradas))
+        self._quitar(clave)
+        self.desalojos += 1
+
+    def _purgar_vencidas(self) -> None:
+        ahora = time.monotonic()
+        for clave in [c for c, e in self._entradas.items() if e.vence is not None and e.vence <= ahora]:
+            self._quitar(clave)
+            self.vencidas += 1
+
+    def _ajustar(self) -> None:
+        """Desaloja las entradas menos usadas hasta respetar los límites del espacio."""
+        if self.fijo:
+            return
+        while self._entradas and (
+            (self.max_entradas is not None and len(self._entradas) > self.max_entradas)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self._desalojar_lru()
+
+    def invalidar(self, clave=_TODAS, predicado: Optional[Callable[[Any], bool]] = None) -> int:
+        """
+        Quita entradas del espacio: todas, una clave o las que cumplan el
+        predicado (que recibe la clave). Devuelve cuántas quitó.
+        """
+        with self.registro.lock:
+            if predicado is not None:
+                claves = [c for c in self._entradas if predicado(c)]
+            elif clave is _TODAS:
+                claves = list(self._entradas)
+            else:
+                claves = [clave]
+            quitadas = sum(self._quitar(c) for c in claves)
+        backend = self._backend()
+        if backend is not None:
+            if predicado is not None:
+                textos = [t for t, objeto in backend.claves(self.nombre) if objeto is not None and predicado(objeto)]
+                quitadas = max(quitadas, backend.invalidar(self.nombre, textos))
+            elif clave is _TODAS:
+                quitadas = max(quitadas, backend.invalidar(self.nombre))
+            else:
+                quitadas = max(quitadas, backend.invalidar(self.nombre, [texto_clave(clave)]))
+            # La invalidación avanzó la generación: no descartar lo que se guarde desde ahora
+            self._generacion = backend.generacion(self.nombre)
+            self._revisado = time.monotonic()
+        return quitadas
+
+    def estadisticas(self) -> dict:
+        with self.registro.lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+                "fijo": self.fijo,
+                "compartido": self.compartido,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "vencidas": self.vencidas,
+                "rechazadas": self.rechazadas,
+                "aciertos_compartidos": self.aciertos_compartidos,
+            }
+
+
+class RegistroCache:
+    """
+    Conjunto de espacios que comparten el techo global de bytes y, si hay,
+    el nivel compartido entre procesos ('backend').
+    """
+
+    def __init__(self, techo_bytes: Optional[int] = None, backend: Optional[BackendCache] = None):
+        self.techo_bytes = int(CACHE_MAX_MB * MB) if techo_bytes is None else techo_bytes
+        self.backend = backend
+        self.lock = threading.RLock()
+        self.desalojos_techo = 0
+        self._bytes = 0
+        self._espacios = {}
+
+    @property
+    def bytes(self) -> int:
+        """Bytes ocupados por los espacios de datos (los fijos no cuentan)."""
+        return self._bytes
+
+    def espacio(self, nombre: str, max_mb: Optional[float] = None, max_entradas: Optional[int] = None,
+                ttl: Optional[float] = None, fijo: bool = False, compartido: bool = False) -> EspacioCache:
+        """
+        Devuelve el espacio 'nombre', creándolo con estos límites si no existe.
+
+        Args:
+            max_mb: Límite de memoria del espacio (None: solo el techo global)
+            max_entradas: Cantidad máxima de entradas
+            ttl: Segundos de validez de cada entrada (None: sin vencimiento)
+            fijo: Guarda recursos que no se desalojan ni cuentan para el techo
+            compartido: Usa también el nivel compartido entre procesos (si hay);
+                los valores tienen que poder serializarse con pickle
+        """
+        with self.lock:
+            existente = self._espacios.get(nombre)
+            if existente is not None:
+                return existente
+            max_bytes = None if max_mb is None else int(max_mb * MB)
+            nuevo = EspacioCache(self, nombre, max_bytes, max_entradas, ttl, fijo, compartido)
+            self._espacios[nombre] = nuevo
+            return nuevo
+
+    def espacios(self) -> dict:
+        with self.lock:
+            return dict(self._espacios)
+
+    def _ajustar_techo(self) -> None:
+        """Desaloja la entrada usada hace más tiempo (de cualquier espacio) mientras se supere el techo."""
+        while self._bytes > self.techo_bytes:
+            candidatos = [e for e in self._espacios.values() if not e.fijo and e._entradas]
+            if not candidatos:
+                return
+            victima = min(candidatos, key=lambda e: next(iter(e._entradas.values())).uso)
+            victima._desalojar_lru()
+            self.desalojos_techo += 1
+
+    def invalidar(self, nombre: str, clave=_TODAS, predicado: Optional[Callable[[Any], bool]] = None) -> int:
+        """Invalida entradas del espacio 'nombre' (ver EspacioCache.invalidar); 0 si no existe."""
+        with self.lock:
+            espacio_ = self._espacios.get(nombre)
+        return 0 if espacio_ is None else espacio_.invalidar(clave, predicado)
+
+    def estadisticas(self) -> dict:
+        """Estadísticas de cada espacio, por nombre."""
+        return {nombre: e.estadisticas() for nombre, e in sorted(self.espacios().items())}
+
+
+_registro = RegistroCache(backend=crear_backend())
+
+
+def registro() -> RegistroCache:
+    """Registro de cachés del proceso."""
+    return _registro
+
+
+def espacio(nombre: str, max_mb: Optional[float] = None, max_entradas: Optional[int] = None,
+            ttl: Optional[float] = None, fijo: bool = False, compartido: bool = False) -> EspacioCache:
+    """Espacio 'nombre' del registro del proceso (ver RegistroCache.espacio)."""
+    return _registro.espacio(nombre, max_mb, max_entradas, ttl, fijo, compartido)
+
+
+def invalidar(nombre: str, clave=_TODAS, predicado: Optional[Callable[[Any], bool]] = None) -> int:
+    """Invalida entradas del espacio 'nombre' del registro del proceso."""
+    return _registro.invalidar(nombre, clave, predicado)
+
+
+def estadisticas() -> dict:
+    """Estadísticas de cada espacio del registro del proceso."""
+    return _registro.estadisticas()
+
+
+def cacheado(nombre: str, max_mb: Optional[float] = None, max_entradas: Optional[int] = None,
+             ttl: Optional[float] = None, fijo: bool = False, compartido: bool = False,
+             guardar_si: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorador: guarda el resultado de la función en el espacio 'nombre', con
+    los argumentos de la llamada como clave.
+
+    Usar un espacio por función. 'guardar_si' decide si un resultado se
+    guarda (p. ej. bool, para no guardar los vacíos que devuelven los errores).
+    La función decorada expone 'espacio' y 'clear()' (invalida todo el espacio).
+    """
+    def decorador(funcion):
+        espacio_ = espacio(nombre, max_mb, max_entradas, ttl, fijo, compartido)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return espacio_.obtener_o_calcular(
+                clave_de(args, kwargs), lambda: funcion(*args, **kwargs), guardar_si
+            )
+
+        envoltura.espacio = espacio_
+        envoltura.clear = espacio_.invalidar
+        return envoltura
+    return decorador
+
+
+def texto_prometheus(datos: Optional[dict] = None) -> str:
+    """Estadísticas de los espacios en el formato de texto de Prometheus."""
+    datos = estadisticas() if datos is None else datos
+    metricas = [
+        ("bytes", "gauge", "Memoria estimada ocupada por el espacio", "bytes"),
+        ("entradas", "gauge", "Entradas guardadas en el espacio", "entradas"),
+        ("aciertos_total", "counter", "Lecturas resueltas desde la caché", "aciertos"),
+        ("aciertos_compartidos_total", "counter", "Aciertos resueltos desde el nivel compartido entre procesos",
+         "aciertos_compartidos"),
+        ("fallos_total", "counter", "Lecturas que tuvieron que calcular el valor", "fallos"),
+        ("desalojos_total", "counter", "Entradas desalojadas por LRU o por el techo de memoria", "desalojos"),
+        ("vencidas_total", "counter", "Entradas descartadas por TTL", "vencidas"),
+    ]
+    return "\n".join(lineas_prometheus(PREFIJO_METRICAS, metricas, datos, "espacio")) + "\n"
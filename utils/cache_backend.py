@@ -0,0 +1,312 @@
+"""
+Nivel compartido de la caché, fuera del proceso.
+
+Con varios procesos de Streamlit detrás de un proxy, cada uno tiene su propia
+caché en memoria (utils.cache). Un backend compartido agrega un segundo nivel
+que ven todos: lo que descarga o calcula un proceso lo leen los demás, una
+reserva evita que varios calculen lo mismo a la vez, y una generación por
+espacio propaga las invalidaciones.
+
+El backend incluido usa un archivo SQLite local (modo WAL, sin servicios
+externos). Se elige con variables de entorno:
+
+    CACHE_BACKEND=sqlite
+    CACHE_COMPARTIDA_RUTA=data/cache/compartida.db
+    CACHE_COMPARTIDA_MAX_MB=1024
+
+Otros backends se registran en BACKENDS con una clase que implemente la
+interfaz de BackendCache.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Optional
+
+RUTA_POR_DEFECTO = os.path.join("data", "cache", "compartida.db")
+MAX_MB_POR_DEFECTO = 1024
+# Espera de SQLite cuando otro proceso tiene la base bloqueada
+ESPERA_BLOQUEO_MS = 5000
+# Solo se actualiza la marca de uso (LRU) si es más vieja que esto, para no
+# convertir cada lectura en una escritura
+ACTUALIZAR_USO_CADA = 60
+
+
+class BackendCache(ABC):
+    """
+    Interfaz de un nivel compartido. 'clave' es el texto estable de la clave
+    (mismo valor en todos los procesos) y 'objeto' la clave original.
+    Los errores de almacenamiento no se propagan: se tratan como fallos.
+    """
+
+    @abstractmethod
+    def obtener(self, espacio: str, clave: str) -> Optional[tuple]:
+        """(valor, segundos de validez restantes o None) o None si no está."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def guardar(self, espacio: str, clave: str, objeto: Any, valor: Any, ttl: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidar(self, espacio: str, claves: Optional[Iterable[str]] = None) -> int:
+        """Quita las claves (o todo el espacio) y avanza la generación del espacio."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def claves(self, espacio: str) -> list:
+        """Lista de (clave, objeto) guardadas en el espacio."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def generacion(self, espacio: str) -> int:
+        """Contador que cambia con cada invalidación del espacio."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def reservar(self, espacio: str, clave: str, segundos: float) -> bool:
+        """Toma la reserva de cálculo de la clave; False si la tiene otro."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def liberar(self, espacio: str, clave: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reservada(self, espacio: str, clave: str) -> bool:
+        raise NotImplementedError
+
+
+class BackendSQLite(BackendCache):
+    """Nivel compartido en un archivo SQLite, seguro entre procesos y con límite de tamaño."""
+
+    def __init__(self, ruta: Optional[str] = None, max_mb: Optional[float] = None):
+        self.ruta = ruta or RUTA_POR_DEFECTO
+        self.max_bytes = int((MAX_MB_POR_DEFECTO if max_mb is None else max_mb) * 1024 * 1024)
+        self._local = threading.local()
+        self._errores_informados = set()
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (sqlite3 no comparte conexiones entre hilos)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directorio = os.path.dirname(self.ruta)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            conn = sqlite3.connect(self.ruta, timeout=ESPERA_BLOQUEO_MS / 1000, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout = {ESPERA_BLOQUEO_MS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entradas (
+                    espacio TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    objeto BLOB,
+                    valor BLOB NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    vence REAL,
+                    usado REAL NOT NULL,
+                    PRIMARY KEY (espacio, clave)
+                );
+                CREATE INDEX IF NOT EXISTS idx_cache_entradas_usado ON cache_entradas (usado);
+                CREATE TABLE IF NOT EXISTS cache_generaciones (
+                    espacio TEXT PRIMARY KEY,
+                    generacion INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_reservas (
+                    espacio TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    hasta REAL NOT NULL,
+                    pid INTEGER NOT NULL,
+                    PRIMARY KEY (espacio, clave)
+                );
+            """)
+            self._local.conn = conn
+        return conn
+
+    def _informar(self, operacion: str, error: Exception) -> None:
+        # Un mensaje por tipo de fallo: sin nivel compartido la app sigue con la caché local
+        if operacion not in self._errores_informados:
+            self._errores_informados.add(operacion)
+            print(f"Error en la caché compartida ({operacion}, {self.ruta}): {error}")
+
+    def obtener(self, espacio, clave):
+        try:
+            conn = self._conexion()
+            fila = conn.execute(
+                "SELECT valor, vence, usado FROM cache_entradas WHERE espacio = ? AND clave = ?",
+                (espacio, clave),
+            ).fetchone()
+            if fila is None:
+                return None
+            valor, vence, usado = fila
+            ahora = time.time()
+            if vence is not None and vence <= ahora:
+                conn.execute("DELETE FROM cache_entradas WHERE espacio = ? AND clave = ? AND vence <= ?",
+                             (espacio, clave, ahora))
+                return None
+            if ahora - usado > ACTUALIZAR_USO_CADA:
+                conn.execute("UPDATE cache_entradas SET usado = ? WHERE espacio = ? AND clave = ?",
+                             (ahora, espacio, clave))
+            return pickle.loads(valor), (None if vence is None else vence - ahora)
+        except (sqlite3.Error, OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            self._informar("lectura", e)
+            return None
+
+    def guardar(self, espacio, clave, objeto, valor, ttl=None):
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            objeto_datos = pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            self._informar("serialización", e)
+            return False
+        if len(datos) > self.max_bytes:
+            return False
+        ahora = time.time()
+        try:
+            conn = self._conexion()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entradas (espacio, clave, objeto, valor, bytes, vence, usado) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (espacio, clave, objeto_datos, datos, len(datos), None if ttl is None else ahora + ttl, ahora),
+                )
+                self._ajustar(conn, ahora)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return True
+        except sqlite3.Error as e:
+            self._informar("escritura", e)
+            return False
+
+    def _ajustar(self, conn: sqlite3.Connection, ahora: float) -> None:
+        """Quita las vencidas y las menos usadas hasta respetar el tamaño máximo."""
+        conn.execute("DELETE FROM cache_entradas WHERE vence IS NOT NULL AND vence <= ?", (ahora,))
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM cache_entradas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        sobrante = total - self.max_bytes
+        for espacio, clave, bytes_ in conn.execute(
+            "SELECT espacio, clave, bytes FROM cache_entradas ORDER BY usado"
+        ).fetchall():
+            conn.execute("DELETE FROM cache_entradas WHERE espacio = ? AND clave = ?", (espacio, clave))
+            sobrante -= bytes_
+            if sobrante <= 0:
+                break
+
+    def invalidar(self, espacio, claves=None):
+        try:
+            conn = self._conexion()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if claves is None:
+                    quitadas = conn.execute("DELETE FROM cache_entradas WHERE espacio = ?", (espacio,)).rowcount
+                else:
+                    quitadas = sum(
+                        conn.execute("DELETE FROM cache_entradas WHERE espacio = ? AND clave = ?",
+                                     (espacio, clave)).rowcount
+                        for clave in claves
+                    )
+                conn.execute(
+                    "INSERT INTO cache_generaciones (espacio, generacion) VALUES (?, 1) "
+                    "ON CONFLICT(espacio) DO UPDATE SET generacion = generacion + 1",
+                    (espacio,),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return quitadas
+        except sqlite3.Error as e:
+            self._informar("invalidación", e)
+            return 0
+
+    def claves(self, espacio):
+        try:
+            filas = self._conexion().execute(
+                "SELECT clave, objeto FROM cache_entradas WHERE espacio = ?", (espacio,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._informar("lectura", e)
+            return []
+        return [(clave, pickle.loads(objeto) if objeto is not None else None) for clave, objeto in filas]
+
+    def generacion(self, espacio):
+        try:
+            fila = self._conexion().execute(
+                "SELECT generacion FROM cache_generaciones WHERE espacio = ?", (espacio,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._informar("lectura", e)
+            return 0
+        return fila[0] if fila else 0
+
+    def reservar(self, espacio, clave, segundos):
+        ahora = time.time()
+        try:
+            conn = self._conexion()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM cache_reservas WHERE espacio = ? AND clave = ? AND hasta <= ?",
+                             (espacio, clave, ahora))
+                tomada = conn.execute(
+                    "INSERT OR IGNORE INTO cache_reservas (espacio, clave, hasta, pid) VALUES (?, ?, ?, ?)",
+                    (espacio, clave, ahora + segundos, os.getpid()),
+                ).rowcount == 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return tomada
+        except sqlite3.Error as e:
+            # Sin reserva posible se calcula igual (como sin nivel compartido)
+            self._informar("reserva", e)
+            return True
+
+    def liberar(self, espacio, clave):
+        try:
+            self._conexion().execute(
+                "DELETE FROM cache_reservas WHERE espacio = ? AND clave = ? AND pid = ?",
+                (espacio, clave, os.getpid()),
+            )
+        except sqlite3.Error as e:
+            self._informar("reserva", e)
+
+    def reservada(self, espacio, clave):
+        try:
+            fila = self._conexion().execute(
+                "SELECT 1 FROM cache_reservas WHERE espacio = ? AND clave = ? AND hasta > ?",
+                (espacio, clave, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._informar("reserva", e)
+            return False
+        return fila is not None
+
+
+BACKENDS = {
+    "sqlite": BackendSQLite,
+}
+
+
+def crear_backend(nombre: Optional[str] = None) -> Optional[BackendCache]:
+    """
+    Backend compartido configurado en CACHE_BACKEND (o 'nombre'); None si no
+    hay ninguno (un solo proceso, solo caché en memoria).
+    """
+    nombre = (os.getenv("CACHE_BACKEND", "") if nombre is None else nombre).strip().lower()
+    if not nombre or nombre in ("no", "ninguno", "memoria"):
+        return None
+    if nombre not in BACKENDS:
+        raise ValueError(f"CACHE_BACKEND desconocido: '{nombre}' (opciones: {', '.join(BACKENDS)})")
+    if nombre == "sqlite":
+        max_mb = os.getenv("CACHE_COMPARTIDA_MAX_MB")
+        return BackendSQLite(os.getenv("CACHE_COMPARTIDA_RUTA") or None,
+                             float(max_mb) if max_mb else None)
+    return BACKENDS[nombre]()
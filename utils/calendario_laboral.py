@@ -0,0 +1,151 @@
+"""
+Calendario laboral precalculado.
+
+Guarda, para una ventana de varios años, un arreglo booleano de días hábiles
+(lunes a viernes que no son feriados nacionales ni manuales) y su suma
+acumulada. Con eso la cantidad de días hábiles de cualquier rango se responde
+en O(1) y las páginas (Horarios, Vacaciones, Calendario) pueden pedir máscaras
+NumPy para sus propias fechas sin recorrerlas una por una.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+MOTIVO_FERIADO_MANUAL = 'Feriado/Asueto'
+
+
+def _a_dia(fecha) -> np.datetime64:
+    """Convierte date/datetime/str/Timestamp a datetime64[D]."""
+    return np.datetime64(pd.Timestamp(fecha).date(), 'D')
+
+
+def parsear_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna de fechas a datetime64 sin recorrerla fila por fila.
+
+    Las fechas guardadas en la base son ISO (YYYY-MM-DD); 'dayfirst' invertiría
+    día y mes en ese formato, así que solo se usa para el resto (DD/MM/YYYY).
+    Los valores inválidos quedan como NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = serie.astype(str).str.strip()
+    fechas = pd.to_datetime(texto, errors='coerce', format='%Y-%m-%d')
+    if fechas.isna().any():
+        fechas = fechas.fillna(pd.to_datetime(texto.where(fechas.isna()), errors='coerce',
+                                              dayfirst=True, format='mixed'))
+    return fechas
+
+
+def feriados_manuales_dict(df_manual: pd.DataFrame) -> dict:
+    """
+    Convierte la tabla de feriados manuales en un diccionario {YYYY-MM-DD: motivo}.
+
+    Acepta las columnas 'Motivo' o 'Motivo (Opcional)'; las filas con fecha
+    inválida se descartan.
+    """
+    if df_manual is None or df_manual.empty or 'Fecha' not in df_manual.columns:
+        return {}
+
+    df_manual = df_manual.rename(columns=lambda c: str(c).strip())
+    fechas = parsear_fechas(df_manual['Fecha'])
+    motivo_col = next((c for c in ('Motivo (Opcional)', 'Motivo') if c in df_manual.columns), None)
+    if motivo_col:
+        motivos = df_manual[motivo_col].where(df_manual[motivo_col].notna(), '').astype(str).str.strip()
+        motivos = motivos.where(motivos != '', MOTIVO_FERIADO_MANUAL)
+    else:
+        motivos = pd.Series(MOTIVO_FERIADO_MANUAL, index=df_manual.index)
+
+    validas = fechas.notna()
+    return dict(zip(fechas[validas].dt.strftime('%Y-%m-%d'), motivos[validas]))
+
+
+class CalendarioLaboral:
+    """
+    Calendario de días hábiles para el rango [inicio, fin] (ambos inclusive).
+
+    Atributos:
+        fechas: Arreglo datetime64[D] con todos los días de la ventana
+        habiles: Máscara booleana de días hábiles
+        feriados: Máscara booleana de días feriados (incluye fines de semana)
+    """
+
+    def __init__(self, inicio, fin, feriados: dict = None):
+        self.inicio = _a_dia(inicio)
+        self.fin = _a_dia(fin)
+        if self.fin < self.inicio:
+            raise ValueError("La fecha de fin del calendario es anterior a la de inicio")
+
+        feriados = dict(feriados or {})
+        claves = pd.to_datetime(pd.Series(list(feriados), dtype=object), errors='coerce')
+        validas = claves.notna().to_numpy()
+        self.nombres_feriados = dict(zip(
+            claves[validas].dt.strftime('%Y-%m-%d'),
+            np.array(list(feriados.values()), dtype=object)[validas],
+        ))
+        self.fechas = np.arange(self.inicio, self.fin + 1, dtype='datetime64[D]')
+
+        dias_feriados = np.array(claves[validas].values, dtype='datetime64[D]')
+        self.feriados = np.isin(self.fechas, dias_feriados)
+        self.habiles = np.is_busday(self.fechas) & ~self.feriados
+        # _acumulado[i] = días hábiles antes de la posición i
+        self._acumulado = np.concatenate(([0], np.cumsum(self.habiles, dtype=np.int64)))
+
+    def cubre(self, desde, hasta=None) -> bool:
+        """Indica si el rango está completamente dentro de la ventana."""
+        hasta = desde if hasta is None else hasta
+        return self.inicio <= _a_dia(desde) and _a_dia(hasta) <= self.fin
+
+    def _posicion(self, fecha) -> int:
+        return int((_a_dia(fecha) - self.inicio).astype(np.int64))
+
+    def contar_habiles(self, desde, hasta) -> int:
+        """Días hábiles entre desde y hasta (ambos inclusive), en O(1)."""
+        if _a_dia(hasta) < _a_dia(desde):
+            return 0
+        if not self.cubre(desde, hasta):
+            raise ValueError("El rango consultado está fuera del calendario")
+        return int(self._acumulado[self._posicion(hasta) + 1] - self._acumulado[self._posicion(desde)])
+
+    def es_habil(self, fecha) -> bool:
+        """Indica si una fecha es día hábil."""
+        return bool(self.mascara_habiles([fecha])[0])
+
+    def _indices(self, fechas):
+        dias = np.asarray(pd.to_datetime(pd.Series(list(fechas), dtype=object)).values, dtype='datetime64[D]')
+        posiciones = (dias - self.inicio).astype(np.int64)
+        dentro = (posiciones >= 0) & (posiciones < len(self.fechas))
+        return dias, np.where(dentro, posiciones, 0), dentro
+
+    def mascara_habiles(self, fechas) -> np.ndarray:
+        """
+        Máscara booleana de días hábiles alineada con `fechas`.
+
+        Las fechas fuera de la ventana se evalúan solo por día de la semana.
+        """
+        dias, posiciones, dentro = self._indices(fechas)
+        if not len(dias):
+            return np.zeros(0, dtype=bool)
+        return np.where(dentro, self.habiles[posiciones], np.is_busday(dias))
+
+    def mascara_feriados(self, fechas) -> np.ndarray:
+        """Máscara booleana de feriados alineada con `fechas`."""
+        dias, posiciones, dentro = self._indices(fechas)
+        if not len(dias):
+            return np.zeros(0, dtype=bool)
+        return dentro & self.feriados[posiciones]
+
+    def feriados_en_rango(self, desde, hasta) -> list:
+        """Lista ordenada de tuplas (YYYY-MM-DD, nombre) de feriados en el rango."""
+        i = max(self._posicion(desde), 0)
+        j = min(self._posicion(hasta), len(self.fechas) - 1)
+        if j < i:
+            return []
+        dias = self.fechas[i:j + 1][self.feriados[i:j + 1]]
+        return [(str(f), self.nombres_feriados[str(f)]) for f in np.datetime_as_string(dias, unit='D')]
+
+    def dias_feriados(self) -> list:
+        """Fechas (date) de todos los feriados de la ventana."""
+        return [d.astype(date) for d in self.fechas[self.feriados]]
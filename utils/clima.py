@@ -0,0 +1,63 @@
+"""
+Descarga del clima actual y del pronóstico extendido (OpenWeatherMap).
+
+Funciones sin dependencias de Streamlit para poder ejecutarlas desde el hilo
+de refresco en segundo plano (ver utils.refresco).
+"""
+
+from datetime import datetime
+from typing import Optional
+
+import requests
+
+OPENWEATHER_URL = "https://api.openweathermap.org"
+LAT_MALARGUE = -35.4755
+LON_MALARGUE = -69.5843
+TIMEOUT_SEGUNDOS = 10
+
+
+def descargar_clima(api_key: str, lat: float = LAT_MALARGUE, lon: float = LON_MALARGUE,
+                    base_url: Optional[str] = None, timeout: float = TIMEOUT_SEGUNDOS) -> Optional[dict]:
+    """Clima actual; None si la API no responde 200."""
+    response = requests.get(
+        f"{base_url or OPENWEATHER_URL}/data/2.5/weather",
+        params={'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric', 'lang': 'es'},
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    return {
+        'temperature': data['main']['temp'],
+        'feels_like': data['main']['feels_like'],
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'wind_speed': data['wind']['speed'] * 3.6,  # Convertir a km/h
+        'description': data['weather'][0]['description'].capitalize(),
+        'visibility': data.get('visibility', 10000),  # En metros
+        'timestamp': datetime.now().timestamp()
+    }
+
+
+def descargar_pronostico(api_key: str, lat: float = LAT_MALARGUE, lon: float = LON_MALARGUE,
+                         base_url: Optional[str] = None, timeout: float = TIMEOUT_SEGUNDOS,
+                         dias: int = 5) -> Optional[list]:
+    """Pronóstico diario de los próximos `dias` días; None si la API no responde 200."""
+    response = requests.get(
+        f"{base_url or OPENWEATHER_URL}/data/3.0/onecall",
+        params={
+            'lat': lat,
+            'lon': lon,
+            'exclude': 'current,minutely,hourly,alerts',
+            'appid': api_key,
+            'units': 'metric',
+            'lang': 'es'
+        },
+        timeout=timeout,
+    )
+    if response.status_code != 200:
+        return None
+    pronostico = response.json().get('daily', [])[:dias]
+    for dia in pronostico:
+        dia['_cached_at'] = datetime.now().timestamp()
+    return pronostico
@@ -0,0 +1,127 @@
+"""
+Conciliación vectorizada LIBRO vs RELOJ.
+
+Calcula, para todos los empleados y días a la vez, las horas registradas en el
+libro de horarios y en el reloj, la diferencia LIBRO - RELOJ, la paridad de las
+marcaciones de cada origen y la clasificación usada en el gráfico de
+diferencias. El resultado se puede exportar como reporte (CSV o Parquet).
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from utils.jornadas import calcular_jornada
+
+TIPOS_CONCILIACION = ['LIBRO', 'RELOJ']
+
+COLUMNAS_CONCILIACION = [
+    'id_empleado', 'fecha', 'horas_libro', 'horas_reloj', 'diferencia',
+    'marcas_libro', 'marcas_reloj', 'impar_libro', 'impar_reloj',
+    'tiene_impares', 'tipo_diferencia',
+]
+
+
+def _normalizar_marcas(df_registros: pd.DataFrame) -> pd.DataFrame:
+    """Devuelve id_empleado (str), fecha (date) y tipo de cada marcación válida."""
+    fecha_hora = pd.to_datetime(df_registros['fecha_hora'], errors='coerce')
+    marcas = pd.DataFrame({
+        'id_empleado': df_registros['id_empleado'].astype(str),
+        'fecha': fecha_hora.dt.normalize().dt.date,
+        'tipo': df_registros['tipo'],
+    })
+    return marcas[fecha_hora.notna()]
+
+
+def conciliar_libro_reloj(df_registros: pd.DataFrame, jornada: pd.DataFrame = None,
+                          fechas=None) -> pd.DataFrame:
+    """
+    Concilia las horas de LIBRO y RELOJ por empleado y día.
+
+    Args:
+        df_registros: Marcaciones con 'id_empleado', 'fecha_hora' y 'tipo'
+        jornada: Jornada ya calculada (calcular_jornada); se calcula si no se pasa
+        fechas: Fechas a incluir para cada empleado aunque no tengan registros
+
+    Returns:
+        DataFrame con las columnas de COLUMNAS_CONCILIACION. La diferencia solo
+        se calcula cuando ambos orígenes tienen horas (> 0). 'tipo_diferencia'
+        vale 'Registros impares', 'Positiva', 'Negativa' o 'Cero'.
+    """
+    if df_registros is None or df_registros.empty:
+        return pd.DataFrame(columns=COLUMNAS_CONCILIACION)
+    if jornada is None:
+        jornada = calcular_jornada(df_registros)
+
+    claves = ['id_empleado', 'fecha']
+    jornada_tipos = jornada[jornada['tipo'].isin(TIPOS_CONCILIACION)]
+    horas = (
+        jornada_tipos.assign(id_empleado=jornada_tipos['id_empleado'].astype(str))
+        .groupby(claves + ['tipo'])['duracion_horas'].sum()
+        .unstack('tipo')
+        .reindex(columns=TIPOS_CONCILIACION)
+    )
+    horas.columns = ['horas_libro', 'horas_reloj']
+
+    marcas = _normalizar_marcas(df_registros)
+    conteos = (
+        marcas.groupby(claves + ['tipo']).size()
+        .unstack('tipo', fill_value=0)
+        .reindex(columns=TIPOS_CONCILIACION, fill_value=0)
+    )
+    conteos.columns = ['marcas_libro', 'marcas_reloj']
+
+    tabla = conteos.join(horas, how='outer')
+    if fechas is not None:
+        empleados = tabla.index.get_level_values('id_empleado').unique()
+        completo = pd.MultiIndex.from_product(
+            [empleados, sorted(set(fechas))], names=claves
+        )
+        tabla = tabla.reindex(completo)
+
+    tabla[['horas_libro', 'horas_reloj']] = tabla[['horas_libro', 'horas_reloj']].fillna(0.0)
+    tabla[['marcas_libro', 'marcas_reloj']] = (
+        tabla[['marcas_libro', 'marcas_reloj']].fillna(0).astype(np.int64)
+    )
+
+    libro = tabla['horas_libro'].to_numpy()
+    reloj = tabla['horas_reloj'].to_numpy()
+    ambos = (libro > 0) & (reloj > 0)
+    tabla['diferencia'] = np.where(ambos, libro - reloj, np.nan)
+    tabla['impar_libro'] = tabla['marcas_libro'].to_numpy() % 2 != 0
+    tabla['impar_reloj'] = tabla['marcas_reloj'].to_numpy() % 2 != 0
+    tabla['tiene_impares'] = tabla['impar_libro'] | tabla['impar_reloj']
+
+    diferencia = tabla['diferencia'].to_numpy()
+    tabla['tipo_diferencia'] = np.select(
+        [tabla['tiene_impares'].to_numpy(), diferencia > 0, diferencia < 0],
+        ['Registros impares', 'Positiva', 'Negativa'],
+        default='Cero',
+    )
+
+    return tabla.reset_index()[COLUMNAS_CONCILIACION]
+
+
+def exportar_tabla(df: pd.DataFrame, formato: str = 'csv') -> bytes:
+    """
+    Serializa un reporte para descarga.
+
+    Args:
+        df: DataFrame a exportar
+        formato: 'csv' (UTF-8 con BOM, compatible con Excel) o 'parquet'
+
+    Returns:
+        Contenido del archivo en bytes
+    """
+    if formato == 'csv':
+        return df.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
+    if formato == 'parquet':
+        buf = BytesIO()
+        # Las fechas 'date' se guardan como datetime64 para compatibilidad con Parquet
+        df_out = df.copy()
+        if 'fecha' in df_out.columns:
+            df_out['fecha'] = pd.to_datetime(df_out['fecha'])
+        df_out.to_parquet(buf, index=False)
+        return buf.getvalue()
+    raise ValueError(f"Formato de exportación no soportado: '{formato}'")
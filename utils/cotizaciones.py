@@ -0,0 +1,250 @@
+"""
+Obtención concurrente de cotizaciones (dólar oficial, blue y euro).
+
+Todas las consultas HTTP de la página de bienvenida se lanzan en paralelo con
+una única sesión de requests (conexiones keep-alive), de modo que la latencia
+en frío es la de una sola ida y vuelta. Los días anteriores a hoy no cambian:
+se guardan en SQLite (tabla 'cotizaciones_historicas') y no se vuelven a
+pedir. Solo se consulta siempre el día de hoy.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from database import get_connection
+from database_schema import get_create_table_sql
+
+URL_HISTORICO = "https://api.argentinadatos.com/v1/cotizaciones/dolares/{casa}/{fecha}"
+URL_DOLARAPI = "https://dolarapi.com/v1/dolares/{casa}"
+URL_EURO = "https://dolarapi.com/v1/cotizaciones/eur"
+
+CASAS = ('oficial', 'blue')
+DIAS_HISTORICO = 7
+TIMEOUT_SEGUNDOS = 10
+# Un día sin cotización (fin de semana, feriado) solo se da por cerrado después
+# de este margen, por si la API publica el dato con demora
+DIAS_MARGEN_SIN_DATOS = 2
+
+_lock_session = threading.Lock()
+_session = None
+
+
+def get_session() -> requests.Session:
+    """Sesión HTTP compartida (keep-alive) para todas las consultas de cotizaciones."""
+    global _session
+    with _lock_session:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _format_date(dt) -> str:
+    return dt.strftime('%Y/%m/%d')
+
+
+def _normalizar_respuesta(data):
+    """La API puede devolver una lista (se usa el primer elemento) o un diccionario."""
+    if isinstance(data, list):
+        return data[0] if data else None
+    if isinstance(data, dict):
+        return data
+    return None
+
+
+def _asegurar_tabla(conn) -> None:
+    conn.execute(get_create_table_sql("cotizaciones_historicas"))
+
+
+def leer_historico_guardado(casas, fechas, db_path: Optional[str] = None) -> dict:
+    """
+    Días ya guardados: {(casa, 'YYYY-MM-DD'): dato o None}.
+
+    None significa que ese día se consultó y no hubo cotización.
+    """
+    fechas = [f.isoformat() for f in fechas]
+    if not fechas:
+        return {}
+    conn = get_connection(db_path)
+    try:
+        _asegurar_tabla(conn)
+        marcas = ",".join("?" * len(fechas))
+        filas = conn.execute(
+            f'SELECT "Casa", "Fecha", "Datos" FROM cotizaciones_historicas WHERE "Fecha" IN ({marcas})',
+            fechas,
+        ).fetchall()
+        return {(fila[0], fila[1]): (json.loads(fila[2]) if fila[2] else None)
+                for fila in filas if fila[0] in casas}
+    finally:
+        conn.close()
+
+
+def guardar_historico(registros: dict, db_path: Optional[str] = None) -> None:
+    """Guarda días cerrados {(casa, 'YYYY-MM-DD'): dato o None} en una transacción."""
+    if not registros:
+        return
+    conn = get_connection(db_path)
+    try:
+        _asegurar_tabla(conn)
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO cotizaciones_historicas ("Casa", "Fecha", "Datos") VALUES (?, ?, ?)',
+                [(casa, fecha, json.dumps(dato) if dato is not None else None)
+                 for (casa, fecha), dato in registros.items()],
+            )
+    finally:
+        conn.close()
+
+
+def _consultar(session, url, timeout):
+    """GET que devuelve (status, json o None). Los errores de red se propagan."""
+    response = session.get(url, timeout=timeout)
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, response.json()
+
+
+def obtener_cotizaciones(hoy: Optional[date] = None, dias: int = DIAS_HISTORICO,
+                         db_path: Optional[str] = None, session: Optional[requests.Session] = None,
+                         timeout: float = TIMEOUT_SEGUNDOS, urls: Optional[dict] = None) -> dict:
+    """
+    Descarga en paralelo las cotizaciones actuales y el histórico faltante.
+
+    Args:
+        hoy: Fecha de referencia (por defecto, hoy)
+        dias: Cantidad de días de histórico (incluye hoy)
+        db_path: Base donde se guardan los días cerrados
+        session: Sesión HTTP (por defecto, la compartida)
+        timeout: Timeout de cada consulta en segundos
+        urls: Reemplazo opcional de URL_HISTORICO / URL_DOLARAPI / URL_EURO
+            (claves 'historico', 'dolarapi', 'euro'), útil para pruebas
+
+    Returns:
+        {'actual': {casa: dato}, 'euro': dato, 'historico': {casa: [datos]},
+         'errores': [mensajes]}
+    """
+    hoy = hoy or datetime.now().date()
+    session = session or get_session()
+    urls = {'historico': URL_HISTORICO, 'dolarapi': URL_DOLARAPI, 'euro': URL_EURO, **(urls or {})}
+
+    fechas = [hoy - timedelta(days=i) for i in range(dias)]
+    guardado = leer_historico_guardado(CASAS, fechas[1:], db_path)
+
+    tareas = {('actual', casa): urls['dolarapi'].format(casa=casa) for casa in CASAS}
+    tareas[('euro', None)] = urls['euro']
+    for casa in CASAS:
+        for fecha in fechas:
+            if fecha != hoy and (casa, fecha.isoformat()) in guardado:
+                continue
+            tareas[('historico', casa, fecha)] = urls['historico'].format(casa=casa, fecha=_format_date(fecha))
+
+    def _ejecutar(item):
+        clave, url = item
+        try:
+            return clave, _consultar(session, url, timeout), None
+        except (requests.RequestException, ValueError) as e:
+            return clave, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(tareas))) as pool:
+        respuestas = list(pool.map(_ejecutar, tareas.items()))
+
+    resultado = {'actual': {}, 'euro': None, 'historico': {casa: [] for casa in CASAS}, 'errores': []}
+    nuevos_cerrados = {}
+    por_dia = dict(guardado)
+
+    for clave, respuesta, error in respuestas:
+        if error is not None:
+            resultado['errores'].append(f"{clave[0]} {clave[1] or 'eur'}: {error}")
+            continue
+        status, data = respuesta
+        dato = _normalizar_respuesta(data) if status == 200 else None
+
+        if clave[0] in ('actual', 'euro'):
+            if dato is not None and 'fecha' not in dato:
+                dato['fecha'] = _format_date(hoy)
+            if clave[0] == 'actual':
+                resultado['actual'][clave[1]] = dato
+            else:
+                resultado['euro'] = dato
+            continue
+
+        _, casa, fecha = clave
+        if dato is not None and 'fecha' not in dato:
+            dato['fecha'] = _format_date(fecha)
+        por_dia[(casa, fecha.isoformat())] = dato
+        # Los días pasados son inmutables: se guardan si tienen dato o si ya
+        # pasó el margen para considerar que ese día no hubo cotización
+        if fecha < hoy and status in (200, 404):
+            if dato is not None or (hoy - fecha).days >= DIAS_MARGEN_SIN_DATOS:
+                nuevos_cerrados[(casa, fecha.isoformat())] = dato
+
+    guardar_historico(nuevos_cerrados, db_path)
+
+    for casa in CASAS:
+        datos = [por_dia.get((casa, f.isoformat())) for f in fechas]
+        resultado['historico'][casa] = sorted((d for d in datos if d), key=lambda x: x.get('fecha', ''))
+    return resultado
+
+
+def calcular_variacion(historico) -> float:
+    """Variación porcentual de la venta entre los dos registros más recientes."""
+    if len(historico) < 2:
+        return 0.0
+
+    historico_ordenado = sorted(historico, key=lambda x: x.get('fecha', ''), reverse=True)
+    valor_actual = historico_ordenado[0].get('venta', 0)
+    valor_anterior = historico_ordenado[1].get('venta', 0)
+    if valor_anterior == 0:
+        return 0.0
+    return ((valor_actual - valor_anterior) / valor_anterior) * 100
+
+
+def _norm_fecha(fecha_val):
+    """Normaliza una fecha a ISO (YYYY-MM-DD)."""
+    try:
+        return pd.to_datetime(str(fecha_val)).date().isoformat()
+    except Exception:
+        return None
+
+
+def armar_tipos_cambio(cotizaciones: dict) -> dict:
+    """Arma el diccionario que consume la página de bienvenida."""
+    ahora = datetime.now().timestamp()
+    hoy = _format_date(datetime.now())
+    salida = {}
+    for casa in CASAS:
+        actual = cotizaciones['actual'].get(casa)
+        historico = list(cotizaciones['historico'].get(casa, []))
+        # Agregar el dato actual al histórico si no está el día de hoy
+        if actual and historico and not any(str(d.get('fecha', '')).startswith(hoy) for d in historico):
+            historico.append(actual)
+        salida[casa] = {
+            'compra': actual.get('compra', 0) if actual else 0,
+            'venta': actual.get('venta', 0) if actual else 0,
+            'variacion': calcular_variacion(historico) if historico else 0,
+            'historico_compra': [d.get('compra', 0) for d in historico if 'compra' in d],
+            'historico_venta': [d.get('venta', 0) for d in historico if 'venta' in d],
+            'fechas': [f for f in (_norm_fecha(d.get('fecha')) for d in historico) if f],
+            'timestamp': ahora,
+        }
+
+    euro = cotizaciones.get('euro')
+    salida['euro'] = {
+        'compra': euro.get('compra', 0) if euro else 0,
+        'venta': euro.get('venta', 0) if euro else 0,
+        'variacion': 0,  # No mostramos variación para el euro
+        'historico_compra': [],
+        'historico_venta': [],
+        'fechas': [],
+        'timestamp': ahora,
+    }
+    return salida
@@ -1,21 +1,47 @@
-import requests
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
-@st.cache_data(ttl=86400)  # Cache por 24 horas
+from utils.cache import cacheado
+from utils.calendario_laboral import CalendarioLaboral, feriados_manuales_dict
+from utils.feriados_store import obtener_feriados, version_feriados
+
 def get_feriados_argentina(year):
-    """Obtiene los feriados de Argentina desde la API de Argentina Datos."""
-    try:
-        url = f"https://api.argentinadatos.com/v1/feriados/{year}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        # Retornamos un diccionario {fecha: nombre}
-        return {item['fecha']: item['nombre'] for item in data}
-    except Exception as e:
-        st.error(f"Error al obtener feriados para {year}: {e}")
-        return {}
+    """
+    Obtiene los feriados de Argentina ({fecha: nombre}) desde la copia local.
+
+    Nunca espera a la red: si el año no está descargado (o está vencido) se
+    actualiza en segundo plano desde la API de Argentina Datos
+    (ver utils.feriados_store).
+    """
+    return obtener_feriados(year)
+
+@cacheado("calendario_laboral", max_mb=32, max_entradas=16, ttl=86400, compartido=True)
+def obtener_calendario_laboral(anio_desde, anio_hasta, extra_feriados_dict=None, version=None):
+    """
+    Calendario laboral (ver utils.calendario_laboral) para los años indicados,
+    con feriados nacionales y los feriados extra {YYYY-MM-DD: motivo}.
+    `version` (version_feriados()) invalida el caché cuando se actualiza la
+    copia local de feriados; los feriados manuales son parte de la clave.
+    """
+    feriados_all = {}
+    for year in range(int(anio_desde), int(anio_hasta) + 1):
+        feriados_all.update(get_feriados_argentina(year))
+    if extra_feriados_dict:
+        feriados_all.update(extra_feriados_dict)
+    return CalendarioLaboral(f"{anio_desde}-01-01", f"{anio_hasta}-12-31", feriados_all)
+
+def calendario_laboral_sesion(*fechas):
+    """
+    Calendario laboral con los feriados manuales de la sesión.
+    Cubre desde el año anterior al actual hasta el siguiente, ampliado para
+    incluir las fechas indicadas.
+    """
+    anio_actual = datetime.now().year
+    anios = [anio_actual - 1, anio_actual + 1]
+    anios += [pd.Timestamp(f).year for f in fechas if f is not None and pd.notna(f)]
+    manuales = feriados_manuales_dict(st.session_state.get("df_feriados_manuales", pd.DataFrame()))
+    return obtener_calendario_laboral(min(anios), max(anios), manuales, version_feriados())
 
 def calcular_dias_habiles_y_feriados(fecha_inicio, fecha_fin, extra_feriados_dict=None):
     """
@@ -25,57 +51,21 @@ def calcular_dias_habiles_y_feriados(fecha_inicio, fecha_fin, extra_feriados_dic
     if fecha_fin < fecha_inicio:
         return 0, 0, []
 
-    # Generar rango de fechas
-    rango_fechas = pd.date_range(start=fecha_inicio, end=fecha_fin)
-    dias_corrido = len(rango_fechas)
-    
-    # Obtener feriados para los años involucrados
-    years = set([d.year for d in rango_fechas])
-    feriados_all = {}
-    for year in years:
-        feriados_all.update(get_feriados_argentina(year))
-    
-    # Sumar feriados manuales si existen
-    if extra_feriados_dict:
-        feriados_all.update(extra_feriados_dict)
-    
-    dias_habiles = 0
-    feriados_encontrados = [] # Lista de tuplas (fecha, nombre)
-    
-    for fecha in rango_fechas:
-        fecha_str = fecha.strftime('%Y-%m-%d')
-        # Es día hábil si es de lunes a viernes (0-4) y NO es feriado
-        if fecha.weekday() < 5:  # Lunes a Viernes
-            if fecha_str in feriados_all:
-                feriados_encontrados.append((fecha_str, feriados_all[fecha_str]))
-            else:
-                dias_habiles += 1
-        elif fecha_str in feriados_all:
-            # Aunque sea fin de semana, informamos que es feriado si está en la lista
-            # pero no afecta al conteo de días hábiles ya que ya estaba excluido por ser finde
-            feriados_encontrados.append((fecha_str, feriados_all[fecha_str]))
-                
+    dias_corrido = (pd.Timestamp(fecha_fin).normalize() - pd.Timestamp(fecha_inicio).normalize()).days + 1
+    calendario = obtener_calendario_laboral(
+        pd.Timestamp(fecha_inicio).year, pd.Timestamp(fecha_fin).year, extra_feriados_dict,
+        version_feriados()
+    )
+    # Los feriados de fin de semana se informan pero no afectan el conteo de hábiles
+    dias_habiles = calendario.contar_habiles(fecha_inicio, fecha_fin)
+    feriados_encontrados = calendario.feriados_en_rango(fecha_inicio, fecha_fin)
+
     return dias_corrido, dias_habiles, feriados_encontrados
 
 def format_duracion_licencia(fecha_inicio, fecha_fin):
     """Formatea un mensaje con los detalles de la duración."""
     # Obtener feriados manuales del session_state como diccionario {fecha: motivo}
-    manual_holidays_dict = {}
-    df_manual = st.session_state.get("df_feriados_manuales", pd.DataFrame())
-    if not df_manual.empty and 'Fecha' in df_manual.columns:
-        # Normalizar nombres de columnas
-        df_manual.columns = [str(c).strip() for c in df_manual.columns]
-        motivo_col = 'Motivo (Opcional)' if 'Motivo (Opcional)' in df_manual.columns else ('Motivo' if 'Motivo' in df_manual.columns else None)
-        
-        for _, row in df_manual.iterrows():
-            try:
-                fecha_dt = pd.to_datetime(row['Fecha'], errors='coerce', dayfirst=True, format='mixed')
-                if pd.notna(fecha_dt):
-                    f_str = fecha_dt.strftime('%Y-%m-%d')
-                    motivo = str(row[motivo_col]) if motivo_col and pd.notna(row[motivo_col]) else "Feriado/Asueto"
-                    manual_holidays_dict[f_str] = motivo
-            except:
-                continue
+    manual_holidays_dict = feriados_manuales_dict(st.session_state.get("df_feriados_manuales", pd.DataFrame()))
 
     corrido, habiles, feriados = calcular_dias_habiles_y_feriados(fecha_inicio, fecha_fin, extra_feriados_dict=manual_holidays_dict)
     
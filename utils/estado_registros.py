@@ -0,0 +1,134 @@
+"""
+Estado (en curso / próxima / transcurrida) de licencias y ausencias.
+
+Las páginas de Vacaciones y Ausencias muestran todos los registros históricos.
+En lugar de recalcular filtros y estilos fila por fila en cada rerun, acá se
+arma una vista con columnas calculadas de forma vectorizada:
+
+- 'Estado': en curso, próxima o transcurrida respecto de hoy
+- 'Etiqueta': texto de cada registro para el selector de edición, con su
+  identificador (el índice del DataFrame, que es el rowid de SQLite)
+
+La vista se guarda en la sesión junto con la versión de la tabla y la fecha,
+y el color de cada fila se aplica con una sola llamada al Styler.
+"""
+
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.calendario_laboral import parsear_fechas
+from utils.eventos_calendario import version_tabla
+
+ESTADO_EN_CURSO = 'En curso'
+ESTADO_PROXIMA = 'Próxima'
+ESTADO_TRANSCURRIDA = 'Transcurrida'
+
+COLORES_ESTADO = {
+    ESTADO_EN_CURSO: '#1E90FF',      # azul
+    ESTADO_TRANSCURRIDA: '#696969',  # gris
+    ESTADO_PROXIMA: '#FF8C00',       # naranja
+}
+
+# Columnas auxiliares que no se muestran en la tabla
+COLUMNAS_OCULTAS = ['Etiqueta', 'Último día de vacaciones']
+
+
+def calcular_estado(inicio: pd.Series, fin: pd.Series, hoy) -> np.ndarray:
+    """
+    Estado de cada registro según su primer y último día (ambos inclusive).
+
+    Los registros con fechas inválidas quedan con estado vacío.
+    """
+    hoy = pd.Timestamp(hoy).normalize()
+    return np.select(
+        [(inicio <= hoy) & (fin >= hoy), fin < hoy, inicio > hoy],
+        [ESTADO_EN_CURSO, ESTADO_TRANSCURRIDA, ESTADO_PROXIMA],
+        default='',
+    )
+
+
+def _fecha_o_vacio(fechas: pd.Series) -> pd.Series:
+    return fechas.dt.strftime('%d/%m/%Y').fillna('')
+
+
+def _texto_o_vacio(serie: pd.Series) -> pd.Series:
+    return serie.astype(str).where(serie.notna(), '')
+
+
+def _identificadores(vista: pd.DataFrame) -> pd.Series:
+    return pd.Series('#' + vista.index.astype(str), index=vista.index)
+
+
+def preparar_vacaciones(df: pd.DataFrame, hoy) -> pd.DataFrame:
+    """Vista de Vacaciones con fechas parseadas, último día, estado y etiqueta."""
+    vista = df.copy()
+    vista['Fecha inicio'] = parsear_fechas(vista['Fecha inicio'])
+    vista['Fecha regreso'] = parsear_fechas(vista['Fecha regreso'])
+    # La fecha de regreso es el día que vuelve al trabajo; el último día es el anterior
+    vista['Último día de vacaciones'] = vista['Fecha regreso'] - pd.Timedelta(days=1)
+    vista['Estado'] = calcular_estado(vista['Fecha inicio'], vista['Último día de vacaciones'], hoy)
+    vista['Etiqueta'] = (
+        _identificadores(vista) + ': ' + _texto_o_vacio(vista['Apellido, Nombres'])
+        + ' - ' + _fecha_o_vacio(vista['Fecha inicio']) + ' (' + _texto_o_vacio(vista['Tipo']) + ')'
+    )
+    return vista
+
+
+def preparar_compensados(df: pd.DataFrame, hoy) -> pd.DataFrame:
+    """Vista de Ausencias con fechas parseadas, estado y etiqueta."""
+    vista = df.copy()
+    vista['Desde fecha'] = parsear_fechas(vista['Desde fecha'])
+    vista['Hasta fecha'] = parsear_fechas(vista['Hasta fecha'])
+    vista['Estado'] = calcular_estado(vista['Desde fecha'], vista['Hasta fecha'], hoy)
+    desde_hora = _texto_o_vacio(vista['Desde hora']) if 'Desde hora' in vista.columns else ''
+    vista['Etiqueta'] = (
+        _identificadores(vista) + ': ' + _texto_o_vacio(vista['Apellido, Nombres'])
+        + ' - ' + _fecha_o_vacio(vista['Desde fecha']) + ' ' + desde_hora
+    )
+    return vista
+
+
+def vista_en_cache(estado: dict, clave: str, df: pd.DataFrame, preparar, hoy: Optional[date] = None) -> pd.DataFrame:
+    """
+    Devuelve la vista preparada de una tabla, recalculándola solo si cambió la
+    tabla o el día.
+
+    Args:
+        estado: Donde se guarda la vista (st.session_state)
+        clave: Nombre de la entrada en 'estado'
+        df: Tabla original de la sesión (no se modifica)
+        preparar: preparar_vacaciones o preparar_compensados
+        hoy: Fecha de referencia para el estado
+    """
+    hoy = hoy or date.today()
+    version = (version_tabla(df), hoy)
+    guardado = estado.get(clave)
+    if guardado is None or guardado[0] != version:
+        guardado = (version, preparar(df, hoy))
+        estado[clave] = guardado
+    return guardado[1]
+
+
+def contar_estados(vista: pd.DataFrame) -> dict:
+    """Cantidad de registros por estado."""
+    conteo = vista['Estado'].value_counts()
+    return {estado: int(conteo.get(estado, 0)) for estado in COLORES_ESTADO}
+
+
+def estilos_por_estado(df: pd.DataFrame, estados: pd.Series) -> pd.DataFrame:
+    """
+    Estilos CSS de toda la tabla (para Styler.apply con axis=None): cada fila
+    toma el color de su estado.
+    """
+    colores = estados.reindex(df.index).map(COLORES_ESTADO)
+    css = ('background-color: ' + colores).fillna('').to_numpy()
+    return pd.DataFrame(np.repeat(css[:, None], df.shape[1], axis=1), index=df.index, columns=df.columns)
+
+
+def estilar_por_estado(df: pd.DataFrame):
+    """Styler de la tabla coloreada por la columna 'Estado'."""
+    estados = df['Estado']
+    return df.style.apply(lambda datos: estilos_por_estado(datos, estados), axis=None)
@@ -0,0 +1,354 @@
+"""
+Armado de los eventos del Calendario Unificado.
+
+Cada fuente (tareas, licencias, ausencias, eventos, feriados manuales y
+cumpleaños) tiene su propio constructor vectorizado: las fechas se parsean y
+formatean por columna y solo al final se arman los diccionarios que consume
+streamlit-calendar. Las tablas de la sesión no se modifican.
+
+CacheEventos guarda los eventos de cada fuente junto con la versión de su
+tabla (una huella del contenido); al volver a abrir el calendario solo se
+recalculan las fuentes cuya tabla cambió, y la lista combinada se reutiliza
+si no cambió ninguna.
+
+IndiceEventos ordena la lista combinada por fecha de inicio para responder
+consultas por rango con búsqueda binaria: al componente del calendario solo se
+le envían los eventos de la ventana visible más un margen.
+"""
+
+from datetime import date, timedelta
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.calendario_laboral import feriados_manuales_dict, parsear_fechas
+from utils.fechas_personal import FechasPersonal
+
+COLOR_TAREA = '#FF6347'
+COLOR_LICENCIA = '#1E90FF'
+COLOR_AUSENCIA = '#32CD32'
+COLOR_EVENTO = '#DDA0DD'
+COLOR_FERIADO = '#FF4500'
+COLOR_CUMPLEANIOS = '#FFD700'
+
+# Orden en que se combinan las fuentes; los eventos de Google Calendar van
+# entre los feriados y los cumpleaños
+FUENTES = (
+    ('tareas', 'df_tareas'),
+    ('vacaciones', 'df_vacaciones'),
+    ('compensados', 'df_compensados'),
+    ('eventos', 'df_eventos'),
+    ('feriados', 'df_feriados_manuales'),
+)
+FUENTE_CUMPLEANIOS = ('cumpleanios', 'df_personal')
+
+# Días que se cargan antes y después del mes visible
+MARGEN_DIAS = 31
+
+
+def version_tabla(df: Optional[pd.DataFrame]):
+    """
+    Huella del contenido de una tabla (columnas, índice y valores).
+
+    Se calcula con hash_pandas_object, sin bucles en Python, y cambia ante
+    cualquier alta, baja o edición aunque se modifique el DataFrame en su lugar.
+    """
+    if df is None or df.empty:
+        return (0, ())
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Columnas con tipos mezclados que no se pueden hashear directamente
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    # Ponderar por posición para que el orden de las filas también cuente
+    pesos = np.arange(1, len(hashes) + 1, dtype=np.uint64)
+    return (len(df), tuple(map(str, df.columns)), int((hashes.to_numpy() * pesos).sum()))
+
+
+def _fechas_iso(fechas: pd.Series) -> pd.Series:
+    return fechas.dt.strftime('%Y-%m-%d')
+
+
+def _texto_hora(serie: pd.Series) -> pd.Series:
+    """Hora como texto: las columnas datetime se formatean HH:MM:SS y el resto se deja como está."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime('%H:%M:%S')
+    return serie.astype(str)
+
+
+def _tiene_hora(df: pd.DataFrame, columna: str) -> pd.Series:
+    if columna not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df[columna].notna() & (df[columna].astype(str).str.strip() != '')
+
+
+def eventos_tareas(df: pd.DataFrame) -> list:
+    """Tareas no finalizadas con fecha límite válida."""
+    if df is None or df.empty or 'Fecha límite' not in df.columns:
+        return []
+    fechas = parsear_fechas(df['Fecha límite'])
+    activas = fechas.notna()
+    if 'Estado' in df.columns:
+        activas &= df['Estado'] != 'Finalizada'
+    df = df[activas]
+    if df.empty:
+        return []
+
+    titulos = ('Tarea: ' + df['Título Tarea'].astype(str)).tolist()
+    inicios = _fechas_iso(fechas[activas]).tolist()
+    estados = df['Estado'].tolist() if 'Estado' in df.columns else ['Pendiente'] * len(df)
+    responsables = df['Responsable'].tolist() if 'Responsable' in df.columns else ['No asignado'] * len(df)
+    return [
+        {
+            "title": titulo,
+            "start": inicio,
+            "color": COLOR_TAREA,
+            "extendedProps": {"tipo": "tarea", "estado": estado, "responsable": responsable},
+        }
+        for titulo, inicio, estado, responsable in zip(titulos, inicios, estados, responsables)
+    ]
+
+
+def eventos_vacaciones(df: pd.DataFrame) -> list:
+    """Licencias; el evento termina el día de regreso (fin exclusivo)."""
+    if df is None or df.empty or not {'Fecha inicio', 'Fecha regreso'} <= set(df.columns):
+        return []
+    inicio = parsear_fechas(df['Fecha inicio'])
+    regreso = parsear_fechas(df['Fecha regreso'])
+    validas = inicio.notna() & regreso.notna()
+    if not validas.any():
+        return []
+
+    inicio, regreso = inicio[validas], regreso[validas]
+    personas = df.loc[validas, 'Apellido, Nombres'].astype(str)
+    titulos = ('Licencia: ' + personas).tolist()
+    descripciones = (
+        'Período de licencia de ' + personas + ' desde ' + inicio.dt.strftime('%d/%m/%Y')
+        + ' hasta ' + regreso.dt.strftime('%d/%m/%Y')
+    ).tolist()
+    return [
+        {
+            "title": titulo,
+            "start": desde,
+            "end": hasta,
+            "color": COLOR_LICENCIA,
+            "extendedProps": {"tipo": "vacaciones", "persona": persona, "descripcion": descripcion},
+        }
+        for titulo, desde, hasta, persona, descripcion in zip(
+            titulos, _fechas_iso(inicio).tolist(), _fechas_iso(regreso).tolist(),
+            df.loc[validas, 'Apellido, Nombres'].tolist(), descripciones,
+        )
+    ]
+
+
+def _eventos_con_horario(df: pd.DataFrame, titulos: pd.Series, color: str) -> list:
+    """
+    Eventos con 'Desde fecha'/'Hasta fecha' y horas opcionales.
+
+    Con ambas horas el evento va de fecha+hora a fecha+hora; si falta alguna es
+    un evento de todo el día y el fin se corre un día (fin exclusivo).
+    """
+    if df is None or df.empty or not {'Desde fecha', 'Hasta fecha'} <= set(df.columns):
+        return []
+    desde = parsear_fechas(df['Desde fecha'])
+    hasta = parsear_fechas(df['Hasta fecha'])
+    validas = desde.notna() & hasta.notna()
+    if not validas.any():
+        return []
+
+    con_hora = (_tiene_hora(df, 'Desde hora') & _tiene_hora(df, 'Hasta hora'))[validas]
+    desde, hasta = desde[validas], hasta[validas]
+    inicio = _fechas_iso(desde)
+    fin = _fechas_iso(hasta + pd.Timedelta(days=1))
+    if con_hora.any():
+        sub = df.loc[con_hora[con_hora].index]
+        inicio[con_hora] = _fechas_iso(desde[con_hora]) + 'T' + _texto_hora(sub['Desde hora'])
+        fin[con_hora] = _fechas_iso(hasta[con_hora]) + 'T' + _texto_hora(sub['Hasta hora'])
+
+    return [
+        {"title": titulo, "start": start, "end": end, "color": color}
+        for titulo, start, end in zip(titulos[validas].tolist(), inicio.tolist(), fin.tolist())
+    ]
+
+
+def eventos_compensados(df: pd.DataFrame) -> list:
+    """Ausencias (compensatorios y otros tipos)."""
+    if df is None or df.empty or 'Apellido, Nombres' not in df.columns:
+        return []
+    tipos = df['Tipo'].astype(str) if 'Tipo' in df.columns else pd.Series('Ausencia', index=df.index)
+    return _eventos_con_horario(df, tipos + ': ' + df['Apellido, Nombres'].astype(str), COLOR_AUSENCIA)
+
+
+def eventos_eventos(df: pd.DataFrame) -> list:
+    """Eventos cargados en la pestaña de eventos."""
+    if df is None or df.empty or 'Nombre del Evento' not in df.columns:
+        return []
+    return _eventos_con_horario(df, 'Evento: ' + df['Nombre del Evento'].astype(str), COLOR_EVENTO)
+
+
+def eventos_feriados(df: pd.DataFrame) -> list:
+    """Feriados y asuetos cargados a mano."""
+    return [
+        {"title": f"🎌 Feriado: {motivo}", "start": fecha, "color": COLOR_FERIADO}
+        for fecha, motivo in feriados_manuales_dict(df).items()
+    ]
+
+
+def eventos_cumpleanios(df, hoy: Optional[date] = None) -> list:
+    """
+    Cumpleaños del año en curso (y del siguiente si ya es diciembre).
+
+    Args:
+        df: Tabla de personal o un FechasPersonal ya construido
+    """
+    fechas_personal = df if isinstance(df, FechasPersonal) else FechasPersonal(df)
+    if not len(fechas_personal):
+        return []
+    hoy = hoy or date.today()
+    anios = [hoy.year, hoy.year + 1] if hoy.month == 12 else [hoy.year]
+    por_anio = [fechas_personal.fechas_en_anio('nacimiento', anio) for anio in anios]
+    if por_anio[0].empty:
+        return []
+
+    # Por persona: el de este año y, a continuación, el del próximo
+    inicios = np.column_stack([_fechas_iso(t['fecha']).to_numpy() for t in por_anio]).ravel()
+    titulos = np.repeat(('🎂 Cumpleaños: ' + por_anio[0]['nombre']).to_numpy(), len(anios))
+    return [
+        {"title": titulo, "start": inicio, "color": COLOR_CUMPLEANIOS}
+        for titulo, inicio in zip(titulos.tolist(), inicios.tolist())
+    ]
+
+
+CONSTRUCTORES = {
+    'tareas': eventos_tareas,
+    'vacaciones': eventos_vacaciones,
+    'compensados': eventos_compensados,
+    'eventos': eventos_eventos,
+    'feriados': eventos_feriados,
+}
+
+
+def ventana_de_carga(ancla: date, margen_dias: int = MARGEN_DIAS) -> tuple:
+    """
+    Rango [desde, hasta] (ambos inclusive) de eventos a enviar al calendario.
+
+    Cubre el mes de la fecha ancla más un margen a cada lado, de modo que las
+    vistas de semana y día, y un paso de navegación, no queden vacías.
+    """
+    inicio_mes = ancla.replace(day=1)
+    fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return inicio_mes - timedelta(days=margen_dias), fin_mes + timedelta(days=margen_dias)
+
+
+class IndiceEventos:
+    """
+    Eventos ordenados por inicio para consultar por rango de fechas.
+
+    Los extremos se guardan como datetime64[D]; el fin es exclusivo (como en
+    FullCalendar). Una consulta hace una búsqueda binaria sobre los inicios y
+    solo revisa los eventos que empiezan dentro de la ventana, o antes de ella
+    hasta la duración máxima registrada.
+    """
+
+    def __init__(self, eventos: list):
+        inicios = np.array([e['start'][:10] for e in eventos], dtype='datetime64[D]')
+        fines = np.array([(e.get('end') or e['start'])[:10] for e in eventos], dtype='datetime64[D]')
+        # Sin fin, o con hora en el último día: el evento ocupa hasta ese día inclusive
+        con_hora = np.array([len(e.get('end') or e['start']) > 10 or not e.get('end') for e in eventos], dtype=bool)
+        fines = np.where(con_hora, fines + 1, fines)
+        fines = np.maximum(fines, inicios + 1)
+
+        orden = np.argsort(inicios, kind='stable')
+        self.eventos = [eventos[i] for i in orden]
+        self.inicios = inicios[orden]
+        self.fines = fines[orden]
+        self.duracion_maxima = (self.fines - self.inicios).max() if len(eventos) else np.timedelta64(1, 'D')
+
+    def __len__(self) -> int:
+        return len(self.eventos)
+
+    def en_rango(self, desde, hasta) -> list:
+        """Eventos que se superponen con [desde, hasta] (ambos inclusive), en orden de inicio."""
+        desde = np.datetime64(pd.Timestamp(desde).date(), 'D')
+        hasta = np.datetime64(pd.Timestamp(hasta).date(), 'D') + 1
+        primero = np.searchsorted(self.inicios, desde - self.duracion_maxima, side='left')
+        ultimo = np.searchsorted(self.inicios, hasta, side='left')
+        candidatos = np.arange(primero, ultimo)
+        candidatos = candidatos[self.fines[primero:ultimo] > desde]
+        return [self.eventos[i] for i in candidatos]
+
+
+class CacheEventos:
+    """
+    Eventos materializados por fuente, invalidados por la versión de cada tabla.
+
+    Se guarda una instancia por sesión (st.session_state); 'recalculos' cuenta
+    cuántas veces se reconstruyó cada fuente.
+    """
+
+    def __init__(self):
+        self._fuentes = {}
+        self._combinado = (None, [])
+        self._indice = (None, None)
+        self.recalculos = {}
+
+    def eventos_fuente(self, nombre: str, df: Optional[pd.DataFrame], constructor, extra=()) -> tuple:
+        """Devuelve (versión, eventos) de una fuente, recalculando solo si cambió su tabla."""
+        version = (version_tabla(df),) + tuple(extra)
+        guardado = self._fuentes.get(nombre)
+        if guardado is None or guardado[0] != version:
+            guardado = (version, constructor(df))
+            self._fuentes[nombre] = guardado
+            self.recalculos[nombre] = self.recalculos.get(nombre, 0) + 1
+        return guardado
+
+    def eventos(self, tablas: dict, google_events=None, version_google=None,
+                hoy: Optional[date] = None) -> list:
+        """
+        Lista combinada de eventos del calendario.
+
+        Args:
+            tablas: Diccionario con las tablas de la sesión (claves 'df_tareas',
+                'df_vacaciones', ...); puede ser st.session_state
+            google_events: Eventos de Google Calendar ya formateados
+            version_google: Marca que identifica a google_events (por ejemplo la
+                versión del feed y la ventana); si es None se usa su contenido
+            hoy: Fecha de referencia para los cumpleaños
+        """
+        hoy = hoy or date.today()
+        google_events = list(google_events or [])
+        if version_google is None:
+            version_google = (len(google_events), hash(tuple(
+                (e.get('title'), e.get('start'), e.get('end')) for e in google_events
+            )))
+
+        partes = []
+        for nombre, clave in FUENTES:
+            partes.append(self.eventos_fuente(nombre, tablas.get(clave), CONSTRUCTORES[nombre]))
+        nombre, clave = FUENTE_CUMPLEANIOS
+        # Los cumpleaños dependen además del año y de si ya es diciembre
+        cumpleanios = self.eventos_fuente(
+            nombre, tablas.get(clave), partial(eventos_cumpleanios, hoy=hoy),
+            extra=(hoy.year, hoy.month == 12),
+        )
+
+        versiones = tuple(v for v, _ in partes) + (version_google, cumpleanios[0])
+        if self._combinado[0] != versiones:
+            combinados = [evento for _, eventos in partes for evento in eventos]
+            combinados.extend(google_events)
+            combinados.extend(cumpleanios[1])
+            self._combinado = (versiones, combinados)
+        return self._combinado[1]
+
+    def indice(self, tablas: dict, hoy: Optional[date] = None) -> IndiceEventos:
+        """
+        Índice por fechas de los eventos de las tablas locales (sin Google
+        Calendar, que ya se consulta por ventana); se reconstruye solo si
+        cambió alguna fuente.
+        """
+        eventos = self.eventos(tablas, hoy=hoy)
+        if self._indice[0] is not eventos:
+            self._indice = (eventos, IndiceEventos(eventos))
+        return self._indice[1]
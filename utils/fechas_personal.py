@@ -0,0 +1,131 @@
+"""
+Fechas del personal (cumpleaños y aniversarios de ingreso).
+
+FechasPersonal parsea una sola vez las fechas de nacimiento y de ingreso de la
+tabla de personal y guarda mes, día y año de cada una. Las consultas ("quién
+cumple en los próximos N días", "fechas de cumpleaños de un año") se resuelven
+con ordinales de día del año y aritmética sobre arreglos NumPy, sin recorrer
+las filas.
+
+Regla del 29 de febrero: en años no bisiestos se toma el 1 de marzo. Con los
+ordinales sale sola: 31 + 29 = 60, que en un año no bisiesto es el 1/03.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.calendario_laboral import parsear_fechas
+
+COLUMNAS_FECHAS = {
+    'nacimiento': 'Fecha de nacimiento',
+    'ingreso': 'Fecha ingreso PAO',
+}
+
+# Días del año anteriores a cada mes (año no bisiesto)
+_DIAS_ANTES_DEL_MES = np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334])
+
+
+def es_bisiesto(anio: int) -> bool:
+    return anio % 4 == 0 and (anio % 100 != 0 or anio % 400 == 0)
+
+
+def ordinal_en_anio(meses: np.ndarray, dias: np.ndarray, anio: int) -> np.ndarray:
+    """Día del año (1..366) de cada (mes, día) en 'anio'; el 29/02 cae el 1/03 si el año no es bisiesto."""
+    return _DIAS_ANTES_DEL_MES[meses - 1] + dias + (es_bisiesto(anio) & (meses > 2))
+
+
+def _nombres_a_mostrar(nombres: pd.Series) -> pd.Series:
+    """
+    'Apellido, Nombres' -> 'PrimerNombre I.' (inicial del apellido).
+    Sin coma se toma la primera palabra y la inicial de la segunda.
+    """
+    con_coma = nombres.str.contains(',', regex=False)
+    partes = nombres.str.split(',')
+    apellido = partes.str[0].str.strip()
+    nombres_pila = partes.str[1].fillna('').str.strip()
+    pila = nombres_pila.str.split(' ').str[0]
+    pila = pila.where(nombres_pila != '', apellido)
+    inicial = apellido.str[:1].str.upper()
+
+    palabras = nombres.str.split(' ')
+    pila = pila.where(con_coma, palabras.str[0])
+    inicial = inicial.where(con_coma, palabras.str[1].str[:1].str.upper()).fillna('')
+    return pila.where(inicial == '', pila + ' ' + inicial + '.')
+
+
+class FechasPersonal:
+    """Fechas de nacimiento e ingreso del personal, parseadas una sola vez."""
+
+    def __init__(self, df_personal: pd.DataFrame):
+        df = df_personal if df_personal is not None else pd.DataFrame()
+        if 'Apellido, Nombres' in df.columns:
+            nombres = df['Apellido, Nombres']
+        elif 'Nombre' in df.columns:
+            nombres = df['Nombre']
+        else:
+            nombres = pd.Series('', index=df.index)
+        nombres = nombres.fillna('').astype(str)
+        validos = (nombres != '').to_numpy()
+
+        self.nombres = nombres[validos].reset_index(drop=True)
+        self.nombres_mostrar = _nombres_a_mostrar(self.nombres) if len(self.nombres) else self.nombres
+        self._fechas = {}
+        for clave, columna in COLUMNAS_FECHAS.items():
+            if columna in df.columns:
+                fechas = parsear_fechas(df[columna])[validos].reset_index(drop=True)
+            else:
+                fechas = pd.Series(pd.NaT, index=self.nombres.index, dtype='datetime64[ns]')
+            ok = fechas.notna().to_numpy()
+            self._fechas[clave] = {
+                'validas': ok,
+                'anio': fechas.dt.year.fillna(0).to_numpy(dtype=int),
+                'mes': fechas.dt.month.fillna(1).to_numpy(dtype=int),
+                'dia': fechas.dt.day.fillna(1).to_numpy(dtype=int),
+            }
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def fechas_en_anio(self, tipo: str, anio: int) -> pd.DataFrame:
+        """
+        Fecha del aniversario ('nacimiento' o 'ingreso') de cada persona en un año.
+
+        Returns:
+            DataFrame con 'nombre' y 'fecha' (datetime64), solo filas con fecha válida
+        """
+        datos = self._fechas[tipo]
+        ok = datos['validas']
+        ordinales = ordinal_en_anio(datos['mes'][ok], datos['dia'][ok], anio)
+        fechas = np.datetime64(f'{anio:04d}-01-01', 'D') + (ordinales - 1).astype('timedelta64[D]')
+        return pd.DataFrame({'nombre': self.nombres[ok].to_numpy(), 'fecha': fechas.astype('datetime64[ns]')})
+
+    def proximos(self, tipo: str, hoy: date, dias: int) -> pd.DataFrame:
+        """
+        Aniversarios ('nacimiento' o 'ingreso') entre hoy y hoy + dias (inclusive).
+
+        Returns:
+            DataFrame ordenado por cercanía con 'nombre', 'nombre_mostrar',
+            'fecha' (date), 'faltan' (días) y 'anios' (edad o antigüedad)
+        """
+        datos = self._fechas[tipo]
+        hoy_ordinal = hoy.timetuple().tm_yday
+        largo = 366 if es_bisiesto(hoy.year) else 365
+        este = ordinal_en_anio(datos['mes'], datos['dia'], hoy.year)
+        siguiente = ordinal_en_anio(datos['mes'], datos['dia'], hoy.year + 1)
+
+        # Si ya pasó este año, el próximo es el del año siguiente
+        pasado = este < hoy_ordinal
+        faltan = np.where(pasado, largo - hoy_ordinal + siguiente, este - hoy_ordinal)
+        anios = np.where(pasado, hoy.year + 1, hoy.year) - datos['anio']
+        elegidos = np.flatnonzero(datos['validas'] & (faltan <= dias))
+        elegidos = elegidos[np.argsort(faltan[elegidos], kind='stable')]
+
+        return pd.DataFrame({
+            'nombre': self.nombres.to_numpy()[elegidos],
+            'nombre_mostrar': self.nombres_mostrar.to_numpy()[elegidos],
+            'fecha': [hoy + timedelta(days=int(f)) for f in faltan[elegidos]],
+            'faltan': faltan[elegidos],
+            'anios': anios[elegidos],
+        })
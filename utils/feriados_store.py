@@ -0,0 +1,222 @@
+"""
+Almacén local de feriados nacionales.
+
+Los feriados de la API de Argentina Datos se guardan en SQLite (tablas
+'feriados_nacionales' y 'feriados_nacionales_anios') y las consultas leen solo
+de la base local: nunca esperan a la red. La descarga se hace en bloque para
+varios años, con timeout y reintentos, y puede correr en segundo plano.
+
+Uso por línea de comandos (precarga inicial):
+    python -m utils.feriados_store 2024 2025 2026
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+import requests
+
+from database import get_connection
+from database_schema import get_create_table_sql
+
+# URL de la API (se puede redirigir, por ejemplo a un servidor local de pruebas)
+API_FERIADOS_URL = os.getenv("FERIADOS_API_URL", "https://api.argentinadatos.com/v1/feriados")
+
+TIMEOUT_SEGUNDOS = 5
+REINTENTOS = 3
+ESPERA_REINTENTO = 0.5
+# Antigüedad a partir de la cual un año se vuelve a descargar
+MAX_ANTIGUEDAD = timedelta(days=7)
+# Años que se precargan alrededor del año consultado
+ANIOS_ANTES = 1
+ANIOS_DESPUES = 2
+# Tiempo mínimo entre intentos de descarga de un mismo año (evita reintentar en cada render sin red)
+ESPERA_ENTRE_INTENTOS = timedelta(minutes=10)
+
+_lock_refresco = threading.Lock()
+_refresco_en_curso = None
+_ultimo_intento = {}
+
+
+def _asegurar_tablas(conn) -> None:
+    """Crea las tablas del almacén si la base es anterior a ellas."""
+    for tabla in ("feriados_nacionales", "feriados_nacionales_anios"):
+        conn.execute(get_create_table_sql(tabla))
+
+
+def descargar_feriados(year: int, base_url: Optional[str] = None, timeout: float = TIMEOUT_SEGUNDOS,
+                       reintentos: int = REINTENTOS, session: Optional[requests.Session] = None) -> list:
+    """
+    Descarga los feriados de un año desde la API, con timeout y reintentos.
+
+    Returns:
+        Lista de diccionarios con 'fecha', 'nombre' y 'tipo'
+
+    Raises:
+        requests.RequestException si fallan todos los intentos
+    """
+    url = f"{(base_url or API_FERIADOS_URL).rstrip('/')}/{int(year)}"
+    http = session or requests
+    for intento in range(reintentos):
+        try:
+            response = http.get(url, timeout=timeout)
+            response.raise_for_status()
+            return [
+                {'fecha': item['fecha'], 'nombre': item['nombre'], 'tipo': item.get('tipo', '')}
+                for item in response.json()
+            ]
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            if intento == reintentos - 1:
+                raise
+            time.sleep(ESPERA_REINTENTO * (2 ** intento))
+    return []
+
+
+def guardar_feriados(year: int, feriados: list, db_path: Optional[str] = None) -> None:
+    """Reemplaza los feriados guardados de un año en una sola transacción."""
+    conn = get_connection(db_path)
+    try:
+        _asegurar_tablas(conn)
+        with conn:
+            conn.execute('DELETE FROM feriados_nacionales WHERE "Año" = ?', (int(year),))
+            conn.executemany(
+                'INSERT OR REPLACE INTO feriados_nacionales ("Fecha", "Nombre", "Tipo", "Año") VALUES (?, ?, ?, ?)',
+                [(f['fecha'], f['nombre'], f.get('tipo', ''), int(year)) for f in feriados],
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO feriados_nacionales_anios ("Año", "Actualizado") VALUES (?, ?)',
+                (int(year), datetime.now().isoformat(timespec='seconds')),
+            )
+    finally:
+        conn.close()
+
+
+def leer_feriados(year: int, db_path: Optional[str] = None) -> dict:
+    """Feriados guardados de un año como {YYYY-MM-DD: nombre}. No usa la red."""
+    conn = get_connection(db_path)
+    try:
+        _asegurar_tablas(conn)
+        filas = conn.execute(
+            'SELECT "Fecha", "Nombre" FROM feriados_nacionales WHERE "Año" = ? ORDER BY "Fecha"',
+            (int(year),),
+        ).fetchall()
+        return {fila[0]: fila[1] for fila in filas}
+    finally:
+        conn.close()
+
+
+def estado_anios(db_path: Optional[str] = None) -> dict:
+    """Fecha de la última actualización de cada año guardado: {año: datetime}."""
+    conn = get_connection(db_path)
+    try:
+        _asegurar_tablas(conn)
+        filas = conn.execute('SELECT "Año", "Actualizado" FROM feriados_nacionales_anios').fetchall()
+        return {int(fila[0]): datetime.fromisoformat(fila[1]) for fila in filas}
+    finally:
+        conn.close()
+
+
+def version_feriados(db_path: Optional[str] = None) -> str:
+    """Marca que cambia cada vez que se actualiza algún año (para invalidar cachés)."""
+    estado = estado_anios(db_path)
+    return max(estado.values()).isoformat() if estado else ''
+
+
+def anios_pendientes(years, db_path: Optional[str] = None, max_antiguedad: timedelta = MAX_ANTIGUEDAD) -> list:
+    """Años que nunca se descargaron o cuya copia local está vencida."""
+    estado = estado_anios(db_path)
+    limite = datetime.now() - max_antiguedad
+    return sorted({int(y) for y in years if int(y) not in estado or estado[int(y)] < limite})
+
+
+def prefetch_feriados(years, db_path: Optional[str] = None, base_url: Optional[str] = None,
+                      timeout: float = TIMEOUT_SEGUNDOS, reintentos: int = REINTENTOS) -> dict:
+    """
+    Descarga en bloque los feriados de varios años y los guarda en la base.
+
+    Las descargas se hacen en paralelo con una única sesión HTTP. Si un año
+    falla se conserva la copia local anterior.
+
+    Returns:
+        Diccionario {año: True/False} según si el año se actualizó
+    """
+    years = sorted({int(y) for y in years})
+    if not years:
+        return {}
+
+    resultados = {}
+    with requests.Session() as session:
+        def _descargar(year):
+            try:
+                return year, descargar_feriados(year, base_url, timeout, reintentos, session)
+            except Exception as e:
+                print(f"Error al descargar feriados para {year}: {e}")
+                return year, None
+
+        with ThreadPoolExecutor(max_workers=min(4, len(years))) as pool:
+            descargas = list(pool.map(_descargar, years))
+
+    for year, feriados in descargas:
+        if feriados is None:
+            resultados[year] = False
+            continue
+        guardar_feriados(year, feriados, db_path)
+        resultados[year] = True
+    return resultados
+
+
+def refrescar_en_segundo_plano(years, db_path: Optional[str] = None,
+                               base_url: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    Lanza la descarga de los años pendientes en un hilo de fondo.
+
+    Si ya hay un refresco en curso o no hay años pendientes no hace nada.
+
+    Returns:
+        El hilo lanzado, o None
+    """
+    global _refresco_en_curso
+    pendientes = anios_pendientes(years, db_path)
+    if not pendientes:
+        return None
+    with _lock_refresco:
+        if _refresco_en_curso is not None and _refresco_en_curso.is_alive():
+            return None
+        ahora = datetime.now()
+        pendientes = [y for y in pendientes
+                      if ahora - _ultimo_intento.get(y, datetime.min) >= ESPERA_ENTRE_INTENTOS]
+        if not pendientes:
+            return None
+        _ultimo_intento.update({y: ahora for y in pendientes})
+        _refresco_en_curso = threading.Thread(
+            target=prefetch_feriados,
+            args=(pendientes,),
+            kwargs={'db_path': db_path, 'base_url': base_url},
+            name="refresco-feriados",
+            daemon=True,
+        )
+        _refresco_en_curso.start()
+        return _refresco_en_curso
+
+
+def obtener_feriados(year: int, db_path: Optional[str] = None) -> dict:
+    """
+    Feriados de un año desde la copia local, sin esperar a la red.
+
+    Si el año (o los vecinos) no están descargados o están vencidos, se
+    programa un refresco en segundo plano; la próxima consulta ya los verá.
+    """
+    year = int(year)
+    refrescar_en_segundo_plano(range(year - ANIOS_ANTES, year + ANIOS_DESPUES + 1), db_path)
+    return leer_feriados(year, db_path)
+
+
+if __name__ == "__main__":
+    anios = [int(a) for a in sys.argv[1:]] or list(range(datetime.now().year - ANIOS_ANTES,
+                                                         datetime.now().year + ANIOS_DESPUES + 1))
+    for anio, ok in prefetch_feriados(anios).items():
+        print(f"{anio}: {'actualizado' if ok else 'error (se conserva la copia local)'}")
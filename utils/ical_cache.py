@@ -0,0 +1,310 @@
+"""
+Caché de calendarios iCal (Google Calendar) compartida por todo el proceso.
+
+- El feed se descarga con peticiones condicionales (ETag / Last-Modified): si
+  no cambió, el servidor responde 304 y no se vuelve a bajar ni a parsear.
+- El contenido y las metas HTTP se guardan en disco, así un reinicio del
+  servidor no obliga a descargar todo de nuevo.
+- Las recurrencias se expanden por mes y solo para los meses de la ventana
+  pedida; cada mes expandido queda en caché (memoria y disco) hasta que
+  cambie el contenido del feed.
+- Con varios procesos sobre el mismo directorio, cada uno toma del disco la
+  última revalidación y los meses que expandieron los demás antes de ir a la
+  red o expandir (las escrituras son atómicas).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import requests
+from icalendar import Calendar
+
+ICAL_CACHE_DIR = os.getenv("ICAL_CACHE_DIR", os.path.join("data", "cache", "ical"))
+TIMEOUT_SEGUNDOS = 15
+# Tiempo mínimo entre revalidaciones del mismo feed
+REVALIDAR_CADA = 300
+COLOR_GOOGLE = '#FFA500'  # Naranja para los eventos de Google Calendar
+
+
+def _meses_de_ventana(desde: date, hasta: date) -> list:
+    """Lista de (año, mes) que cubren el rango [desde, hasta]."""
+    meses = []
+    anio, mes = desde.year, desde.month
+    while (anio, mes) <= (hasta.year, hasta.month):
+        meses.append((anio, mes))
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
+
+
+def formatear_evento(event, tz) -> dict:
+    """Convierte un VEVENT expandido al formato de streamlit-calendar."""
+    start = event.get('DTSTART').dt
+    end = event.get('DTEND', event.get('DTSTART')).dt
+
+    if isinstance(start, datetime):
+        # Si no tiene zona horaria, asumir UTC
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        start_str = start.astimezone(tz).strftime('%Y-%m-%dT%H:%M:%S')
+    else:
+        # Para eventos de todo el día, no necesitamos conversión de zona horaria
+        start_str = start.strftime('%Y-%m-%d')
+
+    if isinstance(end, datetime):
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        end_str = end.astimezone(tz).strftime('%Y-%m-%dT%H:%M:%S')
+    else:
+        # Para eventos de todo el día, sumamos un día
+        end_str = (datetime.combine(end, datetime.min.time()) + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    event_data = {
+        'title': str(event.get('SUMMARY', 'Evento sin título')),
+        'start': start_str,
+        'end': end_str,
+        'color': COLOR_GOOGLE,
+        'allDay': not isinstance(start, datetime)  # True si es evento de todo el día
+    }
+    description = event.get('DESCRIPTION')
+    if description:
+        event_data['description'] = str(description)
+    location = event.get('LOCATION')
+    if location:
+        event_data['location'] = str(location)
+    return event_data
+
+
+class FeedIcal:
+    """Estado en caché de un feed iCal."""
+
+    def __init__(self, url: str, directorio: str):
+        self.url = url
+        self.lock = threading.Lock()
+        clave = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        self.ruta_ics = os.path.join(directorio, f"{clave}.ics")
+        self.ruta_meta = os.path.join(directorio, f"{clave}.json")
+        self.etag = None
+        self.last_modified = None
+        self.version = None
+        self.revalidado = 0.0
+        self.calendario = None
+        self.meses = {}
+        self._contenido = None
+        self._meses_sin_guardar = False
+        self._mtime_meta = None
+        self._cargar_de_disco()
+
+    def _leer_meta(self) -> Optional[dict]:
+        try:
+            with open(self.ruta_meta, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cargar_de_disco(self) -> None:
+        if not (os.path.exists(self.ruta_ics) and os.path.exists(self.ruta_meta)):
+            return
+        try:
+            mtime = os.stat(self.ruta_meta).st_mtime_ns
+        except OSError:
+            return
+        meta = self._leer_meta()
+        if meta is None:
+            return
+        self._mtime_meta = mtime
+        meses = {tuple(map(int, k.split('-'))): v for k, v in meta.get('meses', {}).items()}
+        self.revalidado = max(self.revalidado, meta.get('revalidado', 0.0))
+        if meta.get('version') == self.version:
+            # Mismo contenido: sumar los meses que expandió otro proceso
+            self.etag = meta.get('etag')
+            self.last_modified = meta.get('last_modified')
+            for mes, eventos in meses.items():
+                self.meses.setdefault(mes, eventos)
+            return
+        try:
+            with open(self.ruta_ics, 'rb') as f:
+                contenido = f.read()
+        except OSError:
+            return
+        if hashlib.sha1(contenido).hexdigest() != meta.get('version'):
+            return
+        self.etag = meta.get('etag')
+        self.last_modified = meta.get('last_modified')
+        self.version = meta['version']
+        self.meses = meses
+        self.calendario = None
+        self._contenido = contenido
+
+    def sincronizar(self) -> None:
+        """Toma del disco lo que guardó otro proceso (si el archivo de metas cambió)."""
+        try:
+            mtime = os.stat(self.ruta_meta).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime_meta:
+            self._cargar_de_disco()
+
+    def _guardar_en_disco(self, contenido: Optional[bytes] = None) -> None:
+        os.makedirs(os.path.dirname(self.ruta_meta) or '.', exist_ok=True)
+        if contenido is not None:
+            tmp = f"{self.ruta_ics}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(contenido)
+            os.replace(tmp, self.ruta_ics)
+        else:
+            # Conservar los meses que haya guardado otro proceso para esta versión
+            meta_disco = self._leer_meta()
+            if meta_disco and meta_disco.get('version') == self.version:
+                for k, eventos in meta_disco.get('meses', {}).items():
+                    self.meses.setdefault(tuple(map(int, k.split('-'))), eventos)
+        meta = {
+            'url_sha1': hashlib.sha1(self.url.encode('utf-8')).hexdigest(),
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'version': self.version,
+            'revalidado': self.revalidado,
+            'meses': {f"{a:04d}-{m:02d}": eventos for (a, m), eventos in self.meses.items()},
+        }
+        tmp = f"{self.ruta_meta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, self.ruta_meta)
+        try:
+            self._mtime_meta = os.stat(self.ruta_meta).st_mtime_ns
+        except OSError:
+            pass
+
+    def _parsear(self) -> Calendar:
+        if self.calendario is None:
+            self.calendario = Calendar.from_ical(self._contenido)
+        return self.calendario
+
+    def revalidar(self, timeout: float = TIMEOUT_SEGUNDOS, forzar: bool = False) -> bool:
+        """
+        Revalida el feed con una petición condicional.
+
+        Returns:
+            True si el contenido cambió
+        """
+        if not forzar and self.version and time.time() - self.revalidado < REVALIDAR_CADA:
+            return False
+
+        headers = {}
+        if self.version:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+        try:
+            response = requests.get(self.url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            # Sin red: se sigue usando la copia guardada si existe
+            if self.version:
+                return False
+            raise
+        self.revalidado = time.time()
+
+        if response.status_code == 304 and self.version:
+            # Registrar la revalidación para que los demás procesos no la repitan
+            self._guardar_en_disco()
+            return False
+        response.raise_for_status()
+
+        contenido = response.content
+        version = hashlib.sha1(contenido).hexdigest()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        if version == self.version:
+            self._guardar_en_disco()
+            return False
+
+        self.version = version
+        self._contenido = contenido
+        self.calendario = None
+        self.meses = {}
+        self._guardar_en_disco(contenido)
+        return True
+
+    def eventos_mes(self, anio: int, mes: int, tz) -> list:
+        """Eventos (recurrencias expandidas) de un mes; se calculan una sola vez."""
+        if (anio, mes) not in self.meses:
+            import recurring_ical_events
+            siguiente = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+            expandidos = recurring_ical_events.of(self._parsear()).between(
+                (anio, mes, 1), (siguiente[0], siguiente[1], 1)
+            )
+            self.meses[(anio, mes)] = [formatear_evento(e, tz) for e in expandidos]
+            self._meses_sin_guardar = True
+        return self.meses[(anio, mes)]
+
+    def guardar_meses(self) -> None:
+        """Persiste los meses expandidos desde el último guardado."""
+        if self._meses_sin_guardar:
+            self._guardar_en_disco()
+            self._meses_sin_guardar = False
+
+
+class CacheIcal:
+    """Registro de feeds iCal del proceso."""
+
+    def __init__(self, directorio: Optional[str] = None):
+        self.directorio = directorio or ICAL_CACHE_DIR
+        self._feeds = {}
+        self._lock = threading.Lock()
+
+    def feed(self, url: str) -> FeedIcal:
+        with self._lock:
+            if url not in self._feeds:
+                self._feeds[url] = FeedIcal(url, self.directorio)
+            return self._feeds[url]
+
+    def eventos_en_ventana(self, url: str, desde: date, hasta: date, tz=timezone.utc,
+                           forzar: bool = False, timeout: float = TIMEOUT_SEGUNDOS) -> list:
+        """
+        Eventos del feed que se superponen con [desde, hasta].
+
+        Args:
+            url: URL del calendario iCal
+            desde, hasta: Ventana visible (fechas)
+            tz: Zona horaria para mostrar los eventos con hora
+            forzar: Revalidar aunque no haya pasado REVALIDAR_CADA
+            timeout: Timeout de la descarga en segundos
+        """
+        feed = self.feed(url)
+        with feed.lock:
+            feed.sincronizar()
+            feed.revalidar(timeout=timeout, forzar=forzar)
+            vistos = set()
+            eventos = []
+            limite_inf = desde.isoformat()
+            limite_sup = (hasta + timedelta(days=1)).isoformat()
+            for anio, mes in _meses_de_ventana(desde, hasta):
+                for evento in feed.eventos_mes(anio, mes, tz):
+                    clave = (evento['title'], evento['start'], evento['end'])
+                    if clave in vistos:
+                        continue
+                    # Superposición con la ventana (fin exclusivo en eventos de todo el día)
+                    if evento['end'][:10] < limite_inf or evento['start'][:10] >= limite_sup:
+                        continue
+                    vistos.add(clave)
+                    eventos.append(evento)
+            feed.guardar_meses()
+            return eventos
+
+
+_cache_global = None
+_lock_global = threading.Lock()
+
+
+def get_cache_ical() -> CacheIcal:
+    """Caché de iCal compartida por todas las sesiones del proceso."""
+    global _cache_global
+    with _lock_global:
+        if _cache_global is None:
+            _cache_global = CacheIcal()
+        return _cache_global
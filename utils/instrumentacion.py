@@ -0,0 +1,269 @@
+"""
+Instrumentación de las etapas de un rerun de Streamlit.
+
+Cada etapa registra el tiempo de reloj, las filas procesadas y, si usa una
+caché, si fue acierto o fallo:
+
+    with etapa("horarios.jornada") as medicion:
+        jornada = calcular_jornada(df)
+        medicion.filas = len(jornada)
+
+    @instrumentar("horarios.vacaciones", filas=len)
+    def obtener_vacaciones_por_fecha(): ...
+
+Las mediciones se guardan por hilo (Streamlit ejecuta cada sesión en su hilo)
+desde iniciar_rerun() hasta el próximo rerun, y se acumulan en totales del
+proceso que exportar_prometheus() escribe en formato de texto de Prometheus
+(junto con las estadísticas de utils.cache).
+
+Desactivada (lo normal), etapa() devuelve siempre el mismo objeto nulo: el
+costo es una llamada y una lectura de atributo.
+"""
+
+import functools
+import math
+import numbers
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Activar para todas las sesiones (además del interruptor del panel de admin)
+ACTIVA_POR_ENTORNO = os.getenv("INSTRUMENTACION", "").lower() in ("1", "true", "si", "sí")
+RUTA_PROMETHEUS = os.getenv("INSTRUMENTACION_PROM", os.path.join("data", "metricas", "gestor.prom"))
+PREFIJO_METRICAS = "gestor_etapa"
+
+_estado = threading.local()
+_totales = {}
+_lock_totales = threading.Lock()
+
+
+@dataclass
+class Medicion:
+    """Una etapa medida. 'cache' es 'hit', 'miss' o None si la etapa no usa caché."""
+    nombre: str
+    profundidad: int = 0
+    segundos: float = 0.0
+    filas: Optional[int] = None
+    cache: Optional[str] = None
+    inicio: float = field(default=0.0, repr=False)
+
+    def marcar_hit(self):
+        self.cache = "hit"
+
+    def marcar_miss(self):
+        self.cache = "miss"
+
+
+class _MedicionNula:
+    """Se usa cuando la instrumentación está desactivada: ignora todo."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, nombre, valor):
+        pass
+
+    def marcar_hit(self):
+        pass
+
+    def marcar_miss(self):
+        pass
+
+
+_NULA = _MedicionNula()
+
+
+class _Etapa:
+    __slots__ = ("medicion", "cache")
+
+    def __init__(self, nombre: str, filas: Optional[int], cache: bool):
+        self.medicion = Medicion(nombre, filas=filas)
+        self.cache = cache
+
+    def __enter__(self) -> Medicion:
+        pila = _estado.pila
+        self.medicion.profundidad = len(pila)
+        pila.append(self.medicion)
+        self.medicion.inicio = time.perf_counter()
+        return self.medicion
+
+    def __exit__(self, *exc):
+        medicion = self.medicion
+        medicion.segundos = time.perf_counter() - medicion.inicio
+        _estado.pila.pop()
+        if self.cache and medicion.cache is None:
+            # Las funciones con caché marcan el fallo desde su cuerpo (marcar_miss):
+            # si no se ejecutó, el resultado vino de la caché
+            medicion.cache = "hit"
+        _estado.registros.append(medicion)
+        _acumular(medicion)
+        return False
+
+
+def activa() -> bool:
+    """Si la instrumentación está activa en el hilo (sesión) actual."""
+    return getattr(_estado, "activa", False)
+
+
+def iniciar_rerun(activar: bool = False) -> None:
+    """Descarta las mediciones del rerun anterior y define si se mide este."""
+    _estado.activa = activar or ACTIVA_POR_ENTORNO
+    _estado.inicio = time.perf_counter()
+    _estado.registros = []
+    _estado.pila = []
+
+
+def etapa(nombre: str, filas: Optional[int] = None, cache: bool = False):
+    """
+    Context manager que mide una etapa.
+
+    Args:
+        nombre: Identificador de la etapa ('modulo.etapa')
+        filas: Filas procesadas, si ya se conocen (si no, asignar medicion.filas)
+        cache: La etapa usa una caché; es 'hit' salvo que se llame a marcar_miss()
+    """
+    if not getattr(_estado, "activa", False):
+        return _NULA
+    return _Etapa(nombre, filas, cache)
+
+
+def marcar_miss() -> None:
+    """Marca como fallo de caché la etapa en curso (llamar desde el cuerpo de una función cacheada)."""
+    pila = getattr(_estado, "pila", None)
+    if getattr(_estado, "activa", False) and pila:
+        pila[-1].marcar_miss()
+
+
+def instrumentar(nombre: str, filas: Optional[Callable] = None, cache: bool = False):
+    """
+    Decorador: mide cada llamada a la función como una etapa.
+
+    Args:
+        filas: Función que recibe el resultado y devuelve las filas procesadas (p. ej. len)
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not getattr(_estado, "activa", False):
+                return funcion(*args, **kwargs)
+            with _Etapa(nombre, None, cache) as medicion:
+                resultado = funcion(*args, **kwargs)
+                if filas is not None and resultado is not None:
+                    medicion.filas = filas(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def registros() -> list:
+    """Mediciones del rerun en curso, en orden de finalización."""
+    return list(getattr(_estado, "registros", []))
+
+
+def duracion_rerun() -> float:
+    """Segundos desde iniciar_rerun()."""
+    inicio = getattr(_estado, "inicio", None)
+    return 0.0 if inicio is None else time.perf_counter() - inicio
+
+
+# --- Totales del proceso y exportación ---
+
+def _acumular(medicion: Medicion) -> None:
+    with _lock_totales:
+        total = _totales.setdefault(medicion.nombre, {
+            "ejecuciones": 0, "segundos": 0.0, "filas": 0, "hit": 0, "miss": 0, "ultima": 0.0,
+        })
+        total["ejecuciones"] += 1
+        total["segundos"] += medicion.segundos
+        total["ultima"] = medicion.segundos
+        if medicion.filas is not None:
+            total["filas"] += medicion.filas
+        if medicion.cache in ("hit", "miss"):
+            total[medicion.cache] += 1
+
+
+def totales() -> dict:
+    """Copia de los totales acumulados por etapa desde que arrancó el proceso."""
+    with _lock_totales:
+        return {nombre: dict(total) for nombre, total in _totales.items()}
+
+
+def reiniciar_totales() -> None:
+    with _lock_totales:
+        _totales.clear()
+
+
+def _etiqueta(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _valor(valor) -> str:
+    """Número en el formato de Prometheus, sin perder dígitos (':g' deja solo 6)."""
+    if isinstance(valor, numbers.Integral):
+        return str(int(valor))
+    valor = float(valor)
+    if math.isnan(valor):
+        return "NaN"
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(valor)
+
+
+def lineas_prometheus(prefijo: str, metricas: list, datos: dict, etiqueta: str) -> list:
+    """
+    Líneas de texto de Prometheus de cada métrica (sufijo, tipo, ayuda, clave)
+    con una serie por entrada de 'datos', etiquetada como etiqueta="nombre".
+    La usan también las estadísticas de utils.cache.
+    """
+    lineas = []
+    for sufijo, tipo, ayuda, clave in metricas:
+        metrica = f"{prefijo}_{sufijo}"
+        lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} {tipo}"]
+        for nombre in sorted(datos):
+            lineas.append(f'{metrica}{{{etiqueta}="{_etiqueta(nombre)}"}} {_valor(datos[nombre][clave])}')
+    return lineas
+
+
+def texto_prometheus(datos: Optional[dict] = None) -> str:
+    """Totales en el formato de texto de Prometheus (para el textfile collector)."""
+    datos = totales() if datos is None else datos
+    metricas = [
+        ("ejecuciones_total", "counter", "Cantidad de ejecuciones de la etapa", "ejecuciones"),
+        ("segundos_total", "counter", "Tiempo de reloj acumulado de la etapa", "segundos"),
+        ("filas_total", "counter", "Filas procesadas por la etapa", "filas"),
+        ("ultima_segundos", "gauge", "Duración de la última ejecución de la etapa", "ultima"),
+    ]
+    lineas = lineas_prometheus(PREFIJO_METRICAS, metricas, datos, "etapa")
+    metrica = f"{PREFIJO_METRICAS}_cache_total"
+    lineas += [f"# HELP {metrica} Aciertos y fallos de caché de la etapa", f"# TYPE {metrica} counter"]
+    for nombre in sorted(datos):
+        for resultado in ("hit", "miss"):
+            if datos[nombre]["hit"] or datos[nombre]["miss"]:
+                lineas.append(f'{metrica}{{etapa="{_etiqueta(nombre)}",resultado="{resultado}"}} '
+                              f'{_valor(datos[nombre][resultado])}')
+    return "\n".join(lineas) + "\n"
+
+
+def exportar_prometheus(ruta: Optional[str] = None) -> str:
+    """
+    Escribe los totales y las estadísticas de la caché (utils.cache) en
+    'ruta' (reemplazo atómico) y devuelve la ruta.
+    """
+    from utils import cache
+
+    ruta = ruta or RUTA_PROMETHEUS
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "w") as f:
+        f.write(texto_prometheus() + cache.texto_prometheus())
+    os.replace(temporal, ruta)
+    return ruta
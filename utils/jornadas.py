@@ -0,0 +1,230 @@
+"""
+Motor vectorizado de intervalos y jornadas para el análisis de horarios.
+
+Empareja las marcaciones (entrada/salida) de RELOJ y LIBRO de todos los
+empleados y días en una sola pasada, sin bucles por grupo. La misma tabla de
+intervalos alimenta el cálculo de la jornada diaria y el gráfico de
+intervalos de trabajo (timeline RELOJ / COMPENSADO).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columnas de la tabla de intervalos
+COLUMNAS_INTERVALOS = [
+    'id_empleado', 'fecha', 'tipo', 'inicio', 'fin',
+    'duracion_horas', 'base_horas', 'dia_par',
+]
+
+# Columnas de la tabla lista para el gráfico de timeline
+COLUMNAS_TIMELINE = ['Fecha', 'Inicio', 'Fin', 'Duración', 'DuracionHM', 'Base', 'Tipo']
+
+# Bloque con el que se representa una ausencia de día completo en el timeline
+INICIO_DIA_COMPLETO = 8.0
+HORAS_DIA_COMPLETO = 8.0
+
+
+def _horas_desde_medianoche(serie: pd.Series) -> pd.Series:
+    """Convierte una serie datetime en horas decimales desde la medianoche."""
+    return (serie - serie.dt.normalize()).dt.total_seconds() / 3600
+
+
+def formatear_duracion_hm(minutos) -> pd.Series:
+    """Formatea minutos enteros como 'H:MM' de forma vectorizada."""
+    minutos = pd.Series(minutos).fillna(0).astype(np.int64)
+    return (minutos // 60).astype(str) + ':' + (minutos % 60).astype(str).str.zfill(2)
+
+
+def construir_intervalos(df_registros: pd.DataFrame, tipos=None) -> pd.DataFrame:
+    """
+    Construye la tabla de intervalos de trabajo a partir de las marcaciones.
+
+    Las marcaciones se ordenan por empleado, día, tipo y hora; cada marcación en
+    posición par del grupo se empareja con la siguiente. Si el grupo tiene una
+    cantidad impar de marcaciones, la última queda sin pareja (igual que el
+    cálculo histórico por pares).
+
+    Args:
+        df_registros: DataFrame con columnas 'id_empleado', 'fecha_hora' y 'tipo'
+        tipos: Lista opcional de tipos a considerar (ej: ['RELOJ'])
+
+    Returns:
+        DataFrame con una fila por intervalo y las columnas de COLUMNAS_INTERVALOS.
+        'dia_par' indica si el grupo (empleado, día, tipo) tiene marcaciones pares.
+    """
+    if df_registros is None or df_registros.empty:
+        return pd.DataFrame(columns=COLUMNAS_INTERVALOS)
+
+    df = df_registros[['id_empleado', 'fecha_hora', 'tipo']].copy()
+    if tipos is not None:
+        df = df[df['tipo'].isin(tipos)]
+    df['fecha_hora'] = pd.to_datetime(df['fecha_hora'], errors='coerce')
+    df = df.dropna(subset=['fecha_hora'])
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_INTERVALOS)
+
+    df['id_empleado'] = df['id_empleado'].astype(str)
+    df['dia'] = df['fecha_hora'].dt.normalize()
+    df = df.sort_values(['id_empleado', 'dia', 'tipo', 'fecha_hora'], kind='mergesort')
+
+    grupos = df.groupby(['id_empleado', 'dia', 'tipo'], sort=False)['fecha_hora']
+    posicion = grupos.cumcount().to_numpy()
+    tamanio = grupos.transform('size').to_numpy()
+    siguiente = grupos.shift(-1)
+
+    es_entrada = (posicion % 2 == 0) & siguiente.notna().to_numpy()
+    entradas = df[es_entrada]
+    fin = siguiente[es_entrada]
+
+    intervalos = pd.DataFrame({
+        'id_empleado': entradas['id_empleado'].to_numpy(),
+        'fecha': entradas['dia'].dt.date.to_numpy(),
+        'tipo': entradas['tipo'].to_numpy(),
+        'inicio': entradas['fecha_hora'].to_numpy(),
+        'fin': fin.to_numpy(),
+        'duracion_horas': ((fin - entradas['fecha_hora']).dt.total_seconds() / 3600).to_numpy(),
+        'base_horas': _horas_desde_medianoche(entradas['fecha_hora']).to_numpy(),
+        'dia_par': (tamanio[es_entrada] % 2 == 0),
+    })
+    return intervalos.reset_index(drop=True)
+
+
+def calcular_jornada(df_registros: pd.DataFrame, intervalos: pd.DataFrame = None,
+                     umbral_horas: float = 0.25) -> pd.DataFrame:
+    """
+    Calcula la jornada diaria por empleado, día y tipo (LIBRO/RELOJ).
+
+    Args:
+        df_registros: DataFrame de marcaciones ('id_empleado', 'fecha_hora', 'tipo')
+        intervalos: Tabla de construir_intervalos() ya calculada (opcional)
+        umbral_horas: Se descartan las jornadas de duración menor o igual
+
+    Returns:
+        DataFrame con 'id_empleado', 'fecha', 'tipo', 'duracion_horas',
+        'inicio_jornada' y 'fin_jornada' (mínimo y máximo del día, todos los tipos).
+    """
+    columnas = ['id_empleado', 'fecha', 'tipo', 'duracion_horas', 'inicio_jornada', 'fin_jornada']
+    if df_registros is None or df_registros.empty:
+        return pd.DataFrame(columns=columnas)
+    if intervalos is None:
+        intervalos = construir_intervalos(df_registros)
+    if intervalos.empty:
+        return pd.DataFrame(columns=columnas)
+
+    jornada = (
+        intervalos.groupby(['id_empleado', 'fecha', 'tipo'], sort=True)['duracion_horas']
+        .sum()
+        .reset_index()
+    )
+    jornada = jornada[jornada['duracion_horas'] > umbral_horas]
+
+    marcas = pd.DataFrame({
+        'id_empleado': df_registros['id_empleado'].astype(str),
+        'fecha_hora': pd.to_datetime(df_registros['fecha_hora'], errors='coerce'),
+    }).dropna(subset=['fecha_hora'])
+    marcas['fecha'] = marcas['fecha_hora'].dt.normalize().dt.date
+    min_max = (
+        marcas.groupby(['id_empleado', 'fecha'])['fecha_hora']
+        .agg(inicio_jornada='min', fin_jornada='max')
+        .reset_index()
+    )
+    return jornada.merge(min_max, on=['id_empleado', 'fecha'], how='left')[columnas]
+
+
+def intervalos_ausencias(df_ausencias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las ausencias diarias (obtener_compensatorios_por_fecha) en intervalos.
+
+    Las ausencias por horas usan 'hora_inicio'/'hora_fin' (HH:MM); las de día
+    completo (8 hs sin horario) se representan como un bloque de 08:00 a 16:00.
+
+    Returns:
+        DataFrame con las columnas de COLUMNAS_INTERVALOS y tipo 'COMPENSADO'.
+    """
+    if df_ausencias is None or df_ausencias.empty:
+        return pd.DataFrame(columns=COLUMNAS_INTERVALOS)
+
+    fechas = pd.to_datetime(pd.Series(df_ausencias['fecha'].to_numpy()), errors='coerce')
+    h_ini = pd.Series(df_ausencias.get('hora_inicio', pd.Series('', index=df_ausencias.index)).to_numpy())
+    h_fin = pd.Series(df_ausencias.get('hora_fin', pd.Series('', index=df_ausencias.index)).to_numpy())
+    t_ini = pd.to_datetime(h_ini.fillna('').astype(str), format='%H:%M', errors='coerce')
+    t_fin = pd.to_datetime(h_fin.fillna('').astype(str), format='%H:%M', errors='coerce')
+    duracion = pd.Series(df_ausencias['duracion_horas'].to_numpy(), dtype='float64')
+
+    con_horas = t_ini.notna() & t_fin.notna()
+    dia_completo = ~con_horas & (h_ini.fillna('') == '') & (duracion == HORAS_DIA_COMPLETO)
+
+    base = pd.Series(np.where(con_horas, _horas_desde_medianoche(t_ini), INICIO_DIA_COMPLETO))
+    fin_h = pd.Series(np.where(con_horas, _horas_desde_medianoche(t_fin),
+                               INICIO_DIA_COMPLETO + HORAS_DIA_COMPLETO))
+    dur = fin_h - base
+    validas = (con_horas & (dur > 0)) | dia_completo
+
+    inicio = fechas + pd.to_timedelta(base, unit='h')
+    fin = fechas + pd.to_timedelta(fin_h, unit='h')
+    intervalos = pd.DataFrame({
+        'id_empleado': df_ausencias['id_empleado'].astype(str).to_numpy(),
+        'fecha': fechas.dt.date,
+        'tipo': 'COMPENSADO',
+        'inicio': inicio,
+        'fin': fin,
+        'duracion_horas': dur,
+        'base_horas': base,
+        'dia_par': True,
+    })
+    return intervalos[validas.to_numpy()].reset_index(drop=True)
+
+
+def tabla_timeline(intervalos, fechas) -> pd.DataFrame:
+    """
+    Prepara la tabla del gráfico de intervalos de trabajo y compensados.
+
+    Solo se grafican los días con marcaciones pares. Los días de `fechas` sin
+    intervalos se completan (reindexando por fecha) con una fila vacía de tipo
+    RELOJ para sincronizar el eje X con el resto de los gráficos.
+
+    Args:
+        intervalos: Tabla (o lista de tablas) de construir_intervalos() /
+            intervalos_ausencias()
+        fechas: Fechas visibles en el eje X
+
+    Returns:
+        DataFrame con las columnas de COLUMNAS_TIMELINE ordenado por fecha y tipo.
+    """
+    fechas_idx = pd.Index(sorted(set(fechas)), name='Fecha')
+    if isinstance(intervalos, (list, tuple)):
+        no_vacios = [df for df in intervalos if df is not None and not df.empty]
+        intervalos = pd.concat(no_vacios, ignore_index=True) if no_vacios else None
+    if intervalos is not None and not intervalos.empty:
+        visibles = intervalos[intervalos['dia_par'].astype(bool) & intervalos['fecha'].isin(fechas_idx)]
+    else:
+        visibles = pd.DataFrame(columns=COLUMNAS_INTERVALOS)
+
+    minutos = ((pd.to_datetime(visibles['fin']) - pd.to_datetime(visibles['inicio']))
+               .dt.total_seconds() // 60)
+    datos = pd.DataFrame({
+        'Fecha': visibles['fecha'].to_numpy(),
+        'Inicio': pd.to_datetime(visibles['inicio']).dt.strftime('%H:%M').to_numpy(),
+        'Fin': pd.to_datetime(visibles['fin']).dt.strftime('%H:%M').to_numpy(),
+        'Duración': visibles['duracion_horas'].astype(float).to_numpy(),
+        'DuracionHM': formatear_duracion_hm(minutos.to_numpy()).to_numpy(),
+        'Base': visibles['base_horas'].astype(float).to_numpy(),
+        'Tipo': visibles['tipo'].replace({'AUSENCIAS': 'COMPENSADO'}).to_numpy(),
+    }, columns=COLUMNAS_TIMELINE)
+
+    # Rellenar huecos reindexando la cantidad de intervalos por fecha
+    conteo = datos.groupby('Fecha').size().reindex(fechas_idx, fill_value=0)
+    faltantes = conteo.index[conteo.to_numpy() == 0]
+    if len(faltantes):
+        relleno = pd.DataFrame({
+            'Fecha': faltantes,
+            'Inicio': '-',
+            'Fin': '-',
+            'Duración': 0.0,
+            'DuracionHM': '0:00',
+            'Base': 0.0,
+            'Tipo': 'RELOJ',
+        }, columns=COLUMNAS_TIMELINE)
+        datos = relleno if datos.empty else pd.concat([datos, relleno], ignore_index=True)
+
+    return datos.sort_values(['Fecha', 'Tipo'], kind='mergesort').reset_index(drop=True)
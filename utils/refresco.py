@@ -0,0 +1,242 @@
+"""
+Refresco en segundo plano de datos externos (stale-while-revalidate).
+
+Un único hilo por proceso del servidor de Streamlit recorre las tareas
+registradas y vuelve a descargar cada conjunto de datos antes de que venza su
+TTL. Las páginas leen siempre de la caché compartida, sin esperar a la red, y
+pueden mostrar la antigüedad del dato. Si una descarga falla se conserva el
+último valor bueno.
+
+Con varios procesos, la caché puede publicar sus valores en un nivel
+compartido (utils.cache_backend): cada proceso toma el dato más reciente de
+cualquiera de ellos y una reserva por tarea hace que solo uno lo descargue.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+# Fracción del TTL a partir de la cual se refresca (antes de que venza)
+FRACCION_REFRESCO = 0.8
+# Cada cuántos segundos revisa el planificador si hay tareas por refrescar
+INTERVALO_REVISION = 15
+# Espera mínima antes de reintentar una tarea que falló
+ESPERA_TRAS_ERROR = 60
+# Duración máxima de la reserva de una tarea en el nivel compartido
+RESERVA_REFRESCO = 120
+# Cada cuánto se mira el nivel compartido mientras se espera la primera carga
+ESPERA_SINCRONIZACION = 0.25
+
+
+@dataclass
+class EntradaCache:
+    """Último valor conocido de una tarea y su estado."""
+    valor: Any = None
+    actualizado: Optional[float] = None  # time.time() de la última descarga exitosa
+    error: Optional[str] = None
+    cargado: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass
+class Tarea:
+    """Conjunto de datos a mantener actualizado."""
+    nombre: str
+    funcion: Callable[[], Any]
+    ttl: float
+    ultimo_intento: Optional[float] = None
+
+
+class CacheCompartida:
+    """
+    Caché en memoria, segura entre hilos, compartida por todas las sesiones.
+
+    Con 'backend' (un BackendCache) además publica cada valor en el espacio
+    'espacio' del nivel compartido y adopta el de otro proceso si es más reciente.
+    """
+
+    def __init__(self, backend=None, espacio: str = "refresco"):
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._backend = backend
+        self._espacio = espacio
+
+    def _entrada(self, clave) -> EntradaCache:
+        with self._lock:
+            return self._entradas.setdefault(clave, EntradaCache())
+
+    def guardar(self, clave, valor) -> None:
+        entrada = self._entrada(clave)
+        with self._lock:
+            entrada.valor = valor
+            entrada.actualizado = actualizado = time.time()
+            entrada.error = None
+        entrada.cargado.set()
+        if self._backend is not None:
+            self._backend.guardar(self._espacio, clave, clave, (valor, actualizado))
+
+    def _sincronizar(self, clave) -> None:
+        """Adopta el valor del nivel compartido si es más reciente que el local."""
+        if self._backend is None:
+            return
+        encontrado = self._backend.obtener(self._espacio, clave)
+        if encontrado is None:
+            return
+        valor, actualizado = encontrado[0]
+        entrada = self._entrada(clave)
+        with self._lock:
+            if entrada.actualizado is not None and entrada.actualizado >= actualizado:
+                return
+            entrada.valor = valor
+            entrada.actualizado = actualizado
+            entrada.error = None
+        entrada.cargado.set()
+
+    def reservar(self, clave, segundos: float = RESERVA_REFRESCO) -> bool:
+        """Reserva la descarga de 'clave' entre procesos (siempre True sin nivel compartido)."""
+        return self._backend is None or self._backend.reservar(self._espacio, clave, segundos)
+
+    def liberar(self, clave) -> None:
+        if self._backend is not None:
+            self._backend.liberar(self._espacio, clave)
+
+    def registrar_error(self, clave, error: str) -> None:
+        entrada = self._entrada(clave)
+        with self._lock:
+            entrada.error = error
+        # Sin datos previos también se da por terminada la primera carga
+        entrada.cargado.set()
+
+    def obtener(self, clave, esperar: float = 0) -> tuple:
+        """
+        Devuelve (valor, antigüedad en segundos, error) sin ir a la red.
+
+        Args:
+            esperar: Segundos a esperar solo si el dato todavía no se cargó
+                nunca (primer render tras iniciar el servidor)
+        """
+        entrada = self._entrada(clave)
+        self._sincronizar(clave)
+        if esperar and not entrada.cargado.is_set():
+            if self._backend is None:
+                entrada.cargado.wait(esperar)
+            else:
+                # La primera carga puede hacerla otro proceso
+                limite = time.monotonic() + esperar
+                while not entrada.cargado.is_set() and time.monotonic() < limite:
+                    entrada.cargado.wait(min(ESPERA_SINCRONIZACION, max(0.0, limite - time.monotonic())))
+                    self._sincronizar(clave)
+        with self._lock:
+            edad = time.time() - entrada.actualizado if entrada.actualizado else None
+            return entrada.valor, edad, entrada.error
+
+    def antiguedad(self, clave) -> Optional[float]:
+        return self.obtener(clave)[1]
+
+
+class PlanificadorRefresco:
+    """Hilo de fondo que refresca las tareas registradas antes de que venza su TTL."""
+
+    def __init__(self, cache: Optional[CacheCompartida] = None, intervalo: float = INTERVALO_REVISION,
+                 fraccion: float = FRACCION_REFRESCO):
+        self.cache = cache or CacheCompartida()
+        self.intervalo = intervalo
+        self.fraccion = fraccion
+        self._tareas = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def registrar(self, nombre: str, funcion: Callable[[], Any], ttl: float) -> None:
+        """Agrega (o reemplaza) una tarea y despierta al planificador."""
+        with self._lock:
+            self._tareas[nombre] = Tarea(nombre, funcion, ttl)
+        self._despertar.set()
+
+    def pendientes(self, ahora: Optional[float] = None) -> list:
+        """Tareas cuyo dato no existe o superó la fracción de TTL configurada."""
+        ahora = ahora or time.time()
+        with self._lock:
+            tareas = list(self._tareas.values())
+        vencidas = []
+        for tarea in tareas:
+            edad = self.cache.antiguedad(tarea.nombre)
+            # Tras un error no se reintenta en cada vuelta del bucle
+            espera = min(ESPERA_TRAS_ERROR, tarea.ttl * self.fraccion)
+            reciente = tarea.ultimo_intento is not None and ahora - tarea.ultimo_intento < espera
+            if (edad is None or edad >= tarea.ttl * self.fraccion) and not reciente:
+                vencidas.append(tarea)
+        return vencidas
+
+    def refrescar(self, nombre: str, solo_si_pendiente: bool = False) -> bool:
+        """
+        Ejecuta una tarea ahora. Devuelve True si se actualizó el dato.
+
+        Si otro proceso tiene reservada la tarea no se ejecuta: su resultado
+        llega por la caché compartida. Con 'solo_si_pendiente' tampoco se
+        ejecuta si, ya con la reserva, el dato resultó estar al día.
+        """
+        with self._lock:
+            tarea = self._tareas[nombre]
+        tarea.ultimo_intento = time.time()
+        if not self.cache.reservar(nombre):
+            return False
+        try:
+            if solo_si_pendiente:
+                edad = self.cache.antiguedad(nombre)
+                if edad is not None and edad < tarea.ttl * self.fraccion:
+                    return False
+            try:
+                valor = tarea.funcion()
+            except Exception as e:
+                self.cache.registrar_error(nombre, str(e))
+                print(f"Error al refrescar '{nombre}': {e}")
+                return False
+            if valor is None:
+                self.cache.registrar_error(nombre, "Sin datos")
+                return False
+            self.cache.guardar(nombre, valor)
+            return True
+        finally:
+            self.cache.liberar(nombre)
+
+    def ejecutar_pendientes(self) -> list:
+        """Refresca las tareas pendientes; devuelve sus nombres."""
+        nombres = [tarea.nombre for tarea in self.pendientes()]
+        for nombre in nombres:
+            self.refrescar(nombre, solo_si_pendiente=True)
+        return nombres
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            self.ejecutar_pendientes()
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def iniciar(self) -> None:
+        """Lanza el hilo de fondo (una sola vez)."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="refresco-datos-externos", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 5) -> None:
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+
+def formatear_antiguedad(segundos: Optional[float]) -> str:
+    """Texto corto con la antigüedad de un dato (ej: 'hace 5 min')."""
+    if segundos is None:
+        return "sin datos"
+    if segundos < 60:
+        return "hace instantes"
+    if segundos < 3600:
+        return f"hace {int(segundos // 60)} min"
+    if segundos < 86400:
+        return f"hace {int(segundos // 3600)} h"
+    return f"hace {int(segundos // 86400)} d"